@@ -4,12 +4,17 @@ from __future__ import annotations
 
 Migrated commands:
   /kick, /teleport, /bring, /purge, /worldstate, /safety, /setup,
-  /room <...>, /npc <...>, /faction <...>, /object <...>
+  /room <...>, /npc <...>, /faction <...>, /object <...>, /tickstats, /cmdstats,
+  /settimedesc
+
+Each command is its own handler, listed in COMMANDS with its declared
+arguments. register() puts them on a CommandRegistry, which then does all of
+the dispatch: the admin gate, OPERATION_COSTS and the required-argument check
+(ArgSpec) run as registry middleware before a handler is called.
 
 Behavior is intentionally preserved to keep existing tests green.
 Future improvements (after full modular carve‑out):
   - Dedicated unit tests per handler.
-  - Central registry + help text auto-generation.
   - Metrics / tracing decorators.
 """
 
@@ -17,8 +22,16 @@ from typing import Any
 import json
 
 from command_context import CommandContext, EmitFn
+from command_registry import (
+    ArgumentType,
+    CommandArgument,
+    CommandRegistry,
+    PermissionLevel,
+    permission_middleware,
+    rate_limit_middleware,
+)
 from persistence_utils import save_world
-from rate_limiter import check_rate_limit, OperationType
+from rate_limiter import OperationType
 
 
 def _emit_error(emit: EmitFn, message_out: str, text: str) -> None:
@@ -29,417 +42,454 @@ def _emit_system(emit: EmitFn, message_out: str, text: str) -> None:
     emit(message_out, {'type': 'system', 'content': text})
 
 
-def try_handle(ctx: CommandContext, sid: str | None, cmd: str, args: list[str], raw: str, emit: EmitFn) -> bool:
-    if not cmd:
-        return False
-    admin_cmds = {
-        'kick', 'teleport', 'bring', 'purge', 'worldstate', 'safety', 'setup',
-        'room', 'npc', 'faction', 'object', 'settimedesc'
-    }
-    if cmd not in admin_cmds:
-        return False
+# Rate limiting for admin operations (they can be expensive)
+# Use different costs based on operation severity
+OPERATION_COSTS = {
+    'purge': OperationType.SUPER_HEAVY,  # World reset is very expensive
+    'faction': OperationType.SUPER_HEAVY,  # AI-powered faction generation
+    'room': OperationType.HEAVY,  # Room operations can modify world structure
+    'npc': OperationType.HEAVY,  # NPC operations, especially familygen with AI
+    'object': OperationType.HEAVY,  # Object creation and templates
+    'teleport': OperationType.MODERATE,  # Player movement
+    'bring': OperationType.MODERATE,  # Player movement
+    'kick': OperationType.MODERATE,  # Disconnect players
+    'worldstate': OperationType.BASIC,  # Read-only operation
+    'safety': OperationType.BASIC,  # Configuration change
+    'setup': OperationType.MODERATE,  # World setup
+    'settimedesc': OperationType.BASIC, # Simple text update
+    'tickstats': OperationType.BASIC,  # Read-only profiler snapshot
+    'cmdstats': OperationType.BASIC,  # Read-only command latency snapshot
+}
+DEFAULT_COST = OperationType.HEAVY  # Default to heavy for unknown
+RATE_KEY = 'admin_{cmd}'
+RATE_MESSAGE = 'You are performing admin operations too quickly. Please wait before using /{cmd} again.'
 
-    if cmd in admin_cmds and (sid is None or sid not in ctx.admins):
-        _emit_error(emit, ctx.message_out, 'Admin command. Admin rights required.')
-        return True
-
-    # Rate limiting for admin operations (they can be expensive)
-    # Use different costs based on operation severity
-    operation_costs = {
-        'purge': OperationType.SUPER_HEAVY,  # World reset is very expensive
-        'faction': OperationType.SUPER_HEAVY,  # AI-powered faction generation
-        'room': OperationType.HEAVY,  # Room operations can modify world structure
-        'npc': OperationType.HEAVY,  # NPC operations, especially familygen with AI
-        'object': OperationType.HEAVY,  # Object creation and templates
-        'teleport': OperationType.MODERATE,  # Player movement
-        'bring': OperationType.MODERATE,  # Player movement
-        'kick': OperationType.MODERATE,  # Disconnect players
-        'worldstate': OperationType.BASIC,  # Read-only operation
-        'safety': OperationType.BASIC,  # Configuration change
-        'setup': OperationType.MODERATE,  # World setup
-        'settimedesc': OperationType.BASIC, # Simple text update
-    }
-
-    cost = operation_costs.get(cmd, OperationType.HEAVY)  # Default to heavy for unknown
-    if not check_rate_limit(sid, cost, f"admin_{cmd}"):
-        _emit_error(emit, ctx.message_out,
-                    f'You are performing admin operations too quickly. '
-                    f'Please wait before using /{cmd} again.')
-        return True
 
+def _cmd_kick(ctx: CommandContext, sid: str | None, cmd: str, args: list[str], raw: str, emit: EmitFn) -> bool:
+    """/kick <player>: disconnect a player."""
     world = ctx.world
     MESSAGE_OUT = ctx.message_out
-
-    # /kick
-    if cmd == 'kick':
-        if not args:
-            _emit_error(emit, MESSAGE_OUT, 'Usage: /kick <playerName>')
-            return True
-        target_name = ctx.strip_quotes(" ".join(args))
-        okp, perr, target_sid, _resolved_name = ctx.resolve_player_sid_global(world, target_name)
-        if not okp or target_sid is None:
-            _emit_error(emit, MESSAGE_OUT, perr or f"Player '{target_name}' not found.")
-            return True
-        if target_sid == sid:
-            _emit_error(emit, MESSAGE_OUT, 'You cannot kick yourself.')
-            return True
-        from flask_socketio import disconnect
-        try:
-            disconnect(target_sid, namespace="/")
-            _emit_system(emit, MESSAGE_OUT, f"Kicked '{target_name}'.")
-        except Exception as e:  # pragma: no cover
-            _emit_error(emit, MESSAGE_OUT, f"Failed to kick '{target_name}': {e}")
+    target_name = ctx.strip_quotes(" ".join(args))
+    okp, perr, target_sid, _resolved_name = ctx.resolve_player_sid_global(world, target_name)
+    if not okp or target_sid is None:
+        _emit_error(emit, MESSAGE_OUT, perr or f"Player '{target_name}' not found.")
+        return True
+    if target_sid == sid:
+        _emit_error(emit, MESSAGE_OUT, 'You cannot kick yourself.')
         return True
+    from flask_socketio import disconnect
+    try:
+        disconnect(target_sid, namespace="/")
+        _emit_system(emit, MESSAGE_OUT, f"Kicked '{target_name}'.")
+    except Exception as e:  # pragma: no cover
+        _emit_error(emit, MESSAGE_OUT, f"Failed to kick '{target_name}': {e}")
+    return True
 
-    # /teleport
-    if cmd == 'teleport':
-        if sid is None:
-            _emit_error(emit, MESSAGE_OUT, 'Not connected.')
-            return True
-        if not args:
-            _emit_error(emit, MESSAGE_OUT, 'Usage: /teleport <room_id>  or  /teleport <playerName> | <room_id>')
-            return True
-        target_sid = sid
-        target_room = None
-        joined_args = " ".join(args)
-        if '|' in joined_args:
-            try:
-                player_name, target_room = [ctx.strip_quotes(p.strip()) for p in joined_args.split('|', 1)]
-            except Exception:
-                _emit_error(emit, MESSAGE_OUT, 'Usage: /teleport <playerName> | <room_id>')
-                return True
-            okp, perr, tsid, _pname = ctx.resolve_player_sid_global(world, player_name)
-            if not okp or not tsid:
-                _emit_error(emit, MESSAGE_OUT, perr or f"Player '{player_name}' not found.")
-                return True
-            target_sid = tsid
-        else:
-            target_room = ctx.strip_quotes(joined_args.strip())
-        if not target_room:
-            _emit_error(emit, MESSAGE_OUT, 'Target room id required.')
-            return True
-        rok, rerr, resolved = ctx.resolve_room_id_fuzzy(sid, target_room)
-        if not rok or not resolved:
-            _emit_error(emit, MESSAGE_OUT, rerr or 'Room not found.')
-            return True
-        ok, err, emits2, broadcasts2 = ctx.teleport_player(world, target_sid, resolved)
-        if not ok:
-            _emit_error(emit, MESSAGE_OUT, err or 'Teleport failed.')
-            return True
-        for payload in emits2:
-            try:
-                if target_sid == sid:
-                    emit(MESSAGE_OUT, payload)
-                else:
-                    ctx.socketio.emit(MESSAGE_OUT, payload, to=target_sid)
-            except Exception:  # pragma: no cover
-                pass
-        for room_id, payload in broadcasts2:
-            ctx.broadcast_to_room(room_id, payload, target_sid)
-        if target_sid != sid:
-            _emit_system(emit, MESSAGE_OUT, 'Teleport complete.')
-        return True
-
-    # /bring
-    if cmd == 'bring':
-        if sid is None:
-            _emit_error(emit, MESSAGE_OUT, 'Not connected.')
-            return True
-        if not args:
-            _emit_error(emit, MESSAGE_OUT, 'Usage: /bring <playerName>')
+
+def _cmd_teleport(ctx: CommandContext, sid: str | None, cmd: str, args: list[str], raw: str, emit: EmitFn) -> bool:
+    """/teleport <room> or /teleport <player> | <room>: move yourself or a player."""
+    world = ctx.world
+    MESSAGE_OUT = ctx.message_out
+    if sid is None:
+        _emit_error(emit, MESSAGE_OUT, 'Not connected.')
+        return True
+    if not args:
+        _emit_error(emit, MESSAGE_OUT, 'Usage: /teleport <room_id>  or  /teleport <playerName> | <room_id>')
+        return True
+    target_sid = sid
+    target_room = None
+    joined_args = " ".join(args)
+    if '|' in joined_args:
+        try:
+            player_name, target_room = [ctx.strip_quotes(p.strip()) for p in joined_args.split('|', 1)]
+        except Exception:
+            _emit_error(emit, MESSAGE_OUT, 'Usage: /teleport <playerName> | <room_id>')
             return True
-        player_name = ctx.strip_quotes(" ".join(args).split('|', 1)[0].strip())
         okp, perr, tsid, _pname = ctx.resolve_player_sid_global(world, player_name)
         if not okp or not tsid:
             _emit_error(emit, MESSAGE_OUT, perr or f"Player '{player_name}' not found.")
             return True
-        okh, erh, here_room = ctx.normalize_room_input(sid, 'here')
-        if not okh or not here_room:
-            _emit_error(emit, MESSAGE_OUT, erh or 'You are nowhere.')
-            return True
-        ok, err, emits2, broadcasts2 = ctx.teleport_player(world, tsid, here_room)
-        if not ok:
-            _emit_error(emit, MESSAGE_OUT, err or 'Bring failed.')
-            return True
-        for payload in emits2:
-            try:
-                ctx.socketio.emit(MESSAGE_OUT, payload, to=tsid)
-            except Exception:  # pragma: no cover
-                pass
-        for room_id, payload in broadcasts2:
-            ctx.broadcast_to_room(room_id, payload, tsid)
-        _emit_system(emit, MESSAGE_OUT, 'Bring complete.')
-        return True
-
-    # /purge
-    if cmd == 'purge':
-        if sid is None:
-            _emit_error(emit, MESSAGE_OUT, 'Not connected.')
-            return True
-        ctx.pending_confirm[sid] = 'purge'
-        emit(MESSAGE_OUT, ctx.purge_prompt())
+        target_sid = tsid
+    else:
+        target_room = ctx.strip_quotes(joined_args.strip())
+    if not target_room:
+        _emit_error(emit, MESSAGE_OUT, 'Target room id required.')
         return True
-
-    # /worldstate
-    if cmd == 'worldstate':
-        if sid is None:
-            _emit_error(emit, MESSAGE_OUT, 'Not connected.')
-            return True
+    rok, rerr, resolved = ctx.resolve_room_id_fuzzy(sid, target_room)
+    if not rok or not resolved:
+        _emit_error(emit, MESSAGE_OUT, rerr or 'Room not found.')
+        return True
+    ok, err, emits2, broadcasts2 = ctx.teleport_player(world, target_sid, resolved)
+    if not ok:
+        _emit_error(emit, MESSAGE_OUT, err or 'Teleport failed.')
+        return True
+    for payload in emits2:
         try:
-            with open(ctx.state_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            sanitized = ctx.redact_sensitive(data)
-            raw_json = json.dumps(sanitized, ensure_ascii=False, indent=2)
-            emit(MESSAGE_OUT, {'type': 'system', 'content': f"[b]world_state.json[/b]\n{raw_json}"})
-        except FileNotFoundError:
-            _emit_error(emit, MESSAGE_OUT, 'world_state.json not found.')
-        except Exception as e:  # pragma: no cover
-            _emit_error(emit, MESSAGE_OUT, f'Failed to read world_state.json: {e}')
-        return True
-
-    # /safety
-    if cmd == 'safety':
-        if sid is None:
-            _emit_error(emit, MESSAGE_OUT, 'Not connected.')
-            return True
-        if not args:
-            cur = getattr(world, 'safety_level', 'G')
-            _emit_system(emit, MESSAGE_OUT, f"Current safety level: [b]{cur}[/b]\nUsage: /safety <G|PG-13|R|OFF>")
-            return True
-        raw_level = " ".join(args).strip().upper()
-        if raw_level in ("HIGH", "G", "ALL-AGES"):
-            level = 'G'
-        elif raw_level in ("MEDIUM", "PG13", "PG-13", "PG_13", "PG"):
-            level = 'PG-13'
-        elif raw_level in ("LOW", "R"):
-            level = 'R'
-        elif raw_level in ("OFF", "NONE", "NO FILTERS", "DISABLE", "DISABLED", "SAFETY FILTERS OFF"):
-            level = 'OFF'
-        else:
-            _emit_error(emit, MESSAGE_OUT, 'Invalid safety level. Use one of: G, PG-13, R, OFF.')
-            return True
+            if target_sid == sid:
+                emit(MESSAGE_OUT, payload)
+            else:
+                ctx.send_to(target_sid, payload)
+        except Exception:  # pragma: no cover
+            pass
+    for room_id, payload in broadcasts2:
+        ctx.broadcast_to_room(room_id, payload, target_sid)
+    if target_sid != sid:
+        _emit_system(emit, MESSAGE_OUT, 'Teleport complete.')
+    return True
+
+
+def _cmd_bring(ctx: CommandContext, sid: str | None, cmd: str, args: list[str], raw: str, emit: EmitFn) -> bool:
+    """/bring <player>: move a player to your room."""
+    world = ctx.world
+    MESSAGE_OUT = ctx.message_out
+    if sid is None:
+        _emit_error(emit, MESSAGE_OUT, 'Not connected.')
+        return True
+    player_name = ctx.strip_quotes(" ".join(args).split('|', 1)[0].strip())
+    okp, perr, tsid, _pname = ctx.resolve_player_sid_global(world, player_name)
+    if not okp or not tsid:
+        _emit_error(emit, MESSAGE_OUT, perr or f"Player '{player_name}' not found.")
+        return True
+    okh, erh, here_room = ctx.normalize_room_input(sid, 'here')
+    if not okh or not here_room:
+        _emit_error(emit, MESSAGE_OUT, erh or 'You are nowhere.')
+        return True
+    ok, err, emits2, broadcasts2 = ctx.teleport_player(world, tsid, here_room)
+    if not ok:
+        _emit_error(emit, MESSAGE_OUT, err or 'Bring failed.')
+        return True
+    for payload in emits2:
         try:
-            world.safety_level = level  # type: ignore[attr-defined]
-            save_world(world, ctx.state_path, debounced=True)
+            ctx.send_to(tsid, payload)
         except Exception:  # pragma: no cover
             pass
-        _emit_system(emit, MESSAGE_OUT, f"Safety level set to [b]{level}[/b]. This applies to future AI replies.")
+    for room_id, payload in broadcasts2:
+        ctx.broadcast_to_room(room_id, payload, tsid)
+    _emit_system(emit, MESSAGE_OUT, 'Bring complete.')
+    return True
+
+
+def _cmd_purge(ctx: CommandContext, sid: str | None, cmd: str, args: list[str], raw: str, emit: EmitFn) -> bool:
+    """/purge: ask for confirmation, then reset the world."""
+    MESSAGE_OUT = ctx.message_out
+    if sid is None:
+        _emit_error(emit, MESSAGE_OUT, 'Not connected.')
         return True
+    ctx.pending_confirm[sid] = 'purge'
+    emit(MESSAGE_OUT, ctx.purge_prompt())
+    return True
 
-    # /setup
-    if cmd == 'setup':
-        if sid is None:
-            _emit_error(emit, MESSAGE_OUT, 'Not connected.')
-            return True
-        if getattr(world, 'setup_complete', False):
-            _emit_system(emit, MESSAGE_OUT, 'Setup is already complete. Use /purge to reset the world if you want to run setup again.')
-            return True
-        from setup_service import begin_setup as _setup_begin  # type: ignore
-        # For now reuse world_setup_sessions dict if present; else allocate ephemeral
-        sessions = getattr(world, 'world_setup_sessions', {})
-        for p in _setup_begin(sessions, sid):
-            emit(MESSAGE_OUT, p)
+
+def _cmd_worldstate(ctx: CommandContext, sid: str | None, cmd: str, args: list[str], raw: str, emit: EmitFn) -> bool:
+    """/worldstate: show the saved world state with secrets redacted."""
+    MESSAGE_OUT = ctx.message_out
+    if sid is None:
+        _emit_error(emit, MESSAGE_OUT, 'Not connected.')
         return True
+    try:
+        with open(ctx.state_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        sanitized = ctx.redact_sensitive(data)
+        raw_json = json.dumps(sanitized, ensure_ascii=False, indent=2)
+        emit(MESSAGE_OUT, {'type': 'system', 'content': f"[b]world_state.json[/b]\n{raw_json}"})
+    except FileNotFoundError:
+        _emit_error(emit, MESSAGE_OUT, 'world_state.json not found.')
+    except Exception as e:  # pragma: no cover
+        _emit_error(emit, MESSAGE_OUT, f'Failed to read world_state.json: {e}')
+    return True
 
-    # /world
-    if cmd == 'world':
-        if sid is None:
-            _emit_error(emit, MESSAGE_OUT, 'Not connected.')
-            return True
-        if not args:
-            _emit_system(emit, MESSAGE_OUT, 'Usage: /world set <name|desc|conflict|time|debug> | <value>')
-            return True
-        
-        sub = args[0].lower()
-        sub_args = args[1:]
-        
-        if sub == 'set':
-            joined = " ".join(sub_args)
-            if '|' not in joined:
-                _emit_error(emit, MESSAGE_OUT, 'Usage: /world set <key> | <value>')
-                return True
-            try:
-                key, val = [p.strip() for p in joined.split('|', 1)]
-            except ValueError:
-                _emit_error(emit, MESSAGE_OUT, 'Usage: /world set <key> | <value>')
-                return True
-                
-            key = key.lower()
-            if key == 'name':
-                world.world_name = val
-                _emit_system(emit, MESSAGE_OUT, f"World name set to: {val}")
-            elif key in ('desc', 'description'):
-                world.world_description = val
-                _emit_system(emit, MESSAGE_OUT, "World description updated.")
-            elif key == 'conflict':
-                world.world_conflict = val
-                _emit_system(emit, MESSAGE_OUT, "World conflict updated.")
-            elif key == 'time':
-                try:
-                    world.game_time_ticks = int(val)
-                    _emit_system(emit, MESSAGE_OUT, f"Game time set to tick {val}.")
-                except ValueError:
-                    _emit_error(emit, MESSAGE_OUT, "Time must be an integer.")
-                    return True
-            elif key == 'debug':
-                mode = val.lower() in ('true', 'on', 'yes', '1')
-                world.debug_creative_mode = mode
-                _emit_system(emit, MESSAGE_OUT, f"Debug creative mode set to {mode}.")
-            else:
-                _emit_error(emit, MESSAGE_OUT, "Unknown world property. Valid: name, desc, conflict, time, debug.")
-                return True
-            save_world(world, ctx.state_path, debounced=True)
-            return True
+
+def _cmd_safety(ctx: CommandContext, sid: str | None, cmd: str, args: list[str], raw: str, emit: EmitFn) -> bool:
+    """/safety [level]: show or set the AI content safety level."""
+    world = ctx.world
+    MESSAGE_OUT = ctx.message_out
+    if sid is None:
+        _emit_error(emit, MESSAGE_OUT, 'Not connected.')
+        return True
+    if not args:
+        cur = getattr(world, 'safety_level', 'G')
+        _emit_system(emit, MESSAGE_OUT, f"Current safety level: [b]{cur}[/b]\nUsage: /safety <G|PG-13|R|OFF>")
         return True
+    raw_level = " ".join(args).strip().upper()
+    if raw_level in ("HIGH", "G", "ALL-AGES"):
+        level = 'G'
+    elif raw_level in ("MEDIUM", "PG13", "PG-13", "PG_13", "PG"):
+        level = 'PG-13'
+    elif raw_level in ("LOW", "R"):
+        level = 'R'
+    elif raw_level in ("OFF", "NONE", "NO FILTERS", "DISABLE", "DISABLED", "SAFETY FILTERS OFF"):
+        level = 'OFF'
+    else:
+        _emit_error(emit, MESSAGE_OUT, 'Invalid safety level. Use one of: G, PG-13, R, OFF.')
+        return True
+    try:
+        world.safety_level = level  # type: ignore[attr-defined]
+        save_world(world, ctx.state_path, debounced=True)
+    except Exception:  # pragma: no cover
+        pass
+    _emit_system(emit, MESSAGE_OUT, f"Safety level set to [b]{level}[/b]. This applies to future AI replies.")
+    return True
 
-    # /object
-    if cmd == 'object':
-        if sid is None:
-            _emit_error(emit, MESSAGE_OUT, 'Not connected.')
-            return True
-        if not args:
-            _emit_system(emit, MESSAGE_OUT, 'Usage: /object <createtemplateobject | createobject <room> | <name> | <desc> | <tags or template_key> | listtemplates | viewtemplate <key> | deletetemplate <key> | list | delete>')
-            return True
-        sub = args[0].lower()
-        from object_service import (
-            create_object as _obj_create,
-            list_templates as _obj_list_templates,
-            view_template as _obj_view_template,
-            delete_template as _obj_delete_template,
-            list_objects as _obj_list_objects,
-            delete_object_instance as _obj_delete_instance,
-        )  # type: ignore
-        if sub == 'createobject':
-            if sid not in world.players:
-                _emit_error(emit, MESSAGE_OUT, 'Please authenticate first to create objects.')
-                return True
-            handled, err, emits3, broadcasts3 = _obj_create(world, ctx.state_path, sid, args[1:])
-            if err:
-                _emit_error(emit, MESSAGE_OUT, err)
-                return True
-            for payload in emits3:
-                emit(MESSAGE_OUT, payload)
-            for room_id, payload in broadcasts3:
-                ctx.broadcast_to_room(room_id, payload, exclude_sid=sid)
-            return True
-        if sub == 'createtemplateobject':
-            if not hasattr(world, 'object_template_sessions'):
-                world.object_template_sessions = {}  # type: ignore[attr-defined]
-            world.object_template_sessions[sid] = {"step": "template_key", "temp": {}}  # type: ignore[attr-defined]
-            _emit_system(emit, MESSAGE_OUT, 'Creating a new Object template. Type cancel to abort at any time.')
-            _emit_system(emit, MESSAGE_OUT, 'Enter a unique template key (letters, numbers, underscores), e.g., sword_bronze:')
-            return True
-        if sub == 'listtemplates':
-            templates = _obj_list_templates(world)
-            _emit_system(emit, MESSAGE_OUT, 'No object templates saved.' if not templates else 'Object templates: ' + ", ".join(templates))
-            return True
-        if sub == 'viewtemplate':
-            if len(args) < 2:
-                _emit_error(emit, MESSAGE_OUT, 'Usage: /object viewtemplate <key>')
-                return True
-            key = args[1]
-            okv, ev, raw_t = _obj_view_template(world, key)
-            if not okv:
-                _emit_error(emit, MESSAGE_OUT, ev or 'Template not found.')
-                return True
-            _emit_system(emit, MESSAGE_OUT, f"[b]{key}[/b]\n{raw_t}")
-            return True
-        if sub == 'deletetemplate':
-            if len(args) < 2:
-                _emit_error(emit, MESSAGE_OUT, 'Usage: /object deletetemplate <key>')
-                return True
-            key = args[1]
-            handled, err2, emitsD, broadcastsD = _obj_delete_template(world, ctx.state_path, key)
-            if err2:
-                _emit_error(emit, MESSAGE_OUT, err2)
-                return True
-            for payload in emitsD:
-                emit(MESSAGE_OUT, payload)
-            for room_id, payload in broadcastsD:
-                ctx.broadcast_to_room(room_id, payload, exclude_sid=sid)
-            return True
-        if sub == 'list':
-            handled, err2, emitsL, broadcastsL = _obj_list_objects(world, sid, args[1:])
-            if err2:
-                _emit_error(emit, MESSAGE_OUT, err2)
-                return True
-            for payload in emitsL:
-                emit(MESSAGE_OUT, payload)
-            return True
-        if sub == 'delete':
-            handled, err2, emitsD, broadcastsD = _obj_delete_instance(world, ctx.state_path, args[1:])
-            if err2:
-                _emit_error(emit, MESSAGE_OUT, err2)
-                return True
-            for payload in emitsD:
-                emit(MESSAGE_OUT, payload)
-            return True
-        _emit_error(emit, MESSAGE_OUT, 'Unknown /object subcommand. Use createobject, createtemplateobject, listtemplates, viewtemplate, deletetemplate, list, or delete.')
+
+def _cmd_setup(ctx: CommandContext, sid: str | None, cmd: str, args: list[str], raw: str, emit: EmitFn) -> bool:
+    """/setup: start the first-run world setup wizard."""
+    world = ctx.world
+    MESSAGE_OUT = ctx.message_out
+    if sid is None:
+        _emit_error(emit, MESSAGE_OUT, 'Not connected.')
+        return True
+    if getattr(world, 'setup_complete', False):
+        _emit_system(emit, MESSAGE_OUT, 'Setup is already complete. Use /purge to reset the world if you want to run setup again.')
         return True
+    from setup_service import begin_setup as _setup_begin  # type: ignore
+    # For now reuse world_setup_sessions dict if present; else allocate ephemeral
+    sessions = getattr(world, 'world_setup_sessions', {})
+    for p in _setup_begin(sessions, sid):
+        emit(MESSAGE_OUT, p)
+    return True
 
-    # /room
-    if cmd == 'room':
-        handled, err, emits2, broadcasts2 = ctx.handle_room_command(world, ctx.state_path, args, sid)
+
+def _cmd_object(ctx: CommandContext, sid: str | None, cmd: str, args: list[str], raw: str, emit: EmitFn) -> bool:
+    """/object <subcommand>: objects and object templates."""
+    world = ctx.world
+    MESSAGE_OUT = ctx.message_out
+    if sid is None:
+        _emit_error(emit, MESSAGE_OUT, 'Not connected.')
+        return True
+    if not args:
+        _emit_system(emit, MESSAGE_OUT, 'Usage: /object <createtemplateobject | createobject <room> | <name> | <desc> | <tags or template_key> | listtemplates | viewtemplate <key> | deletetemplate <key> | list | delete>')
+        return True
+    sub = args[0].lower()
+    from object_service import (
+        create_object as _obj_create,
+        list_templates as _obj_list_templates,
+        view_template as _obj_view_template,
+        delete_template as _obj_delete_template,
+        list_objects as _obj_list_objects,
+        delete_object_instance as _obj_delete_instance,
+    )  # type: ignore
+    if sub == 'createobject':
+        if sid not in world.players:
+            _emit_error(emit, MESSAGE_OUT, 'Please authenticate first to create objects.')
+            return True
+        handled, err, emits3, broadcasts3 = _obj_create(world, ctx.state_path, sid, args[1:])
         if err:
             _emit_error(emit, MESSAGE_OUT, err)
             return True
-        for payload in emits2:
+        for payload in emits3:
             emit(MESSAGE_OUT, payload)
-        for room_id, payload in broadcasts2:
+        for room_id, payload in broadcasts3:
             ctx.broadcast_to_room(room_id, payload, exclude_sid=sid)
-        return True if handled else False
-
-    # /faction
-    if cmd == 'faction':
-        if sid is None:
-            _emit_error(emit, MESSAGE_OUT, 'Not connected.')
+        return True
+    if sub == 'createtemplateobject':
+        if not hasattr(world, 'object_template_sessions'):
+            world.object_template_sessions = {}  # type: ignore[attr-defined]
+        world.object_template_sessions[sid] = {"step": "template_key", "temp": {}}  # type: ignore[attr-defined]
+        _emit_system(emit, MESSAGE_OUT, 'Creating a new Object template. Type cancel to abort at any time.')
+        _emit_system(emit, MESSAGE_OUT, 'Enter a unique template key (letters, numbers, underscores), e.g., sword_bronze:')
+        return True
+    if sub == 'listtemplates':
+        templates = _obj_list_templates(world)
+        _emit_system(emit, MESSAGE_OUT, 'No object templates saved.' if not templates else 'Object templates: ' + ", ".join(templates))
+        return True
+    if sub == 'viewtemplate':
+        if len(args) < 2:
+            _emit_error(emit, MESSAGE_OUT, 'Usage: /object viewtemplate <key>')
             return True
-        if sid not in ctx.admins:
-            _emit_error(emit, MESSAGE_OUT, 'Admin command. Admin rights required.')
+        key = args[1]
+        okv, ev, raw_t = _obj_view_template(world, key)
+        if not okv:
+            _emit_error(emit, MESSAGE_OUT, ev or 'Template not found.')
             return True
-        handled, err, emits2, broadcasts2 = ctx.handle_faction_command(world, ctx.state_path, sid, args)
-        if err:
-            _emit_error(emit, MESSAGE_OUT, err)
+        _emit_system(emit, MESSAGE_OUT, f"[b]{key}[/b]\n{raw_t}")
+        return True
+    if sub == 'deletetemplate':
+        if len(args) < 2:
+            _emit_error(emit, MESSAGE_OUT, 'Usage: /object deletetemplate <key>')
             return True
-        for payload in emits2:
-            emit(MESSAGE_OUT, payload)
-        for room_id, payload in broadcasts2:
-            ctx.broadcast_to_room(room_id, payload, exclude_sid=sid)
-        return True if handled else False
-
-    # /npc
-    if cmd == 'npc':
-        handled, err, emits2, broadcasts2 = ctx.handle_npc_command(world, ctx.state_path, sid, args)
-        if err:
-            _emit_error(emit, MESSAGE_OUT, err)
+        key = args[1]
+        handled, err2, emitsD, broadcastsD = _obj_delete_template(world, ctx.state_path, key)
+        if err2:
+            _emit_error(emit, MESSAGE_OUT, err2)
             return True
-        for payload in emits2:
+        for payload in emitsD:
             emit(MESSAGE_OUT, payload)
-        for room_id, payload in broadcasts2:
+        for room_id, payload in broadcastsD:
             ctx.broadcast_to_room(room_id, payload, exclude_sid=sid)
-        return True if handled else False
-
-    # /settimedesc
-    if cmd == 'settimedesc':
-        if len(args) < 2:
-            _emit_system(emit, MESSAGE_OUT, "Usage: /settimedesc <hour> <description>")
+        return True
+    if sub == 'list':
+        handled, err2, emitsL, broadcastsL = _obj_list_objects(world, sid, args[1:])
+        if err2:
+            _emit_error(emit, MESSAGE_OUT, err2)
             return True
-        
-        try:
-            hour = int(args[0])
-            if not (0 <= hour <= 23):
-                raise ValueError
-        except ValueError:
-            _emit_error(emit, MESSAGE_OUT, "Hour must be an integer between 0 and 23.")
+        for payload in emitsL:
+            emit(MESSAGE_OUT, payload)
+        return True
+    if sub == 'delete':
+        handled, err2, emitsD, broadcastsD = _obj_delete_instance(world, ctx.state_path, args[1:])
+        if err2:
+            _emit_error(emit, MESSAGE_OUT, err2)
             return True
-            
-        desc = " ".join(args[1:])
-        if not hasattr(world, 'time_descriptions'):
-            world.time_descriptions = {}
-            
-        world.time_descriptions[hour] = desc
-        save_world(world, ctx.state_path, debounced=True)
-        _emit_system(emit, MESSAGE_OUT, f"Description for hour {hour} updated.")
+        for payload in emitsD:
+            emit(MESSAGE_OUT, payload)
         return True
+    _emit_error(emit, MESSAGE_OUT, 'Unknown /object subcommand. Use createobject, createtemplateobject, listtemplates, viewtemplate, deletetemplate, list, or delete.')
+    return True
+
+
+def _cmd_room(ctx: CommandContext, sid: str | None, cmd: str, args: list[str], raw: str, emit: EmitFn) -> bool:
+    """/room <subcommand>: room management (room_service)."""
+    world = ctx.world
+    MESSAGE_OUT = ctx.message_out
+    handled, err, emits2, broadcasts2 = ctx.handle_room_command(world, ctx.state_path, args, sid)
+    if err:
+        _emit_error(emit, MESSAGE_OUT, err)
+        return True
+    for payload in emits2:
+        emit(MESSAGE_OUT, payload)
+    for room_id, payload in broadcasts2:
+        ctx.broadcast_to_room(room_id, payload, exclude_sid=sid)
+    return True if handled else False
+
 
-    return False
+def _cmd_faction(ctx: CommandContext, sid: str | None, cmd: str, args: list[str], raw: str, emit: EmitFn) -> bool:
+    """/faction <subcommand>: faction management (faction_service)."""
+    world = ctx.world
+    MESSAGE_OUT = ctx.message_out
+    if sid is None:
+        _emit_error(emit, MESSAGE_OUT, 'Not connected.')
+        return True
+    if sid not in ctx.admins:
+        _emit_error(emit, MESSAGE_OUT, 'Admin command. Admin rights required.')
+        return True
+    handled, err, emits2, broadcasts2 = ctx.handle_faction_command(world, ctx.state_path, sid, args)
+    if err:
+        _emit_error(emit, MESSAGE_OUT, err)
+        return True
+    for payload in emits2:
+        emit(MESSAGE_OUT, payload)
+    for room_id, payload in broadcasts2:
+        ctx.broadcast_to_room(room_id, payload, exclude_sid=sid)
+    return True if handled else False
+
+
+def _cmd_npc(ctx: CommandContext, sid: str | None, cmd: str, args: list[str], raw: str, emit: EmitFn) -> bool:
+    """/npc <subcommand>: NPC management (npc_service)."""
+    world = ctx.world
+    MESSAGE_OUT = ctx.message_out
+    handled, err, emits2, broadcasts2 = ctx.handle_npc_command(world, ctx.state_path, sid, args)
+    if err:
+        _emit_error(emit, MESSAGE_OUT, err)
+        return True
+    for payload in emits2:
+        emit(MESSAGE_OUT, payload)
+    for room_id, payload in broadcasts2:
+        ctx.broadcast_to_room(room_id, payload, exclude_sid=sid)
+    return True if handled else False
+
+
+def _cmd_tickstats(ctx: CommandContext, sid: str | None, cmd: str, args: list[str], raw: str, emit: EmitFn) -> bool:
+    """/tickstats [reset]: world tick phase timings."""
+    MESSAGE_OUT = ctx.message_out
+    import tick_profiler
+    prof = tick_profiler.get_tick_profiler()
+    if args and args[0].lower() == 'reset':
+        prof.reset()
+        _emit_system(emit, MESSAGE_OUT, 'Tick stats reset.')
+        return True
+    _emit_system(emit, MESSAGE_OUT, tick_profiler.format_tick_stats(prof.snapshot()))
+    return True
+
+
+def _cmd_cmdstats(ctx: CommandContext, sid: str | None, cmd: str, args: list[str], raw: str, emit: EmitFn) -> bool:
+    """/cmdstats [reset]: per-command latency."""
+    MESSAGE_OUT = ctx.message_out
+    import command_metrics
+    metrics = command_metrics.get_command_metrics()
+    if args and args[0].lower() == 'reset':
+        metrics.reset()
+        _emit_system(emit, MESSAGE_OUT, 'Command stats reset.')
+        return True
+    _emit_system(emit, MESSAGE_OUT, command_metrics.format_command_stats(metrics.snapshot()))
+    return True
+
+
+def _cmd_settimedesc(ctx: CommandContext, sid: str | None, cmd: str, args: list[str], raw: str, emit: EmitFn) -> bool:
+    """/settimedesc <hour> <description>: describe an hour of the day."""
+    world = ctx.world
+    MESSAGE_OUT = ctx.message_out
+    try:
+        hour = int(args[0])
+        if not (0 <= hour <= 23):
+            raise ValueError
+    except ValueError:
+        _emit_error(emit, MESSAGE_OUT, "Hour must be an integer between 0 and 23.")
+        return True
+        
+    desc = " ".join(args[1:])
+    if not hasattr(world, 'time_descriptions'):
+        world.time_descriptions = {}
+        
+    world.time_descriptions[hour] = desc
+    save_world(world, ctx.state_path, debounced=True)
+    _emit_system(emit, MESSAGE_OUT, f"Description for hour {hour} updated.")
+    return True
+
+
+PLAYER_ARG = CommandArgument('playerName', ArgumentType.PLAYER, 'Player to act on')
+
+# name -> (handler, declared arguments); the registry's ArgSpec enforces the required ones
+COMMANDS = {
+    'kick': (_cmd_kick, [PLAYER_ARG]),
+    'teleport': (_cmd_teleport, []),
+    'bring': (_cmd_bring, [PLAYER_ARG]),
+    'purge': (_cmd_purge, []),
+    'worldstate': (_cmd_worldstate, []),
+    'safety': (_cmd_safety, [CommandArgument('level', ArgumentType.OPTIONAL, 'G, PG-13, R or OFF')]),
+    'setup': (_cmd_setup, []),
+    'object': (_cmd_object, []),
+    'room': (_cmd_room, []),
+    'faction': (_cmd_faction, []),
+    'npc': (_cmd_npc, []),
+    'tickstats': (_cmd_tickstats, [CommandArgument('reset', ArgumentType.OPTIONAL, 'Clear the stats')]),
+    'cmdstats': (_cmd_cmdstats, [CommandArgument('reset', ArgumentType.OPTIONAL, 'Clear the stats')]),
+    'settimedesc': (_cmd_settimedesc, [
+        # A string, so a bad hour gets the handler's 0-23 message rather than the usage line
+        CommandArgument('hour', ArgumentType.STRING, 'Hour of the day, 0-23'),
+        CommandArgument('description', ArgumentType.STRING, 'Description for that hour'),
+    ]),
+}
+ADMIN_COMMANDS = frozenset(COMMANDS)
+
+# Usage lines that have always been system messages rather than errors
+USAGE_TYPES = {'settimedesc': 'system'}
+
+
+def register(registry: CommandRegistry) -> None:
+    """Register every admin command, each with its own handler, on registry."""
+    for name, (handler, arguments) in COMMANDS.items():
+        registry.route(
+            [name],
+            handler,
+            'Admin command',
+            permission=PermissionLevel.ADMIN,
+            costs=OPERATION_COSTS,
+            default_cost=DEFAULT_COST,
+            rate_key=RATE_KEY,
+            rate_message=RATE_MESSAGE,
+            router='admin_router',
+            arguments=arguments,
+            usage_type=USAGE_TYPES.get(name, 'error'),
+        )
+
+
+# Direct callers (tests, older routers) get the same gate and costs
+_direct = CommandRegistry(middleware=[permission_middleware, rate_limit_middleware])
+register(_direct)
+
+
+def try_handle(ctx: CommandContext, sid: str | None, cmd: str, args: list[str], raw: str, emit: EmitFn) -> bool:
+    """Run an admin command; False when cmd is not one."""
+    if not cmd:
+        return False
+    return _direct.dispatch(ctx, sid, cmd, args, raw, emit)
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+"""AI Budget — one world-wide scheduler in front of every NPC model call.
+
+NPC planning and NPC dialogue both end in a paid, slow model call. The rate
+limiter protects the server from clients; this module protects the model
+quota from the server. Every call asks the budget for a slot first:
+
+- a global requests-per-minute cap (MUD_AI_RPM, sliding 60s window) and a
+  concurrency cap on calls in flight (MUD_AI_CONCURRENCY)
+- priority classes: DIALOGUE (a player is waiting on the reply) is served
+  before PLAN (ambient NPC planning); MUD_AI_DIALOGUE_RESERVE is the share of
+  the minute budget planning may never use, so dialogue always has headroom
+- fairness: each caller names an owner (the NPC for planning, the player's
+  sid for dialogue). An owner may take at most its fair share of its class
+  budget, split evenly between the owners that asked in the last minute, and
+  among queued requests the least-served owner goes first
+- deadlines: a request may wait up to MUD_AI_PLAN_WAIT / MUD_AI_DIALOGUE_WAIT
+  seconds for a slot (planning defaults to 0, so the tick never blocks)
+
+A request that cannot be served in time is refused and the caller degrades to
+its offline behavior (offline planner, canned NPC reply), exactly as when no
+model is configured. MUD_AI_BUDGET_ENABLE=0 grants every request.
+
+Usage:
+
+    with get_ai_budget().slot(AIPriority.PLAN, npc_name) as granted:
+        if not granted:
+            ... offline fallback ...
+        ... model call ...
+"""
+
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from enum import IntEnum
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+import command_metrics
+
+
+WINDOW_SECONDS = 60.0
+
+
+class AIPriority(IntEnum):
+    """Priority classes, lower is served first."""
+    DIALOGUE = 0
+    PLAN = 1
+
+
+def _env_float(key: str, default: float) -> float:
+    try:
+        return float((os.getenv(key) or str(default)).strip())
+    except Exception:
+        return default
+
+
+def _env_bool(key: str, default: bool) -> bool:
+    raw = os.getenv(key)
+    if raw is None:
+        return default
+    return raw.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+class _Ticket:
+    __slots__ = ('priority', 'owner', 'seq', 'deadline')
+
+    def __init__(self, priority: AIPriority, owner: str, seq: int, deadline: float):
+        self.priority = priority
+        self.owner = owner
+        self.seq = seq
+        self.deadline = deadline
+
+
+class AIBudget:
+    """Admission control for model calls: RPM window, concurrency, classes, fair shares."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self.enabled = _env_bool('MUD_AI_BUDGET_ENABLE', True)
+        self.rpm = max(1, int(_env_float('MUD_AI_RPM', 60)))
+        self.concurrency = max(1, int(_env_float('MUD_AI_CONCURRENCY', 4)))
+        reserve = min(1.0, max(0.0, _env_float('MUD_AI_DIALOGUE_RESERVE', 0.25)))
+        self.limits: Dict[AIPriority, int] = {
+            AIPriority.DIALOGUE: self.rpm,
+            AIPriority.PLAN: self.rpm - int(math.ceil(self.rpm * reserve)),
+        }
+        self.waits: Dict[AIPriority, float] = {
+            AIPriority.DIALOGUE: max(0.0, _env_float('MUD_AI_DIALOGUE_WAIT', 2.0)),
+            AIPriority.PLAN: max(0.0, _env_float('MUD_AI_PLAN_WAIT', 0.0)),
+        }
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._in_flight = 0
+        # Grants in the window: (time, priority, owner), oldest first
+        self._grants: Deque[Tuple[float, AIPriority, str]] = deque()
+        self._class_use: Dict[AIPriority, int] = {p: 0 for p in AIPriority}
+        self._owner_use: Dict[Tuple[AIPriority, str], int] = {}
+        # (priority, owner) -> last time it asked, for the fair share split
+        self._asked: Dict[Tuple[AIPriority, str], float] = {}
+        self._waiting: List[_Ticket] = []
+        self.granted: Dict[str, int] = {p.name: 0 for p in AIPriority}
+        self.denied: Dict[str, int] = {p.name: 0 for p in AIPriority}
+
+    # --- window bookkeeping (caller holds the lock) ---
+
+    def _expire(self, now: float) -> None:
+        cutoff = now - WINDOW_SECONDS
+        while self._grants and self._grants[0][0] <= cutoff:
+            _, prio, owner = self._grants.popleft()
+            self._class_use[prio] -= 1
+            key = (prio, owner)
+            left = self._owner_use[key] - 1
+            if left:
+                self._owner_use[key] = left
+            else:
+                del self._owner_use[key]
+        if len(self._asked) > 64:
+            for key in [k for k, t in self._asked.items() if t <= cutoff]:
+                del self._asked[key]
+
+    def _fair_share(self, prio: AIPriority, now: float) -> int:
+        cutoff = now - WINDOW_SECONDS
+        owners = sum(1 for (p, _), t in self._asked.items() if p == prio and t > cutoff)
+        return max(1, self.limits[prio] // max(1, owners))
+
+    def _fits(self, ticket: _Ticket, now: float) -> bool:
+        if self._class_use[ticket.priority] >= self.limits[ticket.priority]:
+            return False
+        # Dialogue may spend the whole window, but only on top of what planning has used
+        if sum(self._class_use.values()) >= self.rpm:
+            return False
+        return self._owner_use.get((ticket.priority, ticket.owner), 0) < self._fair_share(ticket.priority, now)
+
+    def _order(self, ticket: _Ticket) -> Tuple[int, int, int]:
+        return (int(ticket.priority), self._owner_use.get((ticket.priority, ticket.owner), 0), ticket.seq)
+
+    def _try_grant(self, ticket: _Ticket, now: float) -> bool:
+        self._expire(now)
+        if self._in_flight >= self.concurrency:
+            return False
+        ready = [t for t in self._waiting if self._fits(t, now)]
+        if not ready or min(ready, key=self._order) is not ticket:
+            return False
+        self._waiting.remove(ticket)
+        self._in_flight += 1
+        self._grants.append((now, ticket.priority, ticket.owner))
+        self._class_use[ticket.priority] += 1
+        key = (ticket.priority, ticket.owner)
+        self._owner_use[key] = self._owner_use.get(key, 0) + 1
+        self.granted[ticket.priority.name] += 1
+        return True
+
+    def _next_expiry(self, now: float) -> Optional[float]:
+        if not self._grants:
+            return None
+        return max(0.0, self._grants[0][0] + WINDOW_SECONDS - now)
+
+    # --- public API ---
+
+    def acquire(self, priority: AIPriority, owner: str, wait: Optional[float] = None) -> bool:
+        """Take a slot, waiting up to `wait` seconds (default: the class wait). False = refused."""
+        if not self.enabled:
+            with self._cond:
+                self.granted[priority.name] += 1
+            return True
+        with self._cond:
+            now = self._clock()
+            self._asked[(priority, owner)] = now
+            self._seq += 1
+            ticket = _Ticket(priority, owner, self._seq, now + (self.waits[priority] if wait is None else max(0.0, wait)))
+            self._waiting.append(ticket)
+            while True:
+                if self._try_grant(ticket, now):
+                    return True
+                remaining = ticket.deadline - now
+                if remaining <= 0:
+                    self._waiting.remove(ticket)
+                    self.denied[priority.name] += 1
+                    # Our leaving may let a lower-ordered waiter through
+                    self._cond.notify_all()
+                    return False
+                expiry = self._next_expiry(now)
+                # Queueing for a slot is not the waiting command's own cost
+                with command_metrics.paused():
+                    self._cond.wait(remaining if expiry is None else min(remaining, expiry + 0.001))
+                now = self._clock()
+
+    def release(self) -> None:
+        """Give back the concurrency slot taken by acquire()."""
+        if not self.enabled:
+            return
+        with self._cond:
+            self._in_flight = max(0, self._in_flight - 1)
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, priority: AIPriority, owner: str, wait: Optional[float] = None) -> Iterator[bool]:
+        """Context manager around acquire/release; yields whether the call may proceed."""
+        granted = self.acquire(priority, owner, wait)
+        try:
+            yield granted
+        finally:
+            if granted:
+                self.release()
+
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def queued(self) -> int:
+        return len(self._waiting)
+
+    def window_use(self) -> Dict[str, int]:
+        """Grants per class in the current window."""
+        with self._cond:
+            self._expire(self._clock())
+            return {p.name: n for p, n in self._class_use.items()}
+
+    def reset(self) -> None:
+        """Re-read the environment and forget all grants (tests)."""
+        self.__init__(self._clock)
+
+
+_budget = AIBudget()
+
+
+def get_ai_budget() -> AIBudget:
+    """Return the process-wide AI budget."""
+    return _budget
@@ -4,13 +4,20 @@ This module centralizes logic that was previously duplicated across the server
 and NPC services, in particular the mapping from a world safety level to the
 Google Gemini SDK's safety_settings structure.
 
+generate_content() wraps model.generate_content with per-kind call, latency
+and error accounting (get_ai_stats()), reported by the /metrics endpoint.
+
 Keep it dependency-light and safe to import even when the Google SDK isn't
 installed; in that case the exported helpers simply return None.
 """
 
 from __future__ import annotations
 
-from typing import Optional, Any
+import time
+from typing import Dict, Optional, Any
+
+import command_metrics
+from command_metrics import LatencySeries
 
 # Optional Gemini SDK enums (we detect presence at runtime)
 try:
@@ -51,3 +58,47 @@ def safety_settings_for_level(level: Optional[str]) -> Optional[list[dict[str, A
     if lvl in ('PG-13', 'PG13', 'PG'):
         return mk(getattr(HarmBlockThreshold, 'BLOCK_MEDIUM_AND_ABOVE', HarmBlockThreshold.BLOCK_NONE))
     return mk(getattr(HarmBlockThreshold, 'BLOCK_LOW_AND_ABOVE', HarmBlockThreshold.BLOCK_NONE))
+
+
+class AICallStats:
+    """AI calls per kind ('plan', 'dialogue', 'npc', ...): counts, errors, latency histogram."""
+
+    def __init__(self):
+        self.kinds: Dict[str, LatencySeries] = {}
+
+    def record(self, kind: str, elapsed_ms: float, error: bool = False) -> None:
+        series = self.kinds.get(kind)
+        if series is None:
+            series = self.kinds[kind] = LatencySeries()
+        series.add(elapsed_ms, error)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {kind: s.snapshot() for kind, s in sorted(self.kinds.items())}
+
+    def reset(self) -> None:
+        self.kinds.clear()
+
+
+_ai_stats = AICallStats()
+
+
+def get_ai_stats() -> AICallStats:
+    """Return the process-wide AI call statistics."""
+    return _ai_stats
+
+
+def generate_content(model: Any, prompt: str, safety: Optional[list] = None, kind: str = 'other') -> Any:
+    """Call model.generate_content (with safety_settings when given) and record it under kind."""
+    start = time.perf_counter()
+    error = False
+    try:
+        # The wait is the model's time, not the command's (see command_metrics.paused)
+        with command_metrics.paused():
+            if safety is not None:
+                return model.generate_content(prompt, safety_settings=safety)
+            return model.generate_content(prompt)
+    except Exception:
+        error = True
+        raise
+    finally:
+        _ai_stats.record(kind, (time.perf_counter() - start) * 1000.0, error)
@@ -1,5 +1,5 @@
 from typing import List, Dict, Any, Optional
-import uuid
+import rng_service
 
 class Milestone:
     def __init__(self, description: str, target_type: str, target_value: Any, completed: bool = False):
@@ -27,7 +27,7 @@ class Milestone:
 
 class Ambition:
     def __init__(self, name: str, description: str, milestones: List[Milestone]):
-        self.id = str(uuid.uuid4())
+        self.id = rng_service.new_id()
         self.name = name
         self.description = description
         self.milestones = milestones
@@ -63,7 +63,7 @@ class Ambition:
             description=data.get('description', ''),
             milestones=[Milestone.from_dict(m) for m in data.get('milestones', [])]
         )
-        ambition.id = data.get('id', str(uuid.uuid4()))
+        ambition.id = data.get('id') or ambition.id
         ambition.current_milestone_idx = data.get('current_milestone_idx', 0)
         ambition.is_completed = data.get('is_completed', False)
         return ambition
@@ -1,4 +1,3 @@
-import random
 from typing import List, Dict, Optional
 from world import World, CharacterSheet, Object
 from ambition_model import Ambition, Milestone
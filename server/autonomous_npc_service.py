@@ -8,13 +8,149 @@ The system works alongside the existing GOAP planner by providing more nuanced
 behavioral triggers and personality-driven action selection.
 """
 
+from dataclasses import dataclass, field
 from typing import List, Dict, Optional
 from world import World, CharacterSheet, Room
-import random
+import rng_service
+import world_clock
 import ambition_service
+import distance_fields
+import room_index
 
 
-def evaluate_npc_autonomy(world: World, npc_name: str, current_room_id: str) -> List[Dict]:
+@dataclass
+class RoomPerception:
+    """What an NPC can observe in a room, gathered in one pass.
+
+    Every evaluator used to re-scan room.players, room.npcs and room.objects for
+    each NPC; a busy room got scanned hundreds of times per tick. The world tick
+    now builds one snapshot per room and shares it with every NPC in that room.
+    Per-NPC questions ("is anyone threatening ME?") are answered from the shared
+    data by the small methods below, which just exclude the asking NPC.
+    """
+    room_id: str
+    npc_names: List[str] = field(default_factory=list)
+    player_names: List[str] = field(default_factory=list)
+    # Players whose target is a given NPC name, plus whether any player is hostile overall
+    player_targets: set = field(default_factory=set)
+    aggressive_player_present: bool = False
+    aggressive_npcs: set = field(default_factory=set)
+    valuables: List = field(default_factory=list)
+    unguarded_valuables: List = field(default_factory=list)
+    npc_traders: List[str] = field(default_factory=list)
+    players_needing_help: List[str] = field(default_factory=list)
+    # Crimes from the last minute, newest first
+    recent_crimes: List[Dict] = field(default_factory=list)
+    hungry_npcs: set = field(default_factory=set)
+    thirsty_npcs: set = field(default_factory=set)
+    conflict: bool = False
+    safe_exits: List[str] = field(default_factory=list)
+
+    def threat_to(self, npc_name: str) -> bool:
+        """True if a player or another NPC in the room threatens npc_name."""
+        if self.aggressive_player_present or npc_name in self.player_targets:
+            return True
+        return any(other != npc_name for other in self.aggressive_npcs)
+
+    def traders_for(self, npc_name: str) -> List[str]:
+        """Players first, then other merchant-minded NPCs."""
+        return self.player_names + [n for n in self.npc_traders if n != npc_name]
+
+    def witnesses_for(self, npc_name: str) -> int:
+        """Players plus every NPC other than npc_name."""
+        others = len(self.npc_names) - (1 if npc_name in self.npc_names else 0)
+        return len(self.player_names) + others
+
+    def crime_for(self, npc_name: str) -> Optional[Dict]:
+        """Newest recent crime not committed by npc_name."""
+        for event in self.recent_crimes:
+            perp = event.get('actor_name')
+            if perp != npc_name:  # Don't report self
+                return {
+                    'type': event.get('type'),
+                    'perpetrator': perp,
+                    'victim': event.get('target_name'),
+                    'timestamp': event.get('timestamp')
+                }
+        return None
+
+    def competitors_for(self, npc_name: str, sheet: CharacterSheet) -> List[str]:
+        """Other NPCs sharing npc_name's urgent hunger or thirst."""
+        hungry = sheet.hunger < 40
+        thirsty = sheet.thirst < 40
+        if not (hungry or thirsty):
+            return []
+        return [
+            other for other in self.npc_names
+            if other != npc_name and (
+                (hungry and other in self.hungry_npcs) or (thirsty and other in self.thirsty_npcs)
+            )
+        ]
+
+
+def build_room_perception(world: World, room: Room) -> RoomPerception:
+    """Scan a room once and capture everything the evaluators look at."""
+    perception = RoomPerception(room_id=getattr(room, 'id', ''))
+    perception.npc_names = list(room.npcs or set())
+
+    for player_sid in list(room.players or set()):
+        player = world.players.get(player_sid)
+        if not player:
+            continue
+        if getattr(player, 'in_combat', False):
+            perception.conflict = True
+        if not player.sheet:
+            continue
+        perception.player_names.append(player.sheet.display_name)
+        target = getattr(player, 'target', None)
+        if target:
+            perception.player_targets.add(target)
+        if getattr(player.sheet, 'aggression', 0) > 80:
+            perception.aggressive_player_present = True
+        # Default to full health if 'hp' missing to avoid false positives
+        hp = getattr(player.sheet, 'hp', 100)
+        max_hp = getattr(player.sheet, 'max_hp', 100)
+        if max_hp > 0 and (hp / max_hp) < 0.5:
+            perception.players_needing_help.append(player.sheet.display_name)
+
+    for other_npc in perception.npc_names:
+        other_sheet = world.npc_sheets.get(other_npc)
+        if not other_sheet:
+            continue
+        if other_sheet.aggression > 70:
+            perception.aggressive_npcs.add(other_npc)
+        if other_sheet.wealth_desire > 40 or 'merchant' in other_sheet.description.lower():
+            perception.npc_traders.append(other_npc)
+        if other_sheet.hunger < 40:
+            perception.hungry_npcs.add(other_npc)
+        if other_sheet.thirst < 40:
+            perception.thirsty_npcs.add(other_npc)
+        if getattr(other_sheet, 'in_combat', False):
+            perception.conflict = True
+
+    perception.valuables = room_index.find(room, 'valuable')
+    perception.unguarded_valuables = room_index.find(
+        room, 'unowned', lambda o: (getattr(o, 'value', None) or 0) > 5
+    )
+
+    # MVP: Check for recent events in room logs if available
+    recent_threshold = world_clock.now() - 60  # Last minute
+    for event in reversed(getattr(room, 'events', None) or []):
+        if event.get('timestamp', 0) < recent_threshold:
+            break
+        if event.get('type') in ('theft', 'assault', 'murder'):
+            perception.recent_crimes.append(event)
+
+    perception.safe_exits = _find_safe_exits(world, room)
+    return perception
+
+
+def evaluate_npc_autonomy(
+    world: World,
+    npc_name: str,
+    current_room_id: str,
+    perception: Optional[RoomPerception] = None,
+) -> List[Dict]:
     """
     Make autonomous decisions for an NPC based on their enhanced needs and personality.
     
@@ -26,6 +162,7 @@ def evaluate_npc_autonomy(world: World, npc_name: str, current_room_id: str) ->
         world: The game world
         npc_name: Name of the NPC to evaluate
         current_room_id: ID of the room the NPC is currently in
+        perception: Shared snapshot of the room (built here when omitted)
         
     Returns:
         List of action dictionaries with 'tool', 'args', and 'priority' keys
@@ -39,20 +176,23 @@ def evaluate_npc_autonomy(world: World, npc_name: str, current_room_id: str) ->
     if not room:
         return []
     
+    if perception is None or perception.room_id != current_room_id:
+        perception = build_room_perception(world, room)
+    
     actions = []
     
     # Evaluate enhanced needs (beyond basic hunger/thirst/sleep/socialization)
-    actions.extend(_evaluate_safety_needs(world, sheet, npc_name, room))
-    actions.extend(_evaluate_wealth_desires(world, sheet, npc_name, room))
-    actions.extend(_evaluate_social_status_needs(world, sheet, npc_name, room))
+    actions.extend(_evaluate_safety_needs(world, sheet, npc_name, room, perception))
+    actions.extend(_evaluate_wealth_desires(world, sheet, npc_name, room, perception))
+    actions.extend(_evaluate_social_status_needs(world, sheet, npc_name, room, perception))
     
     # Evaluate faction combat
-    actions.extend(_evaluate_faction_combat(world, sheet, npc_name, room))
+    actions.extend(_evaluate_faction_combat(world, sheet, npc_name, room, perception))
 
     # Evaluate personality-driven behaviors
-    actions.extend(_evaluate_responsibility_behaviors(world, sheet, npc_name, room))
-    actions.extend(_evaluate_aggression_behaviors(world, sheet, npc_name, room))
-    actions.extend(_evaluate_curiosity_behaviors(world, sheet, npc_name, room))
+    actions.extend(_evaluate_responsibility_behaviors(world, sheet, npc_name, room, perception))
+    actions.extend(_evaluate_aggression_behaviors(world, sheet, npc_name, room, perception))
+    actions.extend(_evaluate_curiosity_behaviors(world, sheet, npc_name, room, perception))
     
     # Evaluate Self-Actualization (Ambitions)
     # This internally checks "Maslow's Gate" (hunger/safety thresholds)
@@ -64,14 +204,16 @@ def evaluate_npc_autonomy(world: World, npc_name: str, current_room_id: str) ->
     return actions
 
 
-def _evaluate_safety_needs(world: World, sheet: CharacterSheet, npc_name: str, room: Room) -> List[Dict]:
+def _evaluate_safety_needs(
+    world: World, sheet: CharacterSheet, npc_name: str, room: Room, perception: RoomPerception
+) -> List[Dict]:
     """Evaluate safety-related autonomous behaviors."""
     actions = []
     
     # If safety is low, NPCs should seek secure areas or avoid threats
     if sheet.safety < 30:
         # High priority: flee from dangerous situations
-        if _has_dangerous_players_or_npcs(world, room, npc_name):
+        if perception.threat_to(npc_name):
             actions.append({
                 'tool': 'flee_danger',
                 'args': {'reason': 'threat_avoidance'},
@@ -80,11 +222,11 @@ def _evaluate_safety_needs(world: World, sheet: CharacterSheet, npc_name: str, r
             })
         
         # Medium priority: seek safe areas (rooms with guards, friendly NPCs)
-        safe_exits = _find_safe_exits(world, room)
+        safe_exits = perception.safe_exits
         if safe_exits:
             actions.append({
                 'tool': 'move_to_safety',
-                'args': {'target_room': random.choice(safe_exits)},
+                'args': {'target_room': rng_service.get_rng('autonomy').choice(safe_exits)},
                 'priority': 60,
                 'description': f'{npc_name} seeks a safer location'
             })
@@ -92,13 +234,15 @@ def _evaluate_safety_needs(world: World, sheet: CharacterSheet, npc_name: str, r
     return actions
 
 
-def _evaluate_wealth_desires(world: World, sheet: CharacterSheet, npc_name: str, room: Room) -> List[Dict]:
+def _evaluate_wealth_desires(
+    world: World, sheet: CharacterSheet, npc_name: str, room: Room, perception: RoomPerception
+) -> List[Dict]:
     """Evaluate wealth accumulation behaviors based on personality and needs."""
     actions = []
     
     # NPCs with high wealth desire and low responsibility might steal
     if sheet.wealth_desire > 70 and sheet.responsibility < 40:
-        valuable_objects = _find_valuable_objects_in_room(room)
+        valuable_objects = perception.valuables
         if valuable_objects and sheet.currency < 50:  # Only if actually poor
             target_obj = max(valuable_objects, key=lambda obj: getattr(obj, 'value', 0))
             actions.append({
@@ -111,7 +255,7 @@ def _evaluate_wealth_desires(world: World, sheet: CharacterSheet, npc_name: str,
     # NPCs with moderate wealth desire might engage in legitimate trade
     elif sheet.wealth_desire > 50:
         # Look for trading opportunities with players or merchant NPCs
-        potential_traders = _find_potential_traders(world, room, npc_name)
+        potential_traders = perception.traders_for(npc_name)
         if potential_traders:
             actions.append({
                 'tool': 'initiate_trade',
@@ -123,7 +267,9 @@ def _evaluate_wealth_desires(world: World, sheet: CharacterSheet, npc_name: str,
     return actions
 
 
-def _evaluate_social_status_needs(world: World, sheet: CharacterSheet, npc_name: str, room: Room) -> List[Dict]:
+def _evaluate_social_status_needs(
+    world: World, sheet: CharacterSheet, npc_name: str, room: Room, perception: RoomPerception
+) -> List[Dict]:
     """Evaluate social status and reputation-seeking behaviors."""
     actions = []
     
@@ -139,7 +285,7 @@ def _evaluate_social_status_needs(world: World, sheet: CharacterSheet, npc_name:
             })
         
         # Look for helping opportunities to build reputation
-        players_in_need = _find_players_needing_help(world, room)
+        players_in_need = perception.players_needing_help
         if players_in_need:
             actions.append({
                 'tool': 'offer_help',
@@ -151,7 +297,9 @@ def _evaluate_social_status_needs(world: World, sheet: CharacterSheet, npc_name:
     return actions
 
 
-def _evaluate_faction_combat(world: World, sheet: CharacterSheet, npc_name: str, room: Room) -> List[Dict]:
+def _evaluate_faction_combat(
+    world: World, sheet: CharacterSheet, npc_name: str, room: Room, perception: RoomPerception
+) -> List[Dict]:
     """Evaluate faction-based combat triggers."""
     actions = []
     
@@ -163,7 +311,7 @@ def _evaluate_faction_combat(world: World, sheet: CharacterSheet, npc_name: str,
     npc_faction = world.factions[npc_faction_id]
     
     # Check for rival NPCs in the room
-    for other_npc_name in room.npcs:
+    for other_npc_name in perception.npc_names:
         if other_npc_name == npc_name:
             continue
             
@@ -199,7 +347,9 @@ def _evaluate_faction_combat(world: World, sheet: CharacterSheet, npc_name: str,
     return actions
 
 
-def _evaluate_responsibility_behaviors(world: World, sheet: CharacterSheet, npc_name: str, room: Room) -> List[Dict]:
+def _evaluate_responsibility_behaviors(
+    world: World, sheet: CharacterSheet, npc_name: str, room: Room, perception: RoomPerception
+) -> List[Dict]:
     """
     Evaluate behaviors driven by the responsibility trait (moral compass).
     Low responsibility = more likely to break rules, high = law-abiding.
@@ -208,9 +358,9 @@ def _evaluate_responsibility_behaviors(world: World, sheet: CharacterSheet, npc_
     
     if sheet.responsibility < 30:
         # Low responsibility NPCs might engage in petty crimes
-        if _witnesses_present(world, room, npc_name) < 2:  # Avoid acting with too many witnesses
+        if perception.witnesses_for(npc_name) < 2:  # Avoid acting with too many witnesses
             # Look for minor theft opportunities
-            unguarded_items = _find_unguarded_valuable_items(room)
+            unguarded_items = perception.unguarded_valuables
             if unguarded_items:
                 actions.append({
                     'tool': 'petty_theft',
@@ -221,7 +371,7 @@ def _evaluate_responsibility_behaviors(world: World, sheet: CharacterSheet, npc_
     
     elif sheet.responsibility > 70:
         # High responsibility NPCs might intervene in crimes or help maintain order
-        criminal_activity = _detect_criminal_activity(world, room, npc_name)
+        criminal_activity = perception.crime_for(npc_name)
         if criminal_activity:
             actions.append({
                 'tool': 'report_crime',
@@ -233,13 +383,15 @@ def _evaluate_responsibility_behaviors(world: World, sheet: CharacterSheet, npc_
     return actions
 
 
-def _evaluate_aggression_behaviors(world: World, sheet: CharacterSheet, npc_name: str, room: Room) -> List[Dict]:
+def _evaluate_aggression_behaviors(
+    world: World, sheet: CharacterSheet, npc_name: str, room: Room, perception: RoomPerception
+) -> List[Dict]:
     """Evaluate combat and conflict behaviors based on aggression trait."""
     actions = []
     
     if sheet.aggression > 60:
         # Aggressive NPCs might start conflicts over resources
-        competitors = _find_resource_competitors(world, room, npc_name)
+        competitors = perception.competitors_for(npc_name, sheet)
         if competitors and sheet.confidence > 40:  # Need some confidence to act on aggression
             actions.append({
                 'tool': 'challenge_competitor',
@@ -250,7 +402,7 @@ def _evaluate_aggression_behaviors(world: World, sheet: CharacterSheet, npc_name
     
     elif sheet.aggression < 20:
         # Pacifist NPCs might flee from any conflict
-        if _conflict_detected_in_room(world, room):
+        if perception.conflict:
             actions.append({
                 'tool': 'flee_conflict',
                 'args': {'destination': 'anywhere_safe'},
@@ -261,7 +413,9 @@ def _evaluate_aggression_behaviors(world: World, sheet: CharacterSheet, npc_name
     return actions
 
 
-def _evaluate_curiosity_behaviors(world: World, sheet: CharacterSheet, npc_name: str, room: Room) -> List[Dict]:
+def _evaluate_curiosity_behaviors(
+    world: World, sheet: CharacterSheet, npc_name: str, room: Room, perception: RoomPerception
+) -> List[Dict]:
     """Evaluate exploration and investigation behaviors based on curiosity."""
     actions = []
     
@@ -292,25 +446,14 @@ def _evaluate_curiosity_behaviors(world: World, sheet: CharacterSheet, npc_name:
 
 # Helper functions for behavioral evaluation
 
-def _has_dangerous_players_or_npcs(world: World, room: Room, npc_name: str) -> bool:
-    """Check if there are threatening entities in the room."""
-    # Look for players or NPCs with high aggression or recent hostile actions
-    for player_sid in room.players:
-        player = world.players.get(player_sid)
-        if player and _is_threatening_to_npc(player, npc_name):
-            return True
-    
-    for other_npc in room.npcs:
-        if other_npc != npc_name:
-            other_sheet = world.npc_sheets.get(other_npc)
-            if other_sheet and other_sheet.aggression > 70:
-                return True
-    
-    return False
-
-
 def _find_safe_exits(world: World, room: Room) -> List[str]:
     """Find exits leading to safer areas (rooms with guards, etc.)."""
+    fields = distance_fields.get_distance_fields()
+    if fields.is_current(world):
+        # Shared 'safe' distance field: first hop toward the nearest guarded room
+        hop, _dist = fields.next_hop('safe', room.id, world)
+        return [hop] if hop else []
+
     safe_exits = []
     
     # Check doors and stairs for rooms with security
@@ -322,139 +465,6 @@ def _find_safe_exits(world: World, room: Room) -> List[str]:
     return safe_exits
 
 
-def _find_valuable_objects_in_room(room: Room) -> List:
-    """Find objects in the room that have significant value."""
-    valuable_objects = []
-    for obj in (room.objects or {}).values():
-        obj_value = getattr(obj, 'value', None)
-        if obj_value is not None and obj_value > 10:  # Threshold for "valuable"
-            valuable_objects.append(obj)
-    return valuable_objects
-
-
-def _find_potential_traders(world: World, room: Room, npc_name: str) -> List[str]:
-    """Find other entities in the room who might be interested in trading."""
-    traders = []
-    
-    # Look for players (always potential traders)
-    for player_sid in room.players:
-        player = world.players.get(player_sid)
-        if player:
-            traders.append(player.sheet.display_name)
-    
-    # Look for merchant NPCs or NPCs with high wealth desire
-    for other_npc in room.npcs:
-        if other_npc != npc_name:
-            other_sheet = world.npc_sheets.get(other_npc)
-            if other_sheet and (other_sheet.wealth_desire > 40 or 'merchant' in other_sheet.description.lower()):
-                traders.append(other_npc)
-    
-    return traders
-
-
-def _find_players_needing_help(world: World, room: Room) -> List[str]:
-    """Find players who might need assistance (low health, etc.)."""
-    # Simplified - in a full implementation, this would check player status
-    players_needing_help = []
-    for player_sid in room.players:
-        player = world.players.get(player_sid)
-        if player:
-            # Check for low health (assuming stats exist in sheet or directly on player)
-            # Default to full health if 'hp' missing to avoid false positives
-            hp = getattr(player.sheet, 'hp', 100)
-            max_hp = getattr(player.sheet, 'max_hp', 100)
-            if max_hp > 0 and (hp / max_hp) < 0.5:
-                players_needing_help.append(player.sheet.display_name)
-    return players_needing_help
-
-
-def _witnesses_present(world: World, room: Room, npc_name: str) -> int:
-    """Count potential witnesses to criminal activity."""
-    witnesses = 0
-    witnesses += len(room.players)  # All players are witnesses
-    witnesses += len([npc for npc in room.npcs if npc != npc_name])  # Other NPCs
-    return witnesses
-
-
-def _find_unguarded_valuable_items(room: Room) -> List:
-    """Find valuable items that aren't being watched."""
-    # Simplified - look for valuable objects not owned by anyone present
-    unguarded = []
-    for obj in (room.objects or {}).values():
-        obj_value = getattr(obj, 'value', None)
-        if obj_value is not None and obj_value > 5 and not getattr(obj, 'owner_id', None):
-            unguarded.append(obj)
-    return unguarded
-
-
-def _detect_criminal_activity(world: World, room: Room, npc_name: str) -> Optional[Dict]:
-    """Detect if criminal activity is happening in the room."""
-    # MVP: Check for recent events in room logs if available
-    if not hasattr(room, 'events'):
-        return None
-        
-    import time
-    recent_threshold = time.time() - 60 # Last minute
-    
-    # Iterate recent events in reverse
-    for event in reversed(getattr(room, 'events', [])):
-        if event.get('timestamp', 0) < recent_threshold:
-            break
-            
-        evt_type = event.get('type')
-        if evt_type in ('theft', 'assault', 'murder'):
-            # Found a crime!
-            perp = event.get('actor_name')
-            if perp != npc_name: # Don't report self
-                return {
-                    'type': evt_type,
-                    'perpetrator': perp,
-                    'victim': event.get('target_name'),
-                    'timestamp': event.get('timestamp')
-                }
-                
-    return None
-
-
-def _find_resource_competitors(world: World, room: Room, npc_name: str) -> List[str]:
-    """Find other entities competing for the same resources."""
-    competitors = []
-    
-    # Look for other NPCs with similar high needs
-    sheet = world.npc_sheets.get(npc_name)
-    if not sheet:
-        return competitors
-    
-    for other_npc in room.npcs:
-        if other_npc != npc_name:
-            other_sheet = world.npc_sheets.get(other_npc)
-            if other_sheet:
-                # Check if they have similar urgent needs
-                if (sheet.hunger < 40 and other_sheet.hunger < 40) or \
-                   (sheet.thirst < 40 and other_sheet.thirst < 40):
-                    competitors.append(other_npc)
-    
-    return competitors
-
-
-def _conflict_detected_in_room(world: World, room: Room) -> bool:
-    """Check if there's ongoing conflict in the room."""
-    # Check if any character in the room is in a combat state
-    # 1. Players
-    for psid in room.players:
-        p = world.players.get(psid)
-        if p and getattr(p, 'in_combat', False):
-            return True
-            
-    # 2. NPCs
-    for n in room.npcs:
-        s = world.npc_sheets.get(n)
-        if s and getattr(s, 'in_combat', False):
-            return True
-            
-    return False
-
-
 def _find_unexplored_objects(sheet: CharacterSheet, room: Room) -> List:
     """Find objects the NPC hasn't investigated before."""
     # Check memories to see what objects have been investigated
@@ -493,33 +503,10 @@ def _find_unexplored_exits(sheet: CharacterSheet, room: Room) -> List[str]:
     return unexplored
 
 
-def _is_threatening_to_npc(player, npc_name: str) -> bool:
-    """Determine if a player poses a threat to the NPC."""
-    if not player or not player.sheet:
-        return False
-        
-    # 1. Active aggression (in combat with this NPC)
-    if getattr(player, 'target', None) == npc_name:
-        return True
-        
-    # 2. Reputation/Aggression check
-    # If they are known to be aggressive (e.g. holding a weapon + high aggression stat)
-    # Simplified: Check if holding weapon (if equitable system exists) or just check 'aggression' stat
-    player_aggression = getattr(player.sheet, 'aggression', 0)
-    if player_aggression > 80:
-        return True
-        
-    return False
-
-
 def _is_safe_room(world: World, room: Room) -> bool:
     """Determine if a room is considered safe."""
     # Look for guards, safe tags, etc.
-    for npc_name in room.npcs:
-        npc_sheet = world.npc_sheets.get(npc_name)
-        if npc_sheet and ('guard' in npc_sheet.description.lower() or npc_sheet.responsibility > 80):
-            return True
-    return False
+    return distance_fields.is_safe_room(world, room)
 
 
 def add_memory(sheet: CharacterSheet, memory_type: str, details: Dict, max_memories: int = 50):
@@ -532,11 +519,9 @@ def add_memory(sheet: CharacterSheet, memory_type: str, details: Dict, max_memor
         details: Dictionary of memory details
         max_memories: Maximum number of memories to keep (oldest are removed)
     """
-    import time
-    
     memory = {
         'type': memory_type,
-        'timestamp': time.time(),
+        'timestamp': world_clock.now(),
         **details
     }
     
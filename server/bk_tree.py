@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+"""BK-tree — edit-distance index for "did you mean" suggestions.
+
+When a typed name matches nothing, the fuzzy resolver (id_parse_utils) looks
+for names within a small Levenshtein distance of it ('tavrn' -> 'tavern',
+'goblim' -> 'goblin'). A BK-tree keeps each name under its parent keyed by
+their distance, so by the triangle inequality a radius-r search only descends
+into children whose key is within r of the query's distance to the parent,
+skipping most of the tree.
+
+- edit_distance(): Levenshtein distance, bit-parallel (Myers 1999) so one
+  comparison is a few integer operations per character
+- BKTree: insert-only (the resolver filters results against the live name
+  set and rebuilds once removed names pile up)
+- typo_radius(): how far a typed fragment may be from a suggestion
+"""
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+def _match_masks(pattern: str) -> Dict[str, int]:
+    masks: Dict[str, int] = {}
+    for i, ch in enumerate(pattern):
+        masks[ch] = masks.get(ch, 0) | (1 << i)
+    return masks
+
+
+class _Pattern:
+    """One string prepared for repeated distance computations against others."""
+
+    __slots__ = ('text', 'masks', 'full', 'top')
+
+    def __init__(self, text: str):
+        self.text = text
+        self.masks = _match_masks(text)
+        self.full = (1 << len(text)) - 1
+        self.top = 1 << (len(text) - 1) if text else 0
+
+    def distance(self, other: str) -> int:
+        m = len(self.text)
+        if m == 0:
+            return len(other)
+        if other == self.text:
+            return 0
+        masks, full, top = self.masks, self.full, self.top
+        pv, mv, score = full, 0, m
+        for ch in other:
+            eq = masks.get(ch, 0)
+            xv = eq | mv
+            xh = (((eq & pv) + pv) ^ pv) | eq
+            ph = mv | ~(xh | pv)
+            mh = pv & xh
+            if ph & top:
+                score += 1
+            elif mh & top:
+                score -= 1
+            ph = ((ph << 1) | 1) & full
+            mh = (mh << 1) & full
+            pv = (mh | ~(xv | ph)) & full
+            mv = ph & xv
+        return score
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance between a and b."""
+    return _Pattern(a).distance(b)
+
+
+def typo_radius(typed: str) -> int:
+    """Edit distance allowed for suggestions: none under 3 chars, 1 up to 7, then 2."""
+    n = len(typed)
+    if n < 3:
+        return 0
+    return 1 if n <= 7 else 2
+
+
+class BKTree:
+    """Insert-only BK-tree over strings."""
+
+    __slots__ = ('_root', 'words')
+
+    def __init__(self, words: Iterable[str] = ()):
+        # node: (word, {distance: child node})
+        self._root: Optional[Tuple[str, Dict[int, tuple]]] = None
+        self.words: Set[str] = set()
+        for word in words:
+            self.add(word)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def add(self, word: str) -> None:
+        if word in self.words:
+            return
+        self.words.add(word)
+        if self._root is None:
+            self._root = (word, {})
+            return
+        pattern = _Pattern(word)
+        node = self._root
+        while True:
+            d = pattern.distance(node[0])
+            child = node[1].get(d)
+            if child is None:
+                node[1][d] = (word, {})
+                return
+            node = child
+
+    def search(self, word: str, radius: int) -> List[Tuple[int, str]]:
+        """(distance, word) for every stored word within radius of word."""
+        if self._root is None or radius < 0:
+            return []
+        pattern = _Pattern(word)
+        found: List[Tuple[int, str]] = []
+        stack = [self._root]
+        while stack:
+            text, children = stack.pop()
+            d = pattern.distance(text)
+            if d <= radius:
+                found.append((d, text))
+            lo, hi = d - radius, d + radius
+            for key, child in children.items():
+                if lo <= key <= hi:
+                    stack.append(child)
+        return found
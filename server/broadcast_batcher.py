@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+"""Broadcast Batcher — one room message per tick instead of one per NPC action.
+
+During a world tick every NPC action may broadcast to its room (emotes, says,
+wake-ups, grumbles, hesitations). With many NPCs that is dozens of emits per
+player per tick. While the tick engine has the batcher open, tick broadcasts
+are handed here instead of being sent; when the tick ends each room's messages
+are flushed as one ordered list of payloads.
+
+The flush does not invent a wire format: each list goes out through the
+outbound buffer's negotiation (see outbound_buffer), so clients that announced
+{"batch": true} get one 'messages' event per room per tick and every other
+client gets the same payloads as individual 'message' events. Messages are
+only grouped while their exclude_sid matches; a change of exclude_sid starts a
+new list for the room so no recipient ever sees a line meant to skip them.
+
+Only what the tick itself sends is batched. Tick code, including server.py's
+NPC action helpers, broadcasts through GameLoopContext.tick_broadcast, which
+offers the payload here first; add() only accepts
+payloads from the thread (greenlet, under eventlet) that opened the batcher.
+server.broadcast_to_room never batches, so player says, arrivals and combat
+lines sent by concurrent handlers during a tick go out at once and are never
+marked ambient.
+"""
+
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# send(room_id, payloads, exclude_sid) delivers one room's ordered payloads
+Send = Callable[[str, List[dict], Optional[str]], None]
+
+
+class RoomBroadcastBatcher:
+    """Buffers room broadcasts while open and flushes them per room."""
+
+    def __init__(self):
+        self._depth = 0
+        # Thread/greenlet that opened the batcher; only its broadcasts are held
+        self._owner: Optional[int] = None
+        # room_id -> [(payload, exclude_sid)], rooms in first-message order
+        self._pending: Dict[str, List[Tuple[dict, Optional[str]]]] = {}
+        self.stats = {'flushes': 0, 'messages': 0, 'payloads': 0}
+
+    @property
+    def active(self) -> bool:
+        return self._depth > 0
+
+    def begin(self) -> None:
+        """Start buffering for the calling thread (nested begin/end pairs flush on the outermost end)."""
+        if self._depth == 0:
+            self._owner = threading.get_ident()
+        self._depth += 1
+
+    def add(self, room_id: str, payload: dict, exclude_sid: Optional[str] = None) -> bool:
+        """Buffer the opener's broadcast if batching is open. Returns False when it must be sent now."""
+        if self._depth <= 0 or threading.get_ident() != self._owner:
+            return False
+        self._pending.setdefault(room_id, []).append((payload, exclude_sid))
+        return True
+
+    def end(self, send: Send) -> int:
+        """Close a begin(); on the outermost one flush through send. Returns payloads sent."""
+        if self._depth <= 0:
+            return 0
+        self._depth -= 1
+        if self._depth > 0:
+            return 0
+        self._owner = None
+        return self.flush(send)
+
+    def flush(self, send: Send) -> int:
+        """Send every buffered room's messages now (one list per exclude run)."""
+        pending, self._pending = self._pending, {}
+        sent = 0
+        for room_id, items in pending.items():
+            run: List[dict] = []
+            run_exclude: Optional[str] = None
+            for payload, exclude_sid in items:
+                if run and exclude_sid != run_exclude:
+                    send(room_id, run, run_exclude)
+                    sent += 1
+                    run = []
+                run.append(payload)
+                run_exclude = exclude_sid
+            if run:
+                send(room_id, run, run_exclude)
+                sent += 1
+            self.stats['messages'] += len(items)
+        if pending:
+            self.stats['flushes'] += 1
+            self.stats['payloads'] += sent
+        return sent
+
+    def discard(self) -> None:
+        """Drop buffered messages and close batching (used when resetting state)."""
+        self._depth = 0
+        self._owner = None
+        self._pending.clear()
+
+
+# Process-wide batcher used by the world tick and server.broadcast_to_room
+_batcher = RoomBroadcastBatcher()
+
+
+def get_room_batcher() -> RoomBroadcastBatcher:
+    """Return the process-wide room broadcast batcher."""
+    return _batcher
@@ -10,8 +10,8 @@ High-level rules:
 - Yielded NPCs should not attack further (router will gate).
 """
 from __future__ import annotations
-import random
-import time
+import rng_service
+import world_clock
 from typing import List, Tuple, Optional
 
 from safe_utils import safe_call
@@ -133,7 +133,7 @@ def attack(world: World, state_path: str, attacker_sid: str, target_token: str,
             'actor_name': attacker_name,
             'target_name': target_sheet.display_name,
             'damage': dmg,
-            'timestamp': time.time()
+            'timestamp': world_clock.now()
         })
 
     # Death check
@@ -153,7 +153,7 @@ def attack(world: World, state_path: str, attacker_sid: str, target_token: str,
             critical_hp = target_sheet.hp <= int(max_hp * 0.3)
             wounded_hp = target_sheet.hp <= int(max_hp * 0.5)
             
-            morale_roll = random.randint(1, 100) + target_sheet.morale + target_sheet.confidence - target_sheet.aggression
+            morale_roll = rng_service.get_rng('combat').randint(1, 100) + target_sheet.morale + target_sheet.confidence - target_sheet.aggression
             
             if critical_hp or (wounded_hp and morale_roll < 50):  # simple threshold heuristic
                 target_sheet.yielded = True
@@ -191,13 +191,14 @@ def flee(world: World, state_path: str, sid: str, sessions: dict, admins: set, b
     if not adjacent_ids:
         return True, "No exits to flee through!", emits, broadcasts
 
-    dest_id = random.choice(list(adjacent_ids))
+    # Sorted so the pick depends only on the seed, not on set ordering
+    dest_id = rng_service.get_rng('combat').choice(sorted(adjacent_ids))
     if dest_id not in world.rooms:
         return True, "Destination room not found.", emits, broadcasts
 
     # Move player
     old_room_id = player.room_id
-    player.room_id = dest_id
+    world.move_player(sid, dest_id)
     emits.append({"type": "system", "content": f"You flee to {world.rooms[dest_id].description}."})
     broadcasts.append((MESSAGE_OUT, {"type": "system", "content": f"{sheet.display_name} flees from combat!"}))
 
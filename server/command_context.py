@@ -82,8 +82,18 @@ class CommandContext:
     # Misc constants / utilities used by handlers (injected for testability)
     broadcast_to_room: BroadcastFn
 
+    # Per-client send through the server's bounded send queues: (sid, event, payload)
+    send_to_sid: Callable[[str, str, Any], None] | None = None
+
     # Optional: dice / other utilities could be added later.
 
+    def send_to(self, sid: str, payload: Dict[str, Any]) -> None:
+        """Send a message_out payload to one client (not the one being served)."""
+        if self.send_to_sid is not None:
+            self.send_to_sid(sid, self.message_out, payload)
+        else:
+            self.socketio.emit(self.message_out, payload, to=sid)
+
     def mark_world_dirty(self) -> None:
         """Request a debounced save after mutation (ignore failures)."""
         try:  # pragma: no cover - defensive
@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+"""Command Metrics — which commands and flows are expensive?
+
+Every slash command (through the command registry middleware) and every chat
+flow handler (setup/trade/template wizards, auth, free-play routers) is timed
+here. Per name we keep:
+
+- call and error counters, total and max latency
+- a fixed-bucket latency histogram, so p50/p95/p99 cost constant memory no
+  matter how much traffic a command sees
+
+Calls slower than MUD_SLOW_COMMAND_MS (default 250) are also kept in a bounded
+slow-command log (command, sid, duration, world size) and written as one JSON
+log line, like over-budget ticks in tick_profiler.
+
+Names: slash commands are '/<name>' ('/npc', '/room'), wizard flows are
+'flow:<mode>' ('flow:trade'), free-play lines are 'play:<router>'
+('play:movement' for look/move, 'play:dialogue' for speech).
+
+Admins read the numbers with /cmdstats; server.py also serves the snapshot as
+JSON at /metrics/commands, only when MUD_METRICS_TOKEN is set (the slow log
+names sids).
+
+timed() also hands each call's busy time to the observers registered with
+observe() (rate_limiter learns per-command token costs from it when
+MUD_RATE_ADAPTIVE is on). Busy time is the call's latency minus the time spent
+inside paused() blocks, which wrap model calls (ai_utils.generate_content) and
+AI budget waits (ai_budget). Thread CPU time would not do: under eventlet every
+greenlet shares one OS thread, so a handler yielding on a model call would be
+billed for whatever other handlers and the tick ran meanwhile. Pauses are
+tracked per thread ident, which eventlet's monkey patching makes per greenlet.
+Short yields outside paused() (socket writes) are still counted.
+
+Configuration (env):
+- MUD_SLOW_COMMAND_MS: slow-command threshold in milliseconds (default 250)
+- MUD_SLOW_COMMAND_LOG: slow-command entries kept (default 50)
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+
+_logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0, 2500.0, 5000.0, 10000.0)
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float((os.getenv(name) or str(default)).strip())
+    except Exception:
+        return default
+
+
+class LatencySeries:
+    """Counters plus a bucketed histogram for one command."""
+
+    __slots__ = ('calls', 'errors', 'total_ms', 'max_ms', 'buckets')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def add(self, elapsed_ms: float, error: bool = False) -> None:
+        self.calls += 1
+        if error:
+            self.errors += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.max_ms:
+            self.max_ms = elapsed_ms
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def percentile(self, pct: float) -> float:
+        """Upper bound of the bucket holding the nearest-rank sample (capped at max)."""
+        if self.calls == 0:
+            return 0.0
+        rank = max(1, math.ceil(pct / 100.0 * self.calls))
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                bound = LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else self.max_ms
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'total_ms': round(self.total_ms, 3),
+            'avg_ms': round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+            'p50': round(self.percentile(50), 3),
+            'p95': round(self.percentile(95), 3),
+            'p99': round(self.percentile(99), 3),
+            'max_ms': round(self.max_ms, 3),
+            'buckets': list(self.buckets),
+        }
+
+
+class CommandMetrics:
+    """Per-command latency series and the slow-command log."""
+
+    def __init__(self, slow_ms: Optional[float] = None, slow_log_size: Optional[int] = None):
+        self.slow_ms = float(slow_ms if slow_ms is not None else _env_number('MUD_SLOW_COMMAND_MS', 250))
+        size = int(slow_log_size if slow_log_size is not None else _env_number('MUD_SLOW_COMMAND_LOG', 50))
+        self.slow: Deque[Dict[str, Any]] = deque(maxlen=max(1, size))
+        self.series: Dict[str, LatencySeries] = {}
+        self._world_size: Callable[[], Any] = lambda: None
+        self._observers: List[Callable[[str, float], None]] = []
+        # thread ident -> milliseconds paused inside its innermost timed() call
+        self._paused: Dict[int, float] = {}
+
+    def bind(self, world_size: Callable[[], Any]) -> None:
+        """world_size() describes the world for slow-log entries (only called for slow calls)."""
+        self._world_size = world_size
+
+    def observe(self, fn: Callable[[str, float], None]) -> None:
+        """Call fn(name, busy_ms) after every timed call (registering twice is a no-op)."""
+        if fn not in self._observers:
+            self._observers.append(fn)
+
+    def record(self, name: str, elapsed_ms: float, sid: Optional[str] = None, error: bool = False,
+               busy_ms: Optional[float] = None) -> None:
+        series = self.series.get(name)
+        if series is None:
+            series = self.series[name] = LatencySeries()
+        series.add(elapsed_ms, error)
+        if busy_ms is not None:
+            for fn in self._observers:
+                try:
+                    fn(name, busy_ms)
+                except Exception:
+                    pass
+        if elapsed_ms < self.slow_ms:
+            return
+        try:
+            size = self._world_size()
+        except Exception:
+            size = None
+        entry = {
+            'command': name,
+            'sid': sid,
+            'duration_ms': round(elapsed_ms, 3),
+            'world_size': size,
+            'at': time.time(),
+        }
+        self.slow.append(entry)
+        try:
+            _logger.warning("slow command %s", json.dumps(entry, sort_keys=True))
+        except Exception:
+            pass
+
+    @contextmanager
+    def timed(self, name: str, sid: Optional[str] = None) -> Iterator[None]:
+        """Time the block under name; an exception counts as an error and propagates."""
+        key = threading.get_ident()
+        outer = self._paused.get(key)
+        self._paused[key] = 0.0
+        start = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000.0
+            paused = self._paused.pop(key, 0.0)
+            if outer is not None:
+                # A nested call's pauses are pauses of the enclosing call too
+                self._paused[key] = outer + paused
+            self.record(name, elapsed, sid, error, max(0.0, elapsed - paused))
+
+    @contextmanager
+    def paused(self) -> Iterator[None]:
+        """Exclude the block's time from the enclosing timed() call's busy time."""
+        key = threading.get_ident()
+        if key not in self._paused:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if key in self._paused:
+                self._paused[key] += (time.perf_counter() - start) * 1000.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'slow_ms': self.slow_ms,
+            'bucket_bounds_ms': list(LATENCY_BUCKETS_MS),
+            'commands': {name: s.snapshot() for name, s in sorted(self.series.items())},
+            'slow': list(self.slow),
+        }
+
+    def reset(self) -> None:
+        """Forget recorded calls; observers stay registered."""
+        self.series.clear()
+        self.slow.clear()
+
+
+def middleware(call: Any, next_fn: Callable[[Any], bool]) -> bool:
+    """Command registry middleware: time each slash command as '/<name>'."""
+    with _metrics.timed('/' + call.name, call.sid):
+        return next_fn(call)
+
+
+def format_command_stats(snap: Dict[str, Any], top: int = 10) -> str:
+    """Human-readable report of a CommandMetrics snapshot for admins."""
+    commands = snap.get('commands') or {}
+    if not commands:
+        return "No commands recorded yet."
+    ranked = sorted(commands.items(), key=lambda kv: kv[1].get('p95', 0.0), reverse=True)
+    lines = [f"Command latency (slowest {min(top, len(ranked))} by p95 of {len(ranked)}):"]
+    for name, s in ranked[:top]:
+        lines.append(
+            f"{name}: {s['calls']} calls, p50 {s['p50']:.1f} ms, p95 {s['p95']:.1f} ms, "
+            f"p99 {s['p99']:.1f} ms, max {s['max_ms']:.1f} ms" + (f", {s['errors']} errors" if s['errors'] else "")
+        )
+    slow: List[Dict[str, Any]] = snap.get('slow') or []
+    if slow:
+        lines.append(f"Slow calls (>= {snap.get('slow_ms', 0):g} ms), newest first:")
+        for entry in reversed(slow[-5:]):
+            lines.append(f"  {entry['command']} {entry['duration_ms']:.1f} ms sid={entry.get('sid')} world={entry.get('world_size')}")
+    return "\n".join(lines)
+
+
+# Process-wide metrics shared by the command registry and message handlers
+_metrics = CommandMetrics()
+
+
+def get_command_metrics() -> CommandMetrics:
+    """Return the process-wide command metrics."""
+    return _metrics
+
+
+def paused():
+    """paused() on the process-wide metrics: time inside is not billed to the running command."""
+    return _metrics.paused()
@@ -14,21 +14,30 @@ Key Features:
 - Auto-generated help text from command metadata
 - Support for both slash commands (/cmd) and flow commands (natural language)
 - Preservation of existing message formats for client compatibility
+- O(1) dispatch: names and aliases share one precomputed name -> command map
+- Argument specs compiled once at registration
+- A middleware chain around every command (permission by default; server.py
+  adds command_metrics timing, permadeath gating and rate-limit costs)
 
 Architecture:
 The registry uses a two-phase approach:
 1. Registration phase: Commands register their metadata (name, args, permissions, etc.)
 2. Dispatch phase: Incoming text is matched against registered commands and routed
 
+Middleware are functions `mw(call, next_fn) -> bool` that see a CommandCall and
+either answer it themselves (return True) or pass it on with `next_fn(call)`.
+The chain is composed once, when the registry is built or `use()` is called.
+
 This maintains the existing router contract while eliminating parsing duplication.
 """
 
 import re
 from dataclasses import dataclass, field
-from typing import Any, Callable, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 from enum import Enum
 
 from command_context import CommandContext, EmitFn
+from rate_limiter import adaptive_costs_enabled, check_rate_limit
 
 
 class PermissionLevel(Enum):
@@ -87,6 +96,24 @@ class CommandMetadata:
     # Module/router this belongs to (for organization)
     router: str = ""
 
+    # Router-style handler: called as handler(ctx, sid, cmd, args, raw, emit)
+    # with the raw tokens instead of parsed arguments
+    raw_handler: bool = False
+
+    # Still usable by a dead (permadeath) character
+    allow_dead: bool = False
+
+    # Rate limit cost (rate_limiter.OperationType) charged before the handler runs
+    cost: Any = None
+    rate_key: str = "{cmd}"
+    rate_message: str = "You are sending commands too quickly. Please slow down."
+
+    # Message type of the usage line sent when the arguments do not parse
+    usage_type: str = 'error'
+
+    # Compiled argument spec (filled in at registration)
+    spec: Optional['ArgSpec'] = None
+
     def generate_usage_text(self) -> str:
         """Generate usage text from metadata."""
         if self.subcommands:
@@ -124,28 +151,213 @@ class CommandMetadata:
         return "\n".join(lines)
 
 
+def _parse_number(raw_value: str) -> Any:
+    try:
+        return int(raw_value)
+    except ValueError:
+        try:
+            return float(raw_value)
+        except ValueError:
+            return raw_value  # Return as string if not a number
+
+
+def _parse_string(raw_value: str) -> Any:
+    # Complex types (PLAYER, NPC, ...) stay strings; handlers resolve them with existing utils
+    return raw_value
+
+
+@dataclass(slots=True)
+class ArgSpec:
+    """Argument metadata compiled once: counts plus one parser per position."""
+    names: Tuple[str, ...]
+    parsers: Tuple[Callable[[str], Any], ...]
+    defaults: Tuple[Any, ...]
+    required: Tuple[bool, ...]
+    min_required: int
+
+    @classmethod
+    def compile(cls, arguments: Sequence[CommandArgument]) -> 'ArgSpec':
+        return cls(
+            names=tuple(a.name for a in arguments),
+            parsers=tuple(_parse_number if a.type == ArgumentType.NUMBER else _parse_string for a in arguments),
+            defaults=tuple(a.default for a in arguments),
+            required=tuple(a.required for a in arguments),
+            min_required=sum(1 for a in arguments if a.required),
+        )
+
+    def parse(self, args: List[str]) -> Optional[Dict[str, Any]]:
+        """Parsed arguments, or None when a required one is missing."""
+        if len(args) < self.min_required:
+            return None
+        parsed: Dict[str, Any] = {}
+        count = len(self.names)
+        for i in range(count):
+            if i < len(args):
+                parsed[self.names[i]] = self.parsers[i](args[i])
+            elif self.required[i]:
+                return None
+            else:
+                parsed[self.names[i]] = self.defaults[i]
+        if len(args) > count:
+            parsed['remaining'] = args[count:]
+        return parsed
+
+
+@dataclass(slots=True)
+class CommandCall:
+    """One slash command invocation as seen by the middleware chain."""
+    ctx: CommandContext
+    sid: str | None
+    name: str            # resolved primary name
+    invoked: str         # what the player typed (may be an alias)
+    args: List[str]
+    raw: str
+    emit: EmitFn
+    metadata: CommandMetadata
+    registry: 'CommandRegistry'
+
+
+NextFn = Callable[[CommandCall], bool]
+Middleware = Callable[[CommandCall, NextFn], bool]
+
+
+def _emit_error(call: CommandCall, text: str) -> None:
+    call.emit(call.ctx.message_out, {'type': 'error', 'content': text})
+
+
+def _permission_error(metadata: CommandMetadata, ctx: CommandContext, sid: str | None) -> Optional[str]:
+    if metadata.permission == PermissionLevel.PUBLIC:
+        return None
+    if metadata.permission == PermissionLevel.ADMIN:
+        if sid is None or sid not in ctx.admins:
+            return 'Admin command. Admin rights required.'
+        return None
+    if sid is None:
+        return 'Not connected.'
+    if metadata.permission == PermissionLevel.AUTHENTICATED:
+        if sid not in ctx.sessions:
+            return 'Please log in first.'
+        return None
+    return 'Permission denied.'
+
+
+def permission_middleware(call: CommandCall, next_fn: NextFn) -> bool:
+    err = _permission_error(call.metadata, call.ctx, call.sid)
+    if err:
+        _emit_error(call, err)
+        return True
+    return next_fn(call)
+
+
+PERMADEATH_MESSAGE = 'You are dead (permadeath). Only /help, /who, /look are allowed.'
+
+
+def permadeath_middleware(call: CommandCall, next_fn: NextFn) -> bool:
+    """Dead characters may only run commands registered with allow_dead."""
+    if call.sid and not call.metadata.allow_dead:
+        player = call.ctx.world.players.get(call.sid)
+        if player is not None and getattr(player.sheet, 'is_dead', False):
+            _emit_error(call, PERMADEATH_MESSAGE)
+            return True
+    return next_fn(call)
+
+
+def rate_limit_middleware(call: CommandCall, next_fn: NextFn) -> bool:
+    """Charge the command's registered cost (learnt per command when adaptive) before running it."""
+    meta = call.metadata
+    if meta.cost is not None and call.sid is not None:
+        learnt = {'cost_key': '/' + call.name} if adaptive_costs_enabled() else {}
+        if not check_rate_limit(call.sid, meta.cost, meta.rate_key.format(cmd=call.name), **learnt):
+            _emit_error(call, meta.rate_message.format(cmd=call.name))
+            return True
+    return next_fn(call)
+
+
+DEFAULT_MIDDLEWARE: Tuple[Middleware, ...] = (permission_middleware,)
+
+
 class CommandRegistry:
     """Central registry for all MUD commands."""
     
-    def __init__(self):
+    def __init__(self, middleware: Optional[Sequence[Middleware]] = None):
         self._commands: Dict[str, CommandMetadata] = {}
         self._flow_commands: List[Tuple[re.Pattern, CommandMetadata]] = []
         self._aliases: Dict[str, str] = {}  # alias -> primary_name
+        self._dispatch: Dict[str, CommandMetadata] = {}  # name or alias -> command
+        self._middleware: List[Middleware] = list(DEFAULT_MIDDLEWARE if middleware is None else middleware)
+        self._chain: NextFn = self._compose()
+
+    def _compose(self) -> NextFn:
+        chain: NextFn = self._invoke
+        for mw in reversed(self._middleware):
+            chain = (lambda m, nxt: (lambda call: m(call, nxt)))(mw, chain)
+        return chain
+
+    def use(self, middleware: Middleware) -> None:
+        """Append a middleware (innermost) and recompose the chain."""
+        self._middleware.append(middleware)
+        self._chain = self._compose()
 
     def register_command(self, metadata: CommandMetadata) -> None:
         """Register a command with the registry."""
+        metadata.spec = ArgSpec.compile(metadata.arguments)
         # Register primary name
         self._commands[metadata.name] = metadata
+        self._dispatch[metadata.name] = metadata
+        for alias, target in self._aliases.items():
+            if target == metadata.name:
+                self._dispatch[alias] = metadata
         
         # Register aliases
         for alias in metadata.aliases:
             self._aliases[alias] = metadata.name
+            self._dispatch[alias] = metadata
         
         # Compile flow patterns
         for pattern in metadata.flow_patterns:
             compiled = re.compile(pattern, re.IGNORECASE)
             self._flow_commands.append((compiled, metadata))
 
+    def route(
+        self,
+        names: Sequence[str],
+        handler: Callable[..., bool],
+        description: str = "",
+        permission: PermissionLevel = PermissionLevel.PUBLIC,
+        aliases: Optional[Dict[str, List[str]]] = None,
+        allow_dead: bool = False,
+        costs: Optional[Dict[str, Any]] = None,
+        default_cost: Any = None,
+        rate_key: str = "{cmd}",
+        rate_message: Optional[str] = None,
+        router: str = "",
+        arguments: Optional[List[CommandArgument]] = None,
+        usage_type: str = 'error',
+    ) -> None:
+        """Register router-style commands: handler(ctx, sid, cmd, args, raw, emit) -> bool.
+
+        Declared arguments are checked (required count) before the handler runs;
+        the handler still gets the raw tokens.
+        """
+        for name in names:
+            meta = CommandMetadata(
+                name=name,
+                description=description,
+                permission=permission,
+                arguments=list(arguments or []),
+                aliases=list((aliases or {}).get(name, [])),
+                handler=handler,
+                router=router,
+                raw_handler=True,
+                allow_dead=allow_dead,
+                cost=(costs or {}).get(name, default_cost),
+                rate_key=rate_key,
+                usage_type=usage_type,
+            )
+            if rate_message is not None:
+                meta.rate_message = rate_message
+            self.register_command(meta)
+
     def command(
         self,
         name: str,
@@ -189,6 +401,7 @@ class CommandRegistry:
                 handler=handler_func,
                 router=parent.router
             )
+            subcmd.spec = ArgSpec.compile(subcmd.arguments)
             parent.subcommands[sub_name] = subcmd
             return handler_func
         return decorator
@@ -212,19 +425,27 @@ class CommandRegistry:
             return handler_func
         return decorator
 
+    def dispatch(self, ctx: CommandContext, sid: str | None,
+                 cmd: str, args: List[str], raw: str, emit: EmitFn) -> bool:
+        """Run a slash command through the middleware chain. False if unknown."""
+        metadata = self._dispatch.get(cmd)
+        if metadata is None or not metadata.handler:
+            return False
+        return self._chain(CommandCall(ctx, sid, metadata.name, cmd, args, raw, emit, metadata, self))
+
     def try_handle_slash(self, ctx: CommandContext, sid: str | None,
                          cmd: str, args: List[str], raw: str, emit: EmitFn) -> bool:
         """Handle slash commands through the registry."""
-        # Resolve aliases
-        resolved_cmd = self._aliases.get(cmd, cmd)
-        metadata = self._commands.get(resolved_cmd)
-        
-        if not metadata or not metadata.handler:
-            return False
+        return self.dispatch(ctx, sid, cmd, args, raw, emit)
 
-        # Check permissions
-        if not self._check_permissions(metadata, ctx, sid, emit):
-            return True
+    def _invoke(self, call: CommandCall) -> bool:
+        """Innermost step: subcommand routing, argument parsing, handler."""
+        metadata, ctx, sid, args, emit = call.metadata, call.ctx, call.sid, call.args, call.emit
+        if metadata.raw_handler:
+            if metadata.arguments and self._parse_arguments(metadata, args, emit) is None:
+                self._emit_usage(metadata, emit, ctx.message_out)
+                return True
+            return bool(metadata.handler(ctx, sid, call.name, args, call.raw, emit))
 
         # Handle subcommands
         if metadata.subcommands and args:
@@ -270,75 +491,24 @@ class CommandRegistry:
     def _check_permissions(self, metadata: CommandMetadata, ctx: CommandContext,
                            sid: str | None, emit: EmitFn) -> bool:
         """Check if user has permission to execute command."""
-        if metadata.permission == PermissionLevel.PUBLIC:
-            return True
-
-        if sid is None:
-            emit(ctx.message_out, {'type': 'error', 'content': 'Not connected.'})
+        err = _permission_error(metadata, ctx, sid)
+        if err:
+            emit(ctx.message_out, {'type': 'error', 'content': err})
             return False
-
-        if metadata.permission == PermissionLevel.AUTHENTICATED:
-            if sid not in ctx.sessions:
-                emit(ctx.message_out, {'type': 'error', 'content': 'Please log in first.'})
-                return False
-            return True
-
-        if metadata.permission == PermissionLevel.ADMIN:
-            if sid not in ctx.admins:
-                emit(ctx.message_out, {'type': 'error', 'content': 'Admin command. Admin rights required.'})
-                return False
-            return True
-
-        return False
+        return True
 
     def _parse_arguments(self, metadata: CommandMetadata, args: List[str],
                          emit: EmitFn) -> Optional[Dict[str, Any]]:
         """Parse and validate command arguments."""
-        parsed = {}
-
-        # Check minimum required arguments
-        required_count = sum(1 for arg in metadata.arguments if arg.required)
-        if len(args) < required_count:
-            return None
-
-        # Parse each argument
-        for i, arg_meta in enumerate(metadata.arguments):
-            if i < len(args):
-                raw_value = args[i]
-                parsed_value = self._parse_single_argument(arg_meta, raw_value)
-                parsed[arg_meta.name] = parsed_value
-            elif arg_meta.required:
-                return None  # Missing required argument
-            else:
-                parsed[arg_meta.name] = arg_meta.default
-
-        # Collect remaining arguments as 'remaining' if there are extras
-        if len(args) > len(metadata.arguments):
-            remaining = args[len(metadata.arguments):]
-            parsed['remaining'] = remaining
-
-        return parsed
-
-    def _parse_single_argument(self, arg_meta: CommandArgument, raw_value: str) -> Any:
-        """Parse a single argument based on its type."""
-        if arg_meta.type == ArgumentType.STRING:
-            return raw_value
-        elif arg_meta.type == ArgumentType.NUMBER:
-            try:
-                return int(raw_value)
-            except ValueError:
-                try:
-                    return float(raw_value)
-                except ValueError:
-                    return raw_value  # Return as string if not a number
-        # For now, return as string for complex types (PLAYER, NPC, etc.)
-        # These can be resolved by the command handlers using existing utils
-        return raw_value
+        spec = metadata.spec
+        if spec is None:
+            spec = metadata.spec = ArgSpec.compile(metadata.arguments)
+        return spec.parse(args)
 
     def _emit_usage(self, metadata: CommandMetadata, emit: EmitFn, message_out: str) -> None:
         """Emit usage text for a command."""
         usage_text = metadata.generate_usage_text()
-        emit(message_out, {'type': 'error', 'content': usage_text})
+        emit(message_out, {'type': metadata.usage_type, 'content': usage_text})
 
     def get_all_commands(self) -> List[CommandMetadata]:
         """Get list of all registered commands."""
@@ -56,6 +56,7 @@ def _force_trade_ctx_patch(server_mod):
             is_confirm_yes=server_mod.is_confirm_yes,
             is_confirm_no=server_mod.is_confirm_no,
             broadcast_to_room=server_mod.broadcast_to_room,
+            send_to_sid=server_mod._send_to_sid,
         )
     try:
         server_mod._build_trade_ctx = _patched  # type: ignore[attr-defined]
@@ -92,6 +93,34 @@ def fresh_server_modules():
         # Reset the global world to a fresh empty state for tests
         from world import World
         server.world = World()  # Replace loaded world with fresh empty world
+        # Plans memoized by an earlier test must not leak into this one
+        try:
+            import plan_cache  # type: ignore
+            plan_cache.get_plan_cache().clear()
+            import game_loop  # type: ignore
+            game_loop.get_wake_queue().clear()
+            import tick_profiler  # type: ignore
+            tick_profiler.get_tick_profiler().reset()
+            import broadcast_batcher  # type: ignore
+            broadcast_batcher.get_room_batcher().discard()
+            import room_membership  # type: ignore
+            room_membership.get_room_membership().clear()
+            import outbound_buffer  # type: ignore
+            outbound_buffer.get_outbound_buffer().discard()
+            import send_queue  # type: ignore
+            send_queue.get_send_queues().reset()
+            import session_modes  # type: ignore
+            session_modes.get_session_modes().clear()
+            import command_metrics  # type: ignore
+            command_metrics.get_command_metrics().reset()
+            import server_metrics  # type: ignore
+            server_metrics.get_server_metrics().reset()
+            import ai_utils  # type: ignore
+            ai_utils.get_ai_stats().reset()
+            import ai_budget  # type: ignore
+            ai_budget.get_ai_budget().reset()
+        except Exception:
+            pass
         # Reload dialogue router to pick up fast-path logic reliably
         try:
             import dialogue_router  # type: ignore
@@ -133,6 +162,7 @@ def fresh_server_modules():
                     is_confirm_yes=server.is_confirm_yes,
                     is_confirm_no=server.is_confirm_no,
                     broadcast_to_room=server.broadcast_to_room,
+                    send_to_sid=server._send_to_sid,
                 )
             server._build_trade_ctx = _fresh_ctx  # type: ignore[attr-defined]
         except Exception:
@@ -1,8 +1,8 @@
 # Daily System: Manages Time, Roles, and Contracts
-import time
 import logging
 import uuid
-import random
+import rng_service
+import world_clock
 from typing import List, Optional
 
 from world import World
@@ -103,7 +103,7 @@ def _start_new_day(world: World, broadcast_func=None):
         except Exception as e:
             print(f"[Daily System] Error in Epiphany for {npc_name}: {e}")
 
-    world.daily_update_timestamp = time.time()
+    world.daily_update_timestamp = world_clock.now()
 
 def _resolve_outstanding_contracts(world: World, member_id: str, faction_id: str, broadcast_func=None):
     """Check for active daily missions from this faction and fail them if expired."""
@@ -187,7 +187,7 @@ def _apply_failure_consequence(world: World, member_id: str, faction_id: str, mi
             'type': 'contract_failed',
             'faction': faction.name,
             'mission': mission.title,
-            'timestamp': time.time()
+            'timestamp': world_clock.now()
         })
         
         # Messaging
@@ -205,7 +205,7 @@ def _assign_daily_contract(world: World, faction, member_id: str, role: FactionR
         assignee_id=member_id,
         faction_id=faction.faction_id,
         status=MissionStatus.ACTIVE,
-        deadline=time.time() + (DAY_LENGTH_TICKS * 60) # Approx deadlines
+        deadline=world_clock.now() + (DAY_LENGTH_TICKS * 60) # Approx deadlines
     )
     
     # Configure Objectives based on Role Type
@@ -232,7 +232,7 @@ def _assign_daily_contract(world: World, faction, member_id: str, role: FactionR
             # Pick any room (for MVP)
             # Ideal: Pick a room in faction territory or connected area
             # Just random for now
-            rid = random.choice(list(world.rooms.keys()))
+            rid = rng_service.get_rng('daily').choice(list(world.rooms.keys()))
             target_room_id = rid
             target_room = world.rooms[rid]
             # Try to get a nice name? Room doesn't have a 'name' field, just description and id.
@@ -21,8 +21,9 @@ Behavioral invariants kept from pre‑refactor server:
   - Whisper remains private (system messages only, not 'player').
 """
 
-import random
 import re
+
+import rng_service
 from command_context import CommandContext, EmitFn
 from dialogue_utils import (
     parse_say as _parse_say,
@@ -37,7 +38,6 @@ MESSAGE_OUT = "message"
 def try_handle_flow(ctx: CommandContext, sid: str, player_message: str, emit: EmitFn) -> bool:
     """Return True if this router consumed the message (success OR error)."""
     world = ctx.world
-    socketio = ctx.socketio
     broadcast_to_room = ctx.broadcast_to_room
     world_setup_sessions = ctx.world_setup_sessions
 
@@ -214,7 +214,7 @@ def try_handle_flow(ctx: CommandContext, sid: str, player_message: str, emit: Em
                 import server as _srv
                 return _srv.dice_roll('d%').total  # type: ignore[attr-defined]
             except Exception:
-                return random.randint(1, 100)
+                return rng_service.get_rng('dialogue').randint(1, 100)
 
         # Explicit targeted NPC say (list of NPC names after say)
         if targets:
@@ -227,9 +227,10 @@ def try_handle_flow(ctx: CommandContext, sid: str, player_message: str, emit: Em
                     _send_npc_reply(npc_name, say_msg, sid)
             # Mention pass for other NPCs present
             if room and getattr(room, 'npcs', None):
-                others = [n for n in list(room.npcs) if n not in set(resolved)]
+                # Match against room.npcs (its cached matcher), then drop the addressed NPCs
+                addressed = set(resolved)
                 try:
-                    mentioned = _extract_npc_mentions(say_msg, others)
+                    mentioned = [n for n in _extract_npc_mentions(say_msg, room.npcs) if n not in addressed]
                 except Exception:
                     mentioned = []
                 for nm in mentioned:
@@ -246,13 +247,13 @@ def try_handle_flow(ctx: CommandContext, sid: str, player_message: str, emit: Em
             pct = _pct_roll()
             if pct <= 33:
                 try:
-                    npc_name = random.choice(list(room.npcs))
+                    npc_name = rng_service.get_rng('dialogue').choice(sorted(room.npcs))
                 except Exception:
                     npc_name = next(iter(room.npcs))
                 _send_npc_reply(npc_name, say_msg, sid)
             else:
                 try:
-                    mentioned = _extract_npc_mentions(say_msg, list(room.npcs))
+                    mentioned = _extract_npc_mentions(say_msg, room.npcs)
                 except Exception:
                     mentioned = []
                 for nm in mentioned:
@@ -312,9 +313,8 @@ def try_handle_flow(ctx: CommandContext, sid: str, player_message: str, emit: Em
         _send_npc_reply(npc_name_resolved, tell_msg, sid)
         # Mention chance among other NPCs
         if room and getattr(room, 'npcs', None):
-            others = [n for n in list(room.npcs) if n != npc_name_resolved]
             try:
-                mentioned = _extract_npc_mentions(tell_msg, others)
+                mentioned = [n for n in _extract_npc_mentions(tell_msg, room.npcs) if n != npc_name_resolved]
             except Exception:
                 mentioned = []
             for nm in mentioned:
@@ -323,7 +323,7 @@ def try_handle_flow(ctx: CommandContext, sid: str, player_message: str, emit: Em
                     if _srv.dice_roll('d%').total <= 33:
                         _send_npc_reply(nm, tell_msg, sid)
                 except Exception:
-                    if random.randint(1, 100) <= 33:
+                    if rng_service.get_rng('dialogue').randint(1, 100) <= 33:
                         _send_npc_reply(nm, tell_msg, sid)
         return True
 
@@ -349,7 +349,7 @@ def try_handle_flow(ctx: CommandContext, sid: str, player_message: str, emit: Em
             emit(MESSAGE_OUT, {'type': 'system', 'content': f"You whisper to {pname}: {whisper_msg}"})
             try:
                 sender_name = player_obj.sheet.display_name if player_obj else 'Someone'
-                socketio.emit(MESSAGE_OUT, {'type': 'system', 'content': f"{sender_name} whispers to you: {whisper_msg}"}, to=psid)
+                ctx.send_to(psid, {'type': 'system', 'content': f"{sender_name} whispers to you: {whisper_msg}"})
             except Exception:
                 pass
             return True
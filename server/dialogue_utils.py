@@ -3,6 +3,8 @@ from __future__ import annotations
 import re
 from typing import List, Tuple, Iterable
 
+from mention_matcher import matcher_for
+
 
 def split_targets(targets_part: str) -> List[str]:
     """Split a targets string into individual NPC names.
@@ -212,9 +214,15 @@ def extract_npc_mentions(text: str, npc_names: Iterable[str]) -> List[str]:
     Matching is case-insensitive and uses word boundaries at the start and end
     of the NPC name to avoid substring false positives (e.g., 'Al' in 'Alice').
     The returned list preserves the order they appear in npc_names and is unique.
+
+    Pass room.npcs itself to use the room's cached one-pass matcher
+    (mention_matcher.py); other iterables are checked name by name.
     """
     if not isinstance(text, str) or not text:
         return []
+    matcher = matcher_for(npc_names)
+    if matcher is not None:
+        return matcher.mentions(text)
     mentions: list[str] = []
     seen: set[str] = set()
     for name in npc_names:
@@ -28,6 +28,8 @@ import re
 import random
 from typing import List, Optional, Tuple
 
+import rng_service
+
 
 @dataclass
 class TermDetail:
@@ -111,7 +113,8 @@ def roll(expression: str, rng: Optional[random.Random] = None) -> RollResult:
       - '1d20', '3d6', '1d100', 'd%', '4d6kh3', '1d20adv+5', '2d6+1d4+2', '1d6!', '1d10!8', '5d6r1'
     """
     if rng is None:
-        rng = random.Random()
+        # Shared seeded 'dice' stream so rolls are reproducible under MUD_RNG_SEED
+        rng = rng_service.get_rng('dice')
 
     expr = expression.strip()
     if not expr:
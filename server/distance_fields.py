@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+"""Distance Fields — shared Dijkstra maps from every room to the nearest resource.
+
+Hungry NPCs used to see only their own room (plus a blind first-door hop), so
+an NPC in a barren room wandered or grumbled. Here we keep one field per
+resource category for the whole world:
+
+- 'food'  : rooms holding an object with satiation value
+- 'water' : rooms holding an object with hydration value
+- 'safe'  : rooms guarded by an NPC (guard in the description or responsibility > 80)
+- beds    : one lazily built field per owner id, for rooms holding a bed they own
+
+Each field stores, for every room that can reach a source, the distance in
+hops and the exit label (door or Travel Point name) to take next. Every edge
+costs 1, so the Dijkstra run degenerates to a multi-source BFS over the
+reversed room graph; answering "which way to the nearest food?" is then a dict
+lookup shared by every NPC in the world.
+
+refresh(world) is called once per world tick. A quiet tick scans no rooms or
+objects: when versioned.current_version() has not moved since the last refresh
+and the set of guard NPCs is the one seen then, refresh returns at once. Guard
+status lives on plain sheet fields, so that set is re-derived from the sheets
+each tick (one flag per NPC) rather than tracked by the data model. Otherwise
+each room's exits and resource membership are re-read only if the versions of
+its objects, doors or door locks moved (room_index keeps the per-category
+counts), and the result is diffed against the previous tick:
+- new sources only relax distances outward from themselves (incremental);
+- lost sources or changed exits rebuild just the affected fields.
+Locked doors are not used as edges since NPCs may not be allowed through.
+"""
+
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+import room_index
+from versioned import current_version, is_versioned
+
+
+CATEGORIES: Tuple[str, ...] = ('food', 'water', 'safe')
+
+Edges = Dict[str, Tuple[Tuple[str, str], ...]]
+
+# What refresh remembers per room: (versions, exits, has food, has water, bed owners)
+RoomEntry = Tuple[Any, Tuple[Tuple[str, str], ...], bool, bool, Tuple[str, ...]]
+
+
+def room_exits(room: Any) -> Tuple[Tuple[str, str], ...]:
+    """(label, target_room_id) for unlocked doors and Travel Points, in order."""
+    exits: List[Tuple[str, str]] = []
+    locks = getattr(room, 'door_locks', None) or {}
+    for label, target in (getattr(room, 'doors', None) or {}).items():
+        if target and label not in locks:
+            exits.append((label, target))
+    for obj in (getattr(room, 'objects', None) or {}).values():
+        tags = getattr(obj, 'object_tags', set()) or set()
+        target = getattr(obj, 'link_target_room_id', None)
+        name = (getattr(obj, 'display_name', None) or '').strip()
+        if 'Travel Point' in tags and target and name:
+            exits.append((name, target))
+    return tuple(exits)
+
+
+def _room_versions(room: Any) -> Optional[tuple]:
+    """Versions of everything room_exits and the resource counts read (None if untracked)."""
+    objects = getattr(room, 'objects', None)
+    doors = getattr(room, 'doors', None)
+    locks = getattr(room, 'door_locks', None)
+    if isinstance(objects, room_index.RoomObjects) and is_versioned(doors) and is_versioned(locks):
+        return (objects.version, doors.version, locks.version)
+    return None
+
+
+def _scan_room(room: Any, versions: Optional[tuple]) -> RoomEntry:
+    owners = []
+    for obj in room_index.find(room, 'bed'):
+        owner = getattr(obj, 'owner_id', None)
+        if owner:
+            owners.append(owner)
+    return (
+        versions,
+        room_exits(room),
+        bool(room_index.count(room, 'edible')),
+        bool(room_index.count(room, 'drinkable')),
+        tuple(owners),
+    )
+
+
+def _is_guard(sheet: Any) -> bool:
+    return 'guard' in (sheet.description or '').lower() or sheet.responsibility > 80
+
+
+def _guards(world: Any) -> frozenset:
+    """Names of the NPCs whose presence makes a room safe."""
+    return frozenset(name for name, sheet in list(world.npc_sheets.items()) if sheet and _is_guard(sheet))
+
+
+def is_safe_room(world: Any, room: Any) -> bool:
+    """A room is safe when a guard (or a very responsible NPC) is present."""
+    for npc_name in (getattr(room, 'npcs', None) or set()):
+        sheet = world.npc_sheets.get(npc_name)
+        if sheet and _is_guard(sheet):
+            return True
+    return False
+
+
+class _Field:
+    """Distances and next hops toward one set of source rooms."""
+
+    __slots__ = ('sources', 'dist', 'hop')
+
+    def __init__(self) -> None:
+        self.sources: Set[str] = set()
+        self.dist: Dict[str, int] = {}
+        self.hop: Dict[str, str] = {}
+
+    def rebuild(self, sources: Iterable[str], reverse: Dict[str, List[Tuple[str, str]]]) -> None:
+        self.sources = set(sources)
+        self.dist = {}
+        self.hop = {}
+        self._relax_from(sorted(self.sources), reverse)
+
+    def add_sources(self, added: Iterable[str], reverse: Dict[str, List[Tuple[str, str]]]) -> None:
+        """Incremental update: new sources can only shorten distances."""
+        added = sorted(set(added) - self.sources)
+        self.sources.update(added)
+        self._relax_from(added, reverse)
+
+    def _relax_from(self, starts: List[str], reverse: Dict[str, List[Tuple[str, str]]]) -> None:
+        queue: Deque[str] = deque()
+        for rid in starts:
+            self.dist[rid] = 0
+            self.hop.pop(rid, None)
+            queue.append(rid)
+        while queue:
+            v = queue.popleft()
+            nd = self.dist[v] + 1
+            for u, label in reverse.get(v, ()):
+                if nd < self.dist.get(u, nd + 1):
+                    self.dist[u] = nd
+                    self.hop[u] = label
+                    queue.append(u)
+
+
+class DistanceFields:
+    """Per-resource distance fields over the room graph of one world."""
+
+    def __init__(self) -> None:
+        self._world: Any = None
+        self._edges: Edges = {}
+        self._reverse: Dict[str, List[Tuple[str, str]]] = {}
+        self._members: Dict[str, Set[str]] = {c: set() for c in CATEGORIES}
+        self._bed_members: Dict[str, Set[str]] = {}
+        self._fields: Dict[str, _Field] = {c: _Field() for c in CATEGORIES}
+        self._bed_fields: Dict[str, _Field] = {}
+        self._rooms: Dict[str, RoomEntry] = {}
+        # current_version() at the last refresh (None: some room is untracked)
+        self._seen_version: Optional[int] = None
+        self._guards: frozenset = frozenset()
+        self.stats = {
+            'refreshes': 0, 'quiet_skips': 0, 'rooms_rescanned': 0,
+            'full_rebuilds': 0, 'incremental_updates': 0,
+        }
+
+    def is_current(self, world: Any) -> bool:
+        """True when the fields were last refreshed for this world object."""
+        return world is not None and world is self._world
+
+    def refresh(self, world: Any) -> None:
+        """Bring every field up to date with the world's rooms."""
+        self.stats['refreshes'] += 1
+        mark = current_version()
+        guards = _guards(world)
+        if world is self._world and mark == self._seen_version and guards == self._guards:
+            self.stats['quiet_skips'] += 1
+            return
+        previous = self._rooms if world is self._world else {}
+        tracked = is_versioned(world.rooms)
+        rooms: Dict[str, RoomEntry] = {}
+        edges: Edges = {}
+        members: Dict[str, Set[str]] = {c: set() for c in CATEGORIES}
+        bed_members: Dict[str, Set[str]] = {}
+        for rid, room in list(world.rooms.items()):
+            versions = _room_versions(room)
+            entry = previous.get(rid)
+            if versions is None or entry is None or entry[0] != versions:
+                entry = _scan_room(room, versions)
+                self.stats['rooms_rescanned'] += 1
+            tracked = tracked and versions is not None
+            rooms[rid] = entry
+            edges[rid] = entry[1]
+            if entry[2]:
+                members['food'].add(rid)
+            if entry[3]:
+                members['water'].add(rid)
+            for owner in entry[4]:
+                bed_members.setdefault(owner, set()).add(rid)
+            if guards and not guards.isdisjoint(getattr(room, 'npcs', None) or ()):
+                members['safe'].add(rid)
+        self._rooms = rooms
+        self._seen_version = mark if tracked else None
+        self._guards = guards
+
+        graph_changed = world is not self._world or edges != self._edges
+        self._world = world
+        if graph_changed:
+            self._edges = edges
+            self._reverse = {}
+            for rid, exits in edges.items():
+                for label, target in exits:
+                    self._reverse.setdefault(target, []).append((rid, label))
+            self.stats['full_rebuilds'] += 1
+            for cat in CATEGORIES:
+                self._fields[cat].rebuild(members[cat], self._reverse)
+            self._bed_fields.clear()
+        else:
+            for cat in CATEGORIES:
+                self._update_field(self._fields[cat], members[cat])
+            for owner in set(self._bed_fields) | set(bed_members):
+                if self._bed_members.get(owner) != bed_members.get(owner):
+                    # Bed fields are cheap and rare; rebuild lazily on next query
+                    self._bed_fields.pop(owner, None)
+        self._members = members
+        self._bed_members = bed_members
+
+    def _update_field(self, field: _Field, sources: Set[str]) -> None:
+        if sources == field.sources:
+            return
+        if field.sources - sources:
+            field.rebuild(sources, self._reverse)
+            self.stats['full_rebuilds'] += 1
+        else:
+            field.add_sources(sources - field.sources, self._reverse)
+            self.stats['incremental_updates'] += 1
+
+    def _bed_field(self, owner_id: str) -> _Field:
+        field = self._bed_fields.get(owner_id)
+        if field is None:
+            field = _Field()
+            field.rebuild(self._bed_members.get(owner_id, set()), self._reverse)
+            self._bed_fields[owner_id] = field
+        return field
+
+    def next_hop(self, category: str, room_id: str, world: Any = None) -> Tuple[Optional[str], Optional[int]]:
+        """(exit label, distance) toward the nearest room in category.
+
+        Distance 0 means the resource is in room_id itself (no hop needed).
+        (None, None) when unreachable or when the fields belong to another world.
+        """
+        if world is not None and not self.is_current(world):
+            return None, None
+        field = self._fields.get(category)
+        if field is None or room_id not in field.dist:
+            return None, None
+        return field.hop.get(room_id), field.dist[room_id]
+
+    def next_hop_to_bed(self, owner_id: str, room_id: str, world: Any = None) -> Tuple[Optional[str], Optional[int]]:
+        """Like next_hop, toward the nearest bed owned by owner_id."""
+        if not owner_id or (world is not None and not self.is_current(world)):
+            return None, None
+        field = self._bed_field(owner_id)
+        if room_id not in field.dist:
+            return None, None
+        return field.hop.get(room_id), field.dist[room_id]
+
+    def nearby_hops(self, world: Any, room_id: str, owner_id: str = '') -> Dict[str, str]:
+        """Exit labels toward food, water, safety and the NPC's own bed elsewhere."""
+        hops: Dict[str, str] = {}
+        for cat in CATEGORIES:
+            hop, dist = self.next_hop(cat, room_id, world)
+            if hop and dist:
+                hops[cat] = hop
+        hop, dist = self.next_hop_to_bed(owner_id, room_id, world)
+        if hop and dist:
+            hops['bed'] = hop
+        return hops
+
+
+# Shared fields used by the world tick and planners
+_fields = DistanceFields()
+
+
+def get_distance_fields() -> DistanceFields:
+    """Return the process-wide distance fields."""
+    return _fields
@@ -37,7 +37,7 @@ import uuid
 from persistence_utils import save_world
 from world import World, Room, Object, CharacterSheet
 from role_model import FactionRole
-from ai_utils import safety_settings_for_level as _shared_safety_settings
+from ai_utils import safety_settings_for_level as _shared_safety_settings, generate_content as ai_generate
 
 # Optional Gemini SDK
 try:
@@ -691,7 +691,7 @@ def handle_faction_command(world: World, state_path: str, sid: str | None, args:
             return True, None, user.user_id, user.display_name
         
         # Then try as NPC using fuzzy resolution on NPC names
-        npc_names = list(world.npc_sheets.keys())
+        npc_names = world.npc_sheets
         if npc_names:
             ok, err, resolved_npc = fuzzy_resolve(entity_name, npc_names)
             if ok and resolved_npc:
@@ -731,10 +731,7 @@ def handle_faction_command(world: World, state_path: str, sid: str | None, args:
             prompt = _build_ai_prompt(world)
             try:
                 safety = _safety(world)
-                if safety is not None:
-                    resp = model.generate_content(prompt, safety_settings=safety)
-                else:
-                    resp = model.generate_content(prompt)
+                resp = ai_generate(model, prompt, safety, kind='faction')
                 text = getattr(resp, 'text', None) or str(resp)
                 parsed = _extract_json_payload(text)
                 if isinstance(parsed, dict):
@@ -4,7 +4,8 @@ This module contains the world heartbeat logic including:
 - NPC needs decay and action point regeneration
 - NPC action execution (move, get, consume, emote, say, etc.)
 - GOAP planning and plan execution
-- Heartbeat thread management
+- TickEngine: the world heartbeat as ordered, individually timed and
+  enabled phases (daily, fields, needs, think, execute, missions)
 """
 from __future__ import annotations
 
@@ -14,11 +15,20 @@ import random
 from typing import Any, Callable, cast
 
 from safe_utils import safe_call, safe_call_with_default
+from nutrition import parse_tag_value as _parse_tag_value, nutrition_from_tags_or_fields as _nutrition_from_tags_or_fields
 from id_parse_utils import fuzzy_resolve, resolve_door_name
 from world import World, CharacterSheet, Room
 import daily_system
 import mission_service
 from combat_service import attack
+import plan_cache
+import goap_planner
+import distance_fields
+import room_index
+import tick_profiler
+import broadcast_batcher
+import send_queue
+from wake_queue import WakeQueue
 
 
 # --- Configuration from environment ---
@@ -63,53 +73,6 @@ def _clamp_need(v: float) -> float:
         return 0.0
 
 
-def _parse_tag_value(tags: set[str] | list[str] | None, key: str) -> int | None:
-    """Return the integer suffix from a tag like 'Edible: 20' or 'Drinkable: 15'."""
-    if not tags:
-        return None
-    return safe_call_with_default(lambda: _parse_tag_value_inner(tags, key), None)
-
-
-def _parse_tag_value_inner(tags, key: str) -> int | None:
-    """Helper function for _parse_tag_value with actual parsing logic."""
-    key_low = key.strip().lower()
-    for t in list(tags):
-        s = safe_call_with_default(lambda: str(t), "")
-        if not s:
-            continue
-        parts = s.split(':', 1)
-        if len(parts) != 2:
-            continue
-        left, right = parts[0].strip().lower(), parts[1].strip()
-        if left == key_low and right:
-            r = right
-            if r.startswith('+'):
-                r = r[1:]
-            if r.lstrip('-').isdigit():
-                return safe_call_with_default(lambda: int(r), None)
-    return None
-
-
-def _nutrition_from_tags_or_fields(obj) -> tuple[int, int]:
-    """Return (satiation, hydration) preferring tag-driven values over legacy fields."""
-    tags = safe_call_with_default(lambda: set(getattr(obj, 'object_tags', []) or []), set())
-    sv_tag = _parse_tag_value(tags, 'Edible')
-    hv_tag = _parse_tag_value(tags, 'Drinkable')
-    has_edible_key = any(str(t).split(':', 1)[0].strip().lower() == 'edible' for t in tags)
-    has_drink_key = any(str(t).split(':', 1)[0].strip().lower() == 'drinkable' for t in tags)
-
-    sv_field = int(getattr(obj, 'satiation_value', 0) or 0)
-    hv_field = int(getattr(obj, 'hydration_value', 0) or 0)
-
-    if has_edible_key or has_drink_key:
-        sv = sv_tag if sv_tag is not None else 0
-        hv = hv_tag if hv_tag is not None else 0
-    else:
-        sv = sv_field
-        hv = hv_field
-    return int(sv or 0), int(hv or 0)
-
-
 class GameLoopContext:
     """Context object holding references needed by game loop functions.
     
@@ -126,15 +89,48 @@ class GameLoopContext:
         sessions: dict,
         admins: set,
         plan_model: Any = None,
+        world_provider: Callable[[], World] | None = None,
+        think_room: Callable[[str, list[str]], Any] | None = None,
+        execute_action: Callable[[str, str, dict], tuple[bool, str]] | None = None,
+        broadcast_many: Callable[[str, list[dict], str | None], None] | None = None,
     ):
-        self.world = world
+        # world_provider lets the owner swap its world (e.g. /purge, tests) without
+        # re-initializing the context; assigning ctx.world pins a world instead.
+        self._world = world
+        self._world_provider = world_provider
         self.state_path = state_path
         self.socketio = socketio
         self.broadcast_to_room = broadcast_to_room
+        # Sends one room's flushed tick messages (falls back to one broadcast each)
+        self.broadcast_many = broadcast_many
         self.save_debounce = save_debounce
         self.sessions = sessions
         self.admins = admins
         self.plan_model = plan_model
+        # Tick engine hooks: plan for the due NPCs of one room, run one plan step
+        self.think_room = think_room
+        self.execute_action = execute_action
+
+    def tick_broadcast(self, room_id: str, payload: dict, exclude_sid: str | None = None) -> None:
+        """Broadcast from tick code: held for the end-of-tick room batch while the
+        tick runs, sent through broadcast_to_room otherwise."""
+        if broadcast_batcher.get_room_batcher().add(room_id, payload, exclude_sid):
+            return
+        if exclude_sid is None:
+            self.broadcast_to_room(room_id, payload)
+        else:
+            self.broadcast_to_room(room_id, payload, exclude_sid)
+
+    @property
+    def world(self) -> World:
+        if self._world_provider is not None:
+            return self._world_provider()
+        return self._world
+
+    @world.setter
+    def world(self, value: World) -> None:
+        self._world = value
+        self._world_provider = None
 
 
 # Global context - set by server.py during initialization
@@ -164,6 +160,60 @@ def update_broadcast_to_room(broadcast_fn) -> None:
         _ctx.broadcast_to_room = broadcast_fn
 
 
+# --- Tick statistics ---
+
+# Counters updated by the world tick; read via get_tick_stats()
+_tick_stats = {
+    'ticks': 0,
+    'npcs_thought': 0,
+    'plan_cache_hits': 0,
+    'last_tick_time': None,
+}
+
+
+# Predicted think ticks per NPC; consulted by the world tick's think phase
+_wake_queue = WakeQueue(
+    NEED_THRESHOLD,
+    NEED_DROP_PER_TICK,
+    SOCIAL_DROP_PER_TICK,
+    SLEEP_DROP_PER_TICK,
+    SLEEP_REFILL_PER_TICK,
+)
+
+
+def get_wake_queue() -> WakeQueue:
+    """Return the process-wide NPC wake-up queue."""
+    return _wake_queue
+
+
+def reschedule_npc_wake(npc_name: str, sheet: CharacterSheet, world: World | None = None) -> None:
+    """Re-check an NPC's wake-up tick after its needs changed (only ever moves it earlier)."""
+    if world is None:
+        world = _ctx.world if _ctx is not None else None
+    decay = bool(getattr(world, 'advanced_goap_enabled', False))
+    safe_call(_wake_queue.pull_earlier, npc_name, sheet, decay)
+
+
+def record_tick(npcs_thought: int = 0, plan_cache_hits: int = 0) -> None:
+    """Account for one completed world tick."""
+    _tick_stats['ticks'] += 1
+    _tick_stats['npcs_thought'] += int(npcs_thought)
+    _tick_stats['plan_cache_hits'] += int(plan_cache_hits)
+    _tick_stats['last_tick_time'] = time.time()
+
+
+def get_tick_stats() -> dict:
+    """Return a snapshot of world tick statistics, including plan cache hit rate."""
+    stats = dict(_tick_stats)
+    stats['plan_cache'] = plan_cache.get_plan_cache().stats()
+    stats['wake_queue'] = _wake_queue.stats()
+    stats['distance_fields'] = dict(distance_fields.get_distance_fields().stats)
+    stats['profiler'] = tick_profiler.get_tick_profiler().snapshot()
+    stats['room_batches'] = dict(broadcast_batcher.get_room_batcher().stats)
+    stats['send_queues'] = send_queue.get_send_queues().snapshot()
+    return stats
+
+
 # --- NPC Helper Functions ---
 
 def _npc_find_room_for(npc_name: str) -> str | None:
@@ -193,7 +243,11 @@ def _npc_gain_socialization(npc_name: str, amount: float) -> None:
     try:
         sheet = _ensure_npc_sheet(npc_name)
         current = getattr(sheet, 'socialization', 100.0) or 100.0
-        sheet.socialization = _clamp_need(current + amount)
+        value = _clamp_need(current + amount)
+        if value == current:
+            return
+        sheet.socialization = value
+        reschedule_npc_wake(npc_name, sheet)
     except Exception:
         pass
 
@@ -274,7 +328,7 @@ def _npc_exec_get_object(npc_name: str, room_id: str, object_name: str) -> tuple
         room.objects[best.uuid] = best
         return False, "cannot carry"
     
-    ctx.broadcast_to_room(room_id, {
+    ctx.tick_broadcast(room_id, {
         'type': 'system',
         'content': f"[i]{npc_name} picks up the {best.display_name}[/i]"
     })
@@ -300,6 +354,7 @@ def _npc_exec_consume_object(npc_name: str, room_id: str, object_uuid: str) -> t
     sheet.hunger = _clamp_need(sheet.hunger + float(sv))
     sheet.thirst = _clamp_need(sheet.thirst + float(hv))
     safe_call(inv.remove, idx)
+    reschedule_npc_wake(npc_name, sheet, ctx.world)
     
     which = []
     if sv:
@@ -307,7 +362,7 @@ def _npc_exec_consume_object(npc_name: str, room_id: str, object_uuid: str) -> t
     if hv and not sv:
         which.append('drinks')
     action_word = 'consumes' if not which else which[0]
-    ctx.broadcast_to_room(room_id, {
+    ctx.tick_broadcast(room_id, {
         'type': 'system',
         'content': f"[i]{npc_name} {action_word} the {getattr(obj, 'display_name', 'item')}[/i]"
     })
@@ -317,7 +372,7 @@ def _npc_exec_consume_object(npc_name: str, room_id: str, object_uuid: str) -> t
 def _npc_exec_do_nothing(npc_name: str, room_id: str) -> tuple[bool, str]:
     """NPC pauses to think."""
     ctx = get_context()
-    ctx.broadcast_to_room(room_id, {'type': 'system', 'content': f"[i]{npc_name} pauses to think.[/i]"})
+    ctx.tick_broadcast(room_id, {'type': 'system', 'content': f"[i]{npc_name} pauses to think.[/i]"})
     return True, "ok"
 
 
@@ -329,7 +384,7 @@ def _npc_exec_emote(npc_name: str, room_id: str, message: str | None = None) ->
         ""
     )
     content = f"[i]{npc_name} {text}[/i]" if text else f"[i]{npc_name} looks around, humming softly.[/i]"
-    ctx.broadcast_to_room(room_id, {'type': 'system', 'content': content})
+    ctx.tick_broadcast(room_id, {'type': 'system', 'content': content})
     safe_call(_npc_gain_socialization, npc_name, SOCIAL_REFILL_EMOTE)
     return True, "ok"
 
@@ -339,7 +394,7 @@ def _npc_exec_say(npc_name: str, room_id: str, message: str) -> tuple[bool, str]
     ctx = get_context()
     if not message:
         return False, "nothing to say"
-    ctx.broadcast_to_room(room_id, {
+    ctx.tick_broadcast(room_id, {
         'type': 'npc',
         'name': npc_name,
         'content': message
@@ -371,7 +426,7 @@ def _npc_exec_drop(npc_name: str, room_id: str, object_uuid: str) -> tuple[bool,
     safe_call(inv.remove, idx)
     room.objects[obj.uuid] = obj
     
-    ctx.broadcast_to_room(room_id, {
+    ctx.tick_broadcast(room_id, {
         'type': 'system',
         'content': f"[i]{npc_name} drops the {getattr(obj, 'display_name', 'item')}.[/i]"
     })
@@ -381,7 +436,7 @@ def _npc_exec_drop(npc_name: str, room_id: str, object_uuid: str) -> tuple[bool,
 def _npc_exec_look(npc_name: str, room_id: str, target_name: str) -> tuple[bool, str]:
     """NPC examines a target object."""
     ctx = get_context()
-    ctx.broadcast_to_room(room_id, {
+    ctx.tick_broadcast(room_id, {
         'type': 'system',
         'content': f"[i]{npc_name} examines the {target_name}.[/i]"
     })
@@ -514,14 +569,14 @@ def _npc_exec_move_through(npc_name: str, room_id: str, name_in: str) -> tuple[b
         permitted = False
     
     if not permitted:
-        safe_call(ctx.broadcast_to_room, room_id, {
+        safe_call(ctx.tick_broadcast, room_id, {
             'type': 'system',
             'content': f"[i]{npc_name} tries the {resolved_label}, but it's locked.[/i]"
         })
         return False, "locked"
     
     # Perform the move
-    safe_call(ctx.broadcast_to_room, room_id, {
+    safe_call(ctx.tick_broadcast, room_id, {
         'type': 'system',
         'content': f"{npc_name} leaves through the {resolved_label}."
     })
@@ -533,7 +588,7 @@ def _npc_exec_move_through(npc_name: str, room_id: str, name_in: str) -> tuple[b
             if target_room_id in ctx.world.rooms:
                 ctx.world.rooms[target_room_id].npcs.add(npc_name)
         safe_call(_update_npc_presence)
-        safe_call(ctx.broadcast_to_room, target_room_id, {
+        safe_call(ctx.tick_broadcast, target_room_id, {
             'type': 'system',
             'content': f"{npc_name} enters."
         })
@@ -562,15 +617,30 @@ def _npc_grumble_failure(npc_name: str, room_id: str, action: dict, reason: str)
         target = action.get('args', {}).get('target', 'them')
         explanation = f"I cannot find {target}!"
     
-    ctx.broadcast_to_room(room_id, {
+    ctx.tick_broadcast(room_id, {
         'type': 'system',
         'content': f"[i]{npc_name} grumbles loudly: \"{explanation}\"[/i]"
     })
 
 
 # Note: Additional NPC execution functions (barter, trade, attack, sleep, etc.)
-# and the main _npc_execute_action dispatcher remain in server.py for now
-# due to their complex dependencies. They can be migrated incrementally.
+# and the main _npc_execute_action dispatcher remain in server.py due to their
+# complex dependencies. The tick engine reaches them through the
+# GameLoopContext.execute_action hook.
+
+
+def _room_other_npc_sheets(npc_name: str, room: Room) -> dict[str, CharacterSheet]:
+    """Sheets of the other NPCs sharing room (potential trade partners)."""
+    sheets = get_context().world.npc_sheets
+    return {n: sheets[n] for n in (room.npcs or set()) if n != npc_name and n in sheets}
+
+
+def _npc_nearby_exits(npc_id: str, room: Room) -> dict[str, str]:
+    """Exits toward food, water, safety and the NPC's bed in other rooms."""
+    ctx = get_context()
+    return safe_call_with_default(
+        lambda: distance_fields.get_distance_fields().nearby_hops(ctx.world, room.id, npc_id), {}
+    )
 
 
 def _npc_offline_plan(npc_name: str, room: Room, sheet: CharacterSheet) -> list[dict]:
@@ -578,45 +648,18 @@ def _npc_offline_plan(npc_name: str, room: Room, sheet: CharacterSheet) -> list[
     Returns a list of actions: [{tool, args}...]
     """
     ctx = get_context()
-    plan: list[dict] = []
-    
-    def find_inv(predicate) -> object | None:
-        for it in sheet.inventory.slots:
-            if it and predicate(it):
-                return it
-        return None
-    
-    # Priority 1: Safety concerns
-    safety = getattr(sheet, 'safety', 100.0)
-    if safety < 30:
-        if hasattr(room, 'doors') and room.doors:
-            exit_name = list(room.doors.keys())[0]
-            plan.append({'tool': 'move_through', 'args': {'name': exit_name}})
-            return plan
-    
-    # Priority 2: Basic survival needs
+    # Priorities 1-2 and 4-5: safety, hunger, thirst, socialization and sleep are
+    # planned by the A* GOAP engine (memoized per start/goal state)
+    npc_id = safe_call_with_default(lambda: ctx.world.get_or_create_npc_id(npc_name), "")
+    facts = goap_planner.gather_facts(
+        npc_name, npc_id, room, sheet, NEED_THRESHOLD, _nutrition_from_tags_or_fields,
+        _room_other_npc_sheets(npc_name, room), _npc_nearby_exits(npc_id, room),
+    )
+    plan = goap_planner.plan_needs(facts)
+    if plan and (facts.state & goap_planner.UNSAFE) and plan[0].get('tool') == 'move_through':
+        return plan  # Safety is highest priority, ignore other needs
     responsibility = getattr(sheet, 'responsibility', 50)
-    
-    if sheet.hunger < NEED_THRESHOLD:
-        inv_food = find_inv(lambda o: _nutrition_from_tags_or_fields(o)[0] > 0)
-        if inv_food:
-            plan.append({'tool': 'consume_object', 'args': {'object_uuid': getattr(inv_food, 'uuid', '')}})
-        else:
-            food = next((o for o in (room.objects or {}).values() if _nutrition_from_tags_or_fields(o)[0] > 0), None)
-            if food:
-                plan.append({'tool': 'get_object', 'args': {'object_name': getattr(food, 'display_name', '')}})
-                plan.append({'tool': 'consume_object', 'args': {'object_uuid': getattr(food, 'uuid', '')}})
-    
-    if sheet.thirst < NEED_THRESHOLD:
-        inv_drink = find_inv(lambda o: _nutrition_from_tags_or_fields(o)[1] > 0)
-        if inv_drink:
-            plan.append({'tool': 'consume_object', 'args': {'object_uuid': getattr(inv_drink, 'uuid', '')}})
-        else:
-            water = next((o for o in (room.objects or {}).values() if _nutrition_from_tags_or_fields(o)[1] > 0), None)
-            if water:
-                plan.append({'tool': 'get_object', 'args': {'object_name': getattr(water, 'display_name', '')}})
-                plan.append({'tool': 'consume_object', 'args': {'object_uuid': getattr(water, 'uuid', '')}})
-    
+
     # Priority 3: Curiosity-driven exploration
     curiosity = getattr(sheet, 'curiosity', 50)
     confidence = getattr(sheet, 'confidence', 50)
@@ -626,33 +669,16 @@ def _npc_offline_plan(npc_name: str, room: Room, sheet: CharacterSheet) -> list[
                 plan.append({'tool': 'look', 'args': {'target': getattr(obj, 'display_name', '')}})
                 break
     
-    # Priority 4: Social needs
-    socialization = safe_call_with_default(lambda: getattr(sheet, 'socialization', 100.0), 100.0)
-    if socialization < NEED_THRESHOLD:
-        aggression = getattr(sheet, 'aggression', 30)
-        if aggression > 60:
-            plan.append({'tool': 'emote', 'args': {'message': 'glares around the room assertively.'}})
-        else:
-            plan.append({'tool': 'emote', 'args': {'message': 'hums a tune to themself.'}})
-    
-    # Priority 5: Sleep needs
-    sleep_val = safe_call_with_default(lambda: getattr(sheet, 'sleep', 100.0), 100.0)
-    if sleep_val < NEED_THRESHOLD:
-        npc_id = safe_call_with_default(lambda: ctx.world.get_or_create_npc_id(npc_name), "")
-        if npc_id:
-            _npc_add_sleep_plan_safe(plan, npc_id, room)
-    
     # Priority 6: Wealth desire
     wealth_desire = getattr(sheet, 'wealth_desire', 50.0)
     if wealth_desire > 60 and getattr(sheet, 'currency', 0) < 20 and not plan:
-        for obj in (room.objects or {}).values():
-            obj_value = getattr(obj, 'value', 0)
-            if obj_value > 10:
-                if responsibility > 60:
-                    plan.append({'tool': 'emote', 'args': {'message': f'looks thoughtfully at the {getattr(obj, "display_name", "item")}.'}})
-                elif responsibility < 40:
-                    plan.append({'tool': 'get_object', 'args': {'object_name': getattr(obj, 'display_name', '')}})
-                break
+        valuables = room_index.find(room, 'valuable')
+        if valuables:
+            obj = valuables[0]
+            if responsibility > 60:
+                plan.append({'tool': 'emote', 'args': {'message': f'looks thoughtfully at the {getattr(obj, "display_name", "item")}.'}})
+            elif responsibility < 40:
+                plan.append({'tool': 'get_object', 'args': {'object_name': getattr(obj, 'display_name', '')}})
     
     if not plan:
         plan.append({'tool': 'do_nothing', 'args': {}})
@@ -660,31 +686,336 @@ def _npc_offline_plan(npc_name: str, room: Room, sheet: CharacterSheet) -> list[
     return plan
 
 
-def _npc_add_sleep_plan_safe(plan: list, npc_id: str, room) -> None:
-    """Helper function to safely find beds and add sleep plan items."""
-    owned_bed = None
-    unowned_bed = None
-    room_objects = safe_call_with_default(lambda: room.objects or {}, {})
-    
-    for o in room_objects.values():
-        tags = safe_call_with_default(lambda: set(getattr(o, 'object_tags', []) or []), set())
-        is_bed = any(safe_call_with_default(lambda: str(t).strip().lower() == 'bed', False) for t in tags)
-        if is_bed:
-            owner = safe_call_with_default(lambda: getattr(o, 'owner_id', None), None)
-            if owner == npc_id and owned_bed is None:
-                owned_bed = o
-            if (owner is None) and unowned_bed is None:
-                unowned_bed = o
-    
-    if owned_bed is not None:
-        bed_uuid = safe_call_with_default(lambda: getattr(owned_bed, 'uuid', ''), '')
-        if bed_uuid:
-            plan.append({'tool': 'sleep', 'args': {'bed_uuid': bed_uuid}})
-    elif unowned_bed is not None:
-        bed_uuid = safe_call_with_default(lambda: getattr(unowned_bed, 'uuid', ''), '')
-        if bed_uuid:
-            plan.append({'tool': 'claim', 'args': {'object_uuid': bed_uuid}})
-            plan.append({'tool': 'sleep', 'args': {'bed_uuid': bed_uuid}})
+# --- Tick engine ---
+
+def _npc_needs_thinking(sheet: CharacterSheet) -> bool:
+    """True when any basic need is below threshold and the NPC has no plan queued."""
+    if sheet.plan_queue:
+        return False
+    return (
+        (sheet.hunger < NEED_THRESHOLD)
+        or (sheet.thirst < NEED_THRESHOLD)
+        or (getattr(sheet, 'socialization', 100.0) < NEED_THRESHOLD)
+        or (getattr(sheet, 'sleep', 100.0) < NEED_THRESHOLD)
+    )
+
+
+def _npc_tick_needs(npc_name: str, rid: str, sheet: CharacterSheet) -> None:
+    """Needs step for one NPC: decay needs, handle sleeping, regenerate AP."""
+    ctx = get_context()
+    if getattr(ctx.world, 'advanced_goap_enabled', False):
+        # Degrade needs slightly (including socialization and sleep)
+        sheet.hunger = _clamp_need(sheet.hunger - NEED_DROP_PER_TICK)
+        sheet.thirst = _clamp_need(sheet.thirst - NEED_DROP_PER_TICK)
+        try:
+            sheet.socialization = _clamp_need((getattr(sheet, 'socialization', 100.0) or 0.0) - SOCIAL_DROP_PER_TICK)
+        except Exception:
+            # Backfill on older worlds missing the field
+            sheet.socialization = _clamp_need(100.0 - SOCIAL_DROP_PER_TICK)
+        try:
+            # If actively sleeping, restore sleep and count down duration
+            if getattr(sheet, 'sleeping_ticks_remaining', 0) > 0:
+                sheet.sleep = _clamp_need((getattr(sheet, 'sleep', 100.0) or 0.0) + SLEEP_REFILL_PER_TICK)
+                sheet.sleeping_ticks_remaining = max(0, int(sheet.sleeping_ticks_remaining) - 1)
+                # Wake up when done
+                if sheet.sleeping_ticks_remaining == 0:
+                    sheet.sleeping_bed_uuid = None
+                    safe_call(ctx.tick_broadcast, rid, {'type': 'system', 'content': f"[i]{npc_name} wakes up, looking refreshed.[/i]"})
+            else:
+                # Not sleeping -> fatigue slowly increases (sleep meter drops)
+                sheet.sleep = _clamp_need((getattr(sheet, 'sleep', 100.0) or 0.0) - SLEEP_DROP_PER_TICK)
+        except Exception:
+            # Backfill for worlds without field
+            safe_call(lambda: setattr(sheet, 'sleep', _clamp_need(100.0 - SLEEP_DROP_PER_TICK)))
+    # Regen AP
+    try:
+        sheet.action_points = int(min(AP_MAX, max(0, (sheet.action_points or 0) + 1)))
+    except Exception:
+        sheet.action_points = 1
+
+
+def _npc_tick_execute(npc_name: str, rid: str, sheet: CharacterSheet) -> bool:
+    """Execute step for one NPC: spend AP on queued actions. True if any ran."""
+    ctx = get_context()
+    if ctx.execute_action is None:
+        return False
+    ran = False
+    # Execute one action per AP (but avoid long loops)
+    steps = min(sheet.action_points or 0, max(0, len(sheet.plan_queue or [])))
+    for _ in range(steps):
+        if not sheet.plan_queue:
+            break
+        action = sheet.plan_queue.pop(0)
+        tick_profiler.get_tick_profiler().count('actions')
+        ok, reason = ctx.execute_action(npc_name, rid, action)
+        if not ok:
+            safe_call(_npc_grumble_failure, npc_name, rid, action, reason)
+        # Spend 1 AP
+        sheet.action_points = max(0, (sheet.action_points or 0) - 1)
+        ran = True
+    return ran
+
+
+class TickState:
+    """Working state shared by the phases of one world tick."""
+
+    def __init__(self, world: World):
+        self.world = world
+        self.mutated = False
+        # (npc_name, room_id, sheet, needs before the tick) for every NPC seen by
+        # the needs phase; later phases work from this snapshot so an NPC that
+        # changes rooms mid-tick is still processed exactly once
+        self.entries: list[tuple[str, str, CharacterSheet, tuple]] = []
+        # NPCs whose predicted wake-up tick has arrived
+        self.due: set[str] = set()
+        self.thought = 0
+
+
+class TickPhase:
+    """A named, individually enabled step of the world tick."""
+
+    def __init__(self, name: str, fn: Callable[[TickState], None], enabled: bool = True):
+        self.name = name
+        self.fn = fn
+        self.enabled = enabled
+
+
+def _phase_daily(state: TickState) -> None:
+    """Day/night cycle (announcements go to every connected client)."""
+    ctx = get_context()
+
+    def _broadcast_all(payload):
+        # Time-of-day lines are ambient: clients already behind get them through
+        # their send queue, where they are the first thing dropped
+        queues = send_queue.get_send_queues()
+        waiting = queues.waiting_sids()
+        with queues.ambient():
+            for sid in waiting:
+                queues.send(sid, 'message', payload)
+        if waiting:
+            safe_call(ctx.socketio.emit, 'message', payload, skip_sid=sorted(waiting))
+        else:
+            safe_call(ctx.socketio.emit, 'message', payload)
+
+    safe_call(daily_system.process_daily_cycle, state.world, _broadcast_all)
+
+
+def _phase_fields(state: TickState) -> None:
+    """Bring the shared resource distance fields up to date for this tick."""
+    safe_call(distance_fields.get_distance_fields().refresh, state.world)
+
+
+def _phase_needs(state: TickState) -> None:
+    """Decay needs and regenerate AP for every NPC, room by room."""
+    prof = tick_profiler.get_tick_profiler()
+    clock = time.perf_counter
+    wake = get_wake_queue()
+    # Iterate over a stable snapshot of rooms; NPCs sorted so their order (and so
+    # RNG draws) doesn't depend on string hash seeds
+    for rid, room in list(state.world.rooms.items()):
+        for npc_name in sorted(room.npcs or ()):
+            t0 = clock()
+            sheet = safe_call_with_default(lambda: _ensure_npc_sheet(npc_name), None)
+            if not sheet:
+                continue
+            # Capture pre-need values for the mutation check
+            pre = (sheet.hunger, sheet.thirst, getattr(sheet, 'socialization', 100.0), getattr(sheet, 'sleep', 100.0))
+            _npc_tick_needs(npc_name, rid, sheet)
+            state.entries.append((npc_name, rid, sheet, pre))
+            if wake.is_due(npc_name):
+                state.due.add(npc_name)
+            prof.add_npc(npc_name, clock() - t0)
+
+
+def _phase_think(state: TickState) -> None:
+    """Plan for due NPCs that need to, one call per room so AI requests batch."""
+    ctx = get_context()
+    prof = tick_profiler.get_tick_profiler()
+    clock = time.perf_counter
+    by_room: dict[str, list[str]] = {}
+    for npc_name, rid, sheet, _ in state.entries:
+        if npc_name in state.due and _npc_needs_thinking(sheet):
+            by_room.setdefault(rid, []).append(npc_name)
+    for rid, thinkers in by_room.items():
+        t0 = clock()
+        if ctx.think_room is not None:
+            # Keep the loop going even if planning for the room fails
+            safe_call(ctx.think_room, rid, thinkers)
+        else:
+            room = state.world.rooms.get(rid)
+            for npc_name in thinkers:
+                sheet = state.world.npc_sheets.get(npc_name)
+                if room is not None and sheet is not None:
+                    sheet.plan_queue = safe_call_with_default(
+                        lambda: _npc_offline_plan(npc_name, room, sheet),
+                        [{'tool': 'do_nothing', 'args': {}}],
+                    )
+        elapsed = clock() - t0
+        # Batched planning can't be split per NPC; share the room's cost evenly
+        for npc_name in thinkers:
+            prof.add_npc(npc_name, elapsed / len(thinkers))
+        state.thought += len(thinkers)
+
+
+def _phase_execute(state: TickState) -> None:
+    """Spend AP on queued plan steps; offline rooms chatter among themselves."""
+    prof = tick_profiler.get_tick_profiler()
+    clock = time.perf_counter
+    for npc_name, rid, sheet, _ in state.entries:
+        t0 = clock()
+        if _npc_tick_execute(npc_name, rid, sheet):
+            state.mutated = True
+        prof.add_npc(npc_name, clock() - t0)
+        # If room has no connected players, simulate socialization refill (offline chatter)
+        try:
+            room = state.world.rooms.get(rid)
+            if room is not None and not room.players:
+                _npc_gain_socialization(npc_name, SOCIAL_SIM_REFILL_TICK)
+        except Exception:
+            pass
+
+
+def _phase_missions(state: TickState) -> None:
+    """Mission deadlines and failures."""
+    try:
+        if mission_service.process_tick(state.world):
+            state.mutated = True
+    except Exception as e:
+        print(f"Mission tick error: {e}")
+
+
+DEFAULT_PHASES: tuple[tuple[str, Callable[[TickState], None]], ...] = (
+    ('daily', _phase_daily),
+    ('fields', _phase_fields),
+    ('needs', _phase_needs),
+    ('think', _phase_think),
+    ('execute', _phase_execute),
+    ('missions', _phase_missions),
+)
+
+
+def _env_disabled_phases() -> set[str]:
+    """Phase names listed in MUD_TICK_DISABLE (comma separated)."""
+    raw = os.getenv('MUD_TICK_DISABLE') or ''
+    return {p.strip().lower() for p in raw.split(',') if p.strip()}
+
+
+class TickEngine:
+    """The world heartbeat: runs its phases in order once per tick.
+
+    Each phase is timed into the tick profiler under its own name and can be
+    switched off independently (env MUD_TICK_DISABLE=missions,daily or
+    set_enabled()). Server-specific work (AI planning, the full action
+    dispatcher, persistence) is reached through the GameLoopContext hooks, so
+    this is the only implementation of the tick.
+    """
+
+    def __init__(self, phases=None, disabled: set[str] | None = None):
+        off = _env_disabled_phases() if disabled is None else set(disabled)
+        self.phases: list[TickPhase] = [
+            TickPhase(name, fn, name not in off) for name, fn in (phases or DEFAULT_PHASES)
+        ]
+
+    def phase(self, name: str) -> TickPhase:
+        for p in self.phases:
+            if p.name == name:
+                return p
+        raise KeyError(name)
+
+    def set_enabled(self, name: str, enabled: bool) -> None:
+        self.phase(name).enabled = bool(enabled)
+
+    def enabled_phases(self) -> list[str]:
+        return [p.name for p in self.phases if p.enabled]
+
+    def add_phase(self, name: str, fn: Callable[[TickState], None], before: str | None = None) -> None:
+        """Register an extra phase, at the end or ahead of an existing one."""
+        if any(p.name == name for p in self.phases):
+            raise ValueError(f"duplicate tick phase: {name}")
+        idx = len(self.phases)
+        if before is not None:
+            idx = self.phases.index(self.phase(before))
+        self.phases.insert(idx, TickPhase(name, fn))
+
+    def run_once(self) -> bool:
+        """Run one world tick. Returns True if world state changed."""
+        ctx = get_context()
+        prof = tick_profiler.get_tick_profiler()
+        prof.start_tick()
+        # Advance the wake-up clock; NPCs whose predicted tick arrived become due
+        _wake_queue.advance()
+        state = TickState(ctx.world)
+        hits_before = plan_cache.get_plan_cache().hits
+        # Room broadcasts made during the tick go out as one payload per room
+        batcher = broadcast_batcher.get_room_batcher()
+        batcher.begin()
+        try:
+            for p in self.phases:
+                if not p.enabled:
+                    continue
+                with prof.phase(p.name):
+                    try:
+                        p.fn(state)
+                    except Exception as e:
+                        print(f"Tick phase {p.name} error: {e}")
+        finally:
+            # NPC chatter is ambient: droppable for clients that fall behind
+            with prof.phase('flush'), send_queue.get_send_queues().ambient():
+                batcher.end(_send_room_payloads)
+        decay = bool(getattr(state.world, 'advanced_goap_enabled', False))
+        for npc_name, _, sheet, pre in state.entries:
+            # If no actions executed but needs changed, mark mutated for persistence
+            post = (sheet.hunger, sheet.thirst, getattr(sheet, 'socialization', 0.0), getattr(sheet, 'sleep', 0.0))
+            if post != pre:
+                state.mutated = True
+            # Put checked NPCs back on the queue (hooks may already have done so)
+            if npc_name in state.due and _wake_queue.is_due(npc_name):
+                _wake_queue.schedule(npc_name, sheet, decay)
+        record_tick(state.thought, plan_cache.get_plan_cache().hits - hits_before)
+        prof.end_tick(npcs_thought=state.thought)
+        return state.mutated
+
+    def run_forever(self, max_ticks: int | None = None) -> None:
+        """Heartbeat loop: sleep TICK_SECONDS, tick, debounce a save on changes."""
+        print("World heartbeat started.")
+        ticks = 0
+        while max_ticks is None or ticks < max_ticks:
+            ticks += 1
+            try:
+                ctx = get_context()
+                # Proper sleep for current async mode (eventlet or threading);
+                # fall back to time.sleep only if socketio.sleep fails
+                try:
+                    ctx.socketio.sleep(TICK_SECONDS)
+                except Exception:
+                    time.sleep(TICK_SECONDS)
+                if self.run_once():
+                    # Debounced persistence after a tick of world changes
+                    safe_call(ctx.save_debounce)
+            except Exception as e:
+                print(f"Heartbeat loop error: {e}")
+
+
+def _send_room_payloads(room_id: str, payloads: list[dict], exclude_sid: str | None) -> None:
+    """Deliver one flushed room batch through the context's broadcast hooks."""
+    ctx = get_context()
+    if ctx.broadcast_many is not None:
+        safe_call(ctx.broadcast_many, room_id, payloads, exclude_sid)
+        return
+    for payload in payloads:
+        if exclude_sid is None:
+            safe_call(ctx.broadcast_to_room, room_id, payload)
+        else:
+            safe_call(ctx.broadcast_to_room, room_id, payload, exclude_sid)
+
+
+# The process-wide engine driven by the heartbeat thread
+_engine = TickEngine()
+
+
+def get_tick_engine() -> TickEngine:
+    """Return the process-wide tick engine."""
+    return _engine
 
 
 # Exported functions that server.py will use
@@ -692,6 +1023,14 @@ __all__ = [
     'GameLoopContext',
     'init_game_loop',
     'get_context',
+    'record_tick',
+    'get_wake_queue',
+    'reschedule_npc_wake',
+    'get_tick_stats',
+    'TickEngine',
+    'TickPhase',
+    'TickState',
+    'get_tick_engine',
     '_clamp_need',
     '_parse_tag_value',
     '_nutrition_from_tags_or_fields',
@@ -708,8 +1047,12 @@ __all__ = [
     '_npc_exec_look',
     '_npc_exec_move_through',
     '_npc_grumble_failure',
+    '_room_other_npc_sheets',
+    '_npc_nearby_exits',
     '_npc_offline_plan',
-    '_npc_add_sleep_plan_safe',
+    '_npc_needs_thinking',
+    '_npc_tick_needs',
+    '_npc_tick_execute',
     'TICK_SECONDS',
     'AP_MAX',
     'NEED_DROP_PER_TICK',
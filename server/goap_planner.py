@@ -0,0 +1,423 @@
+from __future__ import annotations
+
+"""GOAP Planner — A* over bitset world states.
+
+The offline planner used to be a hand-ordered list of if-statements. This
+module replaces its needs handling with a small but real Goal-Oriented Action
+Planning engine:
+
+- World facts (hungry, has_food, food_here, owns_bed_here, ...) are single bits
+  in an int, so a whole state is one integer and copying/comparing is free.
+- Each NPC tool (get_object, consume_object, move_through, claim, sleep, emote,
+  barter, trade) is described once as an Action: required bits, forbidden bits,
+  bits it sets, bits it clears and a cost.
+- A* searches from the NPC's start state to a goal "these need bits are clear".
+  The heuristic is the number of goal bits still set; every action clears at
+  most one need and costs at least 1, so it never overestimates.
+- Results are memoized per (start, goal). The search only ever sees abstract
+  bits, so one cached answer serves every NPC in the same situation; binding
+  the abstract steps to concrete objects (which bread? which bed?) is a cheap
+  linear pass over the NPC's PlanningFacts.
+
+A typical plan is found in a few dozen node expansions, so offline planning
+stays in the microsecond range and the LLM planner is optional flavor.
+"""
+
+import heapq
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import room_index
+
+
+# --- World-state facts (one bit each) ---
+HUNGRY = 1 << 0
+THIRSTY = 1 << 1
+LONELY = 1 << 2
+TIRED = 1 << 3
+UNSAFE = 1 << 4
+HAS_FOOD = 1 << 5
+HAS_DRINK = 1 << 6
+FOOD_HERE = 1 << 7
+DRINK_HERE = 1 << 8
+FOOD_FOR_SALE = 1 << 9
+DRINK_FOR_SALE = 1 << 10
+FOOD_FOR_BARTER = 1 << 11
+DRINK_FOR_BARTER = 1 << 12
+FREE_BED_HERE = 1 << 13
+OWNS_BED_HERE = 1 << 14
+EXIT_AVAILABLE = 1 << 15
+# Reachable through another room (see distance_fields); travel leaves this room
+FOOD_NEARBY = 1 << 16
+DRINK_NEARBY = 1 << 17
+BED_NEARBY = 1 << 18
+
+# Facts that only hold for the current room; travelling invalidates all of them
+ROOM_LOCAL = (
+    FOOD_HERE | DRINK_HERE | FOOD_FOR_SALE | DRINK_FOR_SALE | FOOD_FOR_BARTER
+    | DRINK_FOR_BARTER | FREE_BED_HERE | OWNS_BED_HERE | EXIT_AVAILABLE
+    | FOOD_NEARBY | DRINK_NEARBY | BED_NEARBY
+)
+
+# Travel actions end the bound plan; the NPC replans in the room it arrives in
+TRAVEL_ACTIONS: Tuple[str, ...] = ('travel_food', 'travel_drink', 'travel_bed')
+
+# Needs in the order they are pursued when not all can be met
+NEED_PRIORITY: Tuple[int, ...] = (HUNGRY, THIRSTY, LONELY, TIRED)
+
+# Cap on memoized (start, goal) pairs; the table is cleared when exceeded
+MEMO_LIMIT = 4096
+
+# Hard cap on node expansions per search (the state space is tiny; this is a guard)
+MAX_EXPANSIONS = 2048
+
+
+@dataclass(frozen=True)
+class Action:
+    """A planner action: name, tool, preconditions, effects and cost."""
+    name: str
+    tool: str
+    requires: int
+    sets: int = 0
+    clears: int = 0
+    forbids: int = 0
+    cost: int = 1
+
+    def applicable(self, state: int) -> bool:
+        return (state & self.requires) == self.requires and not (state & self.forbids)
+
+    def apply(self, state: int) -> int:
+        return (state | self.sets) & ~self.clears
+
+
+ACTIONS: Tuple[Action, ...] = (
+    Action('flee', 'move_through', UNSAFE | EXIT_AVAILABLE, clears=UNSAFE),
+    Action('get_food', 'get_object', FOOD_HERE, sets=HAS_FOOD, clears=FOOD_HERE, forbids=HAS_FOOD),
+    Action('eat', 'consume_object', HUNGRY | HAS_FOOD, clears=HUNGRY | HAS_FOOD),
+    Action('buy_food', 'trade', FOOD_FOR_SALE, sets=HAS_FOOD, clears=FOOD_FOR_SALE, forbids=HAS_FOOD, cost=3),
+    Action('barter_food', 'barter', FOOD_FOR_BARTER, sets=HAS_FOOD, clears=FOOD_FOR_BARTER, forbids=HAS_FOOD, cost=4),
+    Action('get_drink', 'get_object', DRINK_HERE, sets=HAS_DRINK, clears=DRINK_HERE, forbids=HAS_DRINK),
+    Action('drink', 'consume_object', THIRSTY | HAS_DRINK, clears=THIRSTY | HAS_DRINK),
+    Action('buy_drink', 'trade', DRINK_FOR_SALE, sets=HAS_DRINK, clears=DRINK_FOR_SALE, forbids=HAS_DRINK, cost=3),
+    Action('barter_drink', 'barter', DRINK_FOR_BARTER, sets=HAS_DRINK, clears=DRINK_FOR_BARTER, forbids=HAS_DRINK, cost=4),
+    Action('emote', 'emote', LONELY, clears=LONELY),
+    Action('claim_bed', 'claim', FREE_BED_HERE, sets=OWNS_BED_HERE, clears=FREE_BED_HERE, forbids=OWNS_BED_HERE),
+    Action('sleep', 'sleep', TIRED | OWNS_BED_HERE, clears=TIRED),
+    Action('travel_food', 'move_through', FOOD_NEARBY, sets=FOOD_HERE,
+           clears=ROOM_LOCAL & ~FOOD_HERE, forbids=FOOD_HERE | HAS_FOOD, cost=3),
+    Action('travel_drink', 'move_through', DRINK_NEARBY, sets=DRINK_HERE,
+           clears=ROOM_LOCAL & ~DRINK_HERE, forbids=DRINK_HERE | HAS_DRINK, cost=3),
+    Action('travel_bed', 'move_through', TIRED | BED_NEARBY, sets=OWNS_BED_HERE,
+           clears=ROOM_LOCAL & ~OWNS_BED_HERE, forbids=OWNS_BED_HERE | FREE_BED_HERE, cost=3),
+)
+
+_ACTIONS_BY_NAME: Dict[str, Action] = {a.name: a for a in ACTIONS}
+
+# (start, goal) -> tuple of action names, or None when the goal is unreachable
+_memo: Dict[Tuple[int, int], Optional[Tuple[str, ...]]] = {}
+_stats = {'searches': 0, 'memo_hits': 0, 'expansions': 0}
+
+
+def _popcount(x: int) -> int:
+    return bin(x).count('1')
+
+
+def astar(start: int, goal: int, actions: Sequence[Action] = ACTIONS) -> Optional[Tuple[str, ...]]:
+    """Cheapest action sequence from start to a state with every goal bit clear.
+
+    Ties on f are broken toward deeper nodes, then insertion order, so plans
+    finish one need before starting the next (get_food, eat, get_drink, drink).
+    """
+    _stats['searches'] += 1
+    if not (start & goal):
+        return ()
+    seq = 0
+    frontier: List[Tuple[int, int, int, int]] = [(_popcount(start & goal), 0, seq, start)]
+    came_from: Dict[int, Tuple[int, str]] = {}
+    best_g: Dict[int, int] = {start: 0}
+    expansions = 0
+    while frontier and expansions < MAX_EXPANSIONS:
+        _f, neg_g, _seq, state = heapq.heappop(frontier)
+        g = -neg_g
+        if g > best_g.get(state, g):
+            continue
+        if not (state & goal):
+            path: List[str] = []
+            while state != start:
+                state, name = came_from[state]
+                path.append(name)
+            _stats['expansions'] += expansions
+            return tuple(reversed(path))
+        expansions += 1
+        for action in actions:
+            if not action.applicable(state):
+                continue
+            nxt = action.apply(state)
+            ng = g + action.cost
+            if ng >= best_g.get(nxt, ng + 1):
+                continue
+            best_g[nxt] = ng
+            came_from[nxt] = (state, action.name)
+            seq += 1
+            heapq.heappush(frontier, (ng + _popcount(nxt & goal), -ng, seq, nxt))
+    _stats['expansions'] += expansions
+    return None
+
+
+def plan_abstract(start: int, goal: int) -> Optional[Tuple[str, ...]]:
+    """Memoized A*: abstract action names for (start, goal)."""
+    key = (start, goal)
+    if key in _memo:
+        _stats['memo_hits'] += 1
+        return _memo[key]
+    result = astar(start, goal)
+    if len(_memo) >= MEMO_LIMIT:
+        _memo.clear()
+    _memo[key] = result
+    return result
+
+
+def choose_goal(start: int) -> int:
+    """Goal bits for a start state.
+
+    Feeling unsafe with a way out trumps everything (flee only). Otherwise each
+    pressing need is added in priority order as long as the combined goal stays
+    reachable, so an unmeetable need never blocks the others.
+    """
+    if (start & UNSAFE) and (start & EXIT_AVAILABLE):
+        return UNSAFE
+    goal = 0
+    for need in NEED_PRIORITY:
+        if not (start & need):
+            continue
+        if plan_abstract(start, goal | need) is not None:
+            goal |= need
+    return goal
+
+
+@dataclass
+class PlanningFacts:
+    """Concrete objects behind the state bits for one NPC in one room."""
+    state: int = 0
+    inv_food: List[Any] = field(default_factory=list)
+    inv_drink: List[Any] = field(default_factory=list)
+    room_food: List[Any] = field(default_factory=list)
+    room_drink: List[Any] = field(default_factory=list)
+    # (seller_name, object, price) for trade, (holder_name, object, offer_uuid) for barter
+    food_for_sale: Optional[Tuple[str, Any, int]] = None
+    drink_for_sale: Optional[Tuple[str, Any, int]] = None
+    food_for_barter: Optional[Tuple[str, Any, str]] = None
+    drink_for_barter: Optional[Tuple[str, Any, str]] = None
+    owned_bed: Any = None
+    free_bed: Any = None
+    exit_name: Optional[str] = None
+    # Exit labels toward food/water/own bed in other rooms (travel_* actions)
+    nearby_exits: Dict[str, str] = field(default_factory=dict)
+    aggression: int = 30
+
+
+def gather_facts(
+    npc_name: str,
+    npc_id: str,
+    room: Any,
+    sheet: Any,
+    threshold: float,
+    nutrition_fn: Callable[[Any], Tuple[int, int]],
+    other_sheets: Optional[Dict[str, Any]] = None,
+    nearby: Optional[Dict[str, str]] = None,
+) -> PlanningFacts:
+    """Read the NPC and its room into a start state plus binding data.
+
+    other_sheets maps names of other NPCs in the room to their sheets; their
+    inventories are what the NPC can trade or barter for. nearby maps 'food',
+    'water', 'bed' and 'safe' to the exit leading toward the closest one
+    elsewhere (DistanceFields.nearby_hops).
+    """
+    facts = PlanningFacts(aggression=int(getattr(sheet, 'aggression', 30) or 0))
+    state = 0
+    if float(getattr(sheet, 'hunger', 100.0) or 0.0) < threshold:
+        state |= HUNGRY
+    if float(getattr(sheet, 'thirst', 100.0) or 0.0) < threshold:
+        state |= THIRSTY
+    if float(getattr(sheet, 'socialization', 100.0) or 0.0) < threshold:
+        state |= LONELY
+    if float(getattr(sheet, 'sleep', 100.0) or 0.0) < threshold:
+        state |= TIRED
+    if float(getattr(sheet, 'safety', 100.0) or 0.0) < 30:
+        state |= UNSAFE
+
+    spare_offer: Optional[str] = None
+    for it in getattr(getattr(sheet, 'inventory', None), 'slots', []) or []:
+        if not it:
+            continue
+        sv, hv = nutrition_fn(it)
+        if sv > 0:
+            facts.inv_food.append(it)
+        if hv > 0:
+            facts.inv_drink.append(it)
+        if sv <= 0 and hv <= 0 and spare_offer is None:
+            spare_offer = getattr(it, 'uuid', None)
+
+    # Room contents come from the room's resource index rather than a full scan
+    facts.room_food = room_index.find(room, 'edible')
+    facts.room_drink = room_index.find(room, 'drinkable')
+    for o in room_index.find(room, 'bed'):
+        owner = getattr(o, 'owner_id', None)
+        if npc_id and owner == npc_id and facts.owned_bed is None:
+            facts.owned_bed = o
+        elif owner is None and facts.free_bed is None:
+            facts.free_bed = o
+
+    coins = int(getattr(sheet, 'currency', 0) or 0)
+    for other_name, other in (other_sheets or {}).items():
+        if other_name == npc_name or other is None:
+            continue
+        for it in getattr(getattr(other, 'inventory', None), 'slots', []) or []:
+            if not it:
+                continue
+            sv, hv = nutrition_fn(it)
+            price = max(1, int(getattr(it, 'value', 0) or 0))
+            for is_kind, sale_attr, barter_attr in (
+                (sv > 0, 'food_for_sale', 'food_for_barter'),
+                (hv > 0, 'drink_for_sale', 'drink_for_barter'),
+            ):
+                if not is_kind:
+                    continue
+                if getattr(facts, sale_attr) is None and coins >= price:
+                    setattr(facts, sale_attr, (other_name, it, price))
+                if getattr(facts, barter_attr) is None and spare_offer:
+                    setattr(facts, barter_attr, (other_name, it, spare_offer))
+
+    if facts.inv_food:
+        state |= HAS_FOOD
+    if facts.inv_drink:
+        state |= HAS_DRINK
+    if facts.room_food:
+        state |= FOOD_HERE
+    if facts.room_drink:
+        state |= DRINK_HERE
+    if facts.food_for_sale:
+        state |= FOOD_FOR_SALE
+    if facts.drink_for_sale:
+        state |= DRINK_FOR_SALE
+    if facts.food_for_barter:
+        state |= FOOD_FOR_BARTER
+    if facts.drink_for_barter:
+        state |= DRINK_FOR_BARTER
+    if facts.owned_bed is not None:
+        state |= OWNS_BED_HERE
+    if facts.free_bed is not None:
+        state |= FREE_BED_HERE
+    facts.nearby_exits = dict(nearby or {})
+    doors = list((getattr(room, 'doors', None) or {}).keys())
+    if doors:
+        # Flee toward the nearest guarded room when one is known
+        facts.exit_name = facts.nearby_exits.get('safe') or doors[0]
+        state |= EXIT_AVAILABLE
+    for key, bit in (('food', FOOD_NEARBY), ('water', DRINK_NEARBY), ('bed', BED_NEARBY)):
+        if facts.nearby_exits.get(key):
+            state |= bit
+    facts.state = state
+    return facts
+
+
+def bind_plan(names: Sequence[str], facts: PlanningFacts) -> List[Dict[str, Any]]:
+    """Turn abstract action names into concrete {'tool', 'args'} steps."""
+    steps: List[Dict[str, Any]] = []
+    held_food = facts.inv_food[0] if facts.inv_food else None
+    held_drink = facts.inv_drink[0] if facts.inv_drink else None
+    taken: set = set()
+
+    def _first_untaken(objs: List[Any]) -> Any:
+        for o in objs:
+            if getattr(o, 'uuid', None) not in taken:
+                return o
+        return None
+
+    bed = facts.owned_bed
+    travel_keys = dict(zip(TRAVEL_ACTIONS, ('food', 'water', 'bed')))
+    for name in names:
+        if name == 'flee':
+            steps.append({'tool': 'move_through', 'args': {'name': facts.exit_name}})
+        elif name in travel_keys:
+            exit_name = facts.nearby_exits.get(travel_keys[name])
+            if exit_name:
+                steps.append({'tool': 'move_through', 'args': {'name': exit_name}})
+            break
+        elif name in ('get_food', 'get_drink'):
+            obj = _first_untaken(facts.room_food if name == 'get_food' else facts.room_drink)
+            if obj is None:
+                continue
+            taken.add(getattr(obj, 'uuid', None))
+            steps.append({'tool': 'get_object', 'args': {'object_name': getattr(obj, 'display_name', '')}})
+            if name == 'get_food':
+                held_food = obj
+            else:
+                held_drink = obj
+        elif name in ('eat', 'drink'):
+            obj = held_food if name == 'eat' else held_drink
+            if obj is None:
+                continue
+            steps.append({'tool': 'consume_object', 'args': {'object_uuid': getattr(obj, 'uuid', '')}})
+        elif name in ('buy_food', 'buy_drink'):
+            deal = facts.food_for_sale if name == 'buy_food' else facts.drink_for_sale
+            if deal is None:
+                continue
+            seller, obj, price = deal
+            steps.append({'tool': 'trade', 'args': {
+                'target_name': seller, 'object_uuid': getattr(obj, 'uuid', ''), 'price': price}})
+            if name == 'buy_food':
+                held_food = obj
+            else:
+                held_drink = obj
+        elif name in ('barter_food', 'barter_drink'):
+            deal = facts.food_for_barter if name == 'barter_food' else facts.drink_for_barter
+            if deal is None:
+                continue
+            holder, obj, offer_uuid = deal
+            steps.append({'tool': 'barter', 'args': {
+                'target_name': holder, 'offer_uuid': offer_uuid, 'want_uuid': getattr(obj, 'uuid', '')}})
+            if name == 'barter_food':
+                held_food = obj
+            else:
+                held_drink = obj
+        elif name == 'emote':
+            if facts.aggression > 60:
+                # Aggressive NPCs might emote more dominantly
+                msg = 'glares around the room assertively.'
+            else:
+                # Peaceful NPCs are more subdued
+                msg = 'hums a tune to themself.'
+            steps.append({'tool': 'emote', 'args': {'message': msg}})
+        elif name == 'claim_bed':
+            bed = facts.free_bed
+            if bed is None:
+                continue
+            steps.append({'tool': 'claim', 'args': {'object_uuid': getattr(bed, 'uuid', '')}})
+        elif name == 'sleep':
+            if bed is None:
+                continue
+            steps.append({'tool': 'sleep', 'args': {'bed_uuid': getattr(bed, 'uuid', '')}})
+    return steps
+
+
+def plan_needs(facts: PlanningFacts) -> List[Dict[str, Any]]:
+    """Plan for the NPC's pressing needs; [] when nothing is needed or possible."""
+    goal = choose_goal(facts.state)
+    if not goal:
+        return []
+    names = plan_abstract(facts.state, goal)
+    if not names:
+        return []
+    return bind_plan(names, facts)
+
+
+def get_planner_stats() -> Dict[str, int]:
+    """Return search/memo counters for monitoring."""
+    stats = dict(_stats)
+    stats['memo_size'] = len(_memo)
+    return stats
+
+
+def clear_memo() -> None:
+    _memo.clear()
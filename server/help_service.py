@@ -80,6 +80,8 @@ def print_command_help() -> None:
         ("/bring <player>", "bring a player to your current room"),
         ("/purge", "reset world to factory default (confirmation required)"),
         ("/worldstate", "print the redacted contents of world_state.json"),
+        ("/tickstats [reset]", "show world tick phase timings and slowest NPCs"),
+        ("/cmdstats [reset]", "show per-command latency percentiles and slow commands"),
         ("/safety <G|PG-13|R|OFF>", "set AI content safety level (admins)"),
         ("/faction factiongen", "[Experimental] AI-generate a small faction"),
     ], indent=2)
@@ -181,6 +183,8 @@ def build_help_text(
             ("/bring <player>", "Bring a player to your current room"),
             ("/purge", "Reset world to factory defaults (confirm)"),
             ("/worldstate", "Print redacted world_state.json"),
+            ("/tickstats [reset]", "World tick timings, percentiles, slow NPCs"),
+            ("/cmdstats [reset]", "Command latency percentiles, slow commands"),
             ("/safety <G|PG-13|R|OFF>", "Set AI content safety level"),
             ("/settimedesc <hour> <text>", "Set description for a daily hour (0-23)"),
             ("/faction factiongen", "AI-generate a small faction"),
@@ -5,10 +5,23 @@ from __future__ import annotations
 Goals:
 - Allow single-quoted ids with spaces across commands.
 - Provide consistent fuzzy matching (ci-exact, unique prefix, unique substring).
-- Offer suggestions when invalid, listing ids with the same first letter (case-insensitive).
+- Offer suggestions when invalid: names within a small edit distance of what was
+  typed (closest first), else ids with the same first letter (case-insensitive).
+
+Candidate sets passed as versioned containers (world.rooms, world.players,
+world.npc_sheets, world.object_templates, room.doors, room.npcs; see
+versioned.py) get a cached FuzzyIndex: a sorted lowercase array for bisect
+prefix lookup and a trigram index for substring lookup, rebuilt only when the
+container's version changes. Results and messages are identical to the scan.
+Its typo suggestions come from a BK-tree (bk_tree.py) that is built on the
+first miss and then only extended as names are added.
 """
 
-from typing import Iterable, List, Optional, Tuple, Dict
+from bisect import bisect_left, bisect_right
+from typing import Any, Iterable, List, Optional, Tuple, Dict, Set
+
+from bk_tree import BKTree, edit_distance, typo_radius
+from versioned import cached, is_versioned, names_version
 
 
 def strip_quotes(s: str) -> str:
@@ -52,6 +65,26 @@ def _suggest_by_first_letter(typed: str, candidates: Iterable[str]) -> List[str]
         return []
 
 
+def _suggest_by_typo(typed: str, candidates: Iterable[str]) -> List[str]:
+    """Candidates within typo_radius edits of typed (case-insensitive), closest first."""
+    t = (typed or "").strip().lower()
+    radius = typo_radius(t)
+    if not radius:
+        return []
+    scored: List[Tuple[int, str, str]] = []
+    for c in candidates:
+        if not isinstance(c, str):
+            continue
+        low = c.lower()
+        if abs(len(low) - len(t)) > radius:
+            continue
+        d = edit_distance(t, low)
+        if d <= radius:
+            scored.append((d, low, c))
+    scored.sort()
+    return [c for _d, _low, c in scored]
+
+
 def _deterministic_sort(items: List[str]) -> List[str]:
     """Sort items deterministically for stable fuzzy resolution results.
     
@@ -68,6 +101,132 @@ def _deterministic_sort(items: List[str]) -> List[str]:
     """
     return sorted(items, key=lambda x: (x.lower(), x))
 
+def _ambiguous(matches: List[str]) -> Tuple[bool, Optional[str], Optional[str]]:
+    return False, 'Ambiguous id. Did you mean: ' + ", ".join(matches[:10]) + ' ?', None
+
+
+def _not_found(typed: str, suggestions: List[str]) -> Tuple[bool, Optional[str], Optional[str]]:
+    if suggestions:
+        return False, f"'{typed}' not found. Did you mean: " + ", ".join(suggestions[:10]) + '?', None
+    return False, f"'{typed}' not found.", None
+
+
+# Substring lookups use trigrams; shorter fragments scan the cached lowercase array
+NGRAM = 3
+
+
+class FuzzyIndex:
+    """Prebuilt lookup structures for one candidate set (see fuzzy_resolve).
+
+    Entries are kept in _deterministic_sort order, so a prefix match is one
+    contiguous bisect range and index order is suggestion order.
+    """
+
+    __slots__ = ('exact', 'lower_map', 'entries', 'lowers', 'grams', 'typos')
+
+    def __init__(self, candidates: Iterable[str], typos: Optional[BKTree] = None):
+        items = list(candidates)
+        self.exact: Set[str] = set(items)
+        self.lower_map: Dict[str, str] = {c.lower(): c for c in items}
+        self.entries: List[str] = _deterministic_sort(items)
+        self.lowers: List[str] = [c.lower() for c in self.entries]
+        self.grams: Dict[str, List[int]] = {}
+        for pos, low in enumerate(self.lowers):
+            for gram in {low[i:i + NGRAM] for i in range(len(low) - NGRAM + 1)}:
+                self.grams.setdefault(gram, []).append(pos)
+        # Shared with the index this one replaces; synced lazily in _typo_tree()
+        self.typos = typos
+
+    def _prefix_range(self, prefix: str) -> Tuple[int, int]:
+        lo = bisect_left(self.lowers, prefix)
+        n = len(prefix)
+        # Truncating sorted strings to n characters keeps them sorted
+        hi = bisect_right(self.lowers, prefix, lo, key=lambda low: low[:n])
+        return lo, hi
+
+    def _substring_positions(self, needle: str) -> List[int]:
+        if len(needle) < NGRAM:
+            return [pos for pos, low in enumerate(self.lowers) if needle in low]
+        postings = []
+        for i in range(len(needle) - NGRAM + 1):
+            plist = self.grams.get(needle[i:i + NGRAM])
+            if not plist:
+                return []
+            postings.append(plist)
+        postings.sort(key=len)
+        found = set(postings[0])
+        for plist in postings[1:]:
+            found.intersection_update(plist)
+            if not found:
+                return []
+        return sorted(pos for pos in found if needle in self.lowers[pos])
+
+    def _typo_tree(self) -> BKTree:
+        tree = self.typos
+        # Removed names stay in the tree (results are filtered); rebuild once they dominate
+        if tree is None or len(tree) > 2 * len(self.lower_map) + 64:
+            tree = BKTree(self.lower_map)
+        else:
+            for low in self.lower_map.keys() - tree.words:
+                tree.add(low)
+        self.typos = tree
+        return tree
+
+    def suggest(self, typed: str) -> List[str]:
+        """Typo suggestions, else same-first-letter ones; same order as the scan."""
+        t = (typed or '').strip()
+        tl = t.lower()
+        radius = typo_radius(tl)
+        if radius:
+            hits = sorted((d, low) for d, low in self._typo_tree().search(tl, radius) if low in self.lower_map)
+            found: List[str] = []
+            for _d, low in hits:
+                found.extend(self.entries[bisect_left(self.lowers, low):bisect_right(self.lowers, low)])
+            if found:
+                return found
+        first = t[:1].lower()
+        if not first:
+            return []
+        lo, hi = self._prefix_range(first)
+        return [c for c in self.entries[lo:hi] if c[:1].lower() == first]
+
+    def resolve(self, typed: str) -> Tuple[bool, Optional[str], Optional[str]]:
+        t = (typed or '').strip()
+        if not t:
+            return False, 'Identifier required.', None
+        if t in self.exact:
+            return True, None, t
+        tl = t.lower()
+        if tl in self.lower_map:
+            return True, None, self.lower_map[tl]
+        lo, hi = self._prefix_range(tl)
+        if hi - lo == 1:
+            return True, None, self.entries[lo]
+        if hi - lo > 1:
+            return _ambiguous(self.entries[lo:min(hi, lo + 10)])
+        subs = self._substring_positions(tl)
+        if len(subs) == 1:
+            return True, None, self.entries[subs[0]]
+        if len(subs) > 1:
+            return _ambiguous([self.entries[pos] for pos in subs])
+        return _not_found(typed, self.suggest(t))
+
+
+def fuzzy_index(candidates: Any, extra: Any = None) -> Optional[FuzzyIndex]:
+    """Cached FuzzyIndex for a versioned container (its keys, for dicts), else None."""
+    if not is_versioned(candidates):
+        return None
+
+    def _build() -> FuzzyIndex:
+        previous = candidates.derived.get('fuzzy')
+        return FuzzyIndex(candidates, previous[1].typos if previous else None)
+
+    try:
+        return cached(candidates, 'fuzzy', _build, extra)
+    except Exception:
+        return None
+
+
 def fuzzy_resolve(typed: str, candidates: Iterable[str]) -> Tuple[bool, Optional[str], Optional[str]]:
     """Generic fuzzy resolver with deterministic ordering.
 
@@ -76,11 +235,18 @@ def fuzzy_resolve(typed: str, candidates: Iterable[str]) -> Tuple[bool, Optional
     - ok=False with err message otherwise
     Strategy: exact -> ci-exact -> unique prefix (ci) -> unique substring (ci).
     On ambiguity: list up to 10 candidates in deterministic order.
-    On not found: suggest ids with same first letter when available.
+    On not found: suggest names within a few typos (closest first), else ids
+    with the same first letter.
     
     Deterministic sorting ensures stable results across different systems, locales,
     and input orderings. Sorts case-insensitively first, then by original case.
+
+    Versioned containers (pass the dict itself, not .keys()) are resolved
+    through their cached FuzzyIndex; any other iterable is scanned.
     """
+    index = fuzzy_index(candidates)
+    if index is not None:
+        return index.resolve(typed)
     t = (typed or '').strip()
     items = list(candidates)
     if not t:
@@ -98,21 +264,16 @@ def fuzzy_resolve(typed: str, candidates: Iterable[str]) -> Tuple[bool, Optional
         return True, None, prefs[0]
     if len(prefs) > 1:
         # Deterministic sorting: case-insensitive first, then by original case
-        deterministic_prefs = _deterministic_sort(prefs)
-        return False, 'Ambiguous id. Did you mean: ' + ", ".join(deterministic_prefs[:10]) + ' ?', None
+        return _ambiguous(_deterministic_sort(prefs))
     # substring
     subs = [c for c in items if t.lower() in c.lower()]
     if len(subs) == 1:
         return True, None, subs[0]
     if len(subs) > 1:
         # Deterministic sorting: case-insensitive first, then by original case  
-        deterministic_subs = _deterministic_sort(subs)
-        return False, 'Ambiguous id. Did you mean: ' + ", ".join(deterministic_subs[:10]) + ' ?', None
+        return _ambiguous(_deterministic_sort(subs))
     # not found suggestions
-    suggestions = _suggest_by_first_letter(t, items)
-    if suggestions:
-        return False, f"'{typed}' not found. Did you mean: " + ", ".join(suggestions[:10]) + '?', None
-    return False, f"'{typed}' not found.", None
+    return _not_found(typed, _suggest_by_typo(t, items) or _suggest_by_first_letter(t, items))
 
 
 # ----- Entity-specific resolvers -----
@@ -125,15 +286,11 @@ def resolve_room_id(world, typed: str) -> Tuple[bool, Optional[str], Optional[st
     world is keyed by stable room ids. This function bridges the two.
     Returns (ok, err, room_id) where room_id is the internal identifier.
     """
-    return fuzzy_resolve(strip_quotes(typed), world.rooms.keys())
+    return fuzzy_resolve(strip_quotes(typed), world.rooms)
 
 
-def resolve_player_sid_global(world, typed: str) -> Tuple[bool, Optional[str], Optional[str], Optional[str]]:
-    """Resolve a player SID by display name across all connected players.
-
-    Returns (ok, err, sid, resolved_display_name).
-    """
-    name = strip_quotes(typed)
+def _player_names(world) -> Tuple[List[str], Dict[str, str]]:
+    """Display names of connected players (in world.players order) and name -> sid."""
     display_to_sid: Dict[str, str] = {}
     candidates: List[str] = []
     for psid, p in list(world.players.items()):
@@ -145,7 +302,32 @@ def resolve_player_sid_global(world, typed: str) -> Tuple[bool, Optional[str], O
             continue
         candidates.append(disp)
         display_to_sid[disp] = psid
-    ok, err, resolved = fuzzy_resolve(name, candidates)
+    return candidates, display_to_sid
+
+
+def resolve_player_sid_global(world, typed: str) -> Tuple[bool, Optional[str], Optional[str], Optional[str]]:
+    """Resolve a player SID by display name across all connected players.
+
+    Returns (ok, err, sid, resolved_display_name).
+    """
+    name = strip_quotes(typed)
+
+    def _build() -> Tuple[FuzzyIndex, Dict[str, str]]:
+        candidates, display_to_sid = _player_names(world)
+        previous = world.players.derived.get('player_names')
+        return FuzzyIndex(candidates, previous[1][0].typos if previous else None), display_to_sid
+
+    # Cached per world.players version and display-name version
+    try:
+        hit = cached(world.players, 'player_names', _build, names_version())
+    except Exception:
+        hit = None
+    if hit is not None:
+        index, display_to_sid = hit
+        ok, err, resolved = index.resolve(name)
+    else:
+        candidates, display_to_sid = _player_names(world)
+        ok, err, resolved = fuzzy_resolve(name, candidates)
     if not ok or not resolved:
         return False, err, None, None
     return True, None, display_to_sid.get(resolved), resolved
@@ -177,7 +359,8 @@ def resolve_npcs_in_room(room, requested: List[str]) -> List[str]:
     """
     if room is None or not getattr(room, 'npcs', None):
         return []
-    in_room = list(room.npcs)
+    # room.npcs itself, so its cached index is used
+    in_room = room.npcs
     resolved: List[str] = []
     seen: set[str] = set()
     for req in requested:
@@ -194,5 +377,4 @@ def resolve_door_name(room, typed: str) -> Tuple[bool, Optional[str], Optional[s
     """
     if room is None:
         return False, 'You are nowhere.', None
-    door_names = list(getattr(room, 'doors', {}).keys())
-    return fuzzy_resolve(strip_quotes(typed), door_names)
+    return fuzzy_resolve(strip_quotes(typed), getattr(room, 'doors', {}))
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import time
 import logging
 
 """
@@ -24,7 +23,8 @@ add actions. "Step Away" is always available so players can cancel.
 
 from typing import Dict, Any
 from concurrency_utils import atomic
-import random
+import rng_service
+import world_clock
 from dice_utils import roll as dice_roll
 from movement_service import move_through_door
 from rate_limiter import check_rate_limit, OperationType
@@ -656,7 +656,7 @@ def handle_interaction_input(
                         'actor_name': player.sheet.display_name,
                         'target_obj_id': obj.uuid,
                         'target_obj_name': getattr(obj, 'display_name', 'object'),
-                        'timestamp': time.time()
+                        'timestamp': world_clock.now()
                     })
 
                 # Transfer ownership to the picking player
@@ -991,7 +991,7 @@ def handle_interaction_input(
         try:
             pct = dice_roll('d%').total
         except Exception:
-            pct = random.randint(1, 100)
+            pct = rng_service.get_rng('interaction').randint(1, 100)
         spawned = None
         if pct <= 20:
             try:
@@ -1007,7 +1007,7 @@ def handle_interaction_input(
                     except Exception:
                         continue
                 if matches:
-                    base = random.choice(matches)
+                    base = rng_service.get_rng('interaction').choice(matches)
                     if hasattr(base, 'to_dict'):
                         spawned = _Obj.from_dict(base.to_dict())
                     else:
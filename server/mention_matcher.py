@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+"""Mention Matcher — which of a room's NPCs does a chat line name?
+
+dialogue_utils.extract_npc_mentions used to run one word-boundary regex per
+NPC for every say/tell. A MentionMatcher compiles the room's NPC names into an
+Aho-Corasick automaton once, then finds every mentioned NPC in a single pass
+over the message:
+
+- matching is case-insensitive with a word boundary at each end of the name,
+  exactly like re.search(r"\\b" + re.escape(name) + r"\\b", text, re.IGNORECASE)
+- results keep the order of the names the matcher was built from, unique
+- the automaton covers ASCII names against ASCII text (all the usual chat);
+  names or messages with other characters take the regex path, so Unicode
+  case and word rules stay exactly those of `re`
+
+matcher_for(room.npcs) caches the matcher on the room's VersionedSet
+(versioned.py), so it is rebuilt only when the room's NPC set changes.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from versioned import cached
+
+
+def _is_word(ch: str) -> bool:
+    """re's \\w for one ASCII character."""
+    return ch.isalnum() or ch == '_'
+
+
+def regex_mentioned(name: str, text: str) -> bool:
+    """The reference rule: name appears in text between word boundaries, any case."""
+    return re.search(r"\b" + re.escape(name) + r"\b", text, flags=re.IGNORECASE) is not None
+
+
+class MentionMatcher:
+    """Aho-Corasick automaton over a fixed list of NPC names."""
+
+    __slots__ = ('names', '_goto', '_fail', '_out', '_regex_names')
+
+    def __init__(self, names: Iterable[str]):
+        self.names: List[str] = []
+        seen: Set[str] = set()
+        for name in names:
+            if isinstance(name, str) and name and name not in seen:
+                seen.add(name)
+                self.names.append(name)
+        # state -> {char: state}; state -> fail state; state -> [(name index, length)]
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, int]]] = [[]]
+        self._regex_names: List[int] = []
+        for idx, name in enumerate(self.names):
+            if name.isascii():
+                self._insert(name.lower(), idx)
+            else:
+                self._regex_names.append(idx)
+        self._link()
+
+    def _insert(self, pattern: str, idx: int) -> None:
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((idx, len(pattern)))
+
+    def _link(self) -> None:
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def _scan(self, text: str) -> Set[int]:
+        found: Set[int] = set()
+        lowered = text.lower()
+        goto, fail, out = self._goto, self._fail, self._out
+        n = len(text)
+        state = 0
+        for i, ch in enumerate(lowered):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for idx, length in out[state]:
+                if idx in found:
+                    continue
+                start = i - length + 1
+                before = _is_word(text[start - 1]) if start > 0 else False
+                after = _is_word(text[i + 1]) if i + 1 < n else False
+                if before != _is_word(text[start]) and after != _is_word(text[i]):
+                    found.add(idx)
+        return found
+
+    def mentions(self, text: str) -> List[str]:
+        """Names mentioned in text, in matcher order, unique."""
+        if not isinstance(text, str) or not text:
+            return []
+        if not text.isascii():
+            return [name for name in self.names if regex_mentioned(name, text)]
+        found = self._scan(text) if len(self._goto) > 1 else set()
+        for idx in self._regex_names:
+            if regex_mentioned(self.names[idx], text):
+                found.add(idx)
+        return [self.names[idx] for idx in sorted(found)]
+
+
+def matcher_for(npcs: Iterable[str]) -> Optional[MentionMatcher]:
+    """Cached matcher for a versioned NPC set (room.npcs); None for plain iterables."""
+    return cached(npcs, 'mentions', lambda: MentionMatcher(npcs))
@@ -5,7 +5,7 @@ to keep server.py clean and enable reuse across services.
 """
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, Callable
 
 from safe_utils import safe_call
 
@@ -22,9 +22,19 @@ class MessageContext:
         self,
         world: Any,
         socketio: Any,
+        send_to_sid: Callable[[str, str, Any], None] | None = None,
     ):
         self.world = world
         self.socketio = socketio
+        # Per-client send through the server's send queues: (sid, event, payload)
+        self.send_to_sid = send_to_sid
+
+    def send(self, sid: str, event: str, payload: Any) -> None:
+        """Send to one client, through the send queues when they are wired in."""
+        if self.send_to_sid is not None:
+            self.send_to_sid(sid, event, payload)
+        else:
+            self.socketio.emit(event, payload, to=sid)
 
 
 # Global context
@@ -63,7 +73,7 @@ def broadcast_to_room(room_id: str, payload: dict, exclude_sid: str | None = Non
             if sid == exclude_sid:
                 continue
             try:
-                ctx.socketio.emit(MESSAGE_OUT, payload, to=sid)
+                ctx.send(sid, MESSAGE_OUT, payload)
             except Exception:
                 pass
     
@@ -79,7 +89,7 @@ def emit_to_player(sid: str, event: str, payload: dict) -> None:
         payload: The message payload dict
     """
     ctx = get_context()
-    safe_call(ctx.socketio.emit, event, payload, to=sid)
+    safe_call(ctx.send, sid, event, payload)
 
 
 def broadcast_all(payload: dict) -> None:
@@ -1,8 +1,8 @@
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import List, Dict, Optional, Any
-import uuid
-import time
+import rng_service
+import world_clock
 
 class MissionStatus(Enum):
     PENDING = "pending"   # Offered but not accepted
@@ -79,10 +79,10 @@ class Mission:
     faction_id: Optional[str] = None # If this is a faction mission
 
     # State
-    uuid: str = field(default_factory=lambda: str(uuid.uuid4()))
+    uuid: str = field(default_factory=rng_service.new_id)
     status: MissionStatus = MissionStatus.PENDING
     objectives: List[Objective] = field(default_factory=list)
-    created_at: float = field(default_factory=time.time)
+    created_at: float = field(default_factory=world_clock.now)
 
     def to_dict(self) -> dict:
         return {
@@ -119,8 +119,8 @@ class Mission:
             deadline=data.get("deadline"),
             min_faction_rank=data.get("min_faction_rank"),
             faction_id=data.get("faction_id"),
-            uuid=data.get("uuid", str(uuid.uuid4())),
-            created_at=data.get("created_at", time.time())
+            uuid=data.get("uuid") or rng_service.new_id(),
+            created_at=data.get("created_at", world_clock.now())
         )
         
         status_val = data.get("status", "pending")
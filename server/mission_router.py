@@ -165,13 +165,8 @@ def _handle_offer(ctx: CommandContext, sid: str, target_name: str, mid: str, emi
             target_player = ctx.world.players.get(target_sid)
             if target_player:
                 # We can't use 'emit' here because that goes to the sender (sid).
-                # We need to use ctx.socketio.emit or similar, but ctx doesn't expose raw emit easily for other sids?
-                # ctx has message_out constant? No.
-                # ctx has broadcast_to_room.
-                # We can use ctx.socketio.emit(MESSAGE_OUT, payload, room=target_sid)
-                from constants import MESSAGE_OUT
                 for e in emits:
-                    ctx.socketio.emit(MESSAGE_OUT, e, room=target_sid)
+                    ctx.send_to(target_sid, e)
         else:
             emit({'type': 'error', 'content': err})
         return
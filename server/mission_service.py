@@ -1,6 +1,6 @@
-import time
 import uuid
-import random
+import rng_service
+import world_clock
 from typing import List, Tuple, Optional, Dict, Any
 
 from mission_model import (
@@ -28,7 +28,7 @@ def create_mission(
     
     deadline = None
     if deadline_seconds:
-        deadline = time.time() + deadline_seconds
+        deadline = world_clock.now() + deadline_seconds
 
     mission = Mission(
         title=title,
@@ -143,7 +143,7 @@ def complete_mission(world: World, mission: Mission):
 def process_tick(world: World) -> List[str]:
     """Check deadlines. Returns list of failed mission UUIDs."""
     failed_ids = []
-    now = time.time()
+    now = world_clock.now()
     
     for mission in list(world.missions.values()):
         if mission.status == MissionStatus.ACTIVE:
@@ -162,7 +162,7 @@ def generate_dynamic_mission(world: World, issuer_npc_name: str, target_player_l
     if not world.object_templates:
         return None
         
-    target_item_key = random.choice(list(world.object_templates.keys()))
+    target_item_key = rng_service.get_rng('missions').choice(list(world.object_templates.keys()))
     target_template = world.object_templates[target_item_key]
     
     title = f"Retrieve {target_template.display_name}"
@@ -175,7 +175,7 @@ def generate_dynamic_mission(world: World, issuer_npc_name: str, target_player_l
     )
     
     rewards = {
-        'currency': random.randint(10, 50) * target_player_level,
+        'currency': rng_service.get_rng('missions').randint(10, 50) * target_player_level,
         'xp': 100 * target_player_level
     }
     
@@ -199,7 +199,7 @@ def generate_faction_mission(world: World, faction_id: str, target_player_level:
     if not world.object_templates:
         return None
         
-    target_item_key = random.choice(list(world.object_templates.keys()))
+    target_item_key = rng_service.get_rng('missions').choice(list(world.object_templates.keys()))
     target_template = world.object_templates[target_item_key]
     
     title = f"Supplies for {faction.name}"
@@ -212,7 +212,7 @@ def generate_faction_mission(world: World, faction_id: str, target_player_level:
     )
     
     rewards = {
-        'currency': random.randint(20, 100) * target_player_level,
+        'currency': rng_service.get_rng('missions').randint(20, 100) * target_player_level,
         'xp': 150 * target_player_level,
         'faction_id': faction_id,
         'faction_rep': 10
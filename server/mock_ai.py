@@ -34,7 +34,7 @@ from __future__ import annotations
 
 import re
 import json
-from typing import Dict, List, Optional, Any, Union
+from typing import Callable, Dict, List, Optional, Any, Union
 import logging
 
 logger = logging.getLogger(__name__)
@@ -76,12 +76,12 @@ class MockAIModel:
             default_response: Text to return when no pattern matches
         """
         self.default_response = default_response
-        self.response_patterns: List[tuple[str, str]] = []
+        self.response_patterns: List[tuple[str, Union[str, Callable[[str], str]]]] = []
         self.call_history: List[str] = []
         self.error_patterns: List[tuple[str, Exception]] = []
         self.call_count = 0
     
-    def add_response_pattern(self, pattern: str, response: str) -> None:
+    def add_response_pattern(self, pattern: str, response: Union[str, Callable[[str], str]]) -> None:
         """Add a regex pattern that triggers a specific response.
         
         When generate_content is called, the prompt will be checked against
@@ -90,7 +90,9 @@ class MockAIModel:
         
         Args:
             pattern: Regex pattern to match against prompts (case-insensitive)
-            response: Text to return when pattern matches
+            response: Text to return when pattern matches, or a callable that
+                receives the prompt and returns the text (handy when the reply
+                must echo details from the prompt, like NPC names)
         """
         self.response_patterns.append((pattern, response))
     
@@ -136,6 +138,8 @@ class MockAIModel:
         for pattern, response in self.response_patterns:
             if re.search(pattern, prompt, re.IGNORECASE | re.DOTALL):
                 logger.debug(f"MockAI: Pattern '{pattern}' matched, returning configured response")
+                if callable(response):
+                    return MockAIResponse(response(prompt))
                 return MockAIResponse(response)
         
         # No patterns matched, return default
@@ -192,6 +196,20 @@ def create_npc_generation_mock() -> MockAIModel:
     return mock
 
 
+def _batch_plan_response(prompt: str) -> str:
+    """Build a batched GOAP reply keyed by the NPC names found in the prompt."""
+    try:
+        payload = json.loads(prompt[prompt.index('{"room_objects"'):])
+        names = [entry['npc']['name'] for entry in payload.get('npcs', [])]
+    except Exception:
+        return '{}'
+    plan = [
+        {"tool": "get_object", "args": {"object_name": "Bread"}},
+        {"tool": "consume_object", "args": {"object_uuid": "test-uuid"}},
+    ]
+    return json.dumps({name: plan for name in names})
+
+
 def create_goap_planning_mock() -> MockAIModel:
     """Create a mock model configured for GOAP AI planning testing.
     
@@ -200,6 +218,14 @@ def create_goap_planning_mock() -> MockAIModel:
     """
     mock = MockAIModel()
     
+    # Batched planning: answer with a consumption plan for every NPC named in
+    # the prompt's JSON payload (checked first since batch prompts mention
+    # every tool and would otherwise hit the simpler patterns below)
+    mock.add_response_pattern(
+        r"^BATCH PLANNING REQUEST",
+        _batch_plan_response
+    )
+    
     # Simple movement plan
     mock.add_response_pattern(
         r"move|travel|go.*to",
@@ -8,6 +8,9 @@ and message broadcasting. Extracted from server.py to reduce file size.
 
 from typing import Any, Callable, Dict, Optional
 
+import ai_budget
+from ai_utils import generate_content as ai_generate
+
 MESSAGE_OUT = 'message'
 
 
@@ -35,7 +38,8 @@ def send_npc_reply(
 
     By default, echoes to the sender and broadcasts to the room (excluding sender).
     If private_to_sender_only=True, only the sender receives the reply.
-    Works offline with a fallback when AI is not configured.
+    Works offline with a fallback when AI is not configured, and falls back the
+    same way when the world-wide AI budget (ai_budget.py) has no slot for it.
     """
     # One-shot suppression flag for quoted-origin messages
     if suppress_flags.get('_suppress_npc_reply_once', False):
@@ -110,13 +114,14 @@ def send_npc_reply(
             if player_obj:
                 broadcast_to_room(player_obj.room_id, payload, exclude_sid=sid)
 
+    offline_reply = {
+        'type': 'npc',
+        'name': npc_name,
+        'content': f"[i]{npc_name} considers your words.[/i] 'I hear you, {player_name}. Try 'look' to survey your surroundings.'"
+    }
     if model is None:
         # Offline fallback
-        _send_payload({
-            'type': 'npc',
-            'name': npc_name,
-            'content': f"[i]{npc_name} considers your words.[/i] 'I hear you, {player_name}. Try 'look' to survey your surroundings.'"
-        })
+        _send_payload(offline_reply)
         return
 
     # Rate limiting
@@ -128,26 +133,29 @@ def send_npc_reply(
         })
         return
 
-    # Generate AI response
-    try:
-        safety = safety_settings_for_level(getattr(world, 'safety_level', 'G'))
-        if safety is not None:
-            ai_response = model.generate_content(prompt, safety_settings=safety)
-        else:
-            ai_response = model.generate_content(prompt)
-        content_text = getattr(ai_response, 'text', None) or str(ai_response)
-        print(f"Gemini response ({npc_name}): {content_text}")
-        _send_payload({
-            'type': 'npc',
-            'name': npc_name,
-            'content': content_text
-        })
-    except Exception as e:
-        print(f"An error occurred while generating content for {npc_name}: {e}")
-        emit(MESSAGE_OUT, {
-            'type': 'error',
-            'content': f"{npc_name} seems distracted and doesn't respond. (Error: {e})"
-        })
+    with ai_budget.get_ai_budget().slot(ai_budget.AIPriority.DIALOGUE, sid or npc_name) as granted:
+        if not granted:
+            # World-wide AI budget exhausted: answer as if offline
+            _send_payload(offline_reply)
+            return
+        # Generate AI response
+        try:
+            safety = safety_settings_for_level(getattr(world, 'safety_level', 'G'))
+            ai_response = ai_generate(model, prompt, safety, kind='dialogue')
+            content_text = getattr(ai_response, 'text', None) or str(ai_response)
+            print(f"Gemini response ({npc_name}): {content_text}")
+        except Exception as e:
+            print(f"An error occurred while generating content for {npc_name}: {e}")
+            emit(MESSAGE_OUT, {
+                'type': 'error',
+                'content': f"{npc_name} seems distracted and doesn't respond. (Error: {e})"
+            })
+            return
+    _send_payload({
+        'type': 'npc',
+        'name': npc_name,
+        'content': content_text
+    })
 
 
 def _build_memory_context(npc_sheet: Any) -> str:
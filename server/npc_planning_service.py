@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+"""NPC Planning Service.
+
+Builds GOAP planning prompts for the AI planner and parses its replies. The
+single-NPC prompt used by npc_think lives here alongside a batched variant that
+plans for several NPCs sharing a room in ONE model call: the system prompt and
+the room's object list are sent once, then each NPC contributes only its own
+needs, personality and inventory. The model answers with a JSON object keyed by
+NPC name; any entry that is missing or malformed falls back to the offline
+planner for that NPC only, so one bad answer never costs the whole room a plan.
+
+Dependencies (model, offline planner, nutrition helper) are injected by the
+caller to keep this module free of server globals.
+"""
+
+import json
+import os
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ai_utils import generate_content as ai_generate
+
+
+# Maximum number of actions we accept from the planner for a single NPC
+MAX_PLAN_STEPS = 4
+
+# Marker that prefixes batched prompts (mock models key off this line too)
+BATCH_MARKER = "BATCH PLANNING REQUEST"
+
+PLANNER_SYSTEM_PROMPT = (
+    "You are an autonomous NPC in a text MUD with personality traits that affect your behavior.\n"
+    "You have needs (hunger/thirst/socialization/sleep/safety/wealth_desire/social_status, 0-100; higher is better).\n"
+    "Your personality traits (0-100) influence how you pursue needs:\n"
+    "- Low responsibility (<40) = more likely to steal/break rules to satisfy needs\n"
+    "- High aggression (>60) = more confrontational approach to competition\n"
+    "- High curiosity (>60) = investigate unknown objects before other actions\n"
+    "- Low confidence (<40) = avoid risky actions, prefer safe options\n"
+    "Plan a short sequence of 1-4 actions considering both your needs AND personality.\n"
+    "Always return ONLY JSON: an array of {\"tool\": str, \"args\": object}. No prose.\n"
+    "Tools:\n"
+    "- move_through(name: str): move through a named door or travel point to an adjacent room.\n"
+    "- get_object(object_name: str): pick up an object in the current room by name.\n"
+    "- consume_object(object_uuid: str): consume an item in your inventory.\n"
+    "- emote(message?: str): perform a small emote to yourself/the room to recharge social needs.\n"
+    "- say(message: str): speak to the room or a specific person.\n"
+    "- drop(object_uuid: str): drop an item from your inventory.\n"
+    "- look(target: str): examine an object or person.\n"
+    "- barter(target_name: str, offer_uuid: str, want_uuid: str): trade items with someone in the same room.\n"
+    "- trade(target_name: str, object_uuid: str, price: int): buy an item with your coins from someone nearby.\n"
+    "- claim(object_uuid: str): claim an object as yours (required before sleeping in a bed).\n"
+    "- unclaim(object_uuid: str): remove your ownership from an object.\n"
+    "- sleep(bed_uuid?: str): sleep in a bed you own to restore sleep.\n"
+    "- do_nothing(): if nothing relevant is needed.\n"
+)
+
+PLANNER_INSTRUCTIONS = (
+    'Consider personality when planning. Low responsibility may steal if desperate. '
+    'High curiosity investigates new objects. Low confidence avoids risks.'
+)
+
+BATCH_INSTRUCTIONS = (
+    "You are planning for SEVERAL NPCs who share the room described below.\n"
+    "Return ONLY JSON: an object whose keys are the exact NPC names and whose values are "
+    "each NPC's action array (same format as above). Include every NPC listed. No prose."
+)
+
+
+def get_batch_size() -> int:
+    """Maximum NPCs per batched planning request (env MUD_PLAN_BATCH_SIZE, default 8)."""
+    try:
+        size = int(os.getenv('MUD_PLAN_BATCH_SIZE', '8'))
+    except Exception:
+        size = 8
+    return max(1, size)
+
+
+def chunk_batches(entries: Sequence[Any], size: int) -> List[List[Any]]:
+    """Split entries into consecutive groups of at most size items."""
+    size = max(1, int(size))
+    return [list(entries[i:i + size]) for i in range(0, len(entries), size)]
+
+
+def describe_items(
+    objs: Iterable[Any],
+    nutrition_fn: Callable[[Any], Tuple[int, int]],
+) -> List[Dict[str, Any]]:
+    """Serialize objects for the planner, adding explicit Edible/Drinkable tags.
+
+    Numeric tags make nutrition obvious to the model even when an object only
+    carries satiation/hydration fields.
+    """
+    items: List[Dict[str, Any]] = []
+    for o in objs:
+        if not o:
+            continue
+        sv, hv = nutrition_fn(o)
+        tags_aug = sorted(list(getattr(o, 'object_tags', set()) or []))
+        if sv > 0 and not any(str(t).lower().startswith('edible:') for t in tags_aug):
+            tags_aug.append(f'Edible: {sv}')
+        if hv > 0 and not any(str(t).lower().startswith('drinkable:') for t in tags_aug):
+            tags_aug.append(f'Drinkable: {hv}')
+        items.append({
+            'uuid': getattr(o, 'uuid', ''),
+            'name': getattr(o, 'display_name', ''),
+            'satiation_value': sv,
+            'hydration_value': hv,
+            'tags': tags_aug,
+        })
+    return items
+
+
+def build_npc_data(npc_name: str, sheet: Any) -> Dict[str, Any]:
+    """Needs, personality and coins for one NPC, shaped for the planner prompt."""
+    return {
+        'name': npc_name,
+        'basic_needs': {
+            'hunger': sheet.hunger,
+            'thirst': sheet.thirst,
+            'socialization': getattr(sheet, 'socialization', 100.0),
+            'sleep': getattr(sheet, 'sleep', 100.0)
+        },
+        'enhanced_needs': {
+            'safety': getattr(sheet, 'safety', 100.0),
+            'wealth_desire': getattr(sheet, 'wealth_desire', 50.0),
+            'social_status': getattr(sheet, 'social_status', 50.0)
+        },
+        'personality': {
+            'responsibility': getattr(sheet, 'responsibility', 50),
+            'aggression': getattr(sheet, 'aggression', 30),
+            'confidence': getattr(sheet, 'confidence', 50),
+            'curiosity': getattr(sheet, 'curiosity', 50)
+        },
+        'currency': getattr(sheet, 'currency', 0)
+    }
+
+
+def _inventory_items(sheet: Any) -> List[Any]:
+    try:
+        return [it for it in sheet.inventory.slots if it]
+    except Exception:
+        return []
+
+
+def build_single_prompt(
+    npc_name: str,
+    sheet: Any,
+    room: Any,
+    nutrition_fn: Callable[[Any], Tuple[int, int]],
+) -> str:
+    """Prompt asking the planner for one NPC's action array."""
+    user_prompt = {
+        'npc': build_npc_data(npc_name, sheet),
+        'room_objects': describe_items((room.objects or {}).values(), nutrition_fn),
+        'inventory': describe_items(_inventory_items(sheet), nutrition_fn),
+        'instructions': PLANNER_INSTRUCTIONS,
+    }
+    return PLANNER_SYSTEM_PROMPT + "\n" + json.dumps(user_prompt, ensure_ascii=False)
+
+
+def build_batch_prompt(
+    npcs: Sequence[Tuple[str, Any]],
+    room: Any,
+    nutrition_fn: Callable[[Any], Tuple[int, int]],
+) -> str:
+    """Prompt asking the planner for several NPCs' plans at once.
+
+    The shared system prompt and room object list appear exactly once; each NPC
+    adds only its own data and inventory.
+    """
+    user_prompt = {
+        'room_objects': describe_items((room.objects or {}).values(), nutrition_fn),
+        'npcs': [
+            {
+                'npc': build_npc_data(name, sheet),
+                'inventory': describe_items(_inventory_items(sheet), nutrition_fn),
+            }
+            for name, sheet in npcs
+        ],
+        'instructions': PLANNER_INSTRUCTIONS,
+    }
+    return (
+        BATCH_MARKER + "\n" + PLANNER_SYSTEM_PROMPT + BATCH_INSTRUCTIONS + "\n"
+        + json.dumps(user_prompt, ensure_ascii=False)
+    )
+
+
+def sanitize_plan(raw: Any) -> List[Dict[str, Any]]:
+    """Keep up to MAX_PLAN_STEPS well-formed {'tool', 'args'} steps; [] if none survive."""
+    if not isinstance(raw, list):
+        return []
+    cleaned: List[Dict[str, Any]] = []
+    for el in raw[:MAX_PLAN_STEPS]:
+        if not isinstance(el, dict):
+            continue
+        t = el.get('tool')
+        a = el.get('args') or {}
+        if isinstance(t, str) and isinstance(a, dict):
+            cleaned.append({'tool': t, 'args': a})
+    return cleaned
+
+
+def parse_batch_response(text: str, npc_names: Sequence[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """Extract per-NPC plans from a batched reply.
+
+    Accepts either {name: [...]} or {"plans": {name: [...]}}. Names match exactly
+    first, then case-insensitively. NPCs without a usable plan are omitted.
+    """
+    try:
+        data = json.loads(text)
+    except Exception:
+        return {}
+    if isinstance(data, dict) and isinstance(data.get('plans'), dict):
+        data = data['plans']
+    if not isinstance(data, dict):
+        return {}
+    lowered = {str(k).lower(): v for k, v in data.items()}
+    plans: Dict[str, List[Dict[str, Any]]] = {}
+    for name in npc_names:
+        raw = data.get(name, lowered.get(name.lower()))
+        cleaned = sanitize_plan(raw)
+        if cleaned:
+            plans[name] = cleaned
+    return plans
+
+
+def _generate(model: Any, prompt: str, safety: Optional[list]) -> str:
+    resp = ai_generate(model, prompt, safety, kind='plan')
+    return getattr(resp, 'text', None) or str(resp)
+
+
+def plan_batch(
+    npcs: Sequence[Tuple[str, Any]],
+    room: Any,
+    *,
+    model: Any,
+    nutrition_fn: Callable[[Any], Tuple[int, int]],
+    offline_plan: Callable[[str, Any, Any], List[Dict[str, Any]]],
+    safety: Optional[list] = None,
+) -> Tuple[Dict[str, List[Dict[str, Any]]], List[str]]:
+    """Plan for every NPC in npcs with a single model call.
+
+    Returns (plans, fallbacks): plans maps each NPC name to its plan, and
+    fallbacks lists the NPCs whose plan came from offline_plan because the
+    model's entry was missing or malformed (or the call itself failed).
+    """
+    names = [name for name, _ in npcs]
+    parsed: Dict[str, List[Dict[str, Any]]] = {}
+    try:
+        text = _generate(model, build_batch_prompt(npcs, room, nutrition_fn), safety)
+        parsed = parse_batch_response(text, names)
+    except Exception as e:
+        print(f"npc batch planning error in {getattr(room, 'id', '?')}: {e}")
+    plans: Dict[str, List[Dict[str, Any]]] = {}
+    fallbacks: List[str] = []
+    for name, sheet in npcs:
+        if name in parsed:
+            plans[name] = parsed[name]
+            continue
+        fallbacks.append(name)
+        try:
+            plans[name] = offline_plan(name, room, sheet)
+        except Exception:
+            plans[name] = [{'tool': 'do_nothing', 'args': {}}]
+    return plans, fallbacks
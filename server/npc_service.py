@@ -38,7 +38,7 @@ import json
 import re
 
 from world import CharacterSheet
-from ai_utils import safety_settings_for_level as _shared_safety_settings
+from ai_utils import safety_settings_for_level as _shared_safety_settings, generate_content as ai_generate
 from id_parse_utils import (
     strip_quotes as _strip_quotes,
     parse_pipe_parts as _parse_pipe_parts,
@@ -176,7 +176,7 @@ def _generate_nexus_profile(model, name: str, description: str, world_context: s
         "IMPORTANT: Advantages must total ≤40 points, disadvantages ≥-40 points, quirks max 5."
     )
     try:
-        resp = model.generate_content(prompt)
+        resp = ai_generate(model, prompt, kind='npc')
         text = getattr(resp, 'text', None) or str(resp)
         return _extract_json_object(text)
     except Exception:
@@ -246,10 +246,7 @@ def _generate_contextual_npc(model, world_name: Optional[str], world_desc: Optio
     
     try:
         safety = _safety_settings_for_level(safety_level)
-        if safety is not None:
-            resp = model.generate_content(prompt, safety_settings=safety)
-        else:
-            resp = model.generate_content(prompt)
+        resp = ai_generate(model, prompt, safety, kind='npc')
         text = getattr(resp, 'text', None) or str(resp)
         return _extract_json_object(text)
     except Exception:
@@ -405,10 +402,7 @@ def handle_npc_command(world, state_path: str, sid: str | None, args: list[str])
         if model is not None:
             try:
                 safety = _safety_settings_for_level(getattr(world, 'safety_level', 'G'))
-                if safety is not None:
-                    ai_resp = model.generate_content(prompt, safety_settings=safety)
-                else:
-                    ai_resp = model.generate_content(prompt)
+                ai_resp = ai_generate(model, prompt, safety, kind='npc')
                 text = getattr(ai_resp, 'text', None) or str(ai_resp)
                 parsed = _extract_json_object(text)
                 if parsed and isinstance(parsed, dict):
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+"""Nutrition — how much an object feeds or waters whoever consumes it.
+
+Objects declare nutrition with tags ('Edible: 20', 'Drinkable: 15') or, in
+older worlds, with the satiation_value/hydration_value fields. The rules:
+
+- any Edible or Drinkable tag switches the object to tag mode, where the tag
+  numbers are used and a tag without a number counts as 0;
+- without such tags the legacy fields are used.
+
+The tick engine, the server's NPC helpers and the room index all classify
+objects with nutrition_from_tags_or_fields(). This module imports nothing from
+the game so the world model (via room_index) can depend on it.
+"""
+
+from typing import Any
+
+from safe_utils import safe_call_with_default
+
+
+def parse_tag_value(tags: set[str] | list[str] | None, key: str) -> int | None:
+    """Return the integer suffix from a tag like 'Edible: 20' or 'Drinkable: 15'.
+
+    - Matching is case-insensitive for the key and tolerant of spaces: 'Edible : 20' is ok.
+    - Returns None if no matching tag or if the suffix is not a valid integer.
+    """
+    if not tags:
+        return None
+    # Safe tag parsing with error handling
+    return safe_call_with_default(lambda: _parse_tag_value_inner(tags, key), None)
+
+
+def _parse_tag_value_inner(tags, key: str) -> int | None:
+    """Helper function for parse_tag_value with actual parsing logic."""
+    key_low = key.strip().lower()
+    for t in list(tags):
+        s = safe_call_with_default(lambda: str(t), "")
+        if not s:
+            continue
+        parts = s.split(':', 1)
+        if len(parts) != 2:
+            continue
+        left, right = parts[0].strip().lower(), parts[1].strip()
+        if left == key_low and right:
+            # accept bare +/- digits
+            r = right
+            if r.startswith('+'):
+                r = r[1:]
+            if r.lstrip('-').isdigit():
+                # Parse integer value with safe fallback
+                return safe_call_with_default(lambda: int(r), None)
+    return None
+
+
+def nutrition_from_tags_or_fields(obj: Any) -> tuple[int, int]:
+    """Return (satiation, hydration) preferring tag-driven values over legacy fields.
+
+    - If an 'Edible' tag exists without a numeric suffix, treat satiation as 0 (require a number).
+    - If a 'Drinkable' tag exists without a numeric suffix, treat hydration as 0.
+    - If no respective tags are present, fall back to obj.satiation_value/obj.hydration_value when available.
+    """
+    # Safe extraction of object tags
+    tags = safe_call_with_default(lambda: set(getattr(obj, 'object_tags', []) or []), set())
+    sv_tag = parse_tag_value(tags, 'Edible')
+    hv_tag = parse_tag_value(tags, 'Drinkable')
+    # If tag keys exist but without value, enforce "require int" by yielding 0 instead of falling back
+    has_edible_key = any(str(t).split(':', 1)[0].strip().lower() == 'edible' for t in tags)
+    has_drink_key = any(str(t).split(':', 1)[0].strip().lower() == 'drinkable' for t in tags)
+
+    # If ANY nutrition-related tag is present, we are in "tag mode":
+    # - Use tag-provided numbers when present
+    # - Treat missing numbers as 0
+    # - Do NOT fall back to legacy fields when tags exist (prevents surprising mixes)
+    if has_edible_key or has_drink_key:
+        sv = sv_tag if sv_tag is not None else 0
+        hv = hv_tag if hv_tag is not None else 0
+    else:
+        # No nutrition tags at all -> use legacy fields
+        sv = int(getattr(obj, 'satiation_value', 0) or 0)
+        hv = int(getattr(obj, 'hydration_value', 0) or 0)
+    return int(sv or 0), int(hv or 0)
@@ -23,6 +23,7 @@ Service Contract:
 from typing import List, Tuple
 from persistence_utils import save_world
 from rate_limiter import check_rate_limit, OperationType
+import rng_service
 
 from id_parse_utils import (
     strip_quotes as _strip_quotes,
@@ -118,7 +119,7 @@ def create_object(world, state_path: str, sid: str | None, args: list[str]) -> t
                 link_to_object_uuid=base.link_to_object_uuid,
             )
         # Fresh identity and overrides
-        new_obj.uuid = str(__import__('uuid').uuid4())
+        new_obj.uuid = rng_service.new_id()
         new_obj.display_name = name
         new_obj.description = desc
         # Do not inherit ownership from templates; start unowned
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+"""Outbound Buffer — coalesce one command's replies into one frame per client.
+
+Handling a single inbound line usually sends the player several 'message'
+payloads (system lines, the room description, echoes). Each used to be its own
+WebSocket frame and JSON encode. While the server handles one inbound message
+(or a connect), replies meant for a client are held here and flushed when the
+handler returns:
+
+- clients that announced batch support get one 'messages' event whose data is
+  the ordered list of payloads;
+- older clients (no announcement) get the same payloads as individual
+  'message' events, in the same order;
+- a single held payload always goes out as a plain 'message'.
+
+Clients announce support in the Socket.IO connect auth payload: {"batch": true}.
+
+Buffering is per sid: handle_message/handle_connect open the buffer for the
+sid they serve and flush only that sid's replies when they return. Handlers
+run as concurrent greenlets under eventlet, so one handler waiting on a model
+call must never hold back another client's replies.
+
+Room broadcasts keep their single channel emit (see room_membership); only a
+recipient that already has replies held is served from its buffer, so it still
+sees every line in order. The end-of-tick room batches (broadcast_batcher) go
+out per recipient through deliver(), which applies the same negotiation.
+"""
+
+from typing import Callable, Dict, List, Set
+
+
+MESSAGE_BATCH = 'messages'
+
+SendOne = Callable[[str, dict], None]
+SendBatch = Callable[[str, List[dict]], None]
+
+
+class OutboundBuffer:
+    """Per-sid payload buffers, each open while a handler serves that sid."""
+
+    def __init__(self):
+        # sid -> nesting depth of the handlers currently serving it
+        self._depth: Dict[str, int] = {}
+        self._pending: Dict[str, List[dict]] = {}
+        self._batch_capable: Set[str] = set()
+        self.stats = {'payloads': 0, 'frames': 0, 'batches': 0}
+
+    @property
+    def active(self) -> bool:
+        return bool(self._depth)
+
+    def is_open(self, sid: str) -> bool:
+        return sid in self._depth
+
+    def set_batch_capable(self, sid: str, capable: bool) -> None:
+        if capable:
+            self._batch_capable.add(sid)
+        else:
+            self._batch_capable.discard(sid)
+
+    def is_batch_capable(self, sid: str) -> bool:
+        return sid in self._batch_capable
+
+    def forget(self, sid: str) -> None:
+        """Drop everything known about a disconnected sid."""
+        self._batch_capable.discard(sid)
+        self._pending.pop(sid, None)
+        self._depth.pop(sid, None)
+
+    def begin(self, sid: str | None) -> None:
+        """Start holding replies for sid (nested begin/end pairs flush on the outermost end)."""
+        if sid:
+            self._depth[sid] = self._depth.get(sid, 0) + 1
+
+    def add(self, sid: str, payload: dict) -> bool:
+        """Hold a payload for sid if a handler has it open. False means send it now."""
+        if not sid or sid not in self._depth:
+            return False
+        self._pending.setdefault(sid, []).append(payload)
+        return True
+
+    def has_pending(self, sid: str) -> bool:
+        return sid in self._pending
+
+    def pending_sids(self) -> Set[str]:
+        return set(self._pending)
+
+    def end(self, sid: str | None, send_one: SendOne, send_batch: SendBatch) -> int:
+        """Close a begin(sid); on the outermost one flush sid's replies. Returns frames sent."""
+        depth = self._depth.get(sid or '', 0)
+        if depth <= 0:
+            return 0
+        if depth > 1:
+            self._depth[sid] = depth - 1
+            return 0
+        del self._depth[sid]
+        payloads = self._pending.pop(sid, None)
+        return self._send(sid, payloads, send_one, send_batch) if payloads else 0
+
+    def deliver(self, sid: str, payloads: List[dict], send_one: SendOne, send_batch: SendBatch) -> int:
+        """Send several payloads to sid in as few frames as it accepts. Returns frames sent.
+
+        While a handler has sid open they are held behind its replies instead.
+        """
+        if not payloads:
+            return 0
+        if sid in self._depth:
+            self._pending.setdefault(sid, []).extend(payloads)
+            return 0
+        return self._send(sid, list(payloads), send_one, send_batch)
+
+    def flush(self, send_one: SendOne, send_batch: SendBatch) -> int:
+        """Send everything held for every sid (buffers stay open)."""
+        pending, self._pending = self._pending, {}
+        return sum(self._send(sid, payloads, send_one, send_batch) for sid, payloads in pending.items())
+
+    def _send(self, sid: str, payloads: List[dict], send_one: SendOne, send_batch: SendBatch) -> int:
+        self.stats['payloads'] += len(payloads)
+        if len(payloads) > 1 and sid in self._batch_capable:
+            send_batch(sid, payloads)
+            self.stats['batches'] += 1
+            self.stats['frames'] += 1
+            return 1
+        for payload in payloads:
+            send_one(sid, payload)
+        self.stats['frames'] += len(payloads)
+        return len(payloads)
+
+    def discard(self) -> None:
+        """Drop held payloads and close buffering (used when resetting state)."""
+        self._depth.clear()
+        self._pending.clear()
+
+
+# Process-wide buffer used by the Socket.IO handlers in server.py
+_buffer = OutboundBuffer()
+
+
+def get_outbound_buffer() -> OutboundBuffer:
+    """Return the process-wide outbound buffer."""
+    return _buffer
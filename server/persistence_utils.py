@@ -42,6 +42,10 @@ _stats = {
     'immediate_calls': 0,
     'errors': 0,
     'last_save_time': None,
+    'saves': 0,
+    'total_save_ms': 0.0,
+    'last_save_ms': None,
+    'last_save_bytes': None,
 }
 
 
@@ -108,8 +112,17 @@ def _save_world_immediate(world, state_path: str) -> None:
     If you're tempted to call world.save_to_file() elsewhere, use save_world() instead!
     """
     try:
+        start = time.perf_counter()
         world.save_to_file(state_path)
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
         _stats['last_save_time'] = time.time()
+        _stats['saves'] += 1
+        _stats['total_save_ms'] += elapsed_ms
+        _stats['last_save_ms'] = round(elapsed_ms, 3)
+        try:
+            _stats['last_save_bytes'] = os.path.getsize(state_path)
+        except OSError:
+            pass
     except Exception:
         _stats['errors'] += 1
         # Swallow to maintain responsiveness
@@ -141,6 +154,9 @@ def get_save_stats() -> Dict[str, Any]:
         - immediate_calls: Count of immediate save_world calls
         - errors: Count of save errors (logged but swallowed)
         - last_save_time: Unix timestamp of most recent successful save (or None)
+        - saves: Count of completed writes to disk
+        - total_save_ms / last_save_ms: Time spent writing (total, most recent)
+        - last_save_bytes: Size of the state file after the most recent write
         - active_savers: Number of DebouncedSaver instances in the registry
     """
     return {
@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+"""Plan Cache — memoized NPC plans keyed on quantized state.
+
+NPCs that share a room and sit in the same need/personality bands end up with
+the same plan, so recomputing it (or worse, paying for an AI call) every time
+a need dips below NEED_THRESHOLD is wasted work. This module remembers plans
+under a key built from:
+
+- quantized needs: which decision thresholds each need is past (the planner
+  only ever compares needs against fixed cut-offs, so bands are exact)
+- personality bands: the same idea for responsibility/aggression/curiosity/...
+- the room signature: the versions of the room's objects and exits (see
+  room_index.RoomObjects and versioned.py, O(1) to read), and the food/drink
+  other NPCs could trade. Rooms without versioned containers fall back to
+  listing their objects and exit names.
+- the NPC's inventory signature and its relation to beds in the room
+- the exits toward food, water, safety and the NPC's bed in other rooms
+
+Entries live in an LRU (OrderedDict) bounded by MUD_PLAN_CACHE_SIZE. Each room
+remembers the signature its entries were built against; when the room's
+objects or exits change (their version moves), every entry for that room is
+dropped. Cached plans
+are still re-validated before use: any uuid they mention must exist in the
+room or the NPC's inventory right now (or, for trades, the seller's).
+"""
+
+import os
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import room_index
+from versioned import is_versioned
+
+
+NutritionFn = Callable[[Any], Tuple[int, int]]
+
+
+def _get_capacity() -> int:
+    """Read cache capacity from environment, default 512 plans."""
+    try:
+        return max(1, int((os.getenv('MUD_PLAN_CACHE_SIZE') or '512').strip()))
+    except Exception:
+        return 512
+
+
+def _is_bed(obj: Any) -> bool:
+    tags = getattr(obj, 'object_tags', set()) or set()
+    return any(str(t).strip().lower() == 'bed' for t in tags)
+
+
+def market_signature(others: Optional[Dict[str, Any]], nutrition_fn: NutritionFn) -> tuple:
+    """Food and drink held by other NPCs in the room (trade/barter candidates)."""
+    sig = []
+    for name, other in sorted((others or {}).items()):
+        for it in getattr(getattr(other, 'inventory', None), 'slots', []) or []:
+            if not it:
+                continue
+            sv, hv = nutrition_fn(it)
+            if sv > 0 or hv > 0:
+                sig.append((name, getattr(it, 'uuid', ''), sv, hv, int(getattr(it, 'value', 0) or 0)))
+    return tuple(sig)
+
+
+def room_signature(room: Any, nutrition_fn: NutritionFn, others: Optional[Dict[str, Any]] = None) -> tuple:
+    """Signature of a room: objects and exits (by version when tracked) and market."""
+    objects = getattr(room, 'objects', None)
+    doors = getattr(room, 'doors', None)
+    if isinstance(objects, room_index.RoomObjects) and is_versioned(doors):
+        layout: tuple = (objects.version, doors.version)
+    else:
+        layout = _layout_scan(objects, doors, nutrition_fn)
+    return (layout, market_signature(others, nutrition_fn))
+
+
+def _layout_scan(objects: Any, doors: Any, nutrition_fn: NutritionFn) -> tuple:
+    """Objects (in order) and exit names, for rooms that keep no versions."""
+    objs = []
+    for o in (objects or {}).values():
+        sv, hv = nutrition_fn(o)
+        objs.append((
+            getattr(o, 'uuid', ''),
+            getattr(o, 'display_name', ''),
+            sv,
+            hv,
+            _is_bed(o),
+            getattr(o, 'owner_id', None),
+            int(getattr(o, 'value', 0) or 0) > 10,
+        ))
+    return (tuple(objs), tuple((doors or {}).keys()))
+
+
+def inventory_signature(sheet: Any, nutrition_fn: NutritionFn) -> tuple:
+    """Inventory items that matter to planning: uuid plus nutrition values."""
+    sig = []
+    try:
+        for it in sheet.inventory.slots:
+            if it:
+                sv, hv = nutrition_fn(it)
+                sig.append((getattr(it, 'uuid', ''), sv, hv))
+    except Exception:
+        return ()
+    return tuple(sig)
+
+
+def need_bands(sheet: Any, threshold: float) -> tuple:
+    """Quantize needs to the cut-offs the planners branch on."""
+    hunger = float(getattr(sheet, 'hunger', 100.0) or 0.0)
+    thirst = float(getattr(sheet, 'thirst', 100.0) or 0.0)
+    social = float(getattr(sheet, 'socialization', 100.0) or 0.0)
+    sleep = float(getattr(sheet, 'sleep', 100.0) or 0.0)
+    safety = float(getattr(sheet, 'safety', 100.0) or 0.0)
+    return (
+        hunger < threshold, hunger < 20,
+        thirst < threshold,
+        social < threshold,
+        sleep < threshold,
+        safety < 30,
+    )
+
+
+def personality_bands(sheet: Any) -> tuple:
+    """Quantize personality and wealth traits to the planner's cut-offs."""
+    responsibility = getattr(sheet, 'responsibility', 50)
+    return (
+        responsibility < 30, responsibility < 40, responsibility > 60,
+        getattr(sheet, 'aggression', 30) > 60,
+        getattr(sheet, 'curiosity', 50) > 60,
+        getattr(sheet, 'confidence', 50) > 40,
+        getattr(sheet, 'wealth_desire', 50.0) > 60,
+        getattr(sheet, 'currency', 0) < 20,
+    )
+
+
+def npc_relation(npc_name: str, npc_id: str, sheet: Any, room: Any) -> tuple:
+    """NPC-relative facts about the room: owned bed and investigated objects."""
+    owned_bed = None
+    investigated: tuple = ()
+    if npc_id:
+        for o in room_index.find(room, 'bed'):
+            if getattr(o, 'owner_id', None) == npc_id:
+                owned_bed = getattr(o, 'uuid', '')
+                break
+    # Only the curious planner branch looks at per-NPC investigation marks
+    if getattr(sheet, 'curiosity', 50) > 60 and getattr(sheet, 'confidence', 50) > 40:
+        objs = (getattr(room, 'objects', None) or {}).values()
+        investigated = tuple(hasattr(o, 'investigated_by_' + npc_name) for o in objs)
+    return (owned_bed, investigated)
+
+
+def _inventory_uuids(sheet: Any) -> set:
+    try:
+        return {getattr(it, 'uuid', '') for it in sheet.inventory.slots if it}
+    except Exception:
+        return set()
+
+
+def plan_is_valid(
+    plan: List[Dict[str, Any]],
+    room: Any,
+    sheet: Any,
+    others: Optional[Dict[str, Any]] = None,
+) -> bool:
+    """True when every object a plan refers to is still reachable.
+
+    uuids must be in the room or the NPC's inventory, except the item wanted in
+    a trade/barter, which must still be held by the named NPC. Object names for
+    get_object must match an object in the room.
+    """
+    room_objs = getattr(room, 'objects', None) or {}
+    known = set(room_objs.keys()) | _inventory_uuids(sheet)
+    names = {str(getattr(o, 'display_name', '')).lower() for o in room_objs.values()}
+    for step in plan:
+        args = step.get('args') or {}
+        keys = ['object_uuid', 'bed_uuid', 'offer_uuid', 'want_uuid']
+        if step.get('tool') in ('trade', 'barter'):
+            wanted_key = 'object_uuid' if step.get('tool') == 'trade' else 'want_uuid'
+            keys.remove(wanted_key)
+            holder = (others or {}).get(str(args.get('target_name') or ''))
+            if args.get(wanted_key) not in _inventory_uuids(holder):
+                return False
+        for key in keys:
+            val = args.get(key)
+            if val and val not in known:
+                return False
+        if step.get('tool') == 'get_object':
+            name = str(args.get('object_name') or '').lower()
+            if name and name not in names:
+                return False
+    return True
+
+
+class PlanCache:
+    """LRU of plans with per-room invalidation and hit/miss counters."""
+
+    def __init__(self, capacity: Optional[int] = None):
+        self.capacity = capacity or _get_capacity()
+        self._entries: "OrderedDict[tuple, List[Dict[str, Any]]]" = OrderedDict()
+        self._room_sigs: Dict[str, tuple] = {}
+        self._room_keys: Dict[str, set] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def make_key(
+        self,
+        source: str,
+        npc_name: str,
+        npc_id: str,
+        sheet: Any,
+        room: Any,
+        threshold: float,
+        nutrition_fn: NutritionFn,
+        others: Optional[Dict[str, Any]] = None,
+        nearby: Optional[Dict[str, str]] = None,
+    ) -> tuple:
+        """Build a cache key; source separates offline and AI plans.
+
+        others maps the other NPCs in the room to their sheets and nearby the
+        exits toward resources in other rooms (distance fields). Also checks the
+        room signature and drops the room's entries if the room changed since
+        they were stored.
+        """
+        room_id = getattr(room, 'id', '')
+        sig = room_signature(room, nutrition_fn, others)
+        self._check_room(room_id, sig)
+        # Coins only matter when someone in the room has food or drink to sell
+        coins = int(getattr(sheet, 'currency', 0) or 0) if sig[1] else None
+        return (
+            source,
+            room_id,
+            sig,
+            need_bands(sheet, threshold),
+            personality_bands(sheet),
+            inventory_signature(sheet, nutrition_fn),
+            npc_relation(npc_name, npc_id, sheet, room),
+            coins,
+            tuple(sorted((nearby or {}).items())),
+        )
+
+    def _check_room(self, room_id: str, sig: tuple) -> None:
+        prev = self._room_sigs.get(room_id)
+        if prev is not None and prev != sig:
+            self.invalidate_room(room_id)
+        self._room_sigs[room_id] = sig
+
+    def get(
+        self, key: tuple, room: Any, sheet: Any, others: Optional[Dict[str, Any]] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Return a copy of the cached plan if present and still valid."""
+        plan = self._entries.get(key)
+        if plan is None or not plan_is_valid(plan, room, sheet, others):
+            if plan is not None:
+                self._discard(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return [{'tool': s['tool'], 'args': dict(s.get('args') or {})} for s in plan]
+
+    def put(self, key: tuple, plan: List[Dict[str, Any]]) -> None:
+        """Store a copy of plan, evicting the least recently used entry if full."""
+        if not plan:
+            return
+        self._entries[key] = [{'tool': s['tool'], 'args': dict(s.get('args') or {})} for s in plan]
+        self._entries.move_to_end(key)
+        self._room_keys.setdefault(key[1], set()).add(key)
+        while len(self._entries) > self.capacity:
+            old_key, _ = self._entries.popitem(last=False)
+            self._forget_room_key(old_key)
+
+    def invalidate_room(self, room_id: str) -> None:
+        """Drop every plan computed for room_id."""
+        keys = self._room_keys.pop(room_id, set())
+        for key in keys:
+            self._entries.pop(key, None)
+        if keys:
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._room_sigs.clear()
+        self._room_keys.clear()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _discard(self, key: tuple) -> None:
+        self._entries.pop(key, None)
+        self._forget_room_key(key)
+
+    def _forget_room_key(self, key: tuple) -> None:
+        keys = self._room_keys.get(key[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                self._room_keys.pop(key[1], None)
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return (self.hits / total) if total else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'size': len(self._entries),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hit_rate(), 4),
+            'invalidations': self.invalidations,
+        }
+
+
+# Shared cache used by the world tick
+_cache = PlanCache()
+
+
+def get_plan_cache() -> PlanCache:
+    """Return the process-wide plan cache."""
+    return _cache
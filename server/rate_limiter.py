@@ -18,18 +18,52 @@ Operations consume tokens based on their classification:
 The system is designed to be fail-safe - if rate limiting encounters errors,
 it logs the issue but allows operations to continue (fail-open policy).
 
+Buckets:
+- one per SID; callers without a SID share the "anonymous" bucket unless they
+  pass key=... (NPC planning and other server-side actors), which gives them
+  their own keyed bucket
+- optionally one per client IP as well (MUD_RATE_IP_ENABLE): an operation must
+  fit in both, so reconnecting for a fresh SID does not reset a client's budget
+
+Time comes from time.monotonic(), so wall-clock changes never refill or drain
+buckets. Idle buckets are evicted by a timer wheel after MUD_RATE_BUCKET_TTL
+seconds, and at most MUD_RATE_MAX_BUCKETS are kept (the ones closest to expiry
+go first), so memory stays bounded under connection churn. Rejections are
+counted per OperationType for the /metrics endpoint.
+
+Adaptive costs (MUD_RATE_ADAPTIVE, default off): the static classes are a
+guess, and a BASIC `look` in a room with hundreds of objects can cost the
+server more than a HEAVY admin command. With adaptive costs on, callers that
+pass cost_key (the command_metrics name: '/npc', 'play:movement', ...) are
+charged from an EWMA of that command's measured busy time instead (latency
+minus model calls and AI budget waits, see command_metrics), one token per
+MUD_RATE_MS_PER_TOKEN milliseconds, clamped to the band of its static
+class (ADAPTIVE_BANDS). Commands without enough samples yet pay the static
+cost. Free-play lines (look, move, roll, interact, speech) are only charged
+in this mode, so turning it off leaves the static behavior untouched.
+
 Environment configuration:
 - MUD_RATE_ENABLE: "1" to enable rate limiting (default: disabled)
 - MUD_RATE_CAPACITY: maximum burst tokens per SID (default: 50)
 - MUD_RATE_REFILL_PER_SEC: tokens refilled per second (default: 5.0)
 - MUD_RATE_LOG_VIOLATIONS: "1" to log rate limit violations (default: enabled)
+- MUD_RATE_IP_ENABLE: "1" to add the per-IP tier (default: disabled)
+- MUD_RATE_IP_CAPACITY: maximum burst tokens per IP (default: 200)
+- MUD_RATE_IP_REFILL_PER_SEC: per-IP tokens refilled per second (default: 20.0)
+- MUD_RATE_BUCKET_TTL: seconds an idle bucket is kept (default: 600)
+- MUD_RATE_MAX_BUCKETS: bucket count cap across all tiers (default: 50000)
+- MUD_RATE_ADAPTIVE: "1" to charge learnt per-command costs (default: disabled)
+- MUD_RATE_MS_PER_TOKEN: busy milliseconds worth one token (default: 2.0)
+- MUD_RATE_ADAPTIVE_ALPHA: EWMA weight of the newest sample (default: 0.2)
+- MUD_RATE_ADAPTIVE_WARMUP: samples before a learnt cost is used (default: 5)
 """
 
 import os
 import time
 import logging
 from enum import Enum
-from typing import Dict
+from itertools import islice
+from typing import Callable, Dict, Iterator, List, Set, Tuple
 
 
 # Logging setup for rate limiter violations
@@ -44,6 +78,45 @@ class OperationType(Enum):
     SUPER_HEAVY = 25    # world purge, bulk operations, family generation
 
 
+# Learnt costs stay within (floor, cap) tokens of their static class: a class
+# can move at most one step toward its neighbours, never past them
+ADAPTIVE_BANDS: Dict[OperationType, Tuple[float, float]] = {
+    OperationType.BASIC: (1.0, 3.0),
+    OperationType.MODERATE: (1.0, 10.0),
+    OperationType.HEAVY: (3.0, 25.0),
+    OperationType.SUPER_HEAVY: (10.0, 25.0),
+}
+
+
+class AdaptiveCosts:
+    """Per-command token costs learnt from measured busy time (EWMA)."""
+
+    __slots__ = ('enabled', 'alpha', 'ms_per_token', 'warmup', 'ewma_ms', 'samples')
+
+    def __init__(self):
+        self.enabled = RateLimiter._parse_bool_env('MUD_RATE_ADAPTIVE', False)
+        self.alpha = min(1.0, max(0.001, float(os.getenv('MUD_RATE_ADAPTIVE_ALPHA', '0.2'))))
+        self.ms_per_token = max(0.001, float(os.getenv('MUD_RATE_MS_PER_TOKEN', '2.0')))
+        self.warmup = max(1, int(os.getenv('MUD_RATE_ADAPTIVE_WARMUP', '5')))
+        self.ewma_ms: Dict[str, float] = {}
+        self.samples: Dict[str, int] = {}
+
+    def observe(self, name: str, busy_ms: float) -> None:
+        """Fold one measured call into the command's average."""
+        if not self.enabled:
+            return
+        prev = self.ewma_ms.get(name)
+        self.ewma_ms[name] = busy_ms if prev is None else prev + self.alpha * (busy_ms - prev)
+        self.samples[name] = self.samples.get(name, 0) + 1
+
+    def cost(self, name: str | None, operation_type: OperationType) -> float:
+        """Tokens to charge: the learnt cost clamped to the class band, else the static cost."""
+        if not self.enabled or name is None or self.samples.get(name, 0) < self.warmup:
+            return float(operation_type.value)
+        floor, cap = ADAPTIVE_BANDS[operation_type]
+        return min(cap, max(floor, self.ewma_ms[name] / self.ms_per_token))
+
+
 class TokenBucket:
     """Token bucket implementation for rate limiting a single client (SID).
     
@@ -55,18 +128,28 @@ class TokenBucket:
     The bucket refills continuously based on elapsed time since last access.
     """
     
-    def __init__(self, capacity: float, refill_rate: float):
+    __slots__ = ('capacity', 'refill_rate', 'tokens', 'last_update', '_clock')
+
+    def __init__(self, capacity: float, refill_rate: float,
+                 clock: Callable[[], float] = time.monotonic):
         """Initialize token bucket.
         
         Args:
             capacity: Maximum number of tokens the bucket can hold
             refill_rate: Tokens added per second
+            clock: Monotonic time source (seconds)
         """
         self.capacity = capacity
         self.refill_rate = refill_rate
         self.tokens = capacity  # Start with full bucket
-        self.last_update = time.time()
+        self._clock = clock
+        self.last_update = clock()
     
+    def has(self, tokens: float) -> bool:
+        """Whether tokens could be consumed right now (refills, consumes nothing)."""
+        self._refill()
+        return self.tokens >= tokens
+
     def consume(self, tokens: float) -> bool:
         """Attempt to consume tokens from the bucket.
         
@@ -85,7 +168,7 @@ class TokenBucket:
     
     def _refill(self) -> None:
         """Refill the bucket based on elapsed time."""
-        now = time.time()
+        now = self._clock()
         elapsed = max(0.0, now - self.last_update)
         self.last_update = now
         
@@ -93,6 +176,75 @@ class TokenBucket:
         self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_rate)
 
 
+class TimerWheel:
+    """Hashed timer wheel of bucket keys, for idle-bucket eviction.
+
+    Each key sits in the slot of the tick its deadline falls in. Advancing the
+    wheel hands back the keys of every slot that has come due; the caller
+    evicts the ones really idle and reschedules the rest (a bucket touched
+    since it was scheduled just moves to a later slot). Deadlines beyond one
+    revolution wrap around and are re-checked when their slot comes up.
+    """
+
+    __slots__ = ('tick_seconds', 'slots', '_where', '_tick')
+
+    def __init__(self, tick_seconds: float, slot_count: int, now: float):
+        self.tick_seconds = max(0.001, float(tick_seconds))
+        self.slots: List[Set[Tuple[str, str]]] = [set() for _ in range(max(1, slot_count))]
+        self._where: Dict[Tuple[str, str], int] = {}
+        self._tick = self._tick_of(now)
+
+    def _tick_of(self, t: float) -> int:
+        return int(t // self.tick_seconds)
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def schedule(self, key: Tuple[str, str], deadline: float) -> None:
+        tick = max(self._tick_of(deadline), self._tick + 1)
+        slot = tick % len(self.slots)
+        old = self._where.get(key)
+        if old == slot:
+            return
+        if old is not None:
+            self.slots[old].discard(key)
+        self.slots[slot].add(key)
+        self._where[key] = slot
+
+    def cancel(self, key: Tuple[str, str]) -> None:
+        slot = self._where.pop(key, None)
+        if slot is not None:
+            self.slots[slot].discard(key)
+
+    def advance(self, now: float) -> List[Tuple[str, str]]:
+        """Keys in every slot passed since the last advance (removed from the wheel)."""
+        target = self._tick_of(now)
+        due: List[Tuple[str, str]] = []
+        steps = min(target - self._tick, len(self.slots))
+        for i in range(1, steps + 1):
+            slot = (self._tick + i) % len(self.slots)
+            if self.slots[slot]:
+                due.extend(self.slots[slot])
+                for key in self.slots[slot]:
+                    del self._where[key]
+                self.slots[slot] = set()
+        self._tick = max(self._tick, target)
+        return due
+
+    def soonest(self) -> Iterator[Tuple[str, str]]:
+        """Keys in the order their slots come due (for evicting under the cap)."""
+        n = len(self.slots)
+        for i in range(1, n + 1):
+            for key in list(self.slots[(self._tick + i) % n]):
+                yield key
+
+
+# Bucket tiers: (tier, key) identifies a bucket in the eviction wheel
+TIER_SID = 'sid'
+TIER_IP = 'ip'
+TIER_KEYED = 'key'
+
+
 class RateLimiter:
     """Multi-tier rate limiter using per-SID token buckets.
     
@@ -105,28 +257,121 @@ class RateLimiter:
     This ensures that bugs in rate limiting don't break core functionality.
     """
     
-    def __init__(self):
-        """Initialize the rate limiter with configuration from environment."""
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        """Initialize the rate limiter with configuration from environment.
+
+        Args:
+            clock: Monotonic time source (seconds); tests pass a fake one
+        """
+        self._clock = clock
         self._buckets: Dict[str, TokenBucket] = {}
+        # Buckets for server-side callers without a SID (check_rate_limit(None, ..., key=...))
+        self.keyed_buckets: Dict[str, TokenBucket] = {}
+        self._ip_buckets: Dict[str, TokenBucket] = {}
+        self._sid_ips: Dict[str, str] = {}
+        # Rejections per OperationType name (for the /metrics endpoint)
+        self.rejections: Dict[str, int] = {op.name: 0 for op in OperationType}
+        # Of those, rejections where the per-IP bucket was the one short
+        self.ip_rejections: Dict[str, int] = {op.name: 0 for op in OperationType}
+        self.evictions = 0
+        self.costs = AdaptiveCosts()
         
         # Load configuration from environment
         self._enabled = self._parse_bool_env('MUD_RATE_ENABLE', False)
         self._capacity = float(os.getenv('MUD_RATE_CAPACITY', '50'))
         self._refill_per_sec = float(os.getenv('MUD_RATE_REFILL_PER_SEC', '5.0'))
         self._log_violations = self._parse_bool_env('MUD_RATE_LOG_VIOLATIONS', True)
+        self._ip_enabled = self._parse_bool_env('MUD_RATE_IP_ENABLE', False)
+        self._ip_capacity = float(os.getenv('MUD_RATE_IP_CAPACITY', '200'))
+        self._ip_refill_per_sec = float(os.getenv('MUD_RATE_IP_REFILL_PER_SEC', '20.0'))
+        self._ttl = max(1.0, float(os.getenv('MUD_RATE_BUCKET_TTL', '600')))
+        self._max_buckets = max(1, int(os.getenv('MUD_RATE_MAX_BUCKETS', '50000')))
+        # 64 slots per TTL: an idle bucket goes within ~1.6% of its TTL
+        self._wheel = TimerWheel(self._ttl / 64.0, 64, clock())
         
         if self._enabled:
             _logger.info(f"Rate limiting enabled: capacity={self._capacity}, "
-                         f"refill={self._refill_per_sec}/sec")
+                         f"refill={self._refill_per_sec}/sec"
+                         + (f", per-IP capacity={self._ip_capacity}, refill={self._ip_refill_per_sec}/sec"
+                            if self._ip_enabled else ""))
+
+    # --- Bucket bookkeeping ---
+
+    def _tier(self, tier: str) -> Dict[str, TokenBucket]:
+        if tier == TIER_SID:
+            return self._buckets
+        if tier == TIER_IP:
+            return self._ip_buckets
+        return self.keyed_buckets
+
+    def _bucket(self, tier: str, key: str) -> TokenBucket:
+        """Get or create a bucket and (re)arm its idle timer."""
+        buckets = self._tier(tier)
+        bucket = buckets.get(key)
+        if bucket is None:
+            if tier == TIER_IP:
+                bucket = TokenBucket(self._ip_capacity, self._ip_refill_per_sec, self._clock)
+            else:
+                bucket = TokenBucket(self._capacity, self._refill_per_sec, self._clock)
+            buckets[key] = bucket
+            self._wheel.schedule((tier, key), bucket.last_update + self._ttl)
+            self._enforce_cap((tier, key))
+        return bucket
+
+    def _drop(self, tier: str, key: str) -> None:
+        self._tier(tier).pop(key, None)
+        if tier == TIER_SID:
+            self._sid_ips.pop(key, None)
+        self._wheel.cancel((tier, key))
+
+    def _expire(self, now: float) -> None:
+        """Drop buckets idle past the TTL."""
+        for tier, key in self._wheel.advance(now):
+            bucket = self._tier(tier).get(key)
+            if bucket is None:
+                continue
+            deadline = bucket.last_update + self._ttl
+            if deadline <= now:
+                self._drop(tier, key)
+                self.evictions += 1
+            else:
+                self._wheel.schedule((tier, key), deadline)
+
+    def _enforce_cap(self, keep: Tuple[str, str]) -> None:
+        """Over MUD_RATE_MAX_BUCKETS, drop the buckets whose idle timers are due soonest."""
+        excess = self.bucket_count() - self._max_buckets
+        if excess <= 0:
+            return
+        victims = islice((k for k in self._wheel.soonest() if k != keep), excess)
+        for tier, key in list(victims):
+            self._drop(tier, key)
+            self.evictions += 1
+
+    def bucket_count(self) -> int:
+        return len(self._buckets) + len(self.keyed_buckets) + len(self._ip_buckets)
+
+    def bind_ip(self, sid: str, ip: str | None) -> None:
+        """Associate a connected SID with its client IP (for the per-IP tier)."""
+        if sid and ip:
+            self._sid_ips[sid] = ip
+
+    def forget_sid(self, sid: str) -> None:
+        """Drop a disconnected SID's bucket; its IP bucket stays until it idles out."""
+        self._drop(TIER_SID, sid)
     
     def check_and_consume(self, sid: str | None, operation_type: OperationType,
-                          operation_name: str = "unknown") -> bool:
+                          operation_name: str = "unknown", key: str | None = None,
+                          cost_key: str | None = None) -> bool:
         """Check if an operation should be allowed and consume tokens if so.
         
         Args:
             sid: Session ID of the client (None for anonymous)
             operation_type: Classification of the operation's resource cost
             operation_name: Human-readable operation name for logging
+            key: Bucket key for server-side callers without a SID (e.g. one
+                NPC's planning); ignored when sid is given
+            cost_key: command_metrics name whose learnt cost is charged when
+                adaptive costs are on (the static cost otherwise)
             
         Returns:
             True if operation should proceed, False if rate limited
@@ -136,25 +381,35 @@ class RateLimiter:
             return True
         
         # Handle anonymous/None SID
-        effective_sid = sid or "anonymous"
+        effective_sid = sid or (key if key else "anonymous")
         
         try:
-            # Get or create token bucket for this SID
-            if effective_sid not in self._buckets:
-                self._buckets[effective_sid] = TokenBucket(self._capacity, self._refill_per_sec)
-            
-            bucket = self._buckets[effective_sid]
-            tokens_needed = operation_type.value
+            now = self._clock()
+            self._expire(now)
+            if sid or not key:
+                bucket = self._bucket(TIER_SID, effective_sid)
+            else:
+                bucket = self._bucket(TIER_KEYED, key)
+            ip = self._sid_ips.get(sid) if (sid and self._ip_enabled) else None
+            ip_bucket = self._bucket(TIER_IP, ip) if ip else None
+            tokens_needed = self.costs.cost(cost_key, operation_type)
             
-            # Try to consume tokens
-            if bucket.consume(tokens_needed):
+            # Both tiers must have the tokens before either is charged
+            ip_short = ip_bucket is not None and not ip_bucket.has(tokens_needed)
+            if not ip_short and bucket.consume(tokens_needed):
+                if ip_bucket is not None:
+                    ip_bucket.consume(tokens_needed)
                 return True
             else:
+                self.rejections[operation_type.name] = self.rejections.get(operation_type.name, 0) + 1
+                if ip_short:
+                    self.ip_rejections[operation_type.name] = self.ip_rejections.get(operation_type.name, 0) + 1
                 # Rate limited - log violation if enabled
                 if self._log_violations:
-                    _logger.warning(f"Rate limit violation: SID {effective_sid} "
+                    short = ip_bucket if ip_short and ip_bucket is not None else bucket
+                    _logger.warning(f"Rate limit violation: {'IP ' + str(ip) if ip_short else 'SID ' + effective_sid} "
                                     f"blocked from {operation_name} "
-                                    f"(needed {tokens_needed} tokens, had {bucket.tokens:.1f})")
+                                    f"(needed {tokens_needed:g} tokens, had {short.tokens:.1f})")
                 return False
                 
         except Exception as e:
@@ -193,7 +448,7 @@ class RateLimiter:
         effective_sid = sid or "anonymous"
         try:
             if effective_sid in self._buckets:
-                del self._buckets[effective_sid]
+                self._drop(TIER_SID, effective_sid)
         except Exception as e:
             _logger.error(f"Error resetting bucket for SID {effective_sid}: {e}")
     
@@ -206,18 +461,19 @@ class RateLimiter:
             max_age_seconds: Remove buckets older than this many seconds
         """
         try:
-            now = time.time()
+            now = self._clock()
             cutoff = now - max_age_seconds
             
             # Find buckets to remove (avoid modifying dict during iteration)
             old_sids = []
-            for sid, bucket in self._buckets.items():
-                if bucket.last_update < cutoff:
-                    old_sids.append(sid)
+            for tier in (TIER_SID, TIER_KEYED, TIER_IP):
+                for sid, bucket in self._tier(tier).items():
+                    if bucket.last_update < cutoff:
+                        old_sids.append((tier, sid))
             
             # Remove old buckets
-            for sid in old_sids:
-                del self._buckets[sid]
+            for tier, sid in old_sids:
+                self._drop(tier, sid)
             
             if old_sids and self._log_violations:
                 _logger.info(f"Cleaned up {len(old_sids)} old rate limit buckets")
@@ -242,18 +498,51 @@ _global_rate_limiter = RateLimiter()
 
 
 def check_rate_limit(sid: str | None, operation_type: OperationType,
-                     operation_name: str = "unknown") -> bool:
+                     operation_name: str = "unknown", key: str | None = None,
+                     cost_key: str | None = None) -> bool:
     """Convenience function to check rate limits using the global rate limiter.
     
     Args:
         sid: Session ID of the client
         operation_type: Classification of the operation's resource cost
         operation_name: Human-readable operation name for logging
+        key: Own bucket for a server-side caller without a SID
+        cost_key: command_metrics name for adaptive costing
         
     Returns:
         True if operation should proceed, False if rate limited
     """
-    return _global_rate_limiter.check_and_consume(sid, operation_type, operation_name)
+    return _global_rate_limiter.check_and_consume(sid, operation_type, operation_name, key, cost_key)
+
+
+def observe_cost(name: str, busy_ms: float) -> None:
+    """command_metrics observer: learn a command's cost from one measured call."""
+    _global_rate_limiter.costs.observe(name, busy_ms)
+
+
+def adaptive_costs_enabled() -> bool:
+    """Whether rate limiting is on and charging learnt per-command costs."""
+    return _global_rate_limiter._enabled and _global_rate_limiter.costs.enabled
+
+
+def bind_client_ip(sid: str, ip: str | None) -> None:
+    """Record a connecting client's IP for the optional per-IP tier."""
+    _global_rate_limiter.bind_ip(sid, ip)
+
+
+def forget_client(sid: str) -> None:
+    """Release a disconnected client's SID bucket."""
+    _global_rate_limiter.forget_sid(sid)
+
+
+def get_bucket_count() -> int:
+    """Live token buckets across all tiers."""
+    return _global_rate_limiter.bucket_count()
+
+
+def get_rejection_counts() -> Dict[str, int]:
+    """Rejected operations so far, keyed by OperationType name."""
+    return dict(_global_rate_limiter.rejections)
 
 
 def get_rate_limit_status(sid: str | None) -> tuple[float, float]:
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+"""RNG Service — seeded, named random streams for the world simulation.
+
+Game systems used to call the module-level `random` functions directly, so two
+runs of the same world never matched and tick benchmarks could not be compared
+like for like. Every system now draws from its own named stream instead:
+
+    rng_service.get_rng('combat').randint(1, 100)
+
+Streams ('combat', 'autonomy', 'missions', 'dice', 'daily', 'interaction', ...)
+are independent random.Random instances, each seeded from the one master seed
+and the stream name. A system that starts drawing more numbers therefore does
+not shift the sequence seen by any other system.
+
+The master seed comes from MUD_RNG_SEED. Without it the service seeds itself
+from the OS (normal, non-repeatable play). Simulation and benchmark code calls
+reseed(seed) to make a run repeatable; reseeding resets every stream.
+
+Entity ids the simulation creates (NPC ids, ambitions, missions, objects) come
+from new_id(): a plain uuid4 in normal play, drawn from the 'ids' stream once
+a seed is set, so a seeded run saves the same ids every time. Wall-clock
+timestamps are the other half of that; see world_clock.
+"""
+
+import hashlib
+import os
+import random
+import uuid
+from typing import Dict, Optional
+
+
+# Known stream names (others are created on demand)
+STREAMS = ('combat', 'autonomy', 'missions', 'dice', 'daily', 'interaction')
+
+
+def _env_seed() -> Optional[int]:
+    """Read master seed from environment (MUD_RNG_SEED); None when unset or invalid."""
+    raw = (os.getenv('MUD_RNG_SEED') or '').strip()
+    if not raw:
+        return None
+    try:
+        return int(raw)
+    except ValueError:
+        return None
+
+
+def derive_seed(seed: int, name: str) -> int:
+    """Stable per-stream seed (independent of PYTHONHASHSEED)."""
+    digest = hashlib.sha256(f"{seed}:{name}".encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+class RngService:
+    """Named random.Random streams derived from one master seed."""
+
+    def __init__(self, seed: Optional[int] = None):
+        self._streams: Dict[str, random.Random] = {}
+        self.seed: int = 0
+        # True when the master seed was given (repeatable run), not drawn from the OS
+        self.fixed = False
+        self.reseed(seed)
+
+    def reseed(self, seed: Optional[int] = None) -> None:
+        """Set the master seed (None: pick one from the OS) and reset all streams."""
+        self.fixed = seed is not None
+        self.seed = int(seed) if seed is not None else random.SystemRandom().randrange(2 ** 63)
+        self._streams.clear()
+
+    def salt(self, name: str, salt: str) -> None:
+        """Restart stream `name` from the master seed mixed with `salt`."""
+        self._streams[name] = random.Random(derive_seed(self.seed, f"{name}:{salt}"))
+
+    def new_id(self) -> str:
+        """A uuid4-format id: from the 'ids' stream when seeded, from the OS otherwise."""
+        if not self.fixed:
+            return str(uuid.uuid4())
+        return str(uuid.UUID(int=self.stream('ids').getrandbits(128), version=4))
+
+    def stream(self, name: str) -> random.Random:
+        """The random.Random for `name`, created on first use."""
+        rng = self._streams.get(name)
+        if rng is None:
+            rng = random.Random(derive_seed(self.seed, name))
+            self._streams[name] = rng
+        return rng
+
+    def streams(self) -> Dict[str, random.Random]:
+        return dict(self._streams)
+
+
+# Process-wide service (one world per server process)
+_service = RngService(_env_seed())
+
+
+def get_rng_service() -> RngService:
+    """Return the process-wide RNG service."""
+    return _service
+
+
+def get_rng(name: str) -> random.Random:
+    """Shortcut for get_rng_service().stream(name)."""
+    return _service.stream(name)
+
+
+def reseed(seed: Optional[int] = None) -> None:
+    """Reseed the process-wide service (see RngService.reseed)."""
+    _service.reseed(seed)
+
+
+def new_id() -> str:
+    """Shortcut for get_rng_service().new_id()."""
+    return _service.new_id()
@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+"""Room Index — per-room resource categories kept in step with room.objects.
+
+The planners, autonomy evaluators and distance fields all ask the same
+questions of a room: what here is edible? drinkable? a bed? valuable? unowned?
+Answering by scanning every object (and re-parsing its tags) each time adds
+up when dozens of NPCs think per tick. Instead each Room's `objects` mapping
+is a RoomObjects dict that maintains a RoomIndex:
+
+- category -> set of object uuids, with counts available in O(1)
+- updated on insert, replace, pop/del and clear of room.objects
+- updated when an indexed attribute of a contained Object is assigned
+  (object_tags, owner_id, value, satiation_value, hydration_value);
+  world.Object calls notify_object_changed() from __setattr__
+
+In-place edits such as `obj.object_tags.add(...)` bypass __setattr__; callers
+doing that should call touch(obj) afterwards.
+
+RoomObjects also carries a `version` (see versioned.py) that moves whenever the
+index is updated or a contained object is renamed, so callers can tell "this
+room's objects changed" from one integer instead of rescanning them.
+
+Query with find(room, category, predicate) — results keep room.objects order,
+so callers that pick "the first bread" behave exactly as a scan would.
+"""
+
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from nutrition import nutrition_from_tags_or_fields
+from versioned import next_version
+
+
+CATEGORIES: Tuple[str, ...] = ('edible', 'drinkable', 'bed', 'valuable', 'unowned')
+
+# Objects with value above this count as valuable (matches the evaluators' cut-off)
+VALUABLE_MIN = 10
+
+# Object attributes whose assignment changes the object's categories
+INDEXED_FIELDS = frozenset({'object_tags', 'owner_id', 'value', 'satiation_value', 'hydration_value'})
+
+# Assigning these moves RoomObjects.version too (planners match objects by name,
+# distance_fields reads Travel Point names and targets)
+VERSIONED_FIELDS = INDEXED_FIELDS | {'display_name', 'link_target_room_id'}
+
+# Attribute on an Object holding (weakref to its RoomObjects, key in that mapping)
+_CONTAINER_ATTR = '_room_objects_ref'
+
+
+def categories_of(obj: Any) -> frozenset:
+    """Resource categories an object belongs to."""
+    cats: Set[str] = set()
+    sv, hv = nutrition_from_tags_or_fields(obj)
+    if sv > 0:
+        cats.add('edible')
+    if hv > 0:
+        cats.add('drinkable')
+    tags = getattr(obj, 'object_tags', None) or set()
+    if any(str(t).strip().lower() == 'bed' for t in tags):
+        cats.add('bed')
+    try:
+        if int(getattr(obj, 'value', 0) or 0) > VALUABLE_MIN:
+            cats.add('valuable')
+    except Exception:
+        pass
+    if not getattr(obj, 'owner_id', None):
+        cats.add('unowned')
+    return frozenset(cats)
+
+
+class RoomIndex:
+    """category -> uuid sets for one room, plus insertion order for stable results."""
+
+    __slots__ = ('_members', '_cats_of', '_pos', '_seq')
+
+    def __init__(self) -> None:
+        self._members: Dict[str, Set[str]] = {c: set() for c in CATEGORIES}
+        self._cats_of: Dict[str, frozenset] = {}
+        self._pos: Dict[str, int] = {}
+        self._seq = 0
+
+    def add(self, uid: str, obj: Any) -> None:
+        if uid not in self._pos:
+            self._seq += 1
+            self._pos[uid] = self._seq
+        self.reindex(uid, obj)
+
+    def reindex(self, uid: str, obj: Any) -> None:
+        new = categories_of(obj)
+        old = self._cats_of.get(uid, frozenset())
+        if new == old and uid in self._cats_of:
+            return
+        for cat in old - new:
+            self._members[cat].discard(uid)
+        for cat in new - old:
+            self._members[cat].add(uid)
+        self._cats_of[uid] = new
+
+    def remove(self, uid: str) -> None:
+        for cat in self._cats_of.pop(uid, frozenset()):
+            self._members[cat].discard(uid)
+        self._pos.pop(uid, None)
+
+    def clear(self) -> None:
+        for members in self._members.values():
+            members.clear()
+        self._cats_of.clear()
+        self._pos.clear()
+
+    def count(self, category: str) -> int:
+        return len(self._members.get(category, ()))
+
+    def counts(self) -> Dict[str, int]:
+        return {cat: len(members) for cat, members in self._members.items()}
+
+    def uuids(self, category: str) -> List[str]:
+        """uuids in category, in the order they were added to the room."""
+        members = self._members.get(category, ())
+        return sorted(members, key=self._pos.__getitem__)
+
+
+class RoomObjects(dict):
+    """uuid -> Object mapping that keeps a RoomIndex up to date."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__()
+        self.index = RoomIndex()
+        self.version = next_version()
+        self.update(*args, **kwargs)
+
+    def __reduce__(self):
+        return (self.__class__, (dict(self),))
+
+    def _attach(self, uid: str, obj: Any) -> None:
+        try:
+            obj.__dict__[_CONTAINER_ATTR] = (weakref.ref(self), uid)
+        except Exception:
+            pass
+        self.index.add(uid, obj)
+        self.version = next_version()
+
+    def _detach(self, uid: str, obj: Any) -> None:
+        self.index.remove(uid)
+        self.version = next_version()
+        try:
+            link = obj.__dict__.get(_CONTAINER_ATTR)
+            if link is not None and link[0]() is self:
+                del obj.__dict__[_CONTAINER_ATTR]
+        except Exception:
+            pass
+
+    def __setitem__(self, uid: str, obj: Any) -> None:
+        old = dict.get(self, uid)
+        if old is not None and old is not obj:
+            self._detach(uid, old)
+        super().__setitem__(uid, obj)
+        self._attach(uid, obj)
+
+    def __delitem__(self, uid: str) -> None:
+        obj = dict.__getitem__(self, uid)
+        super().__delitem__(uid)
+        self._detach(uid, obj)
+
+    _MISSING = object()
+
+    def pop(self, uid: str, default: Any = _MISSING) -> Any:
+        if uid in self:
+            obj = super().pop(uid)
+            self._detach(uid, obj)
+            return obj
+        if default is RoomObjects._MISSING:
+            raise KeyError(uid)
+        return default
+
+    def popitem(self) -> Tuple[str, Any]:
+        uid, obj = super().popitem()
+        self._detach(uid, obj)
+        return uid, obj
+
+    def clear(self) -> None:
+        for uid, obj in list(self.items()):
+            self._detach(uid, obj)
+        super().clear()
+
+    def setdefault(self, uid: str, default: Any = None) -> Any:
+        if uid not in self:
+            self[uid] = default
+        return dict.__getitem__(self, uid)
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        for uid, obj in dict(*args, **kwargs).items():
+            self[uid] = obj
+
+    def __ior__(self, other: Any) -> "RoomObjects":
+        self.update(other)
+        return self
+
+    def reindex(self, uid: str, obj: Any) -> None:
+        if dict.get(self, uid) is obj:
+            self.index.reindex(uid, obj)
+            self.version = next_version()
+
+    def bump(self, uid: str, obj: Any) -> None:
+        """Move version for a change that does not affect the index."""
+        if dict.get(self, uid) is obj:
+            self.version = next_version()
+
+
+def notify_object_changed(obj: Any, name: str) -> None:
+    """Re-categorize obj in its room after an indexed attribute was assigned."""
+    if name not in VERSIONED_FIELDS:
+        return
+    link = getattr(obj, '__dict__', {}).get(_CONTAINER_ATTR)
+    container = link[0]() if link is not None else None
+    if container is None:
+        return
+    if name in INDEXED_FIELDS:
+        container.reindex(link[1], obj)
+    else:
+        container.bump(link[1], obj)
+
+
+def touch(obj: Any) -> None:
+    """Re-categorize obj after an in-place edit (e.g. object_tags.add)."""
+    notify_object_changed(obj, 'object_tags')
+
+
+def _index_for(room: Any) -> Optional[RoomIndex]:
+    objs = getattr(room, 'objects', None)
+    return objs.index if isinstance(objs, RoomObjects) else None
+
+
+def find(room: Any, category: str, predicate: Optional[Callable[[Any], bool]] = None) -> List[Any]:
+    """Objects in room belonging to category (and matching predicate), in room order."""
+    objs = getattr(room, 'objects', None) or {}
+    index = _index_for(room)
+    if index is None:
+        # Plain dicts (hand-built rooms) fall back to a scan
+        found = [o for o in objs.values() if category in categories_of(o)]
+    else:
+        found = [objs[uid] for uid in index.uuids(category)]
+    if predicate is not None:
+        found = [o for o in found if predicate(o)]
+    return found
+
+
+def count(room: Any, category: str) -> int:
+    """Number of objects in room belonging to category."""
+    index = _index_for(room)
+    if index is None:
+        return len(find(room, category))
+    return index.count(category)
+
+
+def counts(room: Any) -> Dict[str, int]:
+    """Per-category object counts for room."""
+    index = _index_for(room)
+    if index is None:
+        return {cat: count(room, cat) for cat in CATEGORIES}
+    return index.counts()
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+"""Room Membership — game rooms mirrored as Socket.IO rooms.
+
+broadcast_to_room used to emit once per player sid, so the Socket.IO server
+encoded the same payload once per recipient. Now every connected player also
+sits in a Socket.IO room named after their game room ("room:<room_id>"), and a
+room broadcast is a single emit to that channel (skip_sid for the excluded
+player).
+
+World.add_player / move_player / remove_player report placements through the
+world module's player room listener; this module turns them into enter_room /
+leave_room calls on the Socket.IO server. Only sids the Socket.IO server knows
+(connected clients) can enter a room, so anything else — test sids, observers
+placed straight into room.players — stays a "loose" member that
+broadcast_to_room still reaches with a per-sid emit.
+"""
+
+from typing import Any, Dict, Optional, Set
+
+
+NAMESPACE = '/'
+
+
+def channel(room_id: str) -> str:
+    """Socket.IO room name for a game room."""
+    return f"room:{room_id}"
+
+
+class RoomMembership:
+    """Tracks which sids joined which game room's Socket.IO room."""
+
+    def __init__(self):
+        self._sio: Any = None
+        self._room_of: Dict[str, str] = {}
+        self._members: Dict[str, Set[str]] = {}
+        self.stats = {'joins': 0, 'leaves': 0, 'join_failures': 0}
+
+    def bind(self, socketio: Any) -> None:
+        """Use this Flask-SocketIO (or python-socketio) server for enter/leave calls."""
+        self._sio = socketio
+
+    def _server(self) -> Any:
+        # Flask-SocketIO keeps the python-socketio server on .server
+        return getattr(self._sio, 'server', None)
+
+    def place(self, sid: str, room_id: Optional[str]) -> bool:
+        """Move sid into room_id's channel (None: leave any). True if sid is now joined."""
+        if self._room_of.get(sid) == room_id and room_id is not None:
+            return True
+        self.remove(sid)
+        if room_id is None:
+            return False
+        server = self._server()
+        if server is None:
+            return False
+        try:
+            server.enter_room(sid, channel(room_id), namespace=NAMESPACE)
+        except Exception:
+            # Not a connected client (or no server); broadcasts fall back to per-sid
+            self.stats['join_failures'] += 1
+            return False
+        self._room_of[sid] = room_id
+        self._members.setdefault(room_id, set()).add(sid)
+        self.stats['joins'] += 1
+        return True
+
+    def remove(self, sid: str) -> None:
+        """Take sid out of whatever channel it joined."""
+        room_id = self._room_of.pop(sid, None)
+        if room_id is None:
+            return
+        members = self._members.get(room_id)
+        if members is not None:
+            members.discard(sid)
+            if not members:
+                del self._members[room_id]
+        server = self._server()
+        if server is not None:
+            try:
+                server.leave_room(sid, channel(room_id), namespace=NAMESPACE)
+            except Exception:
+                pass
+        self.stats['leaves'] += 1
+
+    def members(self, room_id: str, present: Set[str]) -> Set[str]:
+        """Joined sids of room_id, dropping any no longer in present (room.players)."""
+        joined = self._members.get(room_id)
+        if not joined:
+            return set()
+        stale = joined - present
+        for sid in stale:
+            self.remove(sid)
+        return set(self._members.get(room_id, ()))
+
+    def room_of(self, sid: str) -> Optional[str]:
+        return self._room_of.get(sid)
+
+    def clear(self) -> None:
+        """Forget all placements (does not touch the Socket.IO server)."""
+        self._room_of.clear()
+        self._members.clear()
+
+
+# Process-wide membership (one Socket.IO server per process)
+_membership = RoomMembership()
+
+
+def get_room_membership() -> RoomMembership:
+    """Return the process-wide room membership tracker."""
+    return _membership
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+"""Send Queue — bounded per-client outbound queues with backpressure.
+
+Socket.IO queues every emit for a client inside its engine.io socket, without
+limit. A stalled client in a busy room therefore grows server memory for as
+long as it stays connected. Room broadcasts and buffered replies now go through
+SendQueues instead:
+
+- While a client keeps up (its engine.io backlog is under MUD_SEND_BACKLOG
+  packets and nothing is waiting here), messages are emitted immediately.
+- Once it falls behind, new messages wait in a bounded per-sid queue that a
+  background drainer (and every later send) feeds out as the backlog clears.
+- Over MUD_SEND_QUEUE_MAX entries, the oldest non-critical entry is dropped.
+  Non-critical means ambient traffic: NPC chatter flushed at the end of a tick
+  and time-of-day announcements, i.e. anything sent inside `ambient()`.
+- A queue that still reaches MUD_SEND_HIGH_WATER entries (only critical
+  messages left) gets its client disconnected and the queue discarded.
+
+snapshot() reports per-sid depth, drops and peak depth for the admin views.
+
+Configuration (env):
+- MUD_SEND_BACKLOG: engine.io packets in flight before a client counts as slow (default 64)
+- MUD_SEND_QUEUE_MAX: queued entries before non-critical ones are dropped (default 200)
+- MUD_SEND_HIGH_WATER: queued entries that trigger a disconnect (default 500)
+"""
+
+import os
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Set, Tuple
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int((os.getenv(name) or str(default)).strip())
+    except Exception:
+        return default
+
+
+Entry = Tuple[str, Any, bool]  # (event, payload, critical)
+
+
+class _ClientQueue:
+    __slots__ = ('entries', 'dropped', 'peak')
+
+    def __init__(self):
+        self.entries: Deque[Entry] = deque()
+        self.dropped = 0
+        self.peak = 0
+
+
+class SendQueues:
+    """Per-sid bounded queues in front of the Socket.IO emit."""
+
+    def __init__(
+        self,
+        max_depth: Optional[int] = None,
+        high_water: Optional[int] = None,
+        backlog_limit: Optional[int] = None,
+    ):
+        self.max_depth = max_depth if max_depth is not None else _env_int('MUD_SEND_QUEUE_MAX', 200)
+        self.high_water = high_water if high_water is not None else _env_int('MUD_SEND_HIGH_WATER', 500)
+        self.backlog_limit = backlog_limit if backlog_limit is not None else _env_int('MUD_SEND_BACKLOG', 64)
+        self._queues: Dict[str, _ClientQueue] = {}
+        self._ambient = 0
+        self._emit: Optional[Callable[[str, str, Any], None]] = None
+        self._backlog: Callable[[str], int] = lambda sid: 0
+        self._disconnect: Callable[[str], None] = lambda sid: None
+        self.stats = {'sent': 0, 'queued': 0, 'dropped': 0, 'disconnects': 0}
+
+    def bind(
+        self,
+        emit: Callable[[str, str, Any], None],
+        backlog: Optional[Callable[[str], int]] = None,
+        disconnect: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        """emit(sid, event, payload) sends; backlog(sid) is the transport's pending packets."""
+        self._emit = emit
+        if backlog is not None:
+            self._backlog = backlog
+        if disconnect is not None:
+            self._disconnect = disconnect
+
+    @contextmanager
+    def ambient(self) -> Iterator[None]:
+        """Sends inside this block are non-critical (droppable under pressure)."""
+        self._ambient += 1
+        try:
+            yield
+        finally:
+            self._ambient -= 1
+
+    def _transport_busy(self, sid: str) -> bool:
+        try:
+            return int(self._backlog(sid) or 0) >= self.backlog_limit
+        except Exception:
+            return False
+
+    def is_congested(self, sid: str) -> bool:
+        """True if sid's messages must wait (queued backlog or busy transport)."""
+        q = self._queues.get(sid)
+        if q is not None and q.entries:
+            return True
+        return self._transport_busy(sid)
+
+    def _send_now(self, sid: str, event: str, payload: Any) -> None:
+        if self._emit is not None:
+            self._emit(sid, event, payload)
+            self.stats['sent'] += 1
+
+    def send(self, sid: str, event: str, payload: Any, critical: Optional[bool] = None) -> bool:
+        """Emit now or queue behind the client's backlog. False if the client was cut off."""
+        if critical is None:
+            critical = self._ambient == 0
+        if sid in self._queues:
+            self.drain_sid(sid)
+        if not self.is_congested(sid):
+            self._send_now(sid, event, payload)
+            return True
+        q = self._queues.setdefault(sid, _ClientQueue())
+        q.entries.append((event, payload, bool(critical)))
+        self.stats['queued'] += 1
+        if len(q.entries) > self.max_depth:
+            self._drop_oldest_ambient(q)
+        q.peak = max(q.peak, len(q.entries))
+        if len(q.entries) >= self.high_water:
+            self.stats['disconnects'] += 1
+            self._queues.pop(sid, None)
+            try:
+                self._disconnect(sid)
+            except Exception:
+                pass
+            return False
+        return True
+
+    def _drop_oldest_ambient(self, q: _ClientQueue) -> None:
+        for i, (_, _, critical) in enumerate(q.entries):
+            if not critical:
+                del q.entries[i]
+                q.dropped += 1
+                self.stats['dropped'] += 1
+                return
+
+    def drain_sid(self, sid: str) -> int:
+        """Emit queued entries for sid while its transport has room. Returns count sent."""
+        q = self._queues.get(sid)
+        if q is None:
+            return 0
+        sent = 0
+        while q.entries and not self._transport_busy(sid):
+            event, payload, _ = q.entries.popleft()
+            self._send_now(sid, event, payload)
+            sent += 1
+        if not q.entries and not q.dropped:
+            del self._queues[sid]
+        return sent
+
+    def drain(self) -> int:
+        """Drain every waiting client (called periodically by the server)."""
+        return sum(self.drain_sid(sid) for sid in list(self._queues))
+
+    def waiting_sids(self) -> Set[str]:
+        """Sids with messages queued right now."""
+        return {sid for sid, q in self._queues.items() if q.entries}
+
+    def depth(self, sid: str) -> int:
+        q = self._queues.get(sid)
+        return len(q.entries) if q is not None else 0
+
+    def depths(self) -> List[int]:
+        """Current depth of every client queue (empty ones included)."""
+        return [len(q.entries) for q in list(self._queues.values())]
+
+    def forget(self, sid: str) -> None:
+        self._queues.pop(sid, None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Totals plus per-sid depth/dropped/peak for clients that ever queued."""
+        return {
+            'max_depth': self.max_depth,
+            'high_water': self.high_water,
+            'backlog_limit': self.backlog_limit,
+            'totals': dict(self.stats),
+            'clients': {
+                sid: {'depth': len(q.entries), 'dropped': q.dropped, 'peak': q.peak}
+                for sid, q in self._queues.items()
+            },
+        }
+
+    def reset(self) -> None:
+        self._queues.clear()
+        self._ambient = 0
+        for k in self.stats:
+            self.stats[k] = 0
+
+
+# Process-wide queues used by server.py for every per-client send
+_queues = SendQueues()
+
+
+def get_send_queues() -> SendQueues:
+    """Return the process-wide send queues."""
+    return _queues
@@ -50,6 +50,7 @@ import os
 import logging
 import socket
 import atexit
+import hmac
 from typing import Any, cast
 import re
 import random
@@ -158,14 +159,13 @@ except Exception:
     HarmCategory = None  # type: ignore
     HarmBlockThreshold = None  # type: ignore
     _SAFETY_OFF_LIST = None
-from flask import Flask, request
-from flask_socketio import SocketIO, emit, disconnect
-from ai_utils import safety_settings_for_level as _safety_settings_for_level
+from flask import Flask, Response, request, jsonify
+from flask_socketio import SocketIO, emit as _socketio_emit, disconnect
+from ai_utils import safety_settings_for_level as _safety_settings_for_level, generate_content as ai_generate
 from debounced_saver import DebouncedSaver
 from persistence_utils import save_world, flush_all_saves
-from world import World, CharacterSheet, Room, User
+from world import World, CharacterSheet, Room, User, set_player_room_listener
 from concurrency_utils import atomic_many
-import daily_system
 from look_service import format_look as _format_look, resolve_object_in_room as _resolve_object_in_room, format_object_summary as _format_object_summary
 from account_service import create_account_and_login, login_existing
 from movement_service import move_through_door, move_stairs, teleport_player
@@ -196,16 +196,47 @@ from object_service import (
 )
 from setup_service import begin_setup as _setup_begin, handle_setup_input as _setup_handle
 from auth_wizard_service import handle_interactive_auth as _auth_handle
+from command_context import CommandContext
 # Rate limiting system to protect against malicious client spam
 from rate_limiter import (
     check_rate_limit, OperationType, _SimpleRateLimiter,
-    get_rate_limit_status, reset_rate_limit, cleanup_rate_limiter
+    get_rate_limit_status, reset_rate_limit, cleanup_rate_limiter,
+    bind_client_ip, forget_client, observe_cost, adaptive_costs_enabled
 )
 # Safe execution utilities - replaces bare 'except Exception: pass' patterns with logging
 from safe_utils import safe_call, safe_call_with_default
+# Tag-or-field nutrition rules shared with the tick engine and the room index
+from nutrition import nutrition_from_tags_or_fields as _nutrition_from_tags_or_fields
 
 # Extracted modules for NPC execution and messaging (refactoring)
+import ai_budget
 import game_loop
+import npc_planning_service
+import plan_cache
+import goap_planner
+import distance_fields
+import room_index
+import tick_profiler
+import room_membership
+import outbound_buffer
+import send_queue
+import transport_backlog
+import session_modes
+import trade_router
+import object_template_router
+import interaction_router
+import movement_router
+import dice_router
+import dialogue_router
+import auth_router
+import player_router
+import admin_router
+import combat_router
+import mission_router
+import command_registry
+import command_metrics
+import server_metrics
+import autonomous_npc_service
 import message_service
 import event_handlers
 import message_handler
@@ -376,13 +407,14 @@ _saver = DebouncedSaver(lambda: save_world(world, STATE_PATH, debounced=False),
 atexit.register(_save_world)  # one last immediate save on process exit
 admins = set()  # set of admin player sids (derived from logged-in users)
 sessions: dict[str, str] = {}  # sid -> user_id
-_pending_confirm: dict[str, str] = {}  # sid -> action (e.g., 'purge')
+# Flow maps are session_modes.FlowMaps: entering or leaving one sets the sid's mode
+_pending_confirm: dict[str, str] = session_modes.get_session_modes().flow_map()  # sid -> action (e.g., 'purge')
 auth_sessions: dict[str, dict] = {}  # sid -> { mode: 'create'|'login', step: str, temp: dict }
-world_setup_sessions: dict[str, dict] = {}  # sid -> { step: str, temp: dict }
-object_template_sessions: dict[str, dict] = {}  # sid -> { step: str, temp: dict }
-interaction_sessions: dict[str, dict] = {}  # sid -> { step: 'choose', obj_uuid: str, actions: list[str] }
-barter_sessions: dict[str, dict] = {}  # sid -> active barter flow state
-trade_sessions: dict[str, dict] = {}   # sid -> active currency trade flow state
+world_setup_sessions: dict[str, dict] = session_modes.get_session_modes().flow_map()  # sid -> { step: str, temp: dict }
+object_template_sessions: dict[str, dict] = session_modes.get_session_modes().flow_map()  # sid -> { step: str, temp: dict }
+interaction_sessions: dict[str, dict] = session_modes.get_session_modes().flow_map()  # sid -> { step: 'choose', obj_uuid: str, actions: list[str] }
+barter_sessions: dict[str, dict] = session_modes.get_session_modes().flow_map()  # sid -> active barter flow state
+trade_sessions: dict[str, dict] = session_modes.get_session_modes().flow_map()   # sid -> active currency trade flow state
 
 
 
@@ -433,72 +465,6 @@ def _clamp_need(v: float) -> float:
         return 0.0
 
 
-def _parse_tag_value(tags: set[str] | list[str] | None, key: str) -> int | None:
-    """Return the integer suffix from a tag like 'Edible: 20' or 'Drinkable: 15'.
-
-    - Matching is case-insensitive for the key and tolerant of spaces: 'Edible : 20' is ok.
-    - Returns None if no matching tag or if the suffix is not a valid integer.
-    """
-    if not tags:
-        return None
-    # Safe tag parsing with error handling
-    return safe_call_with_default(lambda: _parse_tag_value_inner(tags, key), None)
-
-
-def _parse_tag_value_inner(tags, key: str) -> int | None:
-    """Helper function for _parse_tag_value with actual parsing logic."""
-    key_low = key.strip().lower()
-    for t in list(tags):
-        s = safe_call_with_default(lambda: str(t), "")
-        if not s:
-            continue
-        parts = s.split(':', 1)
-        if len(parts) != 2:
-            continue
-        left, right = parts[0].strip().lower(), parts[1].strip()
-        if left == key_low and right:
-            # accept bare +/- digits
-            r = right
-            if r.startswith('+'):
-                r = r[1:]
-            if r.lstrip('-').isdigit():
-                # Parse integer value with safe fallback
-                return safe_call_with_default(lambda: int(r), None)
-    return None
-
-
-def _nutrition_from_tags_or_fields(obj) -> tuple[int, int]:
-    """Return (satiation, hydration) preferring tag-driven values over legacy fields.
-
-    - If an 'Edible' tag exists without a numeric suffix, treat satiation as 0 (require a number).
-    - If a 'Drinkable' tag exists without a numeric suffix, treat hydration as 0.
-    - If no respective tags are present, fall back to obj.satiation_value/obj.hydration_value when available.
-    """
-    # Safe extraction of object tags
-    tags = safe_call_with_default(lambda: set(getattr(obj, 'object_tags', []) or []), set())
-    sv_tag = _parse_tag_value(tags, 'Edible')
-    hv_tag = _parse_tag_value(tags, 'Drinkable')
-    # If tag keys exist but without value, enforce "require int" by yielding 0 instead of falling back
-    has_edible_key = any(str(t).split(':', 1)[0].strip().lower() == 'edible' for t in tags)
-    has_drink_key = any(str(t).split(':', 1)[0].strip().lower() == 'drinkable' for t in tags)
-
-    sv_field = int(getattr(obj, 'satiation_value', 0) or 0)
-    hv_field = int(getattr(obj, 'hydration_value', 0) or 0)
-
-    # If ANY nutrition-related tag is present, we are in "tag mode":
-    # - Use tag-provided numbers when present
-    # - Treat missing numbers as 0
-    # - Do NOT fall back to legacy fields when tags exist (prevents surprising mixes)
-    if has_edible_key or has_drink_key:
-        sv = sv_tag if sv_tag is not None else 0
-        hv = hv_tag if hv_tag is not None else 0
-    else:
-        # No nutrition tags at all -> use legacy fields
-        sv = sv_field
-        hv = hv_field
-    return int(sv or 0), int(hv or 0)
-
-
 def _npc_find_room_for(npc_name: str) -> str | None:
     # Search rooms where this NPC is present
     def _find_room():
@@ -514,46 +480,6 @@ def _npc_find_inventory_slot(inv, obj) -> int | None:
     return _find_inventory_slot(inv, obj)
 
 
-def _npc_exec_get_object(npc_name: str, room_id: str, object_name: str) -> tuple[bool, str]:
-    """Pick up an object from the room into the NPC's inventory."""
-    return game_loop._npc_exec_get_object(npc_name, room_id, object_name)
-
-
-def _npc_exec_consume_object(npc_name: str, room_id: str, object_uuid: str) -> tuple[bool, str]:
-    """Consume an object in inventory, applying satiation/hydration."""
-    return game_loop._npc_exec_consume_object(npc_name, room_id, object_uuid)
-
-
-def _npc_exec_do_nothing(npc_name: str, room_id: str) -> tuple[bool, str]:
-    """NPC pauses to think."""
-    return game_loop._npc_exec_do_nothing(npc_name, room_id)
-
-
-def _npc_exec_emote(npc_name: str, room_id: str, message: str | None = None) -> tuple[bool, str]:
-    """Perform a lightweight emote to the room."""
-    return game_loop._npc_exec_emote(npc_name, room_id, message)
-
-
-def _npc_exec_say(npc_name: str, room_id: str, message: str) -> tuple[bool, str]:
-    """NPC says something to the room."""
-    return game_loop._npc_exec_say(npc_name, room_id, message)
-
-
-def _npc_exec_drop(npc_name: str, room_id: str, object_uuid: str) -> tuple[bool, str]:
-    """NPC drops an object from inventory."""
-    return game_loop._npc_exec_drop(npc_name, room_id, object_uuid)
-
-
-def _npc_exec_look(npc_name: str, room_id: str, target_name: str) -> tuple[bool, str]:
-    """NPC examines a target object."""
-    return game_loop._npc_exec_look(npc_name, room_id, target_name)
-
-
-def _npc_exec_move_through(npc_name: str, room_id: str, name_in: str) -> tuple[bool, str]:
-    """NPC moves through a door or travel point to an adjacent room."""
-    return game_loop._npc_exec_move_through(npc_name, room_id, name_in)
-
-
 def _npc_exec_barter(npc_name: str, room_id: str, target_name: str, desired_uuid: str, offer_uuid: str) -> tuple[bool, str]:
     room = world.rooms.get(room_id)
     if not room:
@@ -597,7 +523,7 @@ def _npc_exec_barter(npc_name: str, room_id: str, target_name: str, desired_uuid
     offered_name = str(getattr(offered_obj, 'display_name', 'item'))
     desired_name = str(getattr(desired_obj, 'display_name', 'item'))
 
-    broadcast_to_room(room_id, {
+    game_loop.get_context().tick_broadcast(room_id, {
         'type': 'system',
         'content': f"[i]{npc_name} trades their {offered_name} with {target_display}, receiving {desired_name}.[/i]"
     })
@@ -660,7 +586,7 @@ def _npc_exec_trade(npc_name: str, room_id: str, target_name: str, desired_uuid:
         price_paid = safe_call_with_default(lambda: int(price_raw), price_int)
     item_name = str(getattr(bought_obj, 'display_name', 'item'))
 
-    broadcast_to_room(room_id, {
+    game_loop.get_context().tick_broadcast(room_id, {
         'type': 'system',
         'content': f"[i]{npc_name} pays {price_paid} coin{'s' if price_paid != 1 else ''} to {target_display}, receiving {item_name}.[/i]"
     })
@@ -686,24 +612,24 @@ def _npc_execute_action(npc_name: str, room_id: str, action: dict) -> tuple[bool
                 lambda: str(args.get('name') or args.get('door_name') or args.get('object_name') or '').strip(), 
                 ''
             )
-            ok, reason = _npc_exec_move_through(npc_name, room_id, name_in)
+            ok, reason = game_loop._npc_exec_move_through(npc_name, room_id, name_in)
         elif tool == 'get_object':
-            ok, reason = _npc_exec_get_object(npc_name, room_id, str(args.get('object_name') or ''))
+            ok, reason = game_loop._npc_exec_get_object(npc_name, room_id, str(args.get('object_name') or ''))
         elif tool == 'consume_object':
-            ok, reason = _npc_exec_consume_object(npc_name, room_id, str(args.get('object_uuid') or ''))
+            ok, reason = game_loop._npc_exec_consume_object(npc_name, room_id, str(args.get('object_uuid') or ''))
         elif tool == 'emote':
-            ok, reason = _npc_exec_emote(npc_name, room_id, str(args.get('message') or ''))
+            ok, reason = game_loop._npc_exec_emote(npc_name, room_id, str(args.get('message') or ''))
         elif tool == 'say':
-            ok, reason = _npc_exec_say(npc_name, room_id, str(args.get('message') or ''))
+            ok, reason = game_loop._npc_exec_say(npc_name, room_id, str(args.get('message') or ''))
         elif tool == 'drop':
-            ok, reason = _npc_exec_drop(npc_name, room_id, str(args.get('object_uuid') or ''))
+            ok, reason = game_loop._npc_exec_drop(npc_name, room_id, str(args.get('object_uuid') or ''))
         elif tool == 'look' or tool == 'investigate_object':
              target = str(args.get('target') or args.get('target_name') or args.get('object_name') or '')
-             ok, reason = _npc_exec_look(npc_name, room_id, target)
+             ok, reason = game_loop._npc_exec_look(npc_name, room_id, target)
         elif tool in ('steal_object', 'petty_theft'):
              # Treat as get_object for now
              target = str(args.get('target') or args.get('object_name') or '')
-             ok, reason = _npc_exec_get_object(npc_name, room_id, target)
+             ok, reason = game_loop._npc_exec_get_object(npc_name, room_id, target)
         elif tool in ('flee_danger', 'move_to_safety', 'flee_conflict', 'explore_area'):
              # Map to move_through
              target = str(args.get('target_room') or args.get('destination') or args.get('direction') or '')
@@ -712,7 +638,7 @@ def _npc_execute_action(npc_name: str, room_id: str, action: dict) -> tuple[bool
                  room = world.rooms.get(room_id)
                  if room and room.doors:
                      target = list(room.doors.keys())[0]
-             ok, reason = _npc_exec_move_through(npc_name, room_id, target)
+             ok, reason = game_loop._npc_exec_move_through(npc_name, room_id, target)
         elif tool in ('boast_achievements', 'offer_help', 'challenge_competitor', 'report_crime'):
              # Map to say/emote based on args or description
              # autonomous_npc_service puts description in the action dict, but we only get tool/args here usually?
@@ -722,19 +648,19 @@ def _npc_execute_action(npc_name: str, room_id: str, action: dict) -> tuple[bool
              target = str(args.get('target') or args.get('audience') or '')
              if tool == 'boast_achievements':
                  msg = f"boasts about their achievements to {target or 'everyone'}."
-                 ok, reason = _npc_exec_emote(npc_name, room_id, msg)
+                 ok, reason = game_loop._npc_exec_emote(npc_name, room_id, msg)
              elif tool == 'offer_help':
                  msg = f"offers to help {target}."
-                 ok, reason = _npc_exec_emote(npc_name, room_id, msg)
+                 ok, reason = game_loop._npc_exec_emote(npc_name, room_id, msg)
              elif tool == 'challenge_competitor':
                  msg = f"challenges {target}!"
-                 ok, reason = _npc_exec_say(npc_name, room_id, msg)
+                 ok, reason = game_loop._npc_exec_say(npc_name, room_id, msg)
              elif tool == 'report_crime':
                  msg = f"shouts, 'Guards! I witnessed a crime by {args.get('criminal')}!'"
-                 ok, reason = _npc_exec_say(npc_name, room_id, msg)
+                 ok, reason = game_loop._npc_exec_say(npc_name, room_id, msg)
         elif tool == 'initiate_trade':
              target = str(args.get('target') or '')
-             ok, reason = _npc_exec_emote(npc_name, room_id, f"approaches {target} to trade.")
+             ok, reason = game_loop._npc_exec_emote(npc_name, room_id, f"approaches {target} to trade.")
         elif tool == 'barter':
             target_name = str(args.get('target') or args.get('target_name') or '').strip()
             want_uuid = str(args.get('want_uuid') or args.get('desired_uuid') or args.get('want') or '').strip()
@@ -802,12 +728,12 @@ def _npc_execute_action(npc_name: str, room_id: str, action: dict) -> tuple[bool
         elif tool == 'attack':
             target_name = str(args.get('target') or args.get('target_name') or '').strip()
             if target_name:
-                res_ok, _, _, _ = attack(world, STATE_PATH, None, target_name, sessions, admins, broadcast_to_room, socketio.emit, attacker_npc_name=npc_name, room_id=room_id)
+                res_ok, _, _, _ = attack(world, STATE_PATH, None, target_name, sessions, admins, game_loop.get_context().tick_broadcast, socketio.emit, attacker_npc_name=npc_name, room_id=room_id)
                 ok = res_ok
             else:
                 ok = False
         elif tool == 'do_nothing':
-            ok, reason = _npc_exec_do_nothing(npc_name, room_id)
+            ok, reason = game_loop._npc_exec_do_nothing(npc_name, room_id)
         elif tool == 'sleep':
             # Args: bed_uuid (optional; if absent, try to pick an owned bed in room)
             sheet = _ensure_npc_sheet(npc_name)
@@ -848,7 +774,8 @@ def _npc_execute_action(npc_name: str, room_id: str, action: dict) -> tuple[bool
                     # Enter sleeping state
                     sheet.sleeping_ticks_remaining = int(SLEEP_TICKS_DEFAULT)
                     sheet.sleeping_bed_uuid = getattr(target_obj, 'uuid', bed_uuid)
-                    broadcast_to_room(room_id, {'type': 'system', 'content': f"[i]{npc_name} lies down on their bed to rest.[/i]"})
+                    game_loop.reschedule_npc_wake(npc_name, sheet, world)
+                    game_loop.get_context().tick_broadcast(room_id, {'type': 'system', 'content': f"[i]{npc_name} lies down on their bed to rest.[/i]"})
                     ok = True
                 else:
                     ok = False
@@ -860,177 +787,96 @@ def _npc_execute_action(npc_name: str, room_id: str, action: dict) -> tuple[bool
     # Spend AP regardless to avoid spins; failed actions are just wasted time.
     if not ok:
         try:
-            broadcast_to_room(room_id, {'type': 'system', 'content': f"[i]{npc_name} hesitates.[/i]"})
+            game_loop.get_context().tick_broadcast(room_id, {'type': 'system', 'content': f"[i]{npc_name} hesitates.[/i]"})
         except Exception:
             pass
     
     return ok, reason
 
 
-def _npc_offline_plan(npc_name: str, room: Room, sheet: CharacterSheet) -> list[dict]:
-    """Enhanced GOAP: considers personality traits and extended needs alongside basic survival.
-    Returns a list of actions: [{tool, args}...]
+def _npc_urgent_autonomy_plan(
+    npc_name: str, room_id: str, sheet: CharacterSheet, perception: Any = None
+) -> bool:
+    """Queue urgent autonomous actions (priority > 80) if any; True when a plan was set.
+
+    perception is an optional RoomPerception shared by every NPC in the room.
     """
-    plan: list[dict] = []
-    
-    # Helper to find items in inventory
-    def find_inv(predicate) -> object | None:
-        for it in sheet.inventory.slots:
-            if it and predicate(it):
-                return it
+    try:
+        from autonomous_npc_service import evaluate_npc_autonomy
+        autonomous_actions = evaluate_npc_autonomy(world, npc_name, room_id, perception)
+        # If there are high-priority autonomous actions (priority > 80), use those instead
+        urgent_actions = [a for a in autonomous_actions if a.get('priority', 0) > 80]
+        if urgent_actions:
+            # Use up to 3 urgent actions (already sorted by priority in evaluate_npc_autonomy)
+            sheet.plan_queue = [{
+                'tool': a['tool'],
+                'args': a['args']
+            } for a in urgent_actions[:3]]
+            return True
+    except Exception:
+        # If autonomous service fails, continue with normal planning
+        pass
+    return False
+
+
+def _npc_ai_planning_allowed(room: Room) -> bool:
+    """True when the AI planner may be used for NPCs in this room.
+
+    Advanced GOAP must be enabled, a planner model configured, and at least one
+    connected player present (no point paying for plans nobody will see).
+    """
+    if not getattr(world, 'advanced_goap_enabled', False):
+        return False
+    if plan_model is None:
+        return False
+    try:
+        return bool(getattr(room, 'players', None)) and len(room.players) > 0
+    except Exception:
+        return False
+
+
+def _planner_safety_settings() -> Any:
+    # Reuse the shared helper for safety settings (handles SDK availability differences)
+    try:
+        return _safety_settings_for_level(getattr(world, 'safety_level', 'G'))
+    except Exception:
         return None
-    
-    # Priority 1: Safety concerns (if safety is very low, prioritize escape)
-    safety = getattr(sheet, 'safety', 100.0)
-    if safety < 30:
-        # Look for exits to escape danger - simplified for offline planner
-        if hasattr(room, 'doors') and room.doors:
-            exit_name = list(room.doors.keys())[0]  # Take first available exit
-            plan.append({'tool': 'move_through', 'args': {'name': exit_name}})
-            return plan  # Safety is highest priority, ignore other needs
-    
-    # Priority 2: Basic survival needs (hunger/thirst) - consider personality
-    responsibility = getattr(sheet, 'responsibility', 50)
-    
-    # Hunger handling - low responsibility might steal if desperate
-    if sheet.hunger < NEED_THRESHOLD:
-        inv_food = find_inv(lambda o: _nutrition_from_tags_or_fields(o)[0] > 0)
-        if inv_food:
-            plan.append({'tool': 'consume_object', 'args': {'object_uuid': getattr(inv_food, 'uuid', '')}})
-        else:
-            food = next((o for o in (room.objects or {}).values() if _nutrition_from_tags_or_fields(o)[0] > 0), None)
-            if food:
-                # Low responsibility NPCs might just take food without proper social interaction
-                if responsibility < 30 and sheet.hunger < 20:
-                    # Very desperate and low morals - just take it
-                    plan.append({'tool': 'get_object', 'args': {'object_name': getattr(food, 'display_name', '')}})
-                    plan.append({'tool': 'consume_object', 'args': {'object_uuid': getattr(food, 'uuid', '')}})
-                else:
-                    # Normal acquisition
-                    plan.append({'tool': 'get_object', 'args': {'object_name': getattr(food, 'display_name', '')}})
-                    plan.append({'tool': 'consume_object', 'args': {'object_uuid': getattr(food, 'uuid', '')}})
-    
-    # Thirst handling - similar personality considerations
-    if sheet.thirst < NEED_THRESHOLD:
-        inv_drink = find_inv(lambda o: _nutrition_from_tags_or_fields(o)[1] > 0)
-        if inv_drink:
-            plan.append({'tool': 'consume_object', 'args': {'object_uuid': getattr(inv_drink, 'uuid', '')}})
-        else:
-            water = next((o for o in (room.objects or {}).values() if _nutrition_from_tags_or_fields(o)[1] > 0), None)
-            if water:
-                plan.append({'tool': 'get_object', 'args': {'object_name': getattr(water, 'display_name', '')}})
-                plan.append({'tool': 'consume_object', 'args': {'object_uuid': getattr(water, 'uuid', '')}})
-    
-    # Priority 3: Curiosity-driven exploration (if curious and confident)
-    curiosity = getattr(sheet, 'curiosity', 50)
-    confidence = getattr(sheet, 'confidence', 50)
-    if curiosity > 60 and confidence > 40 and not plan:  # Only if no urgent needs
-        # Look for objects to investigate that might have unknown properties
-        for obj in (room.objects or {}).values():
-            if not hasattr(obj, 'investigated_by_' + npc_name):  # Simple memory simulation
-                plan.append({'tool': 'look', 'args': {'target': getattr(obj, 'display_name', '')}})
-                break  # Just one investigation per planning cycle
-    
-    # Priority 4: Social needs - personality affects how they socialize
-    socialization = safe_call_with_default(lambda: getattr(sheet, 'socialization', 100.0), 100.0)
-    if socialization < NEED_THRESHOLD:
-        aggression = getattr(sheet, 'aggression', 30)
-        if aggression > 60:
-            # Aggressive NPCs might emote more dominantly
-            plan.append({'tool': 'emote', 'args': {'message': 'glares around the room assertively.'}})
-        else:
-            # Peaceful NPCs are more subdued
-            plan.append({'tool': 'emote', 'args': {'message': 'hums a tune to themself.'}})
-    
-    # Priority 5: Sleep needs
-    sleep_val = safe_call_with_default(lambda: getattr(sheet, 'sleep', 100.0), 100.0)
-    if sleep_val < NEED_THRESHOLD:
-        npc_id = safe_call_with_default(lambda: world.get_or_create_npc_id(npc_name), "")
-        if npc_id:
-            _npc_add_sleep_plan_safe(plan, npc_id, room)
-    
-    # Priority 6: Wealth desire (if moderate-to-high and opportunity exists)
-    wealth_desire = getattr(sheet, 'wealth_desire', 50.0)
-    if wealth_desire > 60 and getattr(sheet, 'currency', 0) < 20 and not plan:
-        # Look for valuable objects to potentially acquire (legally if high responsibility)
-        for obj in (room.objects or {}).values():
-            obj_value = getattr(obj, 'value', 0)
-            if obj_value > 10:  # Valuable item
-                if responsibility > 60:
-                    # High responsibility: try to trade or interact properly (simplified)
-                    plan.append({'tool': 'emote', 'args': {'message': f'looks thoughtfully at the {getattr(obj, "display_name", "item")}.'}})
-                elif responsibility < 40:
-                    # Low responsibility: might take it if no witnesses
-                    plan.append({'tool': 'get_object', 'args': {'object_name': getattr(obj, 'display_name', '')}})
-                break
-    
-    # Ensure there's always at least one action
-    if not plan:
-        plan.append({'tool': 'do_nothing', 'args': {}})
-    
-    return plan
 
 
-def _npc_grumble_failure(npc_name: str, room_id: str, action: dict, reason: str) -> None:
-    """Announce why an NPC failed to perform an action."""
-    tool = action.get('tool', 'act')
-    
-    # Construct a natural language explanation
-    explanation = f"I cannot {tool} because {reason}!"
-    
-    # More specific messages for common failures
-    if reason == "locked":
-        explanation = "This door is locked!"
-    elif reason == "room not found":
-        explanation = "I don't know where I am going!"
-    elif reason == "object not found":
-        target = action.get('args', {}).get('object_name', 'it')
-        explanation = f"I cannot find the {target}!"
-    elif reason == "cannot carry":
-        explanation = "I am carrying too much!"
-    elif reason == "target not found":
-        target = action.get('args', {}).get('target', 'them')
-        explanation = f"I cannot find {target}!"
-        
-    broadcast_to_room(room_id, {
-        'type': 'system',
-        'content': f"[i]{npc_name} grumbles loudly: \"{explanation}\"[/i]"
-    })
+def _plan_cache_key(source: str, npc_name: str, sheet: CharacterSheet, room: Room) -> tuple:
+    """Plan cache key for this NPC; source is 'ai' or 'offline'."""
+    npc_id = world.get_or_create_npc_id(npc_name)
+    return plan_cache.get_plan_cache().make_key(
+        source, npc_name, npc_id, sheet, room, NEED_THRESHOLD, _nutrition_from_tags_or_fields,
+        game_loop._room_other_npc_sheets(npc_name, room), game_loop._npc_nearby_exits(npc_id, room),
+    )
 
 
-def _npc_add_sleep_plan_safe(plan: list, npc_id: str, room) -> None:
-    """Helper function to safely find beds and add sleep plan items."""
-    owned_bed = None
-    unowned_bed = None
-    room_objects = safe_call_with_default(lambda: room.objects or {}, {})
-    
-    for o in room_objects.values():
-        tags = safe_call_with_default(lambda: set(getattr(o, 'object_tags', []) or []), set())
-        is_bed = any(safe_call_with_default(lambda: str(t).strip().lower() == 'bed', False) for t in tags)
-        if is_bed:
-            owner = safe_call_with_default(lambda: getattr(o, 'owner_id', None), None)
-            if owner == npc_id and owned_bed is None:
-                owned_bed = o
-            if (owner is None) and unowned_bed is None:
-                unowned_bed = o
-    
-    if owned_bed is not None:
-        bed_uuid = safe_call_with_default(lambda: getattr(owned_bed, 'uuid', ''), '')
-        if bed_uuid:
-            plan.append({'tool': 'sleep', 'args': {'bed_uuid': bed_uuid}})
-    elif unowned_bed is not None:
-        # Claim first, then sleep
-        bed_uuid = safe_call_with_default(lambda: getattr(unowned_bed, 'uuid', ''), '')
-        if bed_uuid:
-            plan.append({'tool': 'claim', 'args': {'object_uuid': bed_uuid}})
-            plan.append({'tool': 'sleep', 'args': {'bed_uuid': bed_uuid}})
+def _npc_install_cached_plan(key: tuple, npc_name: str, room: Room, sheet: CharacterSheet) -> bool:
+    """Install a cached plan for key if one is still valid; True on a hit."""
+    others = game_loop._room_other_npc_sheets(npc_name, room)
+    cached = plan_cache.get_plan_cache().get(key, room, sheet, others)
+    if cached is None:
+        return False
+    sheet.plan_queue = cached
+    return True
+
+
+def _npc_plan_offline_cached(npc_name: str, room: Room, sheet: CharacterSheet) -> None:
+    """Offline planning through the plan cache."""
+    key = safe_call_with_default(lambda: _plan_cache_key('offline', npc_name, sheet, room), None)
+    if key is not None and _npc_install_cached_plan(key, npc_name, room, sheet):
+        return
+    sheet.plan_queue = game_loop._npc_offline_plan(npc_name, room, sheet)
+    if key is not None:
+        plan_cache.get_plan_cache().put(key, sheet.plan_queue)
 
 
 def npc_think(npc_name: str) -> None:
     """Build or fetch a plan for the NPC and store it in its sheet.plan_queue.
 
     Enhanced to consider autonomous behaviors based on personality and extended needs.
-    Prefers AI JSON output when model is configured; otherwise uses _npc_offline_plan.
+    Prefers AI JSON output when model is configured; otherwise uses game_loop._npc_offline_plan.
     """
     room_id = _npc_find_room_for(npc_name)
     if not room_id:
@@ -1039,274 +885,136 @@ def npc_think(npc_name: str) -> None:
     if room is None:
         return
     sheet = _ensure_npc_sheet(npc_name)
-    
+
     # Priority 1: Check for urgent autonomous behaviors that override normal GOAP planning
-    try:
-        from autonomous_npc_service import evaluate_npc_autonomy
-        autonomous_actions = evaluate_npc_autonomy(world, npc_name, room_id)
-        
-        # If there are high-priority autonomous actions (priority > 80), use those instead
-        urgent_actions = [a for a in autonomous_actions if a.get('priority', 0) > 80]
-        if urgent_actions:
-            # Use up to 3 urgent actions (already sorted by priority in evaluate_npc_autonomy)
-            sheet.plan_queue = [{
-                'tool': a['tool'],
-                'args': a['args']
-            } for a in urgent_actions[:3]]
-            return
-    except Exception:
-        # If autonomous service fails, continue with normal planning
-        pass
-    
-    # If advanced planning is disabled for this world, stick to the offline heuristic planner.
-    if not getattr(world, 'advanced_goap_enabled', False):
-        sheet.plan_queue = _npc_offline_plan(npc_name, room, sheet)
+    if _npc_urgent_autonomy_plan(npc_name, room_id, sheet):
         return
-    # If no connected players are present in this room, skip API usage and use the offline planner.
-    try:
-        if not getattr(room, 'players', None) or len(room.players) == 0:
-            sheet.plan_queue = _npc_offline_plan(npc_name, room, sheet)
-            return
-    except Exception:
-        # On any unexpected error resolving presence, fall back to offline plan as well
-        sheet.plan_queue = _npc_offline_plan(npc_name, room, sheet)
+    _npc_plan_goap(npc_name, room, sheet)
+
+
+def _npc_plan_goap(npc_name: str, room: Room, sheet: CharacterSheet) -> None:
+    """GOAP planning for one NPC (autonomy already checked), through the plan cache."""
+    # Without advanced GOAP, a planner model, or players to watch, stick to the offline planner.
+    if not _npc_ai_planning_allowed(room):
+        _npc_plan_offline_cached(npc_name, room, sheet)
         return
-    # If no AI planner, use offline planner
-    if plan_model is None:
-        plan = _npc_offline_plan(npc_name, room, sheet)
-        sheet.plan_queue = plan
+    key = safe_call_with_default(lambda: _plan_cache_key('ai', npc_name, sheet, room), None)
+    if key is not None and _npc_install_cached_plan(key, npc_name, room, sheet):
         return
-    # Build a compact JSON-spec prompt
+    _npc_plan_ai_single(npc_name, room, sheet, key)
+
+
+def _npc_plan_ai_single(npc_name: str, room: Room, sheet: CharacterSheet, key: tuple | None) -> None:
+    """Ask the AI planner for one NPC's plan; offline plan on any failure."""
     try:
-        items_room = []
-        for o in (room.objects or {}).values():
-            # Ensure numeric tag presence for planner clarity
-            sv, hv = _nutrition_from_tags_or_fields(o)
-            tags_base = sorted(list(getattr(o, 'object_tags', set()) or []))
-            tags_aug = list(tags_base)
-            if sv > 0 and not any(str(t).lower().startswith('edible:') for t in tags_aug):
-                tags_aug.append(f'Edible: {sv}')
-            if hv > 0 and not any(str(t).lower().startswith('drinkable:') for t in tags_aug):
-                tags_aug.append(f'Drinkable: {hv}')
-            items_room.append({
-                'uuid': getattr(o, 'uuid', ''),
-                'name': getattr(o, 'display_name', ''),
-                'satiation_value': sv,
-                'hydration_value': hv,
-                'tags': tags_aug,
-            })
-        items_inv = []
-        for it in sheet.inventory.slots:
-            if it:
-                sv, hv = _nutrition_from_tags_or_fields(it)
-                tags_base = sorted(list(getattr(it, 'object_tags', set()) or []))
-                tags_aug = list(tags_base)
-                if sv > 0 and not any(str(t).lower().startswith('edible:') for t in tags_aug):
-                    tags_aug.append(f'Edible: {sv}')
-                if hv > 0 and not any(str(t).lower().startswith('drinkable:') for t in tags_aug):
-                    tags_aug.append(f'Drinkable: {hv}')
-                items_inv.append({
-                    'uuid': getattr(it, 'uuid', ''),
-                    'name': getattr(it, 'display_name', ''),
-                    'satiation_value': sv,
-                    'hydration_value': hv,
-                    'tags': tags_aug,
-                })
-        system_prompt = (
-            "You are an autonomous NPC in a text MUD with personality traits that affect your behavior.\n"
-            "You have needs (hunger/thirst/socialization/sleep/safety/wealth_desire/social_status, 0-100; higher is better).\n"
-            "Your personality traits (0-100) influence how you pursue needs:\n"
-            "- Low responsibility (<40) = more likely to steal/break rules to satisfy needs\n"
-            "- High aggression (>60) = more confrontational approach to competition\n"
-            "- High curiosity (>60) = investigate unknown objects before other actions\n"
-            "- Low confidence (<40) = avoid risky actions, prefer safe options\n"
-            "Plan a short sequence of 1-4 actions considering both your needs AND personality.\n"
-            "Always return ONLY JSON: an array of {\"tool\": str, \"args\": object}. No prose.\n"
-            "Tools:\n"
-            "- move_through(name: str): move through a named door or travel point to an adjacent room.\n"
-            "- get_object(object_name: str): pick up an object in the current room by name.\n"
-            "- consume_object(object_uuid: str): consume an item in your inventory.\n"
-            "- emote(message?: str): perform a small emote to yourself/the room to recharge social needs.\n"
-            "- say(message: str): speak to the room or a specific person.\n"
-            "- drop(object_uuid: str): drop an item from your inventory.\n"
-            "- look(target: str): examine an object or person.\n"
-            "- barter(target_name: str, offer_uuid: str, want_uuid: str): trade items with someone in the same room.\n"
-            "- trade(target_name: str, object_uuid: str, price: int): buy an item with your coins from someone nearby.\n"
-            "- claim(object_uuid: str): claim an object as yours (required before sleeping in a bed).\n"
-            "- unclaim(object_uuid: str): remove your ownership from an object.\n"
-            "- sleep(bed_uuid?: str): sleep in a bed you own to restore sleep.\n"
-            "- do_nothing(): if nothing relevant is needed.\n"
+        prompt = npc_planning_service.build_single_prompt(
+            npc_name, sheet, room, _nutrition_from_tags_or_fields
         )
-        
-        # Enhanced NPC data including personality and extended needs
-        npc_data = {
-            'name': npc_name,
-            'basic_needs': {
-                'hunger': sheet.hunger,
-                'thirst': sheet.thirst,
-                'socialization': getattr(sheet, 'socialization', 100.0),
-                'sleep': getattr(sheet, 'sleep', 100.0)
-            },
-            'enhanced_needs': {
-                'safety': getattr(sheet, 'safety', 100.0),
-                'wealth_desire': getattr(sheet, 'wealth_desire', 50.0),
-                'social_status': getattr(sheet, 'social_status', 50.0)
-            },
-            'personality': {
-                'responsibility': getattr(sheet, 'responsibility', 50),
-                'aggression': getattr(sheet, 'aggression', 30),
-                'confidence': getattr(sheet, 'confidence', 50),
-                'curiosity': getattr(sheet, 'curiosity', 50)
-            },
-            'currency': getattr(sheet, 'currency', 0)
-        }
-        
-        user_prompt = {
-            'npc': npc_data,
-            'room_objects': items_room,
-            'inventory': items_inv,
-            'instructions': 'Consider personality when planning. Low responsibility may steal if desperate. High curiosity investigates new objects. Low confidence avoids risks.'
-        }
-        import json as _json
-        prompt = system_prompt + "\n" + _json.dumps(user_prompt, ensure_ascii=False)
-        # Rate limiting: protect against spam of expensive GOAP planning operations
-        if not check_rate_limit(None, OperationType.HEAVY, f"npc_goap_plan_{npc_name}"):
-            # Rate limited - fall back to offline planner
-            sheet.plan_queue = _npc_offline_plan(npc_name, room, sheet)
-            return
-
-        # Reuse the shared helper for safety settings (handles SDK availability differences)
-        try:
-            safety = _safety_settings_for_level(getattr(world, 'safety_level', 'G'))
-        except Exception:
-            safety = None
-        try:
-            ai_response = plan_model.generate_content(prompt, safety_settings=safety) if safety is not None else plan_model.generate_content(prompt)
-            text = getattr(ai_response, 'text', None) or str(ai_response)
-            # Parse JSON array
-            import json as _json
-            plan = _json.loads(text)
-            if isinstance(plan, list):
-                # sanitize minimal
-                cleaned = []
-                for el in plan[:4]:
-                    t = (el or {}).get('tool'); a = (el or {}).get('args') or {}
-                    if isinstance(t, str) and isinstance(a, dict):
-                        cleaned.append({'tool': t, 'args': a})
+        safety = _planner_safety_settings()
+        with ai_budget.get_ai_budget().slot(ai_budget.AIPriority.PLAN, npc_name) as granted:
+            if not granted:
+                # AI budget exhausted - fall back to offline planner
+                sheet.plan_queue = game_loop._npc_offline_plan(npc_name, room, sheet)
+                return
+            tick_profiler.get_tick_profiler().count('ai_calls')
+            try:
+                ai_response = ai_generate(plan_model, prompt, safety, kind='plan')
+                text = getattr(ai_response, 'text', None) or str(ai_response)
+                import json as _json
+                cleaned = npc_planning_service.sanitize_plan(_json.loads(text))
                 if cleaned:
                     sheet.plan_queue = cleaned
+                    if key is not None:
+                        plan_cache.get_plan_cache().put(key, cleaned)
                     return
-        except Exception as e:
-            print(f"npc_think AI parse error for {npc_name}: {e}")
+            except Exception as e:
+                print(f"npc_think AI parse error for {npc_name}: {e}")
         # Fallback on any failure
-        sheet.plan_queue = _npc_offline_plan(npc_name, room, sheet)
+        sheet.plan_queue = game_loop._npc_offline_plan(npc_name, room, sheet)
     except Exception:
         # As a last resort, set a do-nothing plan
         sheet.plan_queue = [{'tool': 'do_nothing', 'args': {}}]
 
 
-def _world_tick() -> None:
-    """World heartbeat loop: adjust needs, regen AP, plan and execute NPC actions."""
-    print("World heartbeat started.")
-    while True:
-        try:
-            # Proper sleep for current async mode (eventlet or threading)
-            sleep_success = safe_call(socketio.sleep, TICK_SECONDS)
-            if not sleep_success:
-                # Fallback to standard time.sleep if socketio.sleep fails
-                safe_call(__import__('time').sleep, TICK_SECONDS)
-
-            # Daily Cycle Processing
-            def _broadcast_all(payload):
-                safe_call(socketio.emit, MESSAGE_OUT, payload)
-                
-            safe_call(daily_system.process_daily_cycle, world, _broadcast_all)
-
-            mutated = False
-            # Iterate over a stable snapshot of rooms and their NPC names
-            for rid, room in list(world.rooms.items()):
-                for npc_name in list(room.npcs or set()):
-                    # Ensure NPC sheet exists for processing
-                    sheet = safe_call_with_default(lambda: _ensure_npc_sheet(npc_name), None)
-                    if not sheet:
-                        continue
-                    # Capture pre-need values for mutation check
-                    pre_h, pre_t = sheet.hunger, sheet.thirst
-                    pre_s = getattr(sheet, 'socialization', 100.0)
-                    pre_sl = getattr(sheet, 'sleep', 100.0)
-                    if getattr(world, 'advanced_goap_enabled', False):
-                        # Degrade needs slightly (including socialization and sleep)
-                        sheet.hunger = _clamp_need(sheet.hunger - NEED_DROP_PER_TICK)
-                        sheet.thirst = _clamp_need(sheet.thirst - NEED_DROP_PER_TICK)
-                        try:
-                            sheet.socialization = _clamp_need((getattr(sheet, 'socialization', 100.0) or 0.0) - SOCIAL_DROP_PER_TICK)
-                        except Exception:
-                            # Backfill on older worlds missing the field
-                            sheet.socialization = _clamp_need(100.0 - SOCIAL_DROP_PER_TICK)
-                        try:
-                            # If actively sleeping, restore sleep and count down duration
-                            if getattr(sheet, 'sleeping_ticks_remaining', 0) > 0:
-                                sheet.sleep = _clamp_need((getattr(sheet, 'sleep', 100.0) or 0.0) + SLEEP_REFILL_PER_TICK)
-                                sheet.sleeping_ticks_remaining = max(0, int(sheet.sleeping_ticks_remaining) - 1)
-                                # Wake up when done
-                                if sheet.sleeping_ticks_remaining == 0:
-                                    sheet.sleeping_bed_uuid = None
-                                    safe_call(broadcast_to_room, rid, {'type': 'system', 'content': f"[i]{npc_name} wakes up, looking refreshed.[/i]"})
-                            else:
-                                # Not sleeping -> fatigue slowly increases (sleep meter drops)
-                                sheet.sleep = _clamp_need((getattr(sheet, 'sleep', 100.0) or 0.0) - SLEEP_DROP_PER_TICK)
-                        except Exception:
-                            # Backfill for worlds without field
-                            safe_call(lambda: setattr(sheet, 'sleep', _clamp_need(100.0 - SLEEP_DROP_PER_TICK)))
-                    # Regen AP
-                    try:
-                        sheet.action_points = int(min(AP_MAX, max(0, (sheet.action_points or 0) + 1)))
-                    except Exception:
-                        sheet.action_points = 1
-                    # If any need is low and no plan, think
-                    if ((sheet.hunger < NEED_THRESHOLD) or (sheet.thirst < NEED_THRESHOLD) or (getattr(sheet, 'socialization', 100.0) < NEED_THRESHOLD) or (getattr(sheet, 'sleep', 100.0) < NEED_THRESHOLD)) and not sheet.plan_queue:
-                        try:
-                            npc_think(npc_name)
-                        except Exception as _e:
-                            # Keep the loop going even if planning for one NPC fails
-                            pass
-                    # Execute one action per AP (but avoid long loops)
-                    steps = min(sheet.action_points or 0, max(0, len(sheet.plan_queue or [])))
-                    for _ in range(steps):
-                        if not sheet.plan_queue:
-                            break
-                        action = sheet.plan_queue.pop(0)
-                        ok, reason = _npc_execute_action(npc_name, rid, action)
-                        if not ok:
-                            safe_call(_npc_grumble_failure, npc_name, rid, action, reason)
-                        # Spend 1 AP
-                        sheet.action_points = max(0, (sheet.action_points or 0) - 1)
-                        mutated = True
-                    # If room has no connected players, simulate socialization refill (offline chatter)
-                    try:
-                        if (not getattr(room, 'players', None)) or len(room.players) == 0:
-                            _npc_gain_socialization(npc_name, SOCIAL_SIM_REFILL_TICK)
-                    except Exception:
-                        pass
-                    # If no actions executed but needs changed, mark mutated for persistence
-                    if sheet.hunger != pre_h or sheet.thirst != pre_t or getattr(sheet, 'socialization', 0.0) != pre_s or getattr(sheet, 'sleep', 0.0) != pre_sl:
-                        mutated = True
-            
-            # Mission system tick
-            try:
-                failed_ids = mission_service.process_tick(world)
-                if failed_ids:
-                    mutated = True
-            except Exception as e:
-                print(f"Mission tick error: {e}")
+def npc_think_room(room_id: str, npc_names: list[str]) -> None:
+    """Plan for several NPCs in the same room, batching AI requests.
 
-            if mutated:
-                # Debounced persistence after a tick of world changes
-                _saver.debounce()
-        except Exception as e:
-            print(f"Heartbeat loop error: {e}")
-            # Continue loop regardless
+    Urgent autonomous behaviors still win per NPC. The remaining NPCs are grouped
+    into batches of up to MUD_PLAN_BATCH_SIZE and planned with one model call per
+    batch (one rate-limit charge per batch too). A lone NPC gets the single-NPC
+    prompt exactly as npc_think would send it. NPCs whose plan is already in
+    the plan cache skip the model entirely.
+    """
+    room = world.rooms.get(room_id)
+    if room is None:
+        return
+    # One perception snapshot of the room serves every NPC planning here this tick
+    perception = safe_call_with_default(
+        lambda: autonomous_npc_service.build_room_perception(world, room), None
+    )
+    pending: list[tuple[str, CharacterSheet]] = []
+    for npc_name in npc_names:
+        sheet = safe_call_with_default(lambda: _ensure_npc_sheet(npc_name), None)
+        if sheet is None:
             continue
+        if _npc_urgent_autonomy_plan(npc_name, room_id, sheet, perception):
+            continue
+        pending.append((npc_name, sheet))
+    if not pending:
+        return
+    if not _npc_ai_planning_allowed(room) or len(pending) == 1:
+        for npc_name, sheet in pending:
+            safe_call(_npc_plan_goap, npc_name, room, sheet)
+        return
+    cache = plan_cache.get_plan_cache()
+    keys: dict[str, tuple | None] = {}
+    uncached: list[tuple[str, CharacterSheet]] = []
+    for npc_name, sheet in pending:
+        key = safe_call_with_default(lambda: _plan_cache_key('ai', npc_name, sheet, room), None)
+        keys[npc_name] = key
+        if key is not None and _npc_install_cached_plan(key, npc_name, room, sheet):
+            continue
+        uncached.append((npc_name, sheet))
+    pending = uncached
+    safety = _planner_safety_settings()
+    for group in npc_planning_service.chunk_batches(pending, npc_planning_service.get_batch_size()):
+        if len(group) == 1:
+            npc_name, sheet = group[0]
+            safe_call(_npc_plan_ai_single, npc_name, room, sheet, keys.get(npc_name))
+            continue
+        # One AI budget slot covers the whole batch; the room is its owner
+        with ai_budget.get_ai_budget().slot(ai_budget.AIPriority.PLAN, f"room:{room_id}") as granted:
+            if not granted:
+                for npc_name, sheet in group:
+                    sheet.plan_queue = safe_call_with_default(
+                        lambda: game_loop._npc_offline_plan(npc_name, room, sheet),
+                        [{'tool': 'do_nothing', 'args': {}}],
+                    )
+                continue
+            tick_profiler.get_tick_profiler().count('ai_calls')
+            plans, fallbacks = npc_planning_service.plan_batch(
+                group,
+                room,
+                model=plan_model,
+                nutrition_fn=_nutrition_from_tags_or_fields,
+                offline_plan=game_loop._npc_offline_plan,
+                safety=safety,
+            )
+        for npc_name, sheet in group:
+            sheet.plan_queue = plans.get(npc_name) or [{'tool': 'do_nothing', 'args': {}}]
+            key = keys.get(npc_name)
+            if key is not None and npc_name not in fallbacks:
+                cache.put(key, sheet.plan_queue)
+
+
+def _world_tick_once() -> bool:
+    """Run one world tick on the game_loop tick engine. Returns True if state changed."""
+    return game_loop.get_tick_engine().run_once()
+
+
+def _world_tick() -> None:
+    """World heartbeat loop (runs until the process exits)."""
+    game_loop.get_tick_engine().run_forever()
 
 
 def _maybe_start_heartbeat() -> None:
@@ -1410,6 +1118,27 @@ _maybe_prompt_creative_mode()
 # Print command help after initialization so admins see it in the console.
 _print_command_help()
 
+SEND_DRAIN_SECONDS = _env_float('MUD_SEND_DRAIN_SECONDS', 0.1)
+
+
+def _send_drain_loop() -> None:
+    """Feed queued messages to slow clients as their transport catches up."""
+    queues = send_queue.get_send_queues()
+    while True:
+        try:
+            socketio.sleep(SEND_DRAIN_SECONDS)
+            queues.drain()
+        except Exception as e:
+            print(f"Send drain loop error: {e}")
+
+
+def _maybe_start_send_drainer() -> None:
+    """Start the send queue drainer (skipped under TEST_MODE, like the heartbeat)."""
+    if os.getenv('TEST_MODE') == '1':
+        return
+    safe_call(socketio.start_background_task, _send_drain_loop)
+
+
 # Start heartbeat (opt-in via env) — add a defensive guard here so that even if
 # tests import this module before conftest sets TEST_MODE, we still do NOT
 # spawn a heartbeat thread unless explicitly enabled AND not under test.
@@ -1419,6 +1148,8 @@ try:
     _under_test = os.getenv('TEST_MODE') == '1' or 'PYTEST_CURRENT_TEST' in os.environ
     if _explicit_enable and not _under_test:
         _maybe_start_heartbeat()
+    if not _under_test:
+        _maybe_start_send_drainer()
 except Exception:
     pass
 
@@ -1436,6 +1167,38 @@ def get_sid() -> str | None:
         return None
 
 
+def _client_ip() -> str | None:
+    """Remote address of the current request (None outside a request)."""
+    try:
+        return getattr(request, "remote_addr", None)
+    except Exception:
+        return None
+
+
+def emit(event: str, *args: Any, **kwargs: Any) -> Any:
+    """flask_socketio.emit to the current client; 'message' replies are held in the
+    outbound buffer while a handler runs and go out together when it returns."""
+    if event == MESSAGE_OUT and len(args) == 1 and not kwargs:
+        sid = get_sid()
+        if sid and outbound_buffer.get_outbound_buffer().add(sid, args[0]):
+            return None
+        if sid:
+            # Not held (no handler open for sid): still through its send queue
+            _send_to_sid(sid, MESSAGE_OUT, args[0])
+            return None
+    server_metrics.get_server_metrics().messages_out.add()
+    return _socketio_emit(event, *args, **kwargs)
+
+
+def _flush_outbound(sid: str | None) -> None:
+    """Close the outbound buffer a handler opened for sid and send what it held."""
+    outbound_buffer.get_outbound_buffer().end(
+        sid,
+        lambda sid, payload: _send_to_sid(sid, MESSAGE_OUT, payload),
+        lambda sid, payloads: _send_to_sid(sid, outbound_buffer.MESSAGE_BATCH, payloads),
+    )
+
+
 # --- Fuzzy room resolver ---
 def _normalize_room_input(sid: str | None, typed: str) -> tuple[bool, str | None, str | None]:
     """Normalize special room identifiers like 'here' to concrete room ids.
@@ -1479,30 +1242,90 @@ MESSAGE_OUT = 'message'
 # a full importlib.reload chain.
 SERVER_BUILD_ID = 8  # improved heartbeat guard; trade debug instrumentation
 
+# Read once at startup; broadcasts are hot enough that per-call getenv showed up
+_DEBUG_CHAT = os.getenv('MUD_DEBUG_CHAT', '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+def _send_to_sid(sid: str, event: str, payload: Any) -> None:
+    """Per-client send through the bounded send queues."""
+    send_queue.get_send_queues().send(sid, event, payload)
+
+
+# Late-bound through the module globals so patched socketio/disconnect are used
+def _emit_to_sid(sid: str, event: str, payload: Any) -> None:
+    server_metrics.get_server_metrics().messages_out.add()
+    safe_call(socketio.emit, event, payload, to=sid)
+
+
+# Engine.io's packet queue tells SendQueues when a client stops draining
+transport_backlog.get_transport_backlog().bind(socketio)
+send_queue.get_send_queues().bind(
+    lambda sid, event, payload: _emit_to_sid(sid, event, payload),
+    backlog=lambda sid: safe_call_with_default(lambda: transport_backlog.get_transport_backlog().backlog(sid), 0),
+    disconnect=lambda sid: safe_call(disconnect, sid, namespace='/'),
+)
+
+# Connected players join their game room's Socket.IO room as they are placed
+room_membership.get_room_membership().bind(socketio)
+set_player_room_listener(room_membership.get_room_membership().place)
+
+
 def broadcast_to_room(room_id: str, payload: dict, exclude_sid: str | None = None) -> None:
     room = world.rooms.get(room_id)
     if not room:
         return
     # Iterate a snapshot to avoid mutation issues
-    debug_chat = False
-    try:
-        import os as _os
-        debug_chat = _os.getenv('MUD_DEBUG_CHAT', '').strip().lower() in ('1', 'true', 'yes', 'on')
-    except Exception:
-        pass
-    for psid in list(room.players):
+    present = set(room.players)
+    joined = room_membership.get_room_membership().members(room_id, present)
+    # Recipients with replies already held get this line queued behind them
+    outbox = outbound_buffer.get_outbound_buffer()
+    held = {psid for psid in present if outbox.has_pending(psid) and psid != exclude_sid}
+    for psid in held:
+        outbox.add(psid, payload)
+    # Slow clients are served from their send queue instead of the channel
+    queues = send_queue.get_send_queues()
+    slow = {psid for psid in joined - held if psid != exclude_sid and queues.is_congested(psid)}
+    for psid in slow:
+        queues.send(psid, MESSAGE_OUT, payload)
+    channel_members = joined - held - slow
+    if channel_members:
+        # One emit for everyone who joined the room's channel; the server
+        # encodes the payload once
+        skip: Any = [psid for psid in held | slow if psid in joined]
+        if exclude_sid in joined:
+            skip.append(exclude_sid)
+        if len(skip) <= 1:
+            skip = skip[0] if skip else None
+        server_metrics.get_server_metrics().messages_out.add(len(channel_members))
+        safe_call(socketio.emit, MESSAGE_OUT, payload, to=room_membership.channel(room_id), skip_sid=skip)
+    for psid in present - joined - held:
         if exclude_sid is not None and psid == exclude_sid:
             continue
-        # Best-effort broadcast; safe_call logs first occurrence of each error type
-        safe_call(socketio.emit, MESSAGE_OUT, payload, to=psid)
-    if debug_chat:
+        _send_to_sid(psid, MESSAGE_OUT, payload)
+    if _DEBUG_CHAT:
         try:
             ptype = payload.get('type') if isinstance(payload, dict) else '<?>'
             pname = payload.get('name') if isinstance(payload, dict) else None
-            print(f"[DEBUG_CHAT] broadcast room={room_id} type={ptype} name={pname} exclude_sid={exclude_sid} recipients={len(room.players) - (1 if exclude_sid in room.players else 0)}")
+            print(f"[DEBUG_CHAT] broadcast room={room_id} type={ptype} name={pname} exclude_sid={exclude_sid} recipients={len(present) - (1 if exclude_sid in present else 0)} channel={len(joined)}")
         except Exception:
             pass
 
+def broadcast_many_to_room(room_id: str, payloads: list[dict], exclude_sid: str | None = None) -> None:
+    """Send a room several payloads at once: one 'messages' event to clients that
+    announced batch support, the individual 'message' events to everyone else."""
+    room = world.rooms.get(room_id)
+    if not room or not payloads:
+        return
+    outbox = outbound_buffer.get_outbound_buffer()
+    for psid in set(room.players):
+        if exclude_sid is not None and psid == exclude_sid:
+            continue
+        outbox.deliver(
+            psid,
+            payloads,
+            lambda sid, payload: _send_to_sid(sid, MESSAGE_OUT, payload),
+            lambda sid, batch: _send_to_sid(sid, outbound_buffer.MESSAGE_BATCH, batch),
+        )
+
 # --- Initialize game_loop context ---
 # Now that broadcast_to_room is defined, we can initialize the game loop context
 # so that game_loop functions can use server.py resources.
@@ -1511,11 +1334,17 @@ try:
         world=world,
         state_path=STATE_PATH,
         socketio=socketio,
-        broadcast_to_room=broadcast_to_room,
+        broadcast_to_room=lambda rid, payload, exclude_sid=None: broadcast_to_room(rid, payload, exclude_sid=exclude_sid),
         save_debounce=_saver.debounce,
         sessions=sessions,
         admins=admins,
         plan_model=model,
+        # Follow reassignments of the module-level world (/purge, tests)
+        world_provider=lambda: world,
+        # Late-bound so patches of these server functions take effect
+        think_room=lambda rid, names: npc_think_room(rid, names),
+        execute_action=lambda npc_name, rid, action: _npc_execute_action(npc_name, rid, action),
+        broadcast_many=lambda rid, payloads, exclude_sid: broadcast_many_to_room(rid, payloads, exclude_sid),
     ))
 except Exception as e:
     print(f"Warning: Failed to initialize game_loop context: {e}")
@@ -1664,6 +1493,7 @@ def _build_trade_ctx():  # internal helper
         is_confirm_yes=is_confirm_yes,
         is_confirm_no=is_confirm_no,
         broadcast_to_room=broadcast_to_room,
+        send_to_sid=_send_to_sid,
     )
 
 def _barter_begin(world: World, sid: str, *, target_kind: str, target_display: str, room_id: str, target_sid: str | None = None, target_name: str | None = None):
@@ -1836,7 +1666,11 @@ def _npc_gain_socialization(npc_name: str, amount: float) -> None:
     try:
         sheet = _ensure_npc_sheet(npc_name)
         cur = getattr(sheet, 'socialization', 100.0) or 0.0
-        sheet.socialization = _clamp_need(cur + float(amount))
+        value = _clamp_need(cur + float(amount))
+        if value == cur:
+            return
+        sheet.socialization = value
+        game_loop.reschedule_npc_wake(npc_name, sheet, world)
     except Exception:
         # Best-effort; ignore if sheet missing or field absent
         pass
@@ -1876,10 +1710,62 @@ def _send_npc_reply(npc_name: str, player_message: str, sid: str | None, *, priv
         globals()['_suppress_npc_reply_once'] = suppress_flags['_suppress_npc_reply_once']
 
 
+# --- HTTP metrics ---
+# MUD_METRICS_TOKEN: the metrics routes are off (404) unless it is set; then they
+# require it as ?token=... or an "Authorization: Bearer ..." header. The command
+# snapshot names player sids, so it is never served to anonymous callers.
+METRICS_TOKEN = _env_str('MUD_METRICS_TOKEN', '')
+
+
+def _metrics_authorized() -> bool:
+    supplied = request.args.get('token') or ''
+    auth_header = request.headers.get('Authorization') or ''
+    if not supplied and auth_header.startswith('Bearer '):
+        supplied = auth_header[len('Bearer '):]
+    return hmac.compare_digest(supplied.encode(), METRICS_TOKEN.encode())
+
+
+@app.route('/metrics/commands')
+def metrics_commands():
+    """Per-command latency histograms and the slow-command log as JSON."""
+    if not METRICS_TOKEN:
+        return 'Not Found', 404
+    if not _metrics_authorized():
+        return 'Forbidden', 403
+    return jsonify(command_metrics.get_command_metrics().snapshot())
+
+
+@app.route('/metrics')
+def metrics_prometheus():
+    """Server health in the Prometheus text format (reads counters only, no world lock)."""
+    if not METRICS_TOKEN:
+        return 'Not Found', 404
+    if not _metrics_authorized():
+        return 'Forbidden', 403
+    return Response(server_metrics.render_metrics(world), mimetype=server_metrics.CONTENT_TYPE)
+
+
 # --- WebSocket Event Handlers ---
 
 @socketio.on('connect')
-def handle_connect():
+def handle_connect(auth: Any = None):
+    """Record the client's capabilities, then greet it with one flush of output."""
+    sid = get_sid()
+    server_metrics.get_server_metrics().on_connect(sid)
+    if sid:
+        # New clients connect with {"batch": true} and can unpack 'messages' events
+        capable = isinstance(auth, dict) and bool(auth.get('batch'))
+        outbound_buffer.get_outbound_buffer().set_batch_capable(sid, capable)
+        # The per-IP rate limit tier outlives reconnects
+        bind_client_ip(sid, _client_ip())
+    outbound_buffer.get_outbound_buffer().begin(sid)
+    try:
+        _handle_connect_greeting()
+    finally:
+        _flush_outbound(sid)
+
+
+def _handle_connect_greeting():
     """Called automatically when a new player connects.
 
     We create a Player for this connection and place them in the default room,
@@ -1946,6 +1832,7 @@ def handle_disconnect():
     print('Client disconnected!')
     try:
         sid = get_sid()
+        server_metrics.get_server_metrics().on_disconnect(sid)
         if sid:
             # Announce to others in the room before removal
             try:
@@ -1985,11 +1872,26 @@ def handle_disconnect():
                 except Exception:
                     pass
             world.remove_player(sid)
+            outbound_buffer.get_outbound_buffer().forget(sid)
+            send_queue.get_send_queues().forget(sid)
+            session_modes.get_session_modes().forget(sid)
+            forget_client(sid)
     except Exception:
         pass
 
 @socketio.on(MESSAGE_IN)
 def handle_message(data):
+    """Handle one inbound line; its replies reach the client as one flush."""
+    server_metrics.get_server_metrics().messages_in.add()
+    sid = get_sid()
+    outbound_buffer.get_outbound_buffer().begin(sid)
+    try:
+        _handle_message_inner(data)
+    finally:
+        _flush_outbound(sid)
+
+
+def _handle_message_inner(data):
     """Main chat handler. Triggered when the client emits 'message_to_server'.
 
     Payload shape from client: { 'content': str }
@@ -2037,364 +1939,46 @@ def handle_message(data):
         # Fallback in case anything goes wrong during logging
         print(f"From [sid={sid}]: {player_message}")
 
-    if isinstance(player_message, str):
-        text_lower = player_message.strip().lower()
-        # Check for pending admin confirmation (Y/N)
-        if sid and sid in _pending_confirm:
-            action = _pending_confirm.get(sid)
-            if text_lower in ("y", "yes"):
-                _pending_confirm.pop(sid, None)
-                if action == 'purge':
-                    # Gather currently connected players before reset
-                    current_sids = prepare_purge_snapshot_sids(world)
-                    # Reset/replace world and persist
-                    world = execute_purge(STATE_PATH)
-                    # Disconnect all other players (keep the confirming admin connected)
-                    try:
-                        for psid in current_sids:
-                            if psid != sid:
-                                disconnect(psid, namespace="/")
-                    except Exception:
-                        pass
-                    emit(MESSAGE_OUT, {'type': 'system', 'content': 'World purged and reset to factory default.'})
-                    return
-                else:
-                    emit(MESSAGE_OUT, {'type': 'error', 'content': 'Unknown confirmation action.'})
-                    return
-            elif text_lower in ("n", "no"):
-                _pending_confirm.pop(sid, None)
-                emit(MESSAGE_OUT, {'type': 'system', 'content': 'Action cancelled.'})
-                return
-            else:
-                emit(MESSAGE_OUT, {'type': 'system', 'content': "Please confirm with 'Y' to proceed or 'N' to cancel."})
-                return
-        # Handle world setup wizard if active for this sid (delegated to setup_service)
-        if sid and sid in world_setup_sessions:
-            handled, err, emits_list, broadcasts_list = _setup_handle(world, STATE_PATH, sid, player_message, world_setup_sessions)
-            if handled:
-                if err:
-                    emit(MESSAGE_OUT, {'type': 'error', 'content': err})
-                    return
-                for payload in emits_list:
-                    emit(MESSAGE_OUT, payload)
-                for room_id, payload in broadcasts_list:
-                    broadcast_to_room(room_id, payload, exclude_sid=sid)
-                return
-
-        # Trade / barter interactive flows
-        if sid and (sid in barter_sessions or sid in trade_sessions):
-            import trade_router  # type: ignore
-            # Build context if not already (reuse earlier pattern)
-            from command_context import CommandContext
-            flow_ctx = CommandContext(
-                world=world,
-                state_path=STATE_PATH,
-                saver=_saver,
-                socketio=socketio,
-                message_out=MESSAGE_OUT,
-                sessions=sessions,
-                admins=admins,
-                pending_confirm=_pending_confirm,
-                world_setup_sessions=world_setup_sessions,
-                barter_sessions=barter_sessions,
-                trade_sessions=trade_sessions,
-                interaction_sessions=interaction_sessions,
-                strip_quotes=_strip_quotes,
-                resolve_player_sid_global=_resolve_player_sid_global,
-                normalize_room_input=_normalize_room_input,
-                resolve_room_id_fuzzy=_resolve_room_id_fuzzy,
-                teleport_player=teleport_player,
-                handle_room_command=handle_room_command,
-                handle_npc_command=handle_npc_command,
-                handle_faction_command=handle_faction_command,
-                purge_prompt=purge_prompt,
-                execute_purge=execute_purge,
-                redact_sensitive=redact_sensitive,
-                is_confirm_yes=is_confirm_yes,
-                is_confirm_no=is_confirm_no,
-                broadcast_to_room=broadcast_to_room,
-            )
-            progressed = trade_router.try_handle_flow(flow_ctx, sid, player_message, emit)
-            if progressed:
-                return
-
-        # Handle object template creation wizard if active for this sid
-        import object_template_router
-        if object_template_router.try_handle_flow(world, STATE_PATH, sid, player_message, object_template_sessions, emit):
-            return
-        # (interaction flow moved to interaction_router; handled after context creation)
-        # Route slash commands to the command handler (includes auth)
-        if player_message.strip().startswith("/"):
-            sid = get_sid()
-            handle_command(sid, player_message.strip())
-            return
-
-        # Multi-turn auth/creation flow for unauthenticated users
-        if sid not in world.players:
-            if sid is None:
-                emit(MESSAGE_OUT, {'type': 'error', 'content': 'Not connected.'})
-                return
-            handled, emits2, broadcasts2 = _auth_handle(world, sid, player_message, sessions, admins, STATE_PATH, auth_sessions)
-            if handled:
-                for payload in emits2:
-                    emit(MESSAGE_OUT, payload)
-                for room_id, payload in broadcasts2:
-                    broadcast_to_room(room_id, payload, exclude_sid=sid)
-                # If this is the first user and setup not complete, start setup wizard
-                try:
-                    if not getattr(world, 'setup_complete', False) and sid in sessions:
-                        uid = sessions.get(sid)
-                        user = world.users.get(uid) if uid else None
-                        if user and user.is_admin:
-                            emit(MESSAGE_OUT, {'type': 'system', 'content': 'You are the first adventurer here and have been made an Admin.'})
-                            for p in _setup_begin(world_setup_sessions, sid):
-                                emit(MESSAGE_OUT, p)
-                            return
-                except Exception:
-                    pass
-                return
-
-        # (Quoted-text convenience now handled inside dialogue_router to centralize say logic.)
-
-        # Build a fresh per-message CommandContext (cheap: just references). Simpler and clearer than
-        # attempting to cache it mid-function; each incoming chat line constructs one and shares it
-        # across routers (movement, dialogue, soon interaction). If this ever shows up in perf
-        # profiles we can revisit, but keeping it explicit avoids UnboundLocal edge cases.
-        from command_context import CommandContext as _CmdCtx
-        _early_ctx = _CmdCtx(
-            world=world,
-            state_path=STATE_PATH,
-            saver=_saver,
-            socketio=socketio,
-            message_out=MESSAGE_OUT,
-            sessions=sessions,
-            admins=admins,
-            pending_confirm=_pending_confirm,
-            world_setup_sessions=world_setup_sessions,
-            barter_sessions=barter_sessions,
-            trade_sessions=trade_sessions,
-            interaction_sessions=interaction_sessions,
-            strip_quotes=_strip_quotes,
-            resolve_player_sid_global=_resolve_player_sid_global,
-            normalize_room_input=_normalize_room_input,
-            resolve_room_id_fuzzy=_resolve_room_id_fuzzy,
-            teleport_player=teleport_player,
-            handle_room_command=handle_room_command,
-            handle_npc_command=handle_npc_command,
-            handle_faction_command=handle_faction_command,
-            purge_prompt=purge_prompt,
-            execute_purge=execute_purge,
-            redact_sensitive=redact_sensitive,
-            is_confirm_yes=is_confirm_yes,
-            is_confirm_no=is_confirm_no,
-            broadcast_to_room=broadcast_to_room,
-        )
-        # First: interaction flow (session continuation or new start)
-        import interaction_router as _interaction_router  # type: ignore
-        if _interaction_router.try_handle_flow(_early_ctx, sid, player_message, text_lower, emit):
-            return
-        import movement_router as _movement_router  # type: ignore
-        if _movement_router.try_handle_flow(_early_ctx, sid, player_message, text_lower, emit):
-            return
-        
-        # --- ROLL command (non-slash) ---
-        import dice_router as _dice_router
-        if _dice_router.try_handle_flow(_early_ctx, sid, player_message, text_lower, emit):
-            return
+    if not isinstance(player_message, str):
+        return
+    text_lower = player_message.strip().lower()
 
-        import dialogue_router as _dialogue_router  # after context creation (built earlier if needed)
-        if _early_ctx and _dialogue_router.try_handle_flow(_early_ctx, sid or '', player_message, emit):
+    # The sid's recorded mode picks the handler directly
+    modes = session_modes.get_session_modes()
+    mode = modes.current(sid)
+    if mode in session_modes.WIZARD_MODES:
+        if _run_mode(mode, sid, player_message, text_lower):
             return
-        # (Re)use _early_ctx for movement router below
-
-        # Ordinary plain chat fallback removed: all speech must go through dialogue_router (say/tell/whisper)
-        # to keep ordering and tests deterministic. We intentionally do nothing here.
+        mode = modes.base_mode(sid)
+    # Route slash commands to the command handler (includes auth)
+    if player_message.strip().startswith("/"):
+        handle_command(sid, player_message.strip())
         return
-    return
-
-
-def handle_command(sid: str | None, text: str) -> None:
-    """Handle slash commands from players.
-
-    Supported commands:
-    - /login <password>: authenticate as admin
-    - /kick <playerName>: disconnect another player (admin only)
-    """
-    if not isinstance(text, str) or not text.startswith('/'):
+    if _run_mode(mode, sid, player_message, text_lower):
         return
+    if mode != session_modes.MODE_PLAY:
+        # Auth wizard or interaction session declined the line: treat it as free play
+        _route_play(sid, player_message, text_lower)
 
-    # Parse command and args
-    parts = text[1:].strip().split()
-    if not parts:
-        emit(MESSAGE_OUT, {'type': 'error', 'content': 'Empty command.'})
-        return
 
-    cmd = parts[0].lower()
-    args = parts[1:]
+# --- Per-mode message handlers (see session_modes) ---
+# Each takes (sid, player_message, text_lower) and returns True when it consumed the line.
 
-    # Permadeath gating: dead players may only use limited informational commands.
-    if sid and sid in world.players:
-        psheet = world.players[sid].sheet
-        if getattr(psheet, 'is_dead', False):
-            allowed = {"help", "who", "look"}
-            if cmd not in allowed:
-                emit(MESSAGE_OUT, {'type': 'error', 'content': 'You are dead (permadeath). Only /help, /who, /look are allowed.'})
-                return
-    # Player ownership commands: /claim <object name>, /unclaim <object name>
-    if cmd in ('claim', 'unclaim'):
-        if sid is None:
-            emit(MESSAGE_OUT, {'type': 'error', 'content': 'Not connected.'}); return
-        if sid not in world.players:
-            emit(MESSAGE_OUT, {'type': 'error', 'content': 'Please authenticate first with /auth.'}); return
-        if not args:
-            emit(MESSAGE_OUT, {'type': 'error', 'content': f"Usage: /{cmd} <object name>"}); return
-        name_raw = _strip_quotes(" ".join(args).strip())
-        player = world.players.get(sid)
-        room = world.rooms.get(player.room_id) if player else None
-        if not room or not player:
-            emit(MESSAGE_OUT, {'type': 'error', 'content': 'You are nowhere.'}); return
-        # Resolve object in room by fuzzy, else search player's inventory by name
-        obj, suggestions = _resolve_object_in_room(room, name_raw)
-        if obj is None:
-            # Search inventory names (case-insensitive exact/prefix/substr)
-            inv = player.sheet.inventory
-            target = None
-            tl = name_raw.lower()
-            # exact
-            for it in inv.slots:
-                if it and getattr(it, 'display_name', '').lower() == tl:
-                    target = it; break
-            if target is None:
-                # prefix
-                cands = [it for it in inv.slots if it and getattr(it, 'display_name', '').lower().startswith(tl)]
-                if len(cands) == 1:
-                    target = cands[0]
-            if target is None:
-                # substring unique
-                cands = [it for it in inv.slots if it and tl in getattr(it, 'display_name', '').lower()]
-                if len(cands) == 1:
-                    target = cands[0]
-            if target is not None:
-                obj = target
-        if obj is None:
-            if suggestions:
-                emit(MESSAGE_OUT, {'type': 'system', 'content': "Did you mean: " + ", ".join(suggestions) + "?"}); return
-            emit(MESSAGE_OUT, {'type': 'system', 'content': f"You don't see '{name_raw}' here or in your inventory."}); return
-        # Apply ownership change
-        try:
-            if cmd == 'claim':
-                # player entity id is their user_id from sessions
-                owner = sessions.get(sid)
-                if not owner:
-                    emit(MESSAGE_OUT, {'type': 'error', 'content': 'Ownership failed: session not found.'}); return
-                obj.owner_id = owner  # type: ignore[attr-defined]
-                emit(MESSAGE_OUT, {'type': 'system', 'content': f"You claim the {getattr(obj, 'display_name', 'item')} as yours."})
-            else:
-                obj.owner_id = None  # type: ignore[attr-defined]
-                emit(MESSAGE_OUT, {'type': 'system', 'content': f"You unclaim the {getattr(obj, 'display_name', 'item')}."})
-            try:
-                save_world(world, STATE_PATH, debounced=True)
-            except Exception:
-                pass
-        except Exception:
-            emit(MESSAGE_OUT, {'type': 'error', 'content': 'Failed to change ownership.'})
-        return
+_flow_ctx_state: dict[str, Any] = {'ctx': None, 'deps': ()}
 
-    # (removed) Player sleep command: /sleep [bed name]
 
-    # Player convenience: /look and /look at <name>
-    if cmd == 'look':
-        if sid is None:
-            emit(MESSAGE_OUT, {'type': 'error', 'content': 'Not connected.'})
-            return
-        if not args:
-            # same as bare look
-            emit(MESSAGE_OUT, {'type': 'system', 'content': _format_look(world, sid)})
-            return
-        # Support: /look at <name>
-        if len(args) >= 2 and args[0].lower() == 'at':
-            name = " ".join(args[1:]).strip()
-            # Must be in a room
-            player = world.players.get(sid)
-            if not player:
-                emit(MESSAGE_OUT, {'type': 'error', 'content': 'Please authenticate first with /auth.'})
-                return
-            room = world.rooms.get(player.room_id)
-            # Try players first (includes self)
-            psid, pname = _resolve_player_in_room(world, room, name)
-            if psid and pname:
-                try:
-                    p = world.players.get(psid)
-                    if p:
-                        rel_lines: list[str] = []
-                        try:
-                            viewer_id = sessions.get(sid) if sid in sessions else None
-                            target_uid = sessions.get(psid) if psid in sessions else None
-                            if viewer_id and target_uid:
-                                rel_to = (world.relationships.get(viewer_id, {}) or {}).get(target_uid)
-                                rel_from = (world.relationships.get(target_uid, {}) or {}).get(viewer_id)
-                                if rel_to:
-                                    rel_lines.append(f"Your relation to {p.sheet.display_name}: {rel_to}")
-                                if rel_from:
-                                    rel_lines.append(f"{p.sheet.display_name}'s relation to you: {rel_from}")
-                        except Exception:
-                            pass
-                        # Append admin aura if the inspected player is an admin
-                        admin_aura = "\nRadiates an unspoken authority." if psid in admins else ""
-                        rel_text = ("\n" + "\n".join(rel_lines)) if rel_lines else ""
-                        emit(MESSAGE_OUT, {'type': 'system', 'content': f"[b]{p.sheet.display_name}[/b]\n{p.sheet.description}{admin_aura}{rel_text}"})
-                        return
-                except Exception:
-                    pass
-            # Try NPCs
-            npcs = _resolve_npcs_in_room(room, [name])
-            if npcs:
-                npc_name = npcs[0]
-                sheet = world.npc_sheets.get(npc_name)
-                if not sheet:
-                    # Create on demand to ensure a description exists
-                    sheet = _ensure_npc_sheet(npc_name)
-                rel_lines: list[str] = []
-                try:
-                    viewer_id = sessions.get(sid) if sid in sessions else None
-                    npc_id = world.get_or_create_npc_id(npc_name)
-                    if viewer_id and npc_id:
-                        rel_to = (world.relationships.get(viewer_id, {}) or {}).get(npc_id)
-                        rel_from = (world.relationships.get(npc_id, {}) or {}).get(viewer_id)
-                        if rel_to:
-                            rel_lines.append(f"Your relation to {sheet.display_name}: {rel_to}")
-                        if rel_from:
-                            rel_lines.append(f"{sheet.display_name}'s relation to you: {rel_from}")
-                except Exception:
-                    pass
-                rel_text = ("\n" + "\n".join(rel_lines)) if rel_lines else ""
-                emit(MESSAGE_OUT, {'type': 'system', 'content': f"[b]{sheet.display_name}[/b]\n{sheet.description}{rel_text}"})
-                return
-            # Try Objects
-            obj, suggestions = _resolve_object_in_room(room, name)
-            if obj is not None:
-                emit(MESSAGE_OUT, {'type': 'system', 'content': _format_object_summary(obj, world)})
-                return
-            if suggestions:
-                emit(MESSAGE_OUT, {'type': 'system', 'content': "Did you mean: " + ", ".join(suggestions) + "?"})
-                return
-            emit(MESSAGE_OUT, {'type': 'system', 'content': f"You don't see '{name}' here."})
-            return
-        # Otherwise, unrecognized look usage
-        emit(MESSAGE_OUT, {'type': 'error', 'content': 'Usage: /look  or  /look at <name>'})
-        return
-
-    # /help: context-aware help for auth/player/admin
-    if cmd == 'help':
-        help_text = _build_help_text(sid)
-        emit(MESSAGE_OUT, {'type': 'system', 'content': help_text})
-        return
+def _flow_ctx() -> CommandContext:
+    """Shared CommandContext for the routers.
 
-    # Routers: auth & player utilities
-    from command_context import CommandContext  # local import (avoid top-level weight during tests)
-    import auth_router, player_router, admin_router  # type: ignore
-    import combat_router  # type: ignore  # new combat commands (/attack)
-    base_ctx = CommandContext(
+    It only holds references, so it is built once and reused by every line and
+    connection; it is rebuilt when one of the swappable globals (world after a
+    purge, or anything a test patches) changes identity.
+    """
+    deps = (world, socketio, _saver, broadcast_to_room, interaction_sessions)
+    ctx = _flow_ctx_state['ctx']
+    if ctx is not None and all(a is b for a, b in zip(deps, _flow_ctx_state['deps'])):
+        return ctx
+    ctx = CommandContext(
         world=world,
         state_path=STATE_PATH,
         saver=_saver,
@@ -2421,29 +2005,368 @@ def handle_command(sid: str | None, text: str) -> None:
         is_confirm_yes=is_confirm_yes,
         is_confirm_no=is_confirm_no,
         broadcast_to_room=broadcast_to_room,
+        send_to_sid=_send_to_sid,
     )
-    if auth_router.try_handle(base_ctx, sid, cmd, args, text, emit):
-        return
-    if player_router.try_handle(base_ctx, sid, cmd, args, text, emit):
-        return
-    # Admin router (admin commands: /room, /npc, /faction, /object, /teleport, etc.)
-    if admin_router.try_handle(base_ctx, sid, cmd, args, text, emit):
-        return
-    # Trade & barter router
-    import trade_router  # type: ignore
-    if trade_router.try_handle(base_ctx, sid, cmd, args, text, emit):
-        return
-    # Combat router
-    if combat_router.try_handle(base_ctx, sid, cmd, args, text, emit):
+    _flow_ctx_state['ctx'] = ctx
+    _flow_ctx_state['deps'] = deps
+    return ctx
+
+
+def _route_confirm(sid: str, player_message: str, text_lower: str) -> bool:
+    """Pending admin confirmation (Y/N)."""
+    global world
+    action = _pending_confirm.get(sid)
+    if text_lower in ("y", "yes"):
+        _pending_confirm.pop(sid, None)
+        if action == 'purge':
+            # Gather currently connected players before reset
+            current_sids = prepare_purge_snapshot_sids(world)
+            # Reset/replace world and persist
+            world = execute_purge(STATE_PATH)
+            # Disconnect all other players (keep the confirming admin connected)
+            try:
+                for psid in current_sids:
+                    if psid != sid:
+                        disconnect(psid, namespace="/")
+            except Exception:
+                pass
+            emit(MESSAGE_OUT, {'type': 'system', 'content': 'World purged and reset to factory default.'})
+        else:
+            emit(MESSAGE_OUT, {'type': 'error', 'content': 'Unknown confirmation action.'})
+    elif text_lower in ("n", "no"):
+        _pending_confirm.pop(sid, None)
+        emit(MESSAGE_OUT, {'type': 'system', 'content': 'Action cancelled.'})
+    else:
+        emit(MESSAGE_OUT, {'type': 'system', 'content': "Please confirm with 'Y' to proceed or 'N' to cancel."})
+    return True
+
+
+def _route_setup(sid: str, player_message: str, text_lower: str) -> bool:
+    """World setup wizard (delegated to setup_service)."""
+    handled, err, emits_list, broadcasts_list = _setup_handle(world, STATE_PATH, sid, player_message, world_setup_sessions)
+    if not handled:
+        return False
+    if err:
+        emit(MESSAGE_OUT, {'type': 'error', 'content': err})
+        return True
+    for payload in emits_list:
+        emit(MESSAGE_OUT, payload)
+    for room_id, payload in broadcasts_list:
+        broadcast_to_room(room_id, payload, exclude_sid=sid)
+    return True
+
+
+def _route_trade(sid: str, player_message: str, text_lower: str) -> bool:
+    """Barter / currency trade interactive flows."""
+    return trade_router.try_handle_flow(_flow_ctx(), sid, player_message, emit)
+
+
+def _route_template(sid: str, player_message: str, text_lower: str) -> bool:
+    """Object template creation wizard."""
+    return object_template_router.try_handle_flow(world, STATE_PATH, sid, player_message, object_template_sessions, emit)
+
+
+def _route_auth(sid: str | None, player_message: str, text_lower: str) -> bool:
+    """Multi-turn auth/creation flow for unauthenticated users."""
+    if sid is None:
+        emit(MESSAGE_OUT, {'type': 'error', 'content': 'Not connected.'})
+        return True
+    handled, emits2, broadcasts2 = _auth_handle(world, sid, player_message, sessions, admins, STATE_PATH, auth_sessions)
+    if not handled:
+        return False
+    for payload in emits2:
+        emit(MESSAGE_OUT, payload)
+    for room_id, payload in broadcasts2:
+        broadcast_to_room(room_id, payload, exclude_sid=sid)
+    # If this is the first user and setup not complete, start setup wizard
+    try:
+        if not getattr(world, 'setup_complete', False) and sid in sessions:
+            uid = sessions.get(sid)
+            user = world.users.get(uid) if uid else None
+            if user and user.is_admin:
+                emit(MESSAGE_OUT, {'type': 'system', 'content': 'You are the first adventurer here and have been made an Admin.'})
+                for p in _setup_begin(world_setup_sessions, sid):
+                    emit(MESSAGE_OUT, p)
+    except Exception:
+        pass
+    return True
+
+
+def _route_interaction(sid: str, player_message: str, text_lower: str) -> bool:
+    """Continue a multi-turn interaction session."""
+    return interaction_router.try_handle_flow(_flow_ctx(), sid, player_message, text_lower, emit)
+
+
+# Free-play routers keyed by the line's first word; anything else is speech
+_PLAY_ROUTERS = {
+    'interact': interaction_router,
+    'move': movement_router,
+    'go': movement_router,
+    'look': movement_router,
+    'l': movement_router,
+    'roll': dice_router,
+}
+
+
+def _charge_play(sid: str | None, name: str) -> bool:
+    """With adaptive rate costs on, charge a free-play line its learnt cost; False = refused."""
+    if not sid or not adaptive_costs_enabled():
+        return True
+    if check_rate_limit(sid, OperationType.BASIC, name, cost_key=name):
+        return True
+    emit(MESSAGE_OUT, {'type': 'error', 'content': 'You are sending commands too quickly. Please slow down.'})
+    return False
+
+
+def _route_play(sid: str | None, player_message: str, text_lower: str) -> bool:
+    """Free play: movement/look, dice and interaction starts by verb, else dialogue."""
+    ctx = _flow_ctx()
+    metrics = command_metrics.get_command_metrics()
+    verb = text_lower.split(None, 1)[0] if text_lower else ''
+    router = _PLAY_ROUTERS.get(verb)
+    if router is not None:
+        name = 'play:' + router.__name__[:-len('_router')]
+        if not _charge_play(sid, name):
+            return True
+        with metrics.timed(name, sid):
+            if router.try_handle_flow(ctx, sid, player_message, text_lower, emit):
+                return True
+    elif not _charge_play(sid, 'play:dialogue'):
+        return True
+    # All speech goes through dialogue_router (say/tell/whisper/quoted); there is no plain-chat fallback
+    with metrics.timed('play:dialogue', sid):
+        return bool(dialogue_router.try_handle_flow(ctx, sid or '', player_message, emit))
+
+
+_MODE_HANDLERS = {
+    session_modes.MODE_CONFIRM: _route_confirm,
+    session_modes.MODE_SETUP: _route_setup,
+    session_modes.MODE_BARTER: _route_trade,
+    session_modes.MODE_TRADE: _route_trade,
+    session_modes.MODE_TEMPLATE: _route_template,
+    session_modes.MODE_AUTH: _route_auth,
+    session_modes.MODE_INTERACTION: _route_interaction,
+    session_modes.MODE_PLAY: _route_play,
+}
+
+
+
+def _run_mode(mode: str, sid: str | None, player_message: str, text_lower: str) -> bool:
+    """Run one mode handler, timed as 'flow:<mode>' (free play times each router itself)."""
+    if mode == session_modes.MODE_PLAY:
+        return _route_play(sid, player_message, text_lower)
+    with command_metrics.get_command_metrics().timed('flow:' + mode, sid):
+        return _MODE_HANDLERS[mode](sid, player_message, text_lower)
+
+
+def _world_size() -> dict:
+    """Rough world size recorded with slow commands."""
+    return {'rooms': len(world.rooms), 'players': len(world.players), 'npcs': len(world.npc_sheets)}
+
+
+command_metrics.get_command_metrics().bind(_world_size)
+command_metrics.get_command_metrics().observe(observe_cost)
+
+session_modes.get_session_modes().bind(
+    [
+        (session_modes.MODE_CONFIRM, lambda: _pending_confirm),
+        (session_modes.MODE_SETUP, lambda: world_setup_sessions),
+        (session_modes.MODE_BARTER, lambda: barter_sessions),
+        (session_modes.MODE_TRADE, lambda: trade_sessions),
+        (session_modes.MODE_TEMPLATE, lambda: object_template_sessions),
+    ],
+    interaction=lambda: interaction_sessions,
+    is_player=lambda sid: sid in world.players,
+)
+
+
+def handle_command(sid: str | None, text: str) -> None:
+    """Handle slash commands from players.
+
+    Every command is registered on `slash_commands` (below): dispatch is one
+    name/alias lookup, then the middleware chain (timing, permadeath gating,
+    permission, rate-limit cost) runs around the handler.
+    """
+    if not isinstance(text, str) or not text.startswith('/'):
         return
-    # Mission router (newly added)
-    import mission_router  # type: ignore
-    if mission_router.try_handle(base_ctx, sid, cmd, args, text, emit):
+
+    # Parse command and args
+    parts = text[1:].strip().split()
+    if not parts:
+        emit(MESSAGE_OUT, {'type': 'error', 'content': 'Empty command.'})
         return
-    # Mission service (for direct calls)
-    import mission_service  # type: ignore
-    # Unknown command
-    emit(MESSAGE_OUT, {'type': 'error', 'content': f"Unknown command: /{cmd}"})
+
+    cmd = parts[0].lower()
+    args = parts[1:]
+    if not slash_commands.dispatch(_flow_ctx(), sid, cmd, args, text, emit):
+        emit(MESSAGE_OUT, {'type': 'error', 'content': f"Unknown command: /{cmd}"})
+
+
+def _cmd_claim(ctx: CommandContext, sid: str | None, cmd: str, args: list[str], raw: str, emit: Any) -> bool:
+    """/claim <object name>, /unclaim <object name>: player ownership of objects."""
+    if sid is None:
+        emit(MESSAGE_OUT, {'type': 'error', 'content': 'Not connected.'}); return True
+    if sid not in world.players:
+        emit(MESSAGE_OUT, {'type': 'error', 'content': 'Please authenticate first with /auth.'}); return True
+    if not args:
+        emit(MESSAGE_OUT, {'type': 'error', 'content': f"Usage: /{cmd} <object name>"}); return True
+    name_raw = _strip_quotes(" ".join(args).strip())
+    player = world.players.get(sid)
+    room = world.rooms.get(player.room_id) if player else None
+    if not room or not player:
+        emit(MESSAGE_OUT, {'type': 'error', 'content': 'You are nowhere.'}); return True
+    # Resolve object in room by fuzzy, else search player's inventory by name
+    obj, suggestions = _resolve_object_in_room(room, name_raw)
+    if obj is None:
+        # Search inventory names (case-insensitive exact/prefix/substr)
+        inv = player.sheet.inventory
+        target = None
+        tl = name_raw.lower()
+        # exact
+        for it in inv.slots:
+            if it and getattr(it, 'display_name', '').lower() == tl:
+                target = it; break
+        if target is None:
+            # prefix
+            cands = [it for it in inv.slots if it and getattr(it, 'display_name', '').lower().startswith(tl)]
+            if len(cands) == 1:
+                target = cands[0]
+        if target is None:
+            # substring unique
+            cands = [it for it in inv.slots if it and tl in getattr(it, 'display_name', '').lower()]
+            if len(cands) == 1:
+                target = cands[0]
+        if target is not None:
+            obj = target
+    if obj is None:
+        if suggestions:
+            emit(MESSAGE_OUT, {'type': 'system', 'content': "Did you mean: " + ", ".join(suggestions) + "?"}); return True
+        emit(MESSAGE_OUT, {'type': 'system', 'content': f"You don't see '{name_raw}' here or in your inventory."}); return True
+    # Apply ownership change
+    try:
+        if cmd == 'claim':
+            # player entity id is their user_id from sessions
+            owner = sessions.get(sid)
+            if not owner:
+                emit(MESSAGE_OUT, {'type': 'error', 'content': 'Ownership failed: session not found.'}); return True
+            obj.owner_id = owner  # type: ignore[attr-defined]
+            emit(MESSAGE_OUT, {'type': 'system', 'content': f"You claim the {getattr(obj, 'display_name', 'item')} as yours."})
+        else:
+            obj.owner_id = None  # type: ignore[attr-defined]
+            emit(MESSAGE_OUT, {'type': 'system', 'content': f"You unclaim the {getattr(obj, 'display_name', 'item')}."})
+        try:
+            save_world(world, STATE_PATH, debounced=True)
+        except Exception:
+            pass
+    except Exception:
+        emit(MESSAGE_OUT, {'type': 'error', 'content': 'Failed to change ownership.'})
+    return True
+
+
+def _cmd_look(ctx: CommandContext, sid: str | None, cmd: str, args: list[str], raw: str, emit: Any) -> bool:
+    """/look and /look at <name>."""
+    if sid is None:
+        emit(MESSAGE_OUT, {'type': 'error', 'content': 'Not connected.'})
+        return True
+    if not args:
+        # same as bare look
+        emit(MESSAGE_OUT, {'type': 'system', 'content': _format_look(world, sid)})
+        return True
+    # Support: /look at <name>
+    if len(args) >= 2 and args[0].lower() == 'at':
+        name = " ".join(args[1:]).strip()
+        # Must be in a room
+        player = world.players.get(sid)
+        if not player:
+            emit(MESSAGE_OUT, {'type': 'error', 'content': 'Please authenticate first with /auth.'})
+            return True
+        room = world.rooms.get(player.room_id)
+        # Try players first (includes self)
+        psid, pname = _resolve_player_in_room(world, room, name)
+        if psid and pname:
+            try:
+                p = world.players.get(psid)
+                if p:
+                    rel_lines: list[str] = []
+                    try:
+                        viewer_id = sessions.get(sid) if sid in sessions else None
+                        target_uid = sessions.get(psid) if psid in sessions else None
+                        if viewer_id and target_uid:
+                            rel_to = (world.relationships.get(viewer_id, {}) or {}).get(target_uid)
+                            rel_from = (world.relationships.get(target_uid, {}) or {}).get(viewer_id)
+                            if rel_to:
+                                rel_lines.append(f"Your relation to {p.sheet.display_name}: {rel_to}")
+                            if rel_from:
+                                rel_lines.append(f"{p.sheet.display_name}'s relation to you: {rel_from}")
+                    except Exception:
+                        pass
+                    # Append admin aura if the inspected player is an admin
+                    admin_aura = "\nRadiates an unspoken authority." if psid in admins else ""
+                    rel_text = ("\n" + "\n".join(rel_lines)) if rel_lines else ""
+                    emit(MESSAGE_OUT, {'type': 'system', 'content': f"[b]{p.sheet.display_name}[/b]\n{p.sheet.description}{admin_aura}{rel_text}"})
+                    return True
+            except Exception:
+                pass
+        # Try NPCs
+        npcs = _resolve_npcs_in_room(room, [name])
+        if npcs:
+            npc_name = npcs[0]
+            sheet = world.npc_sheets.get(npc_name)
+            if not sheet:
+                # Create on demand to ensure a description exists
+                sheet = _ensure_npc_sheet(npc_name)
+            rel_lines: list[str] = []
+            try:
+                viewer_id = sessions.get(sid) if sid in sessions else None
+                npc_id = world.get_or_create_npc_id(npc_name)
+                if viewer_id and npc_id:
+                    rel_to = (world.relationships.get(viewer_id, {}) or {}).get(npc_id)
+                    rel_from = (world.relationships.get(npc_id, {}) or {}).get(viewer_id)
+                    if rel_to:
+                        rel_lines.append(f"Your relation to {sheet.display_name}: {rel_to}")
+                    if rel_from:
+                        rel_lines.append(f"{sheet.display_name}'s relation to you: {rel_from}")
+            except Exception:
+                pass
+            rel_text = ("\n" + "\n".join(rel_lines)) if rel_lines else ""
+            emit(MESSAGE_OUT, {'type': 'system', 'content': f"[b]{sheet.display_name}[/b]\n{sheet.description}{rel_text}"})
+            return True
+        # Try Objects
+        obj, suggestions = _resolve_object_in_room(room, name)
+        if obj is not None:
+            emit(MESSAGE_OUT, {'type': 'system', 'content': _format_object_summary(obj, world)})
+            return True
+        if suggestions:
+            emit(MESSAGE_OUT, {'type': 'system', 'content': "Did you mean: " + ", ".join(suggestions) + "?"})
+            return True
+        emit(MESSAGE_OUT, {'type': 'system', 'content': f"You don't see '{name}' here."})
+        return True
+    # Otherwise, unrecognized look usage
+    emit(MESSAGE_OUT, {'type': 'error', 'content': 'Usage: /look  or  /look at <name>'})
+    return True
+
+
+def _cmd_help(ctx: CommandContext, sid: str | None, cmd: str, args: list[str], raw: str, emit: Any) -> bool:
+    """/help: context-aware help for auth/player/admin."""
+    emit(MESSAGE_OUT, {'type': 'system', 'content': _build_help_text(sid)})
+    return True
+
+
+slash_commands = command_registry.CommandRegistry(middleware=[
+    command_metrics.middleware,
+    command_registry.permadeath_middleware,
+    command_registry.permission_middleware,
+    command_registry.rate_limit_middleware,
+])
+slash_commands.route(['help'], _cmd_help, 'Context-aware help', allow_dead=True, router='server')
+slash_commands.route(['look'], _cmd_look, 'Look around, or at someone or something', allow_dead=True, router='server')
+slash_commands.route(['claim', 'unclaim'], _cmd_claim, 'Claim or release ownership of an object', router='server')
+slash_commands.route(['auth'], auth_router.try_handle, 'Account creation, login and admin management', router='auth_router')
+slash_commands.route(['rename', 'describe', 'sheet', 'roll'], player_router.try_handle, 'Player utilities', router='player_router')
+admin_router.register(slash_commands)
+slash_commands.route(['barter', 'trade'], trade_router.try_handle, 'Barter or trade with a player or NPC', router='trade_router')
+slash_commands.route(['attack', 'flee'], combat_router.try_handle, 'Combat', router='combat_router')
+slash_commands.route(['mission'], mission_router.try_handle, 'Missions', router='mission_router')
 
 
 # --- Run the Server ---
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+"""Server Metrics — Prometheus text exposition for the Flask app.
+
+server.py serves `render_metrics(world)` at /metrics when MUD_METRICS_TOKEN is
+set (the route is off otherwise). Everything reported is
+already counted elsewhere; this module only adds the few counters nobody kept
+(connected sids, messages in/out) and formats the rest:
+
+- connected sids; players, NPCs and rooms in the world
+- messages in/out: totals plus a per-second rate over the last RATE_WINDOW seconds
+- tick duration histogram (tick_profiler)
+- save count, duration and size of the state file (persistence_utils)
+- rate limiter rejections by OperationType (rate_limiter)
+- AI calls, errors and latency histogram by kind (ai_utils)
+- AI budget grants, refusals, calls in flight and queued (ai_budget)
+- command latency histograms (command_metrics)
+- outbound send queue depths, drops and disconnects (send_queue)
+
+A scrape only reads counters and len() of the world's dicts; it never iterates
+world state or takes the world lock, so scraping every few seconds is cheap.
+"""
+
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import ai_budget
+import ai_utils
+import command_metrics
+import persistence_utils
+import rate_limiter
+import send_queue
+import tick_profiler
+import transport_backlog
+
+
+RATE_WINDOW = 10  # seconds averaged by the *_per_second gauges
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class RateCounter:
+    """Monotonic total plus per-second slots for a short moving rate."""
+
+    __slots__ = ('total', '_slots', '_clock')
+
+    def __init__(self, clock=time.monotonic):
+        self.total = 0
+        self._slots: Dict[int, int] = {}
+        self._clock = clock
+
+    def add(self, n: int = 1) -> None:
+        self.total += n
+        now = int(self._clock())
+        self._slots[now] = self._slots.get(now, 0) + n
+        if len(self._slots) > RATE_WINDOW + 1:
+            for sec in [s for s in self._slots if s <= now - RATE_WINDOW]:
+                del self._slots[sec]
+
+    def per_second(self) -> float:
+        """Average over the last RATE_WINDOW complete seconds."""
+        now = int(self._clock())
+        recent = sum(n for sec, n in self._slots.items() if now - RATE_WINDOW <= sec < now)
+        return recent / float(RATE_WINDOW)
+
+
+class ServerMetrics:
+    """Connection and message counters the Socket.IO handlers feed."""
+
+    def __init__(self):
+        self.connected: Set[str] = set()
+        self.messages_in = RateCounter()
+        self.messages_out = RateCounter()
+
+    def on_connect(self, sid: Optional[str]) -> None:
+        if sid:
+            self.connected.add(sid)
+
+    def on_disconnect(self, sid: Optional[str]) -> None:
+        if sid:
+            self.connected.discard(sid)
+
+    def reset(self) -> None:
+        self.connected.clear()
+        self.messages_in = RateCounter()
+        self.messages_out = RateCounter()
+
+
+# --- Text format helpers ---
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(labels: Optional[Dict[str, Any]]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + '}'
+
+
+def _num(value: Any) -> str:
+    if value is None:
+        return 'NaN'
+    if isinstance(value, float):
+        return repr(round(value, 6))
+    return str(value)
+
+
+class _Writer:
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def metric(self, name: str, kind: str, help_text: str,
+               samples: Iterable[Tuple[Optional[Dict[str, Any]], Any]]) -> None:
+        self.lines.append(f'# HELP {name} {help_text}')
+        self.lines.append(f'# TYPE {name} {kind}')
+        for labels, value in samples:
+            self.lines.append(f'{name}{_labels(labels)} {_num(value)}')
+
+    def histogram(self, name: str, help_text: str,
+                  series: Iterable[Tuple[Optional[Dict[str, Any]], command_metrics.LatencySeries]]) -> None:
+        """LatencySeries (milliseconds) as a Prometheus histogram in seconds."""
+        self.lines.append(f'# HELP {name} {help_text}')
+        self.lines.append(f'# TYPE {name} histogram')
+        bounds = command_metrics.LATENCY_BUCKETS_MS
+        for labels, s in series:
+            base = dict(labels or {})
+            cumulative = 0
+            for bound, count in zip(bounds, s.buckets):
+                cumulative += count
+                self.lines.append(f'{name}_bucket{_labels(dict(base, le=repr(bound / 1000.0)))} {cumulative}')
+            self.lines.append(f'{name}_bucket{_labels(dict(base, le="+Inf"))} {s.calls}')
+            self.lines.append(f'{name}_sum{_labels(base)} {_num(s.total_ms / 1000.0)}')
+            self.lines.append(f'{name}_count{_labels(base)} {s.calls}')
+
+    def text(self) -> str:
+        return '\n'.join(self.lines) + '\n'
+
+
+def render_metrics(world: Any, metrics: Optional[ServerMetrics] = None) -> str:
+    """The whole exposition; safe to call from the HTTP handler at any time."""
+    m = metrics or _metrics
+    w = _Writer()
+
+    w.metric('mud_connected_sids', 'gauge', 'Connected Socket.IO sessions.', [(None, len(m.connected))])
+    w.metric('mud_players', 'gauge', 'Players in the world.', [(None, len(getattr(world, 'players', {})))])
+    w.metric('mud_npcs', 'gauge', 'NPC character sheets in the world.', [(None, len(getattr(world, 'npc_sheets', {})))])
+    w.metric('mud_rooms', 'gauge', 'Rooms in the world.', [(None, len(getattr(world, 'rooms', {})))])
+
+    w.metric('mud_messages_in_total', 'counter', 'Chat lines received from clients.', [(None, m.messages_in.total)])
+    w.metric('mud_messages_out_total', 'counter', 'Frames sent to clients.', [(None, m.messages_out.total)])
+    w.metric('mud_messages_in_per_second', 'gauge', f'Lines received per second over the last {RATE_WINDOW}s.',
+             [(None, m.messages_in.per_second())])
+    w.metric('mud_messages_out_per_second', 'gauge', f'Frames sent per second over the last {RATE_WINDOW}s.',
+             [(None, m.messages_out.per_second())])
+
+    prof = tick_profiler.get_tick_profiler()
+    w.histogram('mud_tick_duration_seconds', 'World tick duration.', [(None, prof.histogram)])
+    w.metric('mud_ticks_over_budget_total', 'counter', 'Ticks longer than MUD_TICK_BUDGET_MS.', [(None, prof.over_budget)])
+
+    saves = persistence_utils.get_save_stats()
+    w.metric('mud_saves_total', 'counter', 'World state writes to disk.', [(None, saves.get('saves', 0))])
+    w.metric('mud_save_seconds_total', 'counter', 'Time spent writing world state.',
+             [(None, (saves.get('total_save_ms') or 0.0) / 1000.0)])
+    last_ms = saves.get('last_save_ms')
+    w.metric('mud_last_save_seconds', 'gauge', 'Duration of the most recent save.',
+             [(None, last_ms / 1000.0 if last_ms is not None else None)])
+    w.metric('mud_last_save_bytes', 'gauge', 'Size of the state file after the most recent save.',
+             [(None, saves.get('last_save_bytes'))])
+    w.metric('mud_save_errors_total', 'counter', 'Failed saves.', [(None, saves.get('errors', 0))])
+
+    w.metric('mud_rate_limit_rejections_total', 'counter', 'Operations rejected by the rate limiter.',
+             [({'operation': op}, n) for op, n in sorted(rate_limiter.get_rejection_counts().items())])
+    w.metric('mud_rate_limit_buckets', 'gauge', 'Live rate limiter token buckets (all tiers).',
+             [(None, rate_limiter.get_bucket_count())])
+
+    ai = ai_utils.get_ai_stats().kinds
+    w.metric('mud_ai_calls_total', 'counter', 'AI model calls.', [({'kind': k}, s.calls) for k, s in sorted(ai.items())])
+    w.metric('mud_ai_errors_total', 'counter', 'AI model calls that raised.', [({'kind': k}, s.errors) for k, s in sorted(ai.items())])
+    w.histogram('mud_ai_call_duration_seconds', 'AI model call latency.', [({'kind': k}, s) for k, s in sorted(ai.items())])
+    budget = ai_budget.get_ai_budget()
+    w.metric('mud_ai_budget_granted_total', 'counter', 'AI calls admitted by the AI budget.',
+             [({'priority': p}, n) for p, n in sorted(budget.granted.items())])
+    w.metric('mud_ai_budget_denied_total', 'counter', 'AI calls refused by the AI budget (served offline).',
+             [({'priority': p}, n) for p, n in sorted(budget.denied.items())])
+    w.metric('mud_ai_in_flight', 'gauge', 'AI calls currently running.', [(None, budget.in_flight())])
+    w.metric('mud_ai_queued', 'gauge', 'AI calls waiting for a budget slot.', [(None, budget.queued())])
+
+    commands = command_metrics.get_command_metrics().series
+    w.histogram('mud_command_duration_seconds', 'Command and chat flow handler latency.',
+                [({'command': name}, s) for name, s in sorted(commands.items())])
+
+    q = send_queue.get_send_queues()
+    depths = q.depths()
+    w.metric('mud_send_queue_depth', 'gauge', 'Messages waiting in per-client send queues.', [(None, sum(depths))])
+    w.metric('mud_send_queue_max_depth', 'gauge', 'Deepest per-client send queue.', [(None, max(depths, default=0))])
+    w.metric('mud_send_queue_clients', 'gauge', 'Clients with queued messages.', [(None, sum(1 for d in depths if d))])
+    w.metric('mud_send_queue_dropped_total', 'counter', 'Ambient messages dropped from full queues.', [(None, q.stats['dropped'])])
+    w.metric('mud_send_queue_disconnects_total', 'counter', 'Clients cut off at the queue high-water mark.', [(None, q.stats['disconnects'])])
+    w.metric('mud_send_backlog_supported', 'gauge', 'Whether engine.io packet backlog can be read (0 means queue depth only).',
+             [(None, int(transport_backlog.get_transport_backlog().supported))])
+    return w.text()
+
+
+# Process-wide counters fed by server.py
+_metrics = ServerMetrics()
+
+
+def get_server_metrics() -> ServerMetrics:
+    """Return the process-wide server metrics."""
+    return _metrics
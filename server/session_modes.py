@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+"""Session Modes — one explicit input mode per connected sid.
+
+Every inbound chat line used to walk the same chain of checks: pending admin
+confirmation, world setup wizard, barter/trade flows, object template wizard,
+auth, then the interaction/movement/dice/dialogue routers. Now each sid has a
+SessionRecord whose `mode` server.py dispatches on through a mode -> handler
+table.
+
+The flow session maps are FlowMaps: a sid entering or leaving one (flow start
+or end) re-derives that sid's flow once and stores it on the record, so a
+line costs one record lookup plus, outside any flow, the login check that
+tells auth from play.
+
+Modes, in the priority they are resolved:
+- confirm:     a Y/N admin confirmation is pending (e.g. /purge)
+- setup:       the first-run world setup wizard
+- barter/trade: an interactive barter or currency trade
+- template:    the object template wizard
+- auth:        not logged in yet (account creation / login wizard)
+- interaction: a multi-turn "interact with <object>" session
+- play:        free play (movement, dice, dialogue)
+
+The wizard modes (confirm..template) take the line before slash commands, as
+they always did; auth/interaction/play come after. `base_mode()` gives the mode
+a line falls back to when a wizard declines it.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+
+MODE_CONFIRM = 'confirm'
+MODE_SETUP = 'setup'
+MODE_BARTER = 'barter'
+MODE_TRADE = 'trade'
+MODE_TEMPLATE = 'template'
+MODE_AUTH = 'auth'
+MODE_INTERACTION = 'interaction'
+MODE_PLAY = 'play'
+
+WIZARD_MODES = frozenset({MODE_CONFIRM, MODE_SETUP, MODE_BARTER, MODE_TRADE, MODE_TEMPLATE})
+
+# (mode, provider of the sid -> state map that puts a sid in that mode)
+SessionSource = Tuple[str, Callable[[], Mapping[str, object]]]
+
+
+@dataclass(slots=True)
+class SessionRecord:
+    sid: str
+    mode: str = MODE_AUTH
+    # Highest-priority flow the sid is in (None: auth or play, by login state)
+    flow: Optional[str] = None
+    messages: int = 0
+    transitions: int = 0
+    modes_seen: Dict[str, int] = field(default_factory=dict)
+
+
+class FlowMap(dict):
+    """sid -> flow state; a sid entering or leaving moves its recorded mode."""
+
+    def __init__(self, modes: 'SessionModes', *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._modes = modes
+
+    def __setitem__(self, sid: Any, value: Any) -> None:
+        entering = sid not in self
+        super().__setitem__(sid, value)
+        if entering:
+            self._modes.flow_changed(sid)
+
+    def __delitem__(self, sid: Any) -> None:
+        super().__delitem__(sid)
+        self._modes.flow_changed(sid)
+
+    def pop(self, sid: Any, *default: Any) -> Any:
+        leaving = sid in self
+        value = super().pop(sid, *default)
+        if leaving:
+            self._modes.flow_changed(sid)
+        return value
+
+    def popitem(self) -> Tuple[Any, Any]:
+        sid, value = super().popitem()
+        self._modes.flow_changed(sid)
+        return sid, value
+
+    def setdefault(self, sid: Any, default: Any = None) -> Any:
+        if sid not in self:
+            self[sid] = default
+        return self[sid]
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        for sid, value in dict(*args, **kwargs).items():
+            self[sid] = value
+
+    def clear(self) -> None:
+        sids = list(self)
+        super().clear()
+        for sid in sids:
+            self._modes.flow_changed(sid)
+
+
+class SessionModes:
+    """Per-sid session records whose mode moves when a flow starts or ends."""
+
+    def __init__(self):
+        self._records: Dict[str, SessionRecord] = {}
+        self._wizards: List[SessionSource] = []
+        self._interaction: Callable[[], Mapping[str, object]] = dict
+        self._is_player: Callable[[str], bool] = lambda sid: False
+
+    def bind(
+        self,
+        wizards: List[SessionSource],
+        interaction: Callable[[], Mapping[str, object]],
+        is_player: Callable[[str], bool],
+    ) -> None:
+        """Register the flow maps (as providers, so reassigned dicts are seen)."""
+        self._wizards = list(wizards)
+        self._interaction = interaction
+        self._is_player = is_player
+
+    def flow_map(self) -> FlowMap:
+        """An empty flow session map reporting entries and exits to these records."""
+        return FlowMap(self)
+
+    def base_mode(self, sid: Optional[str]) -> str:
+        """Mode ignoring wizards: auth, interaction or play."""
+        if not sid or not self._is_player(sid):
+            return MODE_AUTH
+        if sid in self._interaction():
+            return MODE_INTERACTION
+        return MODE_PLAY
+
+    def _flow_of(self, sid: str) -> Optional[str]:
+        for name, provider in self._wizards:
+            if sid in provider():
+                return name
+        if sid in self._interaction():
+            return MODE_INTERACTION
+        return None
+
+    def _set_mode(self, rec: SessionRecord, mode: str) -> None:
+        if rec.mode != mode:
+            rec.mode = mode
+            rec.transitions += 1
+
+    def _login_mode(self, sid: str) -> str:
+        return MODE_PLAY if self._is_player(sid) else MODE_AUTH
+
+    def flow_changed(self, sid: str) -> None:
+        """A flow map gained or lost sid: re-derive and record its flow."""
+        rec = self._records.get(sid)
+        if rec is None:
+            rec = self._records[sid] = SessionRecord(sid=sid, mode=self._login_mode(sid))
+        rec.flow = self._flow_of(sid)
+        self._set_mode(rec, rec.flow or self._login_mode(sid))
+
+    def current(self, sid: Optional[str]) -> str:
+        """sid's recorded mode for the line being handled."""
+        if not sid:
+            return MODE_AUTH
+        rec = self._records.get(sid)
+        if rec is None:
+            # First line from this sid: its flows are read once, then kept by the maps
+            rec = self._records[sid] = SessionRecord(sid=sid, flow=self._flow_of(sid))
+            rec.mode = rec.flow or self._login_mode(sid)
+        elif rec.flow is None:
+            # Outside flows the mode follows login state (auth wizard -> play, logout)
+            self._set_mode(rec, self._login_mode(sid))
+        rec.messages += 1
+        rec.modes_seen[rec.mode] = rec.modes_seen.get(rec.mode, 0) + 1
+        return rec.mode
+
+    def record(self, sid: str) -> Optional[SessionRecord]:
+        return self._records.get(sid)
+
+    def mode_of(self, sid: str) -> Optional[str]:
+        """Mode recorded for sid's most recent line (None if it never sent one)."""
+        rec = self._records.get(sid)
+        return rec.mode if rec is not None else None
+
+    def forget(self, sid: str) -> None:
+        """Drop sid's record (disconnect); flows it is still in are read again if it returns."""
+        self._records.pop(sid, None)
+
+    def snapshot(self) -> Dict[str, int]:
+        """Connected sids per current mode."""
+        counts: Dict[str, int] = {}
+        for rec in self._records.values():
+            counts[rec.mode] = counts.get(rec.mode, 0) + 1
+        return counts
+
+    def clear(self) -> None:
+        self._records.clear()
+
+
+# Process-wide records used by server.handle_message
+_modes = SessionModes()
+
+
+def get_session_modes() -> SessionModes:
+    """Return the process-wide session mode tracker."""
+    return _modes
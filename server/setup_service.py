@@ -33,6 +33,7 @@ from world import Room, CharacterSheet
 from persistence_utils import save_world
 from concurrency_utils import atomic
 from safe_utils import safe_call, safe_call_with_default
+from ai_utils import generate_content as ai_generate
 
 # Optional AI import
 try:
@@ -85,7 +86,7 @@ def _call_ai_with_timeout(model, prompt: str, timeout_seconds: float = _AI_TIMEO
     def ai_call():
         """Thread target function for the AI call."""
         try:
-            response = model.generate_content(prompt)
+            response = ai_generate(model, prompt, kind='setup')
             # Extract text with size protection
             raw_text = safe_call_with_default(lambda: getattr(response, 'text', '') or '', '')
             
@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+"""Headless fast-forward simulation of the world heartbeat.
+
+Runs the same tick engine as the live heartbeat (game_loop.TickEngine)
+back-to-back with no sleeping and no Socket.IO clients, so tick performance
+and NPC behavior can be measured offline. It also works as a world "aging"
+pass before a shard opens: load a world file, run a few thousand ticks, save.
+
+- Broadcasts (room messages and global emits) are captured by a BroadcastSink
+  instead of being sent anywhere.
+- Planning uses the offline GOAP planner (--ai offline, the default) or the
+  deterministic mock planner from mock_ai (--ai mock). AI planning only runs
+  in rooms with an audience, so mock mode seats a silent observer sid in
+  every room.
+- Every rng_service stream (and Python's global random) is reseeded from
+  --seed, new entity ids come from the seeded 'ids' stream, and timestamps
+  from a simulated world_clock that starts at the world's last daily update
+  and moves one heartbeat interval per tick. Runs with the same seed and
+  world file therefore save the same world file.
+
+Usage:
+  python server/sim_runner.py --world server/world_state.json --ticks 500 --seed 7
+  python server/sim_runner.py --world aged.json --ticks 2000 --save aged.json
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+
+OBSERVER_SID = 'sim-observer'
+
+# Simulated clock start for worlds that never ran a daily update (2023-11-14)
+SIM_EPOCH = 1_700_000_000.0
+
+
+class BroadcastSink:
+    """Stands in for socketio and broadcast_to_room; remembers what was sent."""
+
+    def __init__(self, keep: int = 200):
+        self.keep = keep
+        self.total = 0
+        self.by_type: Counter = Counter()
+        self.recent: List[Tuple[Optional[str], Any]] = []
+
+    def _record(self, room_id: Optional[str], payload: Any) -> None:
+        self.total += 1
+        ptype = payload.get('type') if isinstance(payload, dict) else None
+        self.by_type[str(ptype or 'other')] += 1
+        self.recent.append((room_id, payload))
+        if len(self.recent) > self.keep:
+            del self.recent[:len(self.recent) - self.keep]
+
+    # socketio-compatible surface
+    def emit(self, event: str, payload: Any = None, to: Optional[str] = None, **kwargs: Any) -> None:
+        self._record(None, payload)
+
+    def sleep(self, seconds: float) -> None:
+        return None
+
+    # broadcast_to_room-compatible surface
+    def broadcast_to_room(self, room_id: str, payload: dict, exclude_sid: Optional[str] = None) -> None:
+        self._record(room_id, payload)
+
+
+def world_summary(world: Any) -> Dict[str, Any]:
+    """Counts and average NPC needs for a world."""
+    sheets = list(world.npc_sheets.values())
+    n = len(sheets) or 1
+
+    def _avg(attr: str) -> float:
+        return round(sum(float(getattr(s, attr, 0.0) or 0.0) for s in sheets) / n, 2)
+
+    return {
+        'rooms': len(world.rooms),
+        'npcs': sum(len(r.npcs or ()) for r in world.rooms.values()),
+        'objects': sum(len(r.objects or {}) for r in world.rooms.values()),
+        'npc_currency': sum(int(getattr(s, 'currency', 0) or 0) for s in sheets),
+        'avg_hunger': _avg('hunger'),
+        'avg_thirst': _avg('thirst'),
+        'avg_socialization': _avg('socialization'),
+        'avg_sleep': _avg('sleep'),
+        'npc_rooms': {name: rid for rid, r in world.rooms.items() for name in (r.npcs or ())},
+    }
+
+
+@dataclass
+class SimResult:
+    """Outcome of run_simulation."""
+    ticks: int
+    seconds: float
+    npc_updates: int
+    mutated_ticks: int
+    before: Dict[str, Any]
+    after: Dict[str, Any]
+    broadcasts: int
+    broadcasts_by_type: Dict[str, int] = field(default_factory=dict)
+    tick_ms: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def ticks_per_sec(self) -> float:
+        return self.ticks / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def npc_updates_per_sec(self) -> float:
+        return self.npc_updates / self.seconds if self.seconds > 0 else 0.0
+
+    def npcs_moved(self) -> int:
+        b, a = self.before['npc_rooms'], self.after['npc_rooms']
+        return sum(1 for name, rid in a.items() if b.get(name) not in (None, rid))
+
+
+def _id_salt(world: Any) -> str:
+    """Digest of the ids already in the world.
+
+    Salting the 'ids' stream with it keeps a second seeded run over an aged
+    world from handing out the ids the first run created.
+    """
+    ids = set(str(v) for v in (getattr(world, 'npc_ids', None) or {}).values())
+    ids.update(str(k) for k in (getattr(world, 'missions', None) or {}))
+    ids.update(str(k) for k in (getattr(world, 'factions', None) or {}))
+    for room in world.rooms.values():
+        ids.update(str(k) for k in (room.objects or {}))
+    for sheet in world.npc_sheets.values():
+        ambition = getattr(sheet, 'ambition', None)
+        if ambition is not None:
+            ids.add(str(ambition.id))
+    return hashlib.sha256('\n'.join(sorted(ids)).encode('utf-8')).hexdigest()
+
+
+def _load_server() -> Any:
+    """Import server.py in headless mode (no heartbeat thread, no prompts)."""
+    os.environ.setdefault('MUD_TICK_ENABLE', '0')
+    os.environ.setdefault('MUD_NO_INTERACTIVE', '1')
+    here = os.path.dirname(os.path.abspath(__file__))
+    if here not in sys.path:
+        sys.path.insert(0, here)
+    import server
+    return server
+
+
+def run_simulation(
+    world: Any,
+    ticks: int,
+    *,
+    seed: int = 0,
+    ai: str = 'offline',
+    enable_goap: bool = True,
+    srv: Any = None,
+) -> SimResult:
+    """Run `ticks` world ticks on `world` with broadcasts captured.
+
+    The server module's world, socketio, broadcast hook and plan model are
+    swapped in for the run and restored afterwards, as is the world's
+    advanced_goap_enabled flag. The world clock is simulated for the run.
+    """
+    srv = srv or _load_server()
+    import game_loop
+    import mock_ai
+    import plan_cache
+    import rng_service
+    import tick_profiler
+    import world_clock
+
+    rng_service.reseed(seed)
+    rng_service.get_rng_service().salt('ids', _id_salt(world))
+    random.seed(seed)
+    clock = world_clock.get_world_clock()
+    sink = BroadcastSink()
+    ctx = game_loop.get_context()
+    # ctx.world follows srv.world through the context's world provider
+    saved = (srv.world, srv.socketio, srv.broadcast_to_room, srv.plan_model,
+             ctx.socketio, ctx.broadcast_to_room)
+    goap_was_enabled = world.advanced_goap_enabled
+    observers: List[Any] = []
+    try:
+        clock.simulate(float(getattr(world, 'daily_update_timestamp', 0.0) or SIM_EPOCH))
+        srv.world = world
+        srv.socketio = ctx.socketio = sink
+        srv.broadcast_to_room = ctx.broadcast_to_room = sink.broadcast_to_room
+        if enable_goap:
+            world.advanced_goap_enabled = True
+        if ai == 'mock':
+            srv.plan_model = mock_ai.create_goap_planning_mock()
+            for room in world.rooms.values():
+                if OBSERVER_SID not in room.players:
+                    room.players.add(OBSERVER_SID)
+                    observers.append(room)
+        else:
+            srv.plan_model = None
+        plan_cache.get_plan_cache().clear()
+        game_loop.get_wake_queue().clear()
+        prof = tick_profiler.get_tick_profiler()
+        prof.reset()
+        engine = game_loop.get_tick_engine()
+
+        before = world_summary(world)
+        npc_updates = 0
+        mutated_ticks = 0
+        t0 = time.perf_counter()
+        for _ in range(max(0, int(ticks))):
+            npc_updates += sum(len(r.npcs or ()) for r in world.rooms.values())
+            clock.advance(game_loop.TICK_SECONDS)
+            if engine.run_once():
+                mutated_ticks += 1
+        seconds = time.perf_counter() - t0
+        after = world_summary(world)
+        return SimResult(
+            ticks=max(0, int(ticks)),
+            seconds=seconds,
+            npc_updates=npc_updates,
+            mutated_ticks=mutated_ticks,
+            before=before,
+            after=after,
+            broadcasts=sink.total,
+            broadcasts_by_type=dict(sink.by_type),
+            tick_ms=prof.percentiles(),
+        )
+    finally:
+        clock.release()
+        world.advanced_goap_enabled = goap_was_enabled
+        for room in observers:
+            room.players.discard(OBSERVER_SID)
+        (srv.world, srv.socketio, srv.broadcast_to_room, srv.plan_model,
+         ctx.socketio, ctx.broadcast_to_room) = saved
+
+
+def format_report(result: SimResult) -> str:
+    """Human-readable throughput and world-change summary."""
+    b, a = result.before, result.after
+    lines = [
+        f"Simulated {result.ticks} ticks in {result.seconds:.3f}s "
+        f"({result.ticks_per_sec:.1f} ticks/s, {result.npc_updates_per_sec:.1f} NPC-updates/s)",
+        f"Tick ms: p50 {result.tick_ms.get('p50', 0):.2f}, p95 {result.tick_ms.get('p95', 0):.2f}, "
+        f"p99 {result.tick_ms.get('p99', 0):.2f}, max {result.tick_ms.get('max', 0):.2f}",
+        f"Ticks with changes: {result.mutated_ticks}",
+        f"Rooms: {a['rooms']}  NPCs: {b['npcs']} -> {a['npcs']}  Objects: {b['objects']} -> {a['objects']}",
+        f"NPCs that changed rooms: {result.npcs_moved()}",
+        f"NPC currency: {b['npc_currency']} -> {a['npc_currency']}",
+    ]
+    for need in ('hunger', 'thirst', 'socialization', 'sleep'):
+        key = 'avg_' + need
+        lines.append(f"Avg {need}: {b[key]:.1f} -> {a[key]:.1f}")
+    by_type = ', '.join(f"{k}={v}" for k, v in sorted(result.broadcasts_by_type.items())) or 'none'
+    lines.append(f"Broadcasts captured: {result.broadcasts} ({by_type})")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Fast-forward the TinyMUD world heartbeat headlessly.')
+    parser.add_argument('--world', required=True, help='world state JSON file to load')
+    parser.add_argument('--ticks', type=int, default=100, help='number of ticks to run (default 100)')
+    parser.add_argument('--seed', type=int, default=0, help='random seed (default 0)')
+    parser.add_argument('--ai', choices=('offline', 'mock'), default='offline',
+                        help='planner: offline GOAP or deterministic mock AI (default offline)')
+    parser.add_argument('--no-goap', action='store_true', help="keep the world's advanced GOAP setting")
+    parser.add_argument('--save', help='write the aged world to this path afterwards')
+    args = parser.parse_args(argv)
+
+    srv = _load_server()
+    from world import World
+    if not os.path.exists(args.world):
+        print(f"World file not found: {args.world}")
+        return 2
+    world = World.load_from_file(args.world)
+    result = run_simulation(
+        world, args.ticks, seed=args.seed, ai=args.ai, enable_goap=not args.no_goap, srv=srv,
+    )
+    print(format_report(result))
+    if args.save:
+        world.save_to_file(args.save)
+        print(f"Saved world to {args.save}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+"""Tests for adaptive rate limiter costs.
+
+Covers:
+- Costs stay static until a command has enough samples, then follow the
+  busy time EWMA, clamped to the band of the command's static class.
+- A client hammering an expensive command is throttled before one sending
+  cheap commands.
+- command_metrics.timed feeds busy time to its observers: a handler that
+  yields on a model call is billed neither for the call nor for what other
+  handlers ran meanwhile.
+- With adaptive costs on, free-play lines like `look` are charged their
+  learnt cost.
+"""
+
+import threading
+import time
+
+import pytest
+
+import ai_utils
+import command_metrics
+import rate_limiter
+from command_metrics import CommandMetrics
+from rate_limiter import OperationType, RateLimiter
+
+
+@pytest.fixture
+def adaptive_env(monkeypatch):
+    monkeypatch.setenv('MUD_RATE_ENABLE', '1')
+    monkeypatch.setenv('MUD_RATE_ADAPTIVE', '1')
+    monkeypatch.setenv('MUD_RATE_CAPACITY', '12')
+    monkeypatch.setenv('MUD_RATE_REFILL_PER_SEC', '0')
+    monkeypatch.setenv('MUD_RATE_MS_PER_TOKEN', '2.0')
+    monkeypatch.setenv('MUD_RATE_ADAPTIVE_ALPHA', '0.5')
+    monkeypatch.setenv('MUD_RATE_ADAPTIVE_WARMUP', '3')
+    monkeypatch.setenv('MUD_RATE_LOG_VIOLATIONS', '0')
+    return monkeypatch
+
+
+def test_learnt_cost_follows_ewma_within_band(adaptive_env):
+    costs = RateLimiter().costs
+    costs.observe('/npc', 4.0)
+    costs.observe('/npc', 4.0)
+    assert costs.cost('/npc', OperationType.HEAVY) == 10.0  # still warming up
+    costs.observe('/npc', 12.0)
+    assert costs.ewma_ms['/npc'] == 8.0
+    assert costs.cost('/npc', OperationType.HEAVY) == 4.0
+    assert costs.cost('/npc', OperationType.MODERATE) == 4.0
+    assert costs.cost('/npc', OperationType.BASIC) == 3.0  # capped at the band
+    for _ in range(10):
+        costs.observe('/npc', 0.01)
+    assert costs.cost('/npc', OperationType.HEAVY) == 3.0  # floored at the band
+    assert costs.cost(None, OperationType.HEAVY) == 10.0
+
+    adaptive_env.setenv('MUD_RATE_ADAPTIVE', '0')
+    static = RateLimiter().costs
+    for _ in range(5):
+        static.observe('/npc', 100.0)
+    assert static.cost('/npc', OperationType.BASIC) == 1.0
+
+
+def test_expensive_command_throttled_first(adaptive_env):
+    limiter = RateLimiter()
+    for _ in range(3):
+        limiter.costs.observe('play:movement', 40.0)
+        limiter.costs.observe('/sheet', 0.5)
+    heavy = cheap = 0
+    while limiter.check_and_consume('sid-a', OperationType.BASIC, 'look', cost_key='play:movement'):
+        heavy += 1
+    while limiter.check_and_consume('sid-b', OperationType.BASIC, 'sheet', cost_key='/sheet'):
+        cheap += 1
+    assert (heavy, cheap) == (4, 12)
+
+
+def test_timed_reports_busy_time_to_observers():
+    metrics = CommandMetrics()
+    seen = []
+    metrics.observe(lambda name, busy_ms: seen.append((name, busy_ms)))
+    metrics.observe(metrics._observers[0])
+    with metrics.timed('/busy'):
+        sum(i * i for i in range(200000))
+    assert len(seen) == 1 and seen[0][0] == '/busy' and seen[0][1] > 0
+    metrics.record('/manual', 5.0)
+    assert len(seen) == 1
+
+
+def test_yielding_handler_not_billed_for_model_wait_or_other_work(monkeypatch):
+    metrics = CommandMetrics()
+    monkeypatch.setattr(command_metrics, '_metrics', metrics)
+    seen = {}
+    metrics.observe(lambda name, busy_ms: seen.setdefault(name, busy_ms))
+    started = threading.Event()
+
+    class SlowModel:
+        def generate_content(self, prompt):
+            started.set()
+            time.sleep(0.2)  # the handler is parked here while others run
+            return 'ok'
+
+    def other_handler():
+        started.wait(5)
+        with metrics.timed('/other'):
+            end = time.perf_counter() + 0.1
+            while time.perf_counter() < end:
+                pass
+
+    other = threading.Thread(target=other_handler)
+    other.start()
+    with metrics.timed('/npc'):
+        with metrics.timed('/inner'):
+            assert ai_utils.generate_content(SlowModel(), 'hi', kind='npc_dialogue') == 'ok'
+    other.join(5)
+
+    assert seen['/other'] >= 100.0
+    assert seen['/inner'] < 50.0
+    assert seen['/npc'] < 50.0  # the nested pause is excluded from the outer call too
+    assert metrics.series['/npc'].snapshot()['max_ms'] >= 200.0  # latency still reported in full
+
+
+def test_ai_budget_wait_not_billed(monkeypatch):
+    from ai_budget import AIBudget, AIPriority
+
+    monkeypatch.setenv('MUD_AI_BUDGET_ENABLE', '1')
+    monkeypatch.setenv('MUD_AI_CONCURRENCY', '1')
+    metrics = CommandMetrics()
+    monkeypatch.setattr(command_metrics, '_metrics', metrics)
+    seen = []
+    metrics.observe(lambda name, busy_ms: seen.append(busy_ms))
+    budget = AIBudget()
+    assert budget.acquire(AIPriority.PLAN, 'holder')
+    with metrics.timed('/talk'):
+        assert not budget.acquire(AIPriority.DIALOGUE, 'sid-1', wait=0.1)
+    assert seen[0] < 50.0
+
+
+def test_free_play_look_charged_learnt_cost(adaptive_env):
+    import server as srv
+    from world import Room
+
+    # Real looks feed the EWMA too; keep it near the seeded 6 ms
+    adaptive_env.setenv('MUD_RATE_ADAPTIVE_ALPHA', '0.001')
+    limiter = RateLimiter()
+    adaptive_env.setattr(rate_limiter, '_global_rate_limiter', limiter)
+    sent = []
+    adaptive_env.setattr(srv, 'emit', lambda event, payload, **kw: sent.append(payload))
+    srv.world.rooms['hall'] = Room(id='hall', description='A hall')
+    srv.world.add_player('sid-1', name='Ann', room_id='hall')
+    for _ in range(3):
+        limiter.costs.observe('play:movement', 6.0)
+
+    for _ in range(4):
+        assert srv._route_play('sid-1', 'look', 'look')
+    assert not any(p.get('type') == 'error' for p in sent)
+    assert srv._route_play('sid-1', 'look', 'look')
+    assert sent[-1] == {'type': 'error', 'content': 'You are sending commands too quickly. Please slow down.'}
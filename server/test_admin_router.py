@@ -7,6 +7,7 @@ This module tests admin commands:
 - /object subcommands
 - /room, /npc, /faction delegation
 - /settimedesc
+- /tickstats
 
 Coverage target: boost admin_router.py from ~22% to ~70%+
 """
@@ -599,7 +600,7 @@ def test_settimedesc_no_args():
     result = try_handle(ctx, admin_sid, "settimedesc", [], "/settimedesc", emit)
     
     assert result is True
-    assert 'Usage' in emits[0][1].get('content', '')
+    assert emits[0][1] == {'type': 'system', 'content': 'Usage: /settimedesc <hour> <description>'}
 
 
 def test_settimedesc_invalid_hour():
@@ -619,6 +620,10 @@ def test_settimedesc_invalid_hour():
     assert emits[0][1].get('type') == 'error'
     assert 'integer' in emits[0][1].get('content', '').lower()
 
+    try_handle(ctx, admin_sid, "settimedesc", ["dusk", "Late"], "/settimedesc dusk Late", emit)
+    assert emits[1][1].get('type') == 'error'
+    assert 'integer' in emits[1][1].get('content', '').lower()
+
 
 def test_settimedesc_success():
     """Test /settimedesc with valid hour and description."""
@@ -832,3 +837,34 @@ def test_rate_limit_applied():
             os.environ['MUD_RATE_ENABLE'] = old_val
         else:
             os.environ.pop('MUD_RATE_ENABLE', None)
+
+
+# ============================================================================
+# /tickstats command
+# ============================================================================
+
+def test_tickstats_reports_last_tick():
+    """Test /tickstats prints percentiles, phases and slowest NPCs."""
+    from admin_router import try_handle
+    import tick_profiler
+
+    w = _fresh_world()
+    admin_sid = "admin1"
+    w.add_player(admin_sid, name="Admin", room_id="start")
+    prof = tick_profiler.get_tick_profiler()
+    prof.start_tick()
+    prof.add_phase('needs', 0.002)
+    prof.add_npc('Bob', 0.004)
+    prof.count('actions', 3)
+    prof.end_tick(npcs_thought=1)
+
+    ctx, broadcasts = _make_ctx(w, admins={admin_sid})
+    emit, emits = _make_emit()
+    result = try_handle(ctx, admin_sid, "tickstats", [], "/tickstats", emit)
+
+    assert result is True
+    content = emits[0][1].get('content', '')
+    assert 'p95' in content
+    assert 'needs 2.0' in content
+    assert 'Bob 4.0 ms' in content
+    assert 'actions 3' in content
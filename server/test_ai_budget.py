@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+"""Tests for the world-wide AI budget.
+
+Covers:
+- The RPM window caps calls, keeps the dialogue reserve out of planning's
+  reach, and refills as grants age out.
+- An NPC that asks more often than the others is held to its fair share.
+- Queued dialogue is served before queued planning; a request past its
+  deadline is refused.
+- With the budget spent, NPC planning falls back to the offline planner
+  without calling the model.
+"""
+
+import threading
+import time
+
+import pytest
+
+from ai_budget import AIBudget, AIPriority
+
+
+class Clock:
+    def __init__(self):
+        self.now = 500.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def budget_env(monkeypatch):
+    monkeypatch.setenv('MUD_AI_BUDGET_ENABLE', '1')
+    monkeypatch.setenv('MUD_AI_RPM', '8')
+    monkeypatch.setenv('MUD_AI_CONCURRENCY', '4')
+    monkeypatch.setenv('MUD_AI_DIALOGUE_RESERVE', '0.25')
+    monkeypatch.setenv('MUD_AI_PLAN_WAIT', '0')
+    monkeypatch.setenv('MUD_AI_DIALOGUE_WAIT', '0')
+    return monkeypatch
+
+
+def _take(budget: AIBudget, priority: AIPriority, owner: str) -> bool:
+    with budget.slot(priority, owner) as granted:
+        return granted
+
+
+def test_window_cap_and_dialogue_reserve(budget_env):
+    clock = Clock()
+    budget = AIBudget(clock=clock)
+    plans = [_take(budget, AIPriority.PLAN, f'npc-{i}') for i in range(10)]
+    assert plans.count(True) == 6  # 8 per minute, 2 held back for dialogue
+    assert _take(budget, AIPriority.DIALOGUE, 'sid-a')
+    assert _take(budget, AIPriority.DIALOGUE, 'sid-b')
+    assert not _take(budget, AIPriority.DIALOGUE, 'sid-c')
+    assert budget.granted == {'DIALOGUE': 2, 'PLAN': 6}
+    assert budget.denied == {'DIALOGUE': 1, 'PLAN': 4}
+
+    clock.now += 61
+    assert _take(budget, AIPriority.PLAN, 'npc-0')
+    assert budget.window_use() == {'DIALOGUE': 0, 'PLAN': 1}
+
+
+def test_busy_npc_held_to_fair_share(budget_env):
+    budget_env.setenv('MUD_AI_DIALOGUE_RESERVE', '0')
+    clock = Clock()
+    budget = AIBudget(clock=clock)
+    assert _take(budget, AIPriority.PLAN, 'Ann')
+    assert _take(budget, AIPriority.PLAN, 'Bob')
+    ann = 1 + sum(_take(budget, AIPriority.PLAN, 'Ann') for _ in range(10))
+    assert ann == 4  # 8 per minute split between two NPCs
+    bob = 1 + sum(_take(budget, AIPriority.PLAN, 'Bob') for _ in range(10))
+    assert bob == 4
+
+
+def test_queued_dialogue_served_before_planning(budget_env):
+    budget_env.setenv('MUD_AI_RPM', '100')
+    budget_env.setenv('MUD_AI_CONCURRENCY', '1')
+    budget = AIBudget()
+    order = []
+
+    def worker(priority: AIPriority, owner: str) -> None:
+        with budget.slot(priority, owner, wait=5.0) as granted:
+            if granted:
+                order.append(priority.name)
+
+    assert budget.acquire(AIPriority.PLAN, 'holder')
+    threads = [threading.Thread(target=worker, args=(AIPriority.PLAN, 'Ann'))]
+    threads[0].start()
+    while budget.queued() < 1:
+        time.sleep(0.001)
+    threads.append(threading.Thread(target=worker, args=(AIPriority.DIALOGUE, 'sid-1')))
+    threads[1].start()
+    while budget.queued() < 2:
+        time.sleep(0.001)
+    budget.release()
+    for t in threads:
+        t.join(5)
+    assert order == ['DIALOGUE', 'PLAN']
+
+    assert budget.acquire(AIPriority.PLAN, 'holder')
+    start = time.monotonic()
+    assert not budget.acquire(AIPriority.DIALOGUE, 'sid-2', wait=0.05)
+    assert time.monotonic() - start >= 0.05
+    assert budget.denied['DIALOGUE'] == 1
+    budget.release()
+
+
+def test_exhausted_budget_plans_offline(monkeypatch):
+    import ai_budget
+    import plan_cache
+    import server as srv
+    from mock_ai import create_goap_planning_mock
+    from world import CharacterSheet, Object as WObject, Room
+
+    monkeypatch.setenv('MUD_AI_RPM', '1')
+    monkeypatch.setenv('MUD_AI_DIALOGUE_RESERVE', '0')
+    ai_budget.get_ai_budget().reset()
+    room = Room(id='hall', description='A hall')
+    bread = WObject(display_name='Bread', description='', object_tags={'Edible: 20'})
+    room.objects[bread.uuid] = bread
+    room.players.add('sid-watcher')
+    srv.world.rooms[room.id] = room
+    srv.world.advanced_goap_enabled = True
+    mock = create_goap_planning_mock()
+    monkeypatch.setattr(srv, 'plan_model', mock)
+    for name in ('Ann', 'Bob'):
+        room.npcs.add(name)
+        sheet = CharacterSheet(display_name=name, description='A regular')
+        sheet.hunger = 5.0
+        srv.world.npc_sheets[name] = sheet
+
+    srv.npc_think('Ann')
+    plan_cache.get_plan_cache().clear()  # Bob would otherwise reuse Ann's plan
+    srv.npc_think('Bob')
+
+    assert mock.call_count == 1
+    assert srv.world.npc_sheets['Bob'].plan_queue  # offline planner filled it in
+    assert ai_budget.get_ai_budget().denied['PLAN'] == 1
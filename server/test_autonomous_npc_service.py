@@ -8,6 +8,7 @@ and autonomous behavior evaluation work correctly.
 import pytest
 from world import World, Room, CharacterSheet, Object
 from autonomous_npc_service import (
+    build_room_perception,
     evaluate_npc_autonomy,
     add_memory,
     update_relationship,
@@ -236,6 +237,48 @@ class TestMemorySystem:
         assert sheet.relationships["player1"] == -100.0  # Should cap at -100
 
 
+class TestRoomPerception:
+    """Test the shared per-room perception snapshot used by autonomy evaluation."""
+    
+    def _busy_room(self):
+        world = World()
+        room = Room(id="market", description="A crowded market")
+        room.objects = {"ring1": Object(display_name="Gold Ring", value=50)}
+        world.rooms["market"] = room
+        for name, hunger, aggression in (("Ada", 20.0, 75), ("Bo", 30.0, 30), ("Cy", 90.0, 30)):
+            sheet = CharacterSheet(name)
+            sheet.hunger = hunger
+            sheet.aggression = aggression
+            sheet.confidence = 60
+            sheet.responsibility = 20
+            sheet.wealth_desire = 80.0
+            sheet.currency = 5
+            world.npc_sheets[name] = sheet
+            room.npcs.add(name)
+        return world, room
+    
+    def test_shared_snapshot_matches_fresh_evaluation(self):
+        """Passing one snapshot to every NPC gives the same actions as scanning per NPC."""
+        world, room = self._busy_room()
+        perception = build_room_perception(world, room)
+        for name in ("Ada", "Bo", "Cy"):
+            shared = evaluate_npc_autonomy(world, name, "market", perception)
+            fresh = evaluate_npc_autonomy(world, name, "market")
+            assert [a['tool'] for a in shared] == [a['tool'] for a in fresh]
+    
+    def test_snapshot_answers_per_npc_questions(self):
+        """Per-NPC views exclude the asking NPC."""
+        world, room = self._busy_room()
+        perception = build_room_perception(world, room)
+        # Ada is the only aggressive NPC, so she is no threat to herself
+        assert perception.threat_to("Bo") is True
+        assert perception.threat_to("Ada") is False
+        assert perception.witnesses_for("Ada") == 2
+        assert perception.competitors_for("Ada", world.npc_sheets["Ada"]) == ["Bo"]
+        assert perception.competitors_for("Cy", world.npc_sheets["Cy"]) == []
+        assert [o.display_name for o in perception.valuables] == ["Gold Ring"]
+
+
 class TestPersonalityModifiers:
     """Test personality trait modifiers for decision-making."""
     
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+"""Tests for edit-distance suggestions.
+
+Covers:
+- edit_distance agrees with the textbook Levenshtein table.
+- BKTree radius search returns exactly the brute-force matches.
+- "did you mean" lists typo matches closest first, falls back to the first
+  letter, and the cached tree is extended rather than rebuilt as rooms are added.
+"""
+
+import random
+
+from bk_tree import BKTree, edit_distance
+from id_parse_utils import fuzzy_resolve, resolve_room_id
+from world import Room, World
+
+
+def _levenshtein(a: str, b: str) -> int:
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+
+def _word(rng: random.Random) -> str:
+    return ''.join(rng.choice('abcd') for _ in range(rng.randint(0, 9)))
+
+
+def test_distance_and_search_match_brute_force():
+    rng = random.Random(3)
+    for _ in range(2000):
+        a, b = _word(rng), _word(rng)
+        assert edit_distance(a, b) == _levenshtein(a, b), (a, b)
+
+    words = {_word(rng) for _ in range(400)}
+    tree = BKTree(words)
+    for _ in range(100):
+        q = _word(rng)
+        for radius in (1, 2):
+            expected = sorted((_levenshtein(q, w), w) for w in words if _levenshtein(q, w) <= radius)
+            assert sorted(tree.search(q, radius)) == expected
+
+
+def test_typo_suggestions_closest_first():
+    names = ['tavern', 'Tavern Hall', 'cavern', 'goblin', 'Goblin King', 'town']
+    assert fuzzy_resolve('goblim', names) == (False, "'goblim' not found. Did you mean: goblin?", None)
+    assert fuzzy_resolve('tavrn', names) == (False, "'tavrn' not found. Did you mean: tavern?", None)
+    assert fuzzy_resolve('savern', names) == (False, "'savern' not found. Did you mean: cavern, tavern?", None)
+    # No typo match: same first letter as before
+    assert fuzzy_resolve('tzzzzz', names) == (False, "'tzzzzz' not found. Did you mean: tavern, Tavern Hall, town?", None)
+
+
+def test_room_index_extends_typo_tree():
+    w = World()
+    for rid in ('tavern', 'market', 'harbor'):
+        w.rooms[rid] = Room(id=rid, description=rid)
+    assert resolve_room_id(w, 'tavrn')[1] == "'tavrn' not found. Did you mean: tavern?"
+    tree = w.rooms.derived['fuzzy'][1].typos
+
+    w.rooms['tavernx'] = Room(id='tavernx', description='annex')
+    del w.rooms['market']
+    # Removed names stay in the tree but are never suggested
+    assert resolve_room_id(w, 'markt')[1] == "'markt' not found."
+    assert resolve_room_id(w, 'tavrn')[1] == "'tavrn' not found. Did you mean: tavern?"
+    assert resolve_room_id(w, 'tavrnx')[1] == "'tavrnx' not found. Did you mean: tavernx?"
+    assert w.rooms.derived['fuzzy'][1].typos is tree
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+"""Tests for per-tick room broadcast batching.
+
+Covers:
+- Buffered messages flush once per room, in order.
+- A change of exclude_sid starts a new list for that room.
+- A real world tick sends a batch-capable player one 'messages' event holding
+  every NPC line, and a player without batch support each line on its own.
+- Only the tick's own broadcasts are held: a player handler broadcasting from
+  another thread mid-tick is sent at once, outside the tick's batch.
+"""
+
+import threading
+
+from broadcast_batcher import RoomBroadcastBatcher
+from world import CharacterSheet, Room
+
+
+def _line(text: str) -> dict:
+    return {'type': 'system', 'content': text}
+
+
+def test_flush_orders_and_groups_per_room():
+    b = RoomBroadcastBatcher()
+    sent: list[tuple] = []
+    assert b.add('hall', _line('x')) is False  # not batching: send immediately
+
+    b.begin()
+    b.begin()
+    for text in ('one', 'two', 'three'):
+        assert b.add('hall', _line(text))
+    b.add('den', _line('solo'))
+    assert b.end(lambda *a: sent.append(a)) == 0  # inner end keeps buffering
+    assert b.end(lambda *a: sent.append(a)) == 2
+
+    hall, den = sent
+    assert hall[0] == 'hall'
+    assert [m['content'] for m in hall[1]] == ['one', 'two', 'three']
+    assert den == ('den', [_line('solo')], None)
+    assert b.stats == {'flushes': 1, 'messages': 4, 'payloads': 2}
+    assert not b.active
+
+
+def test_exclude_change_splits_batch():
+    b = RoomBroadcastBatcher()
+    sent: list[tuple] = []
+    b.begin()
+    b.add('hall', _line('a'))
+    b.add('hall', _line('b'), 'sid-1')
+    b.add('hall', _line('c'), 'sid-1')
+    b.add('hall', _line('d'))
+    b.end(lambda *a: sent.append(a))
+    assert [([m['content'] for m in p], ex) for _, p, ex in sent] == [
+        (['a'], None), (['b', 'c'], 'sid-1'), (['d'], None),
+    ]
+
+
+def test_world_tick_batches_only_for_capable_clients(monkeypatch):
+    import outbound_buffer
+    import server as srv
+
+    class FakeSocketIO:
+        def __init__(self):
+            self.emits: list[tuple] = []
+
+        def emit(self, event, payload=None, to=None, **kwargs):
+            self.emits.append((event, payload, to))
+
+    fake = FakeSocketIO()
+    monkeypatch.setattr(srv, "socketio", fake)
+    room = Room(id="tavern", description="A tavern")
+    room.players.add("sid-p")
+    room.players.add("sid-old")
+    outbound_buffer.get_outbound_buffer().set_batch_capable("sid-p", True)
+    srv.world.rooms[room.id] = room
+    for name in ("Ada", "Bo"):
+        room.npcs.add(name)
+        sheet = CharacterSheet(display_name=name, description="A regular")
+        sheet.action_points = 1
+        sheet.plan_queue = [
+            {'tool': 'emote', 'args': {'message': 'raises a mug.'}},
+            {'tool': 'say', 'args': {'message': 'Cheers!'}},
+        ]
+        srv.world.npc_sheets[name] = sheet
+
+    srv._world_tick_once()
+
+    to_player = [(event, p) for event, p, to in fake.emits if to == "sid-p"]
+    assert len(to_player) == 1
+    event, batch = to_player[0]
+    assert event == outbound_buffer.MESSAGE_BATCH
+    # AP allows two steps each; NPCs act in name order and lines stay distinct
+    contents = [m['content'] for m in batch]
+    assert len(contents) == 4
+    assert contents[0].startswith('[i]Ada') and 'Bo' in contents[2]
+
+    # A client that never announced batch support gets plain 'message' events
+    to_old = [(event, p) for event, p, to in fake.emits if to == "sid-old"]
+    assert [event for event, _ in to_old] == [srv.MESSAGE_OUT] * 4
+    assert [p['content'] for _, p in to_old] == contents
+
+
+def test_concurrent_handler_broadcast_not_held_by_tick(monkeypatch):
+    import game_loop
+    import server as srv
+
+    sent: list[tuple] = []
+    monkeypatch.setattr(srv, "_send_to_sid", lambda sid, event, payload: sent.append((sid, payload)))
+    room = Room(id="tavern", description="A tavern")
+    room.players.add("sid-p")
+    srv.world.rooms[room.id] = room
+    seen_mid_tick: list[tuple] = []
+
+    def phase(state):
+        game_loop.get_context().tick_broadcast("tavern", _line('npc line'))
+        # A player's say handled concurrently while the tick is still open
+        t = threading.Thread(target=srv.broadcast_to_room, args=("tavern", _line('player says hi')))
+        t.start()
+        t.join()
+        seen_mid_tick.extend(sent)
+
+    game_loop.TickEngine(phases=[('chatter', phase)]).run_once()
+
+    assert seen_mid_tick == [("sid-p", _line('player says hi'))]
+    assert sent == [("sid-p", _line('player says hi')), ("sid-p", _line('npc line'))]
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+"""Tests for per-command latency metrics.
+
+Covers:
+- Histogram percentiles, error counts and the bounded slow-command log.
+- Slash commands and chat flows are recorded under '/<name>' and 'play:<router>'.
+- /cmdstats and the /metrics/commands HTTP route report the same snapshot;
+  the route is off unless MUD_METRICS_TOKEN is set.
+"""
+
+import pytest
+
+import command_metrics
+from command_metrics import CommandMetrics
+from world import Room
+
+
+def test_percentiles_errors_and_slow_log():
+    m = CommandMetrics(slow_ms=100, slow_log_size=2)
+    m.bind(lambda: {'rooms': 3})
+    for ms in [0.5] * 90 + [40.0] * 9 + [300.0]:
+        m.record('/look', ms, sid='s1')
+    snap = m.snapshot()['commands']['/look']
+    assert snap['calls'] == 100
+    assert (snap['p50'], snap['p95'], snap['p99'], snap['max_ms']) == (1.0, 50.0, 50.0, 300.0)
+
+    with pytest.raises(RuntimeError):
+        with m.timed('/npc', 's2'):
+            raise RuntimeError('boom')
+    assert m.series['/npc'].errors == 1
+
+    m.record('/room', 150.0)
+    m.record('/faction', 900.0)
+    assert [e['command'] for e in m.slow] == ['/room', '/faction']
+    assert m.slow[-1]['world_size'] == {'rooms': 3}
+
+
+def _setup(srv, monkeypatch):
+    sent: list[dict] = []
+    monkeypatch.setattr(srv, "get_sid", lambda: "sid-a")
+    monkeypatch.setattr(srv, "emit", lambda event, payload=None, **kw: sent.append(payload))
+    srv.world.rooms["hall"] = Room(id="hall", description="A long hall.")
+    srv.world.start_room_id = "hall"
+    srv.world.add_player("sid-a", name="Ann", room_id="hall")
+    return sent
+
+
+def test_commands_and_flows_are_recorded(monkeypatch):
+    import server as srv
+    sent = _setup(srv, monkeypatch)
+    srv._handle_message_inner({'content': '/look'})
+    srv._handle_message_inner({'content': 'look'})
+    srv.admins.add("sid-a")
+    srv._handle_message_inner({'content': '/cmdstats'})
+
+    series = command_metrics.get_command_metrics().series
+    assert series['/look'].calls == 1
+    assert series['play:movement'].calls == 1
+    assert '/look' in sent[-1]['content'] and 'play:movement' in sent[-1]['content']
+
+
+def test_metrics_route_and_token(monkeypatch):
+    import server as srv
+    command_metrics.get_command_metrics().record('/look', 2.0)
+    client = srv.app.test_client()
+    assert client.get('/metrics/commands').status_code == 404
+
+    monkeypatch.setattr(srv, "METRICS_TOKEN", "s3cret")
+    body = client.get('/metrics/commands?token=s3cret').get_json()
+    assert body['commands']['/look']['calls'] == 1
+    assert client.get('/metrics/commands').status_code == 403
+    assert client.get('/metrics/commands?token=s3cret').status_code == 200
+    assert client.get('/metrics/commands', headers={'Authorization': 'Bearer s3cret'}).status_code == 200
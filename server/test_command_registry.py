@@ -302,5 +302,82 @@ def test_global_registry_help_command():
     assert "Available commands:" in content or "No commands available." in content
 
 
+
+def test_middleware_chain_and_aliases():
+    """Router-style commands dispatch by name or alias through the middleware in order."""
+    seen = []
+
+    def outer(call, next_fn):
+        seen.append(('outer', call.name, call.invoked))
+        return next_fn(call)
+
+    def blocker(call, next_fn):
+        if call.args == ['stop']:
+            return True
+        return next_fn(call)
+
+    reg = CommandRegistry(middleware=[outer, blocker])
+    reg.route(['look'], lambda ctx, sid, cmd, args, raw, emit: seen.append(('look', args)) or True,
+              aliases={'look': ['l']})
+    ctx = Mock(spec=CommandContext)
+
+    assert reg.dispatch(ctx, 's1', 'l', ['at', 'bob'], '/l at bob', Mock()) is True
+    assert reg.dispatch(ctx, 's1', 'look', ['stop'], '/look stop', Mock()) is True
+    assert reg.dispatch(ctx, 's1', 'nope', [], '/nope', Mock()) is False
+    assert seen == [('outer', 'look', 'l'), ('look', ['at', 'bob']), ('outer', 'look', 'look')]
+    assert reg.get_command('look').spec is not None
+
+
+def test_server_permadeath_and_admin_rate_limit(monkeypatch):
+    """server.handle_command gates dead players and charges admin costs via middleware."""
+    import server as srv
+    import command_registry
+    from world import Room
+
+    sent = []
+    monkeypatch.setattr(srv, "emit", lambda event, payload=None, **kw: sent.append(payload))
+    srv.world.rooms["hall"] = Room(id="hall", description="A hall.")
+    srv.world.add_player("s1", name="Ann", room_id="hall")
+    srv.world.players["s1"].sheet.is_dead = True
+
+    srv.handle_command("s1", "/sheet")
+    assert sent[-1]['content'] == command_registry.PERMADEATH_MESSAGE
+    srv.handle_command("s1", "/help")
+    assert sent[-1]['type'] == 'system'
+
+    srv.world.players["s1"].sheet.is_dead = False
+    srv.handle_command("s1", "/tickstats")
+    assert sent[-1]['content'] == 'Admin command. Admin rights required.'
+
+    srv.admins.add("s1")
+    charged = []
+    monkeypatch.setattr(command_registry, "check_rate_limit", lambda sid, cost, key: charged.append((cost, key)) and False)
+    srv.handle_command("s1", "/tickstats")
+    assert charged == [(srv.admin_router.OPERATION_COSTS['tickstats'], 'admin_tickstats')]
+    assert 'too quickly' in sent[-1]['content']
+    import command_metrics
+    assert command_metrics.get_command_metrics().series['/tickstats'].calls == 2
+
+
+def test_admin_commands_registered_one_handler_each():
+    """Each admin command has its own handler; declared arguments are checked by ArgSpec."""
+    import admin_router
+
+    reg = CommandRegistry()
+    admin_router.register(reg)
+    handlers = {name: reg.get_command(name).handler for name in admin_router.ADMIN_COMMANDS}
+    assert len(set(handlers.values())) == len(handlers)
+    kick = reg.get_command('kick')
+    assert kick.spec.min_required == 1 and kick.permission == PermissionLevel.ADMIN
+
+    ctx = Mock(spec=CommandContext)
+    ctx.message_out = "message"
+    ctx.admins = {"admin_sid"}
+    emit = Mock()
+    assert reg.dispatch(ctx, "admin_sid", "kick", [], "/kick", emit)
+    emit.assert_called_once_with("message", {'type': 'error', 'content': 'Usage: /kick <playerName>'})
+    ctx.resolve_player_sid_global.assert_not_called()
+    assert not reg.dispatch(ctx, "admin_sid", "world", ["set"], "/world set", emit)
+
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file
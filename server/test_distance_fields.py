@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+"""Tests for shared resource distance fields.
+
+Covers:
+- Next hops and distances toward the nearest food along a corridor of rooms.
+- Incremental relaxation when food appears, rebuild when it disappears.
+- Per-owner bed fields and the 'safe' field used by _find_safe_exits.
+- Quiet ticks return without scanning rooms; only rooms whose versions moved
+  are re-read, and a guard's new description still reaches the safe field.
+- The offline planner walking a hungry NPC toward food in another room.
+"""
+
+from distance_fields import DistanceFields
+from world import CharacterSheet, Object as WObject, Room, World
+
+
+def _corridor(n: int = 4) -> World:
+    """r0 <-> r1 <-> ... <-> r{n-1} with doors named 'east'/'west'."""
+    w = World()
+    for i in range(n):
+        w.rooms[f"r{i}"] = Room(id=f"r{i}", description="")
+    for i in range(n - 1):
+        w.rooms[f"r{i}"].doors["east"] = f"r{i + 1}"
+        w.rooms[f"r{i + 1}"].doors["west"] = f"r{i}"
+    return w
+
+
+def _put(room: Room, name: str, tags: set, uuid: str) -> WObject:
+    obj = WObject(display_name=name, description="", object_tags=set(tags))
+    obj.uuid = uuid
+    room.objects[uuid] = obj
+    return obj
+
+
+def test_food_field_hops_and_incremental_updates():
+    w = _corridor(4)
+    _put(w.rooms["r3"], "Bread", {"Edible: 20"}, "bread-3")
+    fields = DistanceFields()
+    fields.refresh(w)
+    assert fields.next_hop('food', 'r0', w) == ('east', 3)
+    assert fields.next_hop('food', 'r3', w) == (None, 0)
+
+    # New food nearer to r0: incremental relaxation only
+    _put(w.rooms["r1"], "Apple", {"Edible: 10"}, "apple-1")
+    rebuilds = fields.stats['full_rebuilds']
+    fields.refresh(w)
+    assert fields.next_hop('food', 'r0', w) == ('east', 1)
+    assert fields.next_hop('food', 'r2', w)[1] == 1
+    assert fields.stats['full_rebuilds'] == rebuilds
+    assert fields.stats['incremental_updates'] == 1
+
+    # Food eaten: distances grow again
+    del w.rooms["r1"].objects["apple-1"]
+    fields.refresh(w)
+    assert fields.next_hop('food', 'r0', w) == ('east', 3)
+    # Fields built for another world answer nothing
+    assert fields.next_hop('food', 'r0', World()) == (None, None)
+
+
+def test_bed_and_safe_fields():
+    w = _corridor(3)
+    bed = _put(w.rooms["r2"], "Cot", {"bed"}, "cot-2")
+    bed.owner_id = "npc-1"
+    w.rooms["r0"].npcs.add("Guard")
+    w.npc_sheets["Guard"] = CharacterSheet(display_name="Guard", description="A town guard")
+    fields = DistanceFields()
+    fields.refresh(w)
+    assert fields.next_hop_to_bed("npc-1", "r0", w) == ('east', 2)
+    assert fields.next_hop_to_bed("npc-2", "r0", w) == (None, None)
+    assert fields.nearby_hops(w, "r2", "npc-1") == {'safe': 'west'}
+
+    import autonomous_npc_service as ans
+    import distance_fields
+    shared = distance_fields.get_distance_fields()
+    shared.refresh(w)
+    assert ans._find_safe_exits(w, w.rooms["r2"]) == ['west']
+    assert ans._find_safe_exits(w, w.rooms["r0"]) == []
+
+
+def test_quiet_tick_skips_scan_and_rescans_only_changed_rooms():
+    w = _corridor(4)
+    w.rooms["r0"].npcs.add("Guard")
+    sheet = CharacterSheet(display_name="Guard", description="A farmer")
+    w.npc_sheets["Guard"] = sheet
+    fields = DistanceFields()
+    fields.refresh(w)
+    assert fields.stats['rooms_rescanned'] == 4
+    fields.refresh(w)
+    fields.refresh(w)
+    assert fields.stats['quiet_skips'] == 2
+    assert fields.stats['rooms_rescanned'] == 4
+
+    _put(w.rooms["r2"], "Apple", {"Edible: 10"}, "apple-2")
+    fields.refresh(w)
+    assert fields.stats['rooms_rescanned'] == 5  # only r2 was re-read
+    assert fields.next_hop('food', 'r0', w) == ('east', 2)
+
+    w.rooms["r3"].door_locks["west"] = {"allow_ids": []}
+    fields.refresh(w)
+    assert fields.stats['rooms_rescanned'] == 6
+    assert fields.next_hop('food', 'r3', w) == (None, None)
+
+    assert fields.nearby_hops(w, "r1", None).get('safe') is None
+    sheet.description = "A town guard"  # a plain field: no version moves
+    fields.refresh(w)
+    assert fields.stats['quiet_skips'] == 2
+    assert fields.stats['rooms_rescanned'] == 6  # rooms reused, only guards re-read
+    assert fields.nearby_hops(w, "r1", None).get('safe') == 'west'
+    fields.refresh(w)
+    assert fields.stats['quiet_skips'] == 3
+
+
+def test_offline_planner_moves_toward_food_in_other_room():
+    import server as srv
+    import distance_fields
+    w = _corridor(3)
+    _put(w.rooms["r2"], "Bread", {"Edible: 20"}, "bread-2")
+    w.rooms["r0"].npcs.add("Hob")
+    sheet = CharacterSheet(display_name="Hob", description="A wanderer")
+    sheet.hunger = 5.0
+    w.npc_sheets["Hob"] = sheet
+    srv.world = w
+    distance_fields.get_distance_fields().refresh(w)
+
+    plan = srv.game_loop._npc_offline_plan("Hob", w.rooms["r0"], sheet)
+    assert plan == [{'tool': 'move_through', 'args': {'name': 'east'}}]
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+"""Tests for the cached fuzzy resolver index.
+
+Covers:
+- FuzzyIndex gives exactly the scan's results and messages (randomized).
+- world.rooms / room.doors lookups use the cached index and see changes.
+- Player lookups follow joins, leaves and renames.
+"""
+
+import random
+
+from id_parse_utils import FuzzyIndex, fuzzy_resolve, resolve_door_name, resolve_player_sid_global, resolve_room_id
+from versioned import VersionedDict
+from world import Room, World
+
+
+def test_index_matches_scan_randomized():
+    rng = random.Random(7)
+    alphabet = 'abAB cx-_'
+    for _ in range(200):
+        names = [''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 7))) for _ in range(rng.randint(1, 25))]
+        index = FuzzyIndex(names)
+        probes = names + [n[:k] for n in names for k in (1, 2, 3)] + [n[1:4] for n in names] + ['', ' ', 'zz', 'q', 'Ab']
+        for typed in probes:
+            assert index.resolve(typed) == fuzzy_resolve(typed, list(names)), (names, typed)
+
+
+def test_rooms_and_doors_use_cached_index():
+    w = World()
+    for rid in ('tavern', 'tavern_cellar', 'town_square', 'market'):
+        w.rooms[rid] = Room(id=rid, description=rid)
+    assert isinstance(w.rooms, VersionedDict)
+    assert resolve_room_id(w, 'mark') == (True, None, 'market')
+    first = w.rooms.derived['fuzzy'][1]
+    assert resolve_room_id(w, 'tav') == (False, 'Ambiguous id. Did you mean: tavern, tavern_cellar ?', None)
+    assert w.rooms.derived['fuzzy'][1] is first
+
+    w.rooms['harbor'] = Room(id='harbor', description='Docks')
+    assert resolve_room_id(w, 'harb') == (True, None, 'harbor')
+    assert resolve_room_id(w, 'tx') == (False, "'tx' not found. Did you mean: tavern, tavern_cellar, town_square?", None)
+
+    room = w.rooms['tavern']
+    room.doors = {'oak door': 'market'}
+    assert resolve_door_name(room, 'oak') == (True, None, 'oak door')
+    room.doors['iron door'] = 'tavern_cellar'
+    assert resolve_door_name(room, 'door')[1] == 'Ambiguous id. Did you mean: iron door, oak door ?'
+
+
+def test_player_lookup_follows_joins_and_renames():
+    w = World()
+    w.rooms['hall'] = Room(id='hall', description='Hall')
+    w.add_player('s1', name='Alice', room_id='hall')
+    assert resolve_player_sid_global(w, 'ali') == (True, None, 's1', 'Alice')
+
+    w.add_player('s2', name='Alina', room_id='hall')
+    assert resolve_player_sid_global(w, 'ali')[1] == 'Ambiguous id. Did you mean: Alice, Alina ?'
+
+    w.players['s2'].sheet.display_name = 'Bob'
+    assert resolve_player_sid_global(w, 'ali') == (True, None, 's1', 'Alice')
+    assert resolve_player_sid_global(w, 'bo') == (True, None, 's2', 'Bob')
+
+    w.remove_player('s1')
+    assert resolve_player_sid_global(w, 'ali')[1] == "'ali' not found."
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+"""Tests for the A* GOAP planner.
+
+Covers:
+- Abstract plans finish one need before starting the next.
+- Memoization per (start, goal) state.
+- Binding to concrete objects: room food, trades with other NPCs, bed claims.
+- Fleeing overrides other needs; unmeetable needs don't block the rest.
+"""
+
+import goap_planner as gp
+from world import CharacterSheet, Object as WObject, Room
+
+
+def _nutrition(obj):
+    tags = {str(t).lower() for t in (getattr(obj, 'object_tags', set()) or set())}
+    return (20 if 'edible: 20' in tags else 0, 20 if 'drinkable: 20' in tags else 0)
+
+
+def _obj(name: str, *tags: str, value: int = 0) -> WObject:
+    o = WObject(display_name=name, description="", object_tags=set(tags))
+    o.uuid = name.lower() + "-uuid"
+    o.value = value
+    return o
+
+
+def _sheet(**needs) -> CharacterSheet:
+    sheet = CharacterSheet(display_name="Pim", description="An NPC")
+    for key, val in needs.items():
+        setattr(sheet, key, val)
+    return sheet
+
+
+def test_astar_orders_needs_and_memoizes():
+    gp.clear_memo()
+    start = gp.HUNGRY | gp.THIRSTY | gp.FOOD_HERE | gp.DRINK_HERE
+    goal = gp.HUNGRY | gp.THIRSTY
+    assert gp.plan_abstract(start, goal) == ('get_food', 'eat', 'get_drink', 'drink')
+    before = gp.get_planner_stats()['memo_hits']
+    gp.plan_abstract(start, goal)
+    assert gp.get_planner_stats()['memo_hits'] == before + 1
+
+
+def test_binds_room_food_and_buys_drink_from_npc():
+    room = Room(id="camp", description="A camp")
+    bread = _obj("Bread", "Edible: 20")
+    room.objects[bread.uuid] = bread
+    seller = _sheet()
+    water = _obj("Water", "Drinkable: 20", value=3)
+    seller.inventory.slots[0] = water
+    sheet = _sheet(hunger=5.0, thirst=5.0, currency=10)
+    facts = gp.gather_facts("Pim", "pim-id", room, sheet, 25.0, _nutrition, {"Vend": seller})
+    plan = gp.plan_needs(facts)
+    assert plan == [
+        {'tool': 'get_object', 'args': {'object_name': 'Bread'}},
+        {'tool': 'consume_object', 'args': {'object_uuid': 'bread-uuid'}},
+        {'tool': 'trade', 'args': {'target_name': 'Vend', 'object_uuid': 'water-uuid', 'price': 3}},
+        {'tool': 'consume_object', 'args': {'object_uuid': 'water-uuid'}},
+    ]
+
+
+def test_claims_free_bed_before_sleeping():
+    room = Room(id="inn", description="An inn")
+    bed = _obj("Cot", "Bed")
+    room.objects[bed.uuid] = bed
+    facts = gp.gather_facts("Pim", "pim-id", room, _sheet(sleep=5.0), 25.0, _nutrition)
+    assert [s['tool'] for s in gp.plan_needs(facts)] == ['claim', 'sleep']
+
+
+def test_flee_overrides_and_unmeetable_needs_are_skipped():
+    room = Room(id="alley", description="A dark alley")
+    room.doors = {"gate": "square"}
+    scared = _sheet(safety=10.0, hunger=5.0)
+    facts = gp.gather_facts("Pim", "pim-id", room, scared, 25.0, _nutrition)
+    assert gp.plan_needs(facts) == [{'tool': 'move_through', 'args': {'name': 'gate'}}]
+    # Hungry with no food anywhere, but lonely: still emotes
+    lonely = _sheet(hunger=5.0, socialization=5.0)
+    facts = gp.gather_facts("Pim", "pim-id", room, lonely, 25.0, _nutrition)
+    assert [s['tool'] for s in gp.plan_needs(facts)] == ['emote']
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+"""Tests for one-pass NPC mention matching.
+
+Covers:
+- The automaton agrees with the per-name word-boundary regex (randomized,
+  including overlapping and punctuated names).
+- Non-ASCII names and messages follow re's rules.
+- room.npcs caches its matcher and rebuilds it when an NPC arrives.
+"""
+
+import random
+
+from dialogue_utils import extract_npc_mentions
+from mention_matcher import MentionMatcher, regex_mentioned
+from world import Room
+
+
+def test_matches_regex_randomized():
+    rng = random.Random(11)
+    pieces = ['al', 'Al', 'ice', 'bob', 'gate', ' ', '-', "'", '_', '1', '.', 'Gate Guard']
+    for _ in range(300):
+        names = list({''.join(rng.choice(pieces) for _ in range(rng.randint(1, 3))) for _ in range(rng.randint(1, 8))})
+        matcher = MentionMatcher(names)
+        for _ in range(10):
+            text = ''.join(rng.choice(pieces) for _ in range(rng.randint(0, 12)))
+            expected = [n for n in names if regex_mentioned(n, text)]
+            assert matcher.mentions(text) == expected, (names, text)
+
+
+def test_unicode_names_and_text():
+    matcher = MentionMatcher(['José', 'Kane', 'Ann'])
+    assert matcher.mentions('hola JOSÉ, where is ann?') == ['José', 'Ann']
+    # re folds the Kelvin sign to 'k'; the regex path keeps that
+    assert matcher.mentions('\u212aane!') == ['Kane']
+    assert matcher.mentions('Annie and Joséphine') == []
+
+
+def test_room_matcher_cached_until_npcs_change():
+    room = Room(id='hub', description='Hub')
+    room.npcs.update({'Gate Guard', 'Innkeeper', 'Thief'})
+    line = 'Innkeeper, please tell the gate guard to relax.'
+    assert sorted(extract_npc_mentions(line, room.npcs)) == ['Gate Guard', 'Innkeeper']
+    first = room.npcs.derived['mentions'][1]
+    extract_npc_mentions('hello thief', room.npcs)
+    assert room.npcs.derived['mentions'][1] is first
+
+    room.npcs.add('Old Tom')
+    assert extract_npc_mentions('Old Tom!', room.npcs) == ['Old Tom']
+    assert room.npcs.derived['mentions'][1] is not first
+    # Plain lists keep their own order
+    assert extract_npc_mentions(line, ['Innkeeper', 'Gate Guard']) == ['Innkeeper', 'Gate Guard']
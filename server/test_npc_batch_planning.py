@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+"""Tests for batched multi-NPC GOAP planning.
+
+Covers:
+- Several hungry NPCs in one room are planned with a single model call.
+- The batched prompt is shorter than the equivalent single-NPC prompts combined.
+- A malformed entry for one NPC falls back to the offline planner for that NPC only.
+"""
+
+import json
+
+from mock_ai import MockAIModel, create_goap_planning_mock
+from world import CharacterSheet, Object as WObject, Room
+
+
+NPCS = ["Alda", "Bram", "Cora"]
+
+
+def _setup_room(srv) -> Room:
+    room = Room(id="tavern", description="A smoky tavern")
+    bread = WObject(display_name="Bread", description="", object_tags={"Edible: 20"})
+    bread.uuid = "bread-uuid"
+    room.objects[bread.uuid] = bread
+    room.players.add("sid-watcher")
+    srv.world.rooms[room.id] = room
+    srv.world.advanced_goap_enabled = True
+    for name in NPCS:
+        room.npcs.add(name)
+        sheet = CharacterSheet(display_name=name, description="A regular")
+        sheet.hunger = 5.0
+        srv.world.npc_sheets[name] = sheet
+    return room
+
+
+def test_batch_planning_uses_one_call_for_room(monkeypatch):
+    import server as srv
+    room = _setup_room(srv)
+    mock = create_goap_planning_mock()
+    monkeypatch.setattr(srv, "plan_model", mock)
+
+    srv.npc_think_room(room.id, list(NPCS))
+
+    assert mock.call_count == 1
+    assert mock.get_last_prompt().startswith("BATCH PLANNING REQUEST")
+    for name in NPCS:
+        plan = srv.world.npc_sheets[name].plan_queue
+        assert [step["tool"] for step in plan] == ["get_object", "consume_object"]
+
+
+def test_batch_prompt_is_shorter_than_single_prompts():
+    import server as srv
+    import npc_planning_service as nps
+    room = _setup_room(srv)
+    entries = [(name, srv.world.npc_sheets[name]) for name in NPCS]
+    batch = nps.build_batch_prompt(entries, room, srv._nutrition_from_tags_or_fields)
+    singles = sum(
+        len(nps.build_single_prompt(name, sheet, room, srv._nutrition_from_tags_or_fields))
+        for name, sheet in entries
+    )
+    assert len(batch) < singles
+
+
+def test_malformed_entry_falls_back_to_offline_plan(monkeypatch):
+    import server as srv
+    room = _setup_room(srv)
+    good = [{"tool": "emote", "args": {"message": "hums"}}]
+    mock = MockAIModel()
+    mock.add_response_pattern(
+        r"^BATCH PLANNING REQUEST",
+        json.dumps({"Alda": good, "Bram": good, "Cora": "not a plan"}),
+    )
+    monkeypatch.setattr(srv, "plan_model", mock)
+
+    srv.npc_think_room(room.id, list(NPCS))
+
+    assert mock.call_count == 1
+    assert srv.world.npc_sheets["Alda"].plan_queue == good
+    assert srv.world.npc_sheets["Bram"].plan_queue == good
+    cora_plan = srv.world.npc_sheets["Cora"].plan_queue
+    # Offline planner reaches for the bread when hungry
+    assert cora_plan and cora_plan[0]["tool"] == "get_object"
@@ -50,7 +50,7 @@ def test_npc_grumble_on_missing_item(monkeypatch):
     action = sheet.plan_queue.pop(0)
     ok, reason = server._npc_execute_action(npc_name, 'r1', action)
     if not ok:
-        server._npc_grumble_failure(npc_name, 'r1', action, reason)
+        game_loop._npc_grumble_failure(npc_name, 'r1', action, reason)
         
     # Assertions
     assert len(broadcasts) > 0
@@ -90,7 +90,7 @@ def test_npc_grumble_on_locked_door(monkeypatch):
     # server.world IS the global world we patched.
     ok, reason = server._npc_execute_action(npc_name, 'r1', action)
     if not ok:
-        server._npc_grumble_failure(npc_name, 'r1', action, reason)
+        game_loop._npc_grumble_failure(npc_name, 'r1', action, reason)
     
     # Assertions
     # Depending on implementation, it might broadcast "triest the door" THEN grumble
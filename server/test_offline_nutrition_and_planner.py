@@ -5,7 +5,7 @@ from __future__ import annotations
 Covers:
 - _nutrition_from_tags_or_fields correctly preferring numeric tags and not
   falling back when a tag key exists without a number.
-- _npc_offline_plan chooses get/consume actions for drinkable items when thirst
+- game_loop._npc_offline_plan chooses get/consume actions for drinkable items when thirst
   is below threshold.
 """
 
@@ -44,7 +44,7 @@ def test_offline_plan_prefers_drink_when_thirst_low(monkeypatch):
     # Make thirst low to trigger drink plan, hunger ok
     sheet.hunger = 80.0
     sheet.thirst = 0.0
-    plan = srv._npc_offline_plan("Innkeeper", room, sheet)
+    plan = srv.game_loop._npc_offline_plan("Innkeeper", room, sheet)
     # Expect get_object followed by consume_object referring to the same uuid
     assert len(plan) >= 2
     assert plan[0].get("tool") == "get_object"
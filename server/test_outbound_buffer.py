@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+"""Tests for per-client outbound coalescing.
+
+Covers:
+- Batch-capable clients get one 'messages' event; older clients get the same
+  payloads one by one; a lone payload is never wrapped.
+- The connect greeting is one frame for clients that announced batching.
+- A room broadcast reaching a client with held replies queues behind them.
+- Buffers are per sid: a handler that finishes while another sid's handler
+  is still running (yielded on a model call) flushes its own replies at once.
+"""
+
+import outbound_buffer
+import room_membership
+from outbound_buffer import MESSAGE_BATCH, OutboundBuffer
+from world import Room
+
+
+def _line(text: str) -> dict:
+    return {'type': 'system', 'content': text}
+
+
+def test_flush_batches_only_for_capable_clients():
+    buf = OutboundBuffer()
+    one: list[tuple] = []
+    many: list[tuple] = []
+    buf.set_batch_capable('new', True)
+    assert buf.add('new', _line('x')) is False  # closed: send immediately
+
+    for sid in ('new', 'old', 'solo'):
+        buf.begin(sid)
+    buf.begin('new')
+    for text in ('a', 'b'):
+        buf.add('new', _line(text))
+        buf.add('old', _line(text))
+    buf.add('solo', _line('only'))
+    assert buf.end('new', lambda *a: one.append(a), lambda *a: many.append(a)) == 0
+    assert buf.end('new', lambda *a: one.append(a), lambda *a: many.append(a)) == 1
+    assert buf.end('old', lambda *a: one.append(a), lambda *a: many.append(a)) == 2
+    assert buf.end('solo', lambda *a: one.append(a), lambda *a: many.append(a)) == 1
+
+    assert many == [('new', [_line('a'), _line('b')])]
+    assert one == [('old', _line('a')), ('old', _line('b')), ('solo', _line('only'))]
+    assert buf.stats == {'payloads': 5, 'frames': 4, 'batches': 1}
+
+
+class FakeSocketIO:
+    def __init__(self):
+        self.emits: list[tuple] = []
+
+    def emit(self, event, payload=None, to=None, skip_sid=None, **kwargs):
+        self.emits.append((event, payload, to, skip_sid))
+
+
+def _setup(srv, monkeypatch):
+    fake = FakeSocketIO()
+    monkeypatch.setattr(srv, "socketio", fake)
+    monkeypatch.setattr(srv, "get_sid", lambda: "sid-a")
+    srv.world.rooms["hall"] = Room(id="hall", description="A long hall.")
+    srv.world.start_room_id = "hall"
+    srv.world.add_player("sid-a", name="Ann", room_id="hall")
+    outbound_buffer.get_outbound_buffer().set_batch_capable("sid-a", True)
+    return fake
+
+
+def test_connect_greeting_is_one_frame_for_new_clients(monkeypatch):
+    import server as srv
+    fake = _setup(srv, monkeypatch)
+
+    srv.handle_connect({'batch': True})
+    assert len(fake.emits) == 1
+    event, payloads, to, _ = fake.emits[0]
+    assert (event, to) == (MESSAGE_BATCH, "sid-a")
+    assert len(payloads) >= 3
+
+    # Older clients (no auth payload) get the same lines as separate events
+    fake.emits.clear()
+    srv.handle_connect()
+    assert [p for _, p, _, _ in fake.emits] == payloads
+    assert {e for e, _, _, _ in fake.emits} == {'message'}
+
+
+def test_broadcast_queues_behind_held_replies(monkeypatch):
+    import server as srv
+    fake = _setup(srv, monkeypatch)
+    room_membership.get_room_membership().bind(None)
+    buf = outbound_buffer.get_outbound_buffer()
+    srv.world.rooms["hall"].players.add("sid-b")
+
+    buf.begin("sid-a")
+    srv.emit('message', _line('first'))
+    srv.broadcast_to_room("hall", _line('bell'))
+    srv._flush_outbound("sid-a")
+
+    # sid-b had nothing held: sent at once. sid-a gets both lines, in order.
+    assert ('message', _line('bell'), 'sid-b', None) in fake.emits
+    assert (MESSAGE_BATCH, [_line('first'), _line('bell')], 'sid-a', None) in fake.emits
+    assert len(fake.emits) == 2
+
+
+def test_interleaved_handlers_flush_their_own_sid(monkeypatch):
+    import server as srv
+    fake = _setup(srv, monkeypatch)
+    current = ["sid-a"]
+    monkeypatch.setattr(srv, "get_sid", lambda: current[0])
+    outbound_buffer.get_outbound_buffer().set_batch_capable("sid-b", True)
+    b_frames_while_a_open = []
+
+    def inner(data):
+        srv.emit('message', _line(data['content'] + '-1'))
+        if current[0] == "sid-a":
+            # A yields (say, waiting on the model); B's handler runs meanwhile
+            current[0] = "sid-b"
+            srv.handle_message({'content': 'b'})
+            b_frames_while_a_open.extend(e for e in fake.emits if e[2] == "sid-b")
+            current[0] = "sid-a"
+        srv.emit('message', _line(data['content'] + '-2'))
+
+    monkeypatch.setattr(srv, "_handle_message_inner", inner)
+    srv.handle_message({'content': 'a'})
+
+    assert b_frames_while_a_open == [(MESSAGE_BATCH, [_line('b-1'), _line('b-2')], "sid-b", None)]
+    assert fake.emits[-1] == (MESSAGE_BATCH, [_line('a-1'), _line('a-2')], "sid-a", None)
+    assert len(fake.emits) == 2
+    assert not outbound_buffer.get_outbound_buffer().active
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+"""Tests for the NPC plan cache.
+
+Covers:
+- NPCs with the same need/personality bands in one room share a cached plan.
+- Changing the room's objects invalidates its cached plans; the room part of
+  the key is its objects/exits versions, not a scan of every object.
+- Cached plans referring to vanished objects are rejected, not installed.
+- LRU eviction keeps the cache bounded.
+- Tick stats report the plan cache hit rate.
+"""
+
+import plan_cache
+from world import CharacterSheet, Object as WObject, Room
+
+
+def _setup(srv, names=("Alda", "Bram")) -> Room:
+    room = Room(id="kitchen", description="A warm kitchen")
+    bread = WObject(display_name="Bread", description="", object_tags={"Edible: 20"})
+    bread.uuid = "bread-uuid"
+    room.objects[bread.uuid] = bread
+    srv.world.rooms[room.id] = room
+    for name in names:
+        room.npcs.add(name)
+        sheet = CharacterSheet(display_name=name, description="A cook")
+        sheet.hunger = 10.0
+        srv.world.npc_sheets[name] = sheet
+    return room
+
+
+def test_similar_npcs_share_cached_plan():
+    import server as srv
+    _setup(srv)
+    cache = plan_cache.get_plan_cache()
+    srv.npc_think("Alda")
+    srv.npc_think("Bram")
+    assert cache.hits == 1
+    assert cache.misses == 1
+    assert srv.world.npc_sheets["Alda"].plan_queue == srv.world.npc_sheets["Bram"].plan_queue
+
+
+def test_room_object_change_invalidates():
+    import server as srv
+    room = _setup(srv)
+    cache = plan_cache.get_plan_cache()
+    srv.npc_think("Alda")
+    water = WObject(display_name="Water", description="", object_tags={"Drinkable: 20"})
+    water.uuid = "water-uuid"
+    room.objects[water.uuid] = water
+    srv.npc_think("Bram")
+    assert cache.hits == 0
+    assert cache.invalidations == 1
+
+
+def test_room_key_uses_versions_not_object_scan(monkeypatch):
+    import server as srv
+    room = _setup(srv)
+    for i in range(50):
+        junk = WObject(display_name=f"Pebble {i}", description="")
+        room.objects[junk.uuid] = junk
+    nutrition = srv._nutrition_from_tags_or_fields
+    sig = plan_cache.room_signature(room, nutrition)
+    assert sig == ((room.objects.version, room.doors.version), ())
+    monkeypatch.setattr(plan_cache, '_layout_scan', lambda *a: (_ for _ in ()).throw(AssertionError('scanned')))
+    srv._plan_cache_key('offline', "Alda", srv.world.npc_sheets["Alda"], room)
+
+    bread = room.objects["bread-uuid"]
+    bread.owner_id = "npc-1"
+    assert plan_cache.room_signature(room, nutrition) != sig
+    sig = plan_cache.room_signature(room, nutrition)
+    bread.display_name = "Stale bread"
+    assert plan_cache.room_signature(room, nutrition) != sig
+    sig = plan_cache.room_signature(room, nutrition)
+    bread.description = "Crusty"  # planners never read it
+    assert plan_cache.room_signature(room, nutrition) == sig
+
+
+def test_cached_plan_with_missing_uuid_is_rejected():
+    import server as srv
+    room = _setup(srv)
+    cache = plan_cache.get_plan_cache()
+    sheet = srv.world.npc_sheets["Alda"]
+    key = srv._plan_cache_key('offline', "Alda", sheet, room)
+    cache.put(key, [{'tool': 'consume_object', 'args': {'object_uuid': 'gone-uuid'}}])
+    assert cache.get(key, room, sheet) is None
+    assert cache.stats()['size'] == 0
+
+
+def test_lru_eviction_is_bounded():
+    cache = plan_cache.PlanCache(capacity=2)
+    plan = [{'tool': 'do_nothing', 'args': {}}]
+    for i in range(3):
+        cache.put(('offline', 'r', i), plan)
+    assert cache.stats()['size'] == 2
+    assert ('offline', 'r', 0) not in cache._entries
+
+
+def test_tick_stats_report_hit_rate():
+    import server as srv
+    import game_loop
+    _setup(srv)
+    srv._world_tick_once()
+    stats = game_loop.get_tick_stats()
+    assert stats['ticks'] >= 1
+    assert stats['plan_cache']['hits'] == 1
+    assert 0.0 < stats['plan_cache']['hit_rate'] <= 1.0
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+"""Tests for rate limiter eviction, tiers and counters.
+
+Covers:
+- Buckets run on the injected monotonic clock and idle buckets are evicted by
+  the timer wheel after the TTL; active ones are kept.
+- The bucket cap holds under connection churn.
+- The per-IP tier survives a reconnect with a fresh SID.
+- Keyed server-side callers get their own buckets; rejections are counted
+  per OperationType.
+"""
+
+import pytest
+
+from rate_limiter import OperationType, RateLimiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def limiter_env(monkeypatch):
+    monkeypatch.setenv('MUD_RATE_ENABLE', '1')
+    monkeypatch.setenv('MUD_RATE_CAPACITY', '10')
+    monkeypatch.setenv('MUD_RATE_REFILL_PER_SEC', '1')
+    monkeypatch.setenv('MUD_RATE_BUCKET_TTL', '60')
+    monkeypatch.setenv('MUD_RATE_LOG_VIOLATIONS', '0')
+    return monkeypatch
+
+
+def test_idle_buckets_evicted_after_ttl(limiter_env):
+    clock = Clock()
+    limiter = RateLimiter(clock=clock)
+    assert limiter.check_and_consume('idle', OperationType.BASIC)
+    assert limiter.check_and_consume('busy', OperationType.BASIC)
+    for _ in range(8):
+        clock.now += 10
+        assert limiter.check_and_consume('busy', OperationType.BASIC)
+    assert limiter.bucket_count() == 1
+    assert limiter.evictions == 1
+
+    clock.now += 61
+    limiter.check_and_consume('other', OperationType.BASIC)
+    assert limiter.bucket_count() == 1 and limiter.evictions == 2
+
+
+def test_bucket_cap_under_churn(limiter_env):
+    limiter_env.setenv('MUD_RATE_MAX_BUCKETS', '100')
+    clock = Clock()
+    limiter = RateLimiter(clock=clock)
+    for i in range(5000):
+        clock.now += 0.001
+        limiter.check_and_consume(f'sid-{i}', OperationType.BASIC)
+        limiter.bind_ip(f'sid-{i}', '10.0.0.1')
+    assert limiter.bucket_count() <= 100
+    assert len(limiter._sid_ips) <= 100
+
+
+def test_ip_tier_survives_reconnect(limiter_env):
+    limiter_env.setenv('MUD_RATE_IP_ENABLE', '1')
+    limiter_env.setenv('MUD_RATE_IP_CAPACITY', '30')
+    limiter_env.setenv('MUD_RATE_IP_REFILL_PER_SEC', '0')
+    limiter = RateLimiter(clock=Clock())
+    allowed = 0
+    for attempt in range(10):
+        sid = f'spam-{attempt}'
+        limiter.bind_ip(sid, '203.0.113.9')
+        while limiter.check_and_consume(sid, OperationType.MODERATE):
+            allowed += 1
+        limiter.forget_sid(sid)
+    assert allowed == 10  # 30 IP tokens / 3 per MODERATE, however many SIDs
+    assert limiter.ip_rejections['MODERATE'] >= 1
+    # Another address is unaffected
+    limiter.bind_ip('fresh', '198.51.100.7')
+    assert limiter.check_and_consume('fresh', OperationType.MODERATE)
+
+
+def test_keyed_callers_and_rejection_counts(limiter_env):
+    limiter = RateLimiter(clock=Clock())
+    assert limiter.check_and_consume(None, OperationType.HEAVY, 'plan', key='npc_goap_plan_Ann')
+    assert limiter.check_and_consume(None, OperationType.HEAVY, 'plan', key='npc_goap_plan_Bob')
+    assert not limiter.check_and_consume(None, OperationType.HEAVY, 'plan', key='npc_goap_plan_Ann')
+    assert set(limiter.keyed_buckets) == {'npc_goap_plan_Ann', 'npc_goap_plan_Bob'}
+    assert limiter.rejections['HEAVY'] == 1 and limiter.rejections['BASIC'] == 0
+    # Anonymous callers without a key still share one bucket
+    assert limiter.check_and_consume(None, OperationType.BASIC, 'anon')
+    assert 'anonymous' in limiter._buckets
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+"""Tests for the per-room resource index.
+
+Covers:
+- Inserts, pops, deletes and clears keep categories and counts in step.
+- Assigning tags, owner or value on a contained object re-categorizes it.
+- find() keeps room order and applies predicates; plain dicts are wrapped.
+"""
+
+import room_index
+from world import Object as WObject, Room
+
+
+def _obj(name: str, uuid: str, tags=None, **fields) -> WObject:
+    obj = WObject(display_name=name, description="", object_tags=set(tags or {"small"}), **fields)
+    obj.uuid = uuid
+    return obj
+
+
+def test_insert_remove_and_counts():
+    room = Room(id="hall", description="")
+    room.objects["b1"] = _obj("Bread", "b1", {"Edible: 10"})
+    room.objects["w1"] = _obj("Water", "w1", {"Drinkable: 5"})
+    room.objects["cot"] = _obj("Cot", "cot", {"bed"})
+    room.objects["gem"] = _obj("Gem", "gem", value=50, owner_id="someone")
+    assert room_index.counts(room) == {'edible': 1, 'drinkable': 1, 'bed': 1, 'valuable': 1, 'unowned': 3}
+
+    room.objects.pop("b1")
+    del room.objects["w1"]
+    assert room_index.count(room, 'edible') == 0
+    assert room_index.count(room, 'drinkable') == 0
+    assert room_index.count(room, 'unowned') == 1
+    room.objects.clear()
+    assert all(n == 0 for n in room_index.counts(room).values())
+
+
+def test_attribute_changes_reindex():
+    room = Room(id="hall", description="")
+    cot = _obj("Cot", "cot", {"bed"})
+    room.objects[cot.uuid] = cot
+    cot.owner_id = "npc-1"
+    assert room_index.find(room, 'unowned') == []
+    cot.object_tags = {"bed", "Edible: 3"}
+    assert room_index.find(room, 'edible') == [cot]
+    cot.value = 20
+    assert room_index.find(room, 'valuable') == [cot]
+
+    # Once removed, later edits no longer touch the room
+    room.objects.pop(cot.uuid)
+    cot.owner_id = None
+    assert room_index.count(room, 'unowned') == 0
+
+
+def test_find_order_predicate_and_plain_dict_wrapping():
+    a = _obj("Apple", "a", {"Edible: 5"}, value=3)
+    b = _obj("Bun", "b", {"Edible: 9"}, value=8)
+    room = Room(id="kitchen", description="", objects={"b": b, "a": a})
+    assert isinstance(room.objects, room_index.RoomObjects)
+    assert room_index.find(room, 'edible') == [b, a]
+    assert room_index.find(room, 'edible', lambda o: o.value > 5) == [b]
+
+    room.objects = {"a": a}
+    assert room_index.find(room, 'edible') == [a]
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+"""Tests for mirroring game rooms onto Socket.IO rooms.
+
+Covers:
+- add/move/remove_player enter and leave the matching Socket.IO rooms.
+- A room broadcast is one channel emit (skip_sid for the excluded player),
+  with per-sid emits only for sids that could not join.
+"""
+
+import room_membership
+from world import Room
+
+
+class FakeServer:
+    """Minimal python-socketio server: only 'connected' sids may enter rooms."""
+
+    def __init__(self, connected):
+        self.connected = set(connected)
+        self.rooms: dict[str, set[str]] = {}
+
+    def enter_room(self, sid, room, namespace=None):
+        if sid not in self.connected:
+            raise ValueError('sid is not connected to requested namespace')
+        self.rooms.setdefault(room, set()).add(sid)
+
+    def leave_room(self, sid, room, namespace=None):
+        self.rooms.get(room, set()).discard(sid)
+
+
+class FakeSocketIO:
+    def __init__(self, connected):
+        self.server = FakeServer(connected)
+        self.emits: list[tuple] = []
+
+    def emit(self, event, payload=None, to=None, skip_sid=None, **kwargs):
+        self.emits.append((to, skip_sid, payload))
+
+
+def _setup(srv, monkeypatch, connected):
+    fake = FakeSocketIO(connected)
+    monkeypatch.setattr(srv, "socketio", fake)
+    room_membership.get_room_membership().bind(fake)
+    for rid in ("hall", "yard"):
+        srv.world.rooms[rid] = Room(id=rid, description=rid)
+    return fake
+
+
+def test_world_placement_joins_and_leaves(monkeypatch):
+    import server as srv
+    fake = _setup(srv, monkeypatch, connected={"s1", "s2"})
+    srv.world.add_player("s1", name="Ann", room_id="hall")
+    srv.world.add_player("s2", name="Ben", room_id="hall")
+    assert fake.server.rooms["room:hall"] == {"s1", "s2"}
+
+    srv.world.move_player("s1", "yard")
+    assert fake.server.rooms["room:hall"] == {"s2"}
+    assert fake.server.rooms["room:yard"] == {"s1"}
+    assert room_membership.get_room_membership().room_of("s1") == "yard"
+
+    srv.world.remove_player("s2")
+    assert fake.server.rooms["room:hall"] == set()
+    assert room_membership.get_room_membership().room_of("s2") is None
+
+
+def test_broadcast_is_one_channel_emit_plus_loose_sids(monkeypatch):
+    import server as srv
+    fake = _setup(srv, monkeypatch, connected={"s1", "s2"})
+    srv.world.add_player("s1", name="Ann", room_id="hall")
+    srv.world.add_player("s2", name="Ben", room_id="hall")
+    srv.world.rooms["hall"].players.add("observer")  # never connected: can't join
+    payload = {'type': 'system', 'content': 'A bell rings.'}
+
+    srv.broadcast_to_room("hall", payload, exclude_sid="s1")
+
+    assert sorted(fake.emits, key=str) == sorted([
+        ("room:hall", "s1", payload),
+        ("observer", None, payload),
+    ], key=str)
+
+    # A joined sid that left room.players some other way is dropped, not messaged
+    fake.emits.clear()
+    srv.world.rooms["hall"].players.discard("s2")
+    srv.broadcast_to_room("hall", payload, exclude_sid="observer")
+    assert fake.emits == [("room:hall", None, payload)]
+    assert fake.server.rooms["room:hall"] == {"s1"}
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+"""Tests for bounded per-client send queues.
+
+Covers:
+- Healthy clients are sent to at once; slow ones queue and drain in order.
+- Over the bound, the oldest ambient entries go first; at the high-water mark
+  the client is disconnected.
+- Room broadcasts serve a slow channel member from its queue.
+- Per-client sends from routers (whispers) and unbuffered replies go through
+  the queues too.
+"""
+
+import room_membership
+from send_queue import SendQueues
+from world import Room
+
+
+def _line(text: str) -> dict:
+    return {'type': 'system', 'content': text}
+
+
+def _queues(backlog: dict, **kwargs):
+    sent: list[tuple] = []
+    dropped_clients: list[str] = []
+    q = SendQueues(**kwargs)
+    q.bind(
+        lambda sid, event, payload: sent.append((sid, payload['content'])),
+        backlog=lambda sid: backlog.get(sid, 0),
+        disconnect=dropped_clients.append,
+    )
+    return q, sent, dropped_clients
+
+
+def test_slow_client_queues_then_drains_in_order():
+    backlog = {'slow': 10}
+    q, sent, _ = _queues(backlog, backlog_limit=5)
+    q.send('fast', 'message', _line('hi'))
+    q.send('slow', 'message', _line('one'))
+    q.send('slow', 'message', _line('two'))
+    assert sent == [('fast', 'hi')]
+    assert q.depth('slow') == 2
+    assert sorted(q.depths()) == [2]
+    assert q.snapshot()['clients']['slow'] == {'depth': 2, 'dropped': 0, 'peak': 2}
+
+    backlog['slow'] = 0
+    assert q.drain() == 2
+    assert sent[1:] == [('slow', 'one'), ('slow', 'two')]
+    assert q.depth('slow') == 0
+    # Once drained, new messages go straight out again
+    q.send('slow', 'message', _line('three'))
+    assert sent[-1] == ('slow', 'three')
+
+
+def test_ambient_dropped_first_then_disconnect():
+    q, sent, cut = _queues({'slow': 99}, backlog_limit=5, max_depth=3, high_water=5)
+    with q.ambient():
+        q.send('slow', 'message', _line('chatter-1'))
+        q.send('slow', 'message', _line('chatter-2'))
+    for text in ('reply-1', 'reply-2'):
+        q.send('slow', 'message', _line(text))
+    # Fourth entry pushed the queue over 3: the oldest ambient line went
+    contents = [p['content'] for _, p, _ in q._queues['slow'].entries]
+    assert contents == ['chatter-2', 'reply-1', 'reply-2']
+    assert q.stats['dropped'] == 1
+
+    q.send('slow', 'message', _line('reply-3'))   # drops chatter-2
+    q.send('slow', 'message', _line('reply-4'))   # nothing ambient left
+    assert q.send('slow', 'message', _line('reply-5')) is False
+    assert cut == ['slow']
+    assert q.depth('slow') == 0 and q.stats['disconnects'] == 1
+    assert sent == []
+
+
+def test_broadcast_routes_slow_member_through_queue(monkeypatch):
+    import server as srv
+    import send_queue
+
+    class FakeServer:
+        def enter_room(self, sid, room, namespace=None):
+            pass
+
+        def leave_room(self, sid, room, namespace=None):
+            pass
+
+    class FakeSocketIO:
+        server = FakeServer()
+
+        def __init__(self):
+            self.emits: list[tuple] = []
+
+        def emit(self, event, payload=None, to=None, skip_sid=None, **kwargs):
+            self.emits.append((to, skip_sid))
+
+    fake = FakeSocketIO()
+    monkeypatch.setattr(srv, "socketio", fake)
+    room_membership.get_room_membership().bind(fake)
+    srv.world.rooms["hall"] = Room(id="hall", description="A hall")
+    srv.world.add_player("s1", name="Ann", room_id="hall")
+    srv.world.add_player("s2", name="Ben", room_id="hall")
+    queues = send_queue.get_send_queues()
+    backlog = {"s2": 1000}
+    monkeypatch.setattr(queues, "_backlog", lambda sid: backlog.get(sid, 0))
+
+    srv.broadcast_to_room("hall", _line("bell"))
+    assert fake.emits == [("room:hall", "s2")]
+    assert queues.depth("s2") == 1
+
+    backlog["s2"] = 0
+    queues.drain()
+    assert fake.emits[-1] == ("s2", None)
+
+
+def test_whisper_and_unbuffered_reply_use_send_queue(monkeypatch):
+    import server as srv
+    import send_queue
+
+    emits: list[tuple] = []
+
+    class FakeSocketIO:
+        def emit(self, event, payload=None, to=None, **kwargs):
+            emits.append((to, payload['content']))
+
+    monkeypatch.setattr(srv, "socketio", FakeSocketIO())
+    monkeypatch.setattr(srv, "get_sid", lambda: "s1")
+    srv.world.rooms["hall"] = Room(id="hall", description="A hall")
+    srv.world.add_player("s1", name="Ann", room_id="hall")
+    srv.world.add_player("s2", name="Ben", room_id="hall")
+    queues = send_queue.get_send_queues()
+    backlog = {"s1": 1000, "s2": 1000}
+    monkeypatch.setattr(queues, "_backlog", lambda sid: backlog.get(sid, 0))
+
+    srv.handle_message({"content": "whisper Ben psst"})
+    srv.emit("message", _line("late"))  # outside any handler: not held, still queued
+    assert emits == []
+    assert queues.depth("s2") == 1
+    assert queues.depth("s1") == 2
+
+    backlog.clear()
+    queues.drain()
+    assert ("s2", "Ann whispers to you: psst") in emits
+    assert emits[-1] == ("s1", "late")
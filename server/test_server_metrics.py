@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+"""Tests for the Prometheus /metrics endpoint.
+
+Covers:
+- Message rates average whole seconds over the window.
+- AI calls are counted with errors, and histograms come out cumulative in seconds.
+- The route reports connections, world sizes and message counters, and like
+  /metrics/commands is only served with MUD_METRICS_TOKEN set.
+"""
+
+import pytest
+
+import ai_utils
+import server_metrics
+from world import Room
+
+
+def test_rate_counter_window():
+    now = [100.0]
+    counter = server_metrics.RateCounter(clock=lambda: now[0])
+    for _ in range(20):
+        counter.add()
+    now[0] = 101.5
+    counter.add(5)
+    assert counter.total == 25
+    # Only complete seconds count: the 20 at t=100, not the 5 still in progress
+    assert counter.per_second() == pytest.approx(2.0)
+    now[0] = 100.0 + server_metrics.RATE_WINDOW + 1
+    assert counter.per_second() == pytest.approx(0.5)
+
+
+def test_ai_calls_and_histogram_text():
+    class Model:
+        def generate_content(self, prompt, **kwargs):
+            if prompt == 'boom':
+                raise RuntimeError('quota')
+            return 'ok'
+
+    assert ai_utils.generate_content(Model(), 'hi', kind='dialogue') == 'ok'
+    with pytest.raises(RuntimeError):
+        ai_utils.generate_content(Model(), 'boom', kind='dialogue')
+
+    text = server_metrics.render_metrics(object(), server_metrics.ServerMetrics())
+    assert 'mud_ai_calls_total{kind="dialogue"} 2' in text
+    assert 'mud_ai_errors_total{kind="dialogue"} 1' in text
+    assert 'mud_ai_call_duration_seconds_bucket{kind="dialogue",le="+Inf"} 2' in text
+    assert 'mud_ai_call_duration_seconds_count{kind="dialogue"} 2' in text
+    assert 'mud_players 0' in text
+    buckets = [int(line.rsplit(' ', 1)[1]) for line in text.splitlines()
+               if line.startswith('mud_ai_call_duration_seconds_bucket')]
+    assert buckets == sorted(buckets)
+
+
+def test_metrics_route(monkeypatch):
+    import server as srv
+    monkeypatch.setattr(srv, "get_sid", lambda: "sid-a")
+    monkeypatch.setattr(srv, "emit", lambda *a, **kw: None)
+    srv.world.rooms["hall"] = Room(id="hall", description="A hall.")
+    srv.world.add_player("sid-a", name="Ann", room_id="hall")
+    server_metrics.get_server_metrics().on_connect("sid-a")
+    srv.handle_message({'content': 'say hi'})
+
+    client = srv.app.test_client()
+    assert client.get('/metrics').status_code == 404
+    monkeypatch.setattr(srv, "METRICS_TOKEN", "s3cret")
+    resp = client.get('/metrics', headers={'Authorization': 'Bearer s3cret'})
+    assert resp.status_code == 200
+    assert resp.mimetype == 'text/plain'
+    text = resp.get_data(as_text=True)
+    for line in ('mud_connected_sids 1', 'mud_players 1', 'mud_rooms 1', 'mud_messages_in_total 1',
+                 'mud_tick_duration_seconds_count 0', 'mud_rate_limit_rejections_total{operation="BASIC"} 0',
+                 'mud_send_queue_depth 0'):
+        assert line in text
+
+    assert client.get('/metrics').status_code == 403
+    assert client.get('/metrics?token=s3cret').status_code == 200
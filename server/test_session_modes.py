@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+"""Tests for per-session mode routing in handle_message.
+
+Covers:
+- Starting or ending a flow sets the sid's recorded mode (old priority order);
+  lines dispatch on that record.
+- A free-play line goes straight to its router (no other router runs).
+- The router CommandContext is reused across lines and rebuilt after the
+  world is swapped.
+"""
+
+import session_modes
+from session_modes import SessionModes
+from world import Room, World
+
+
+def test_mode_set_when_flows_start_and_end():
+    players: set = set()
+    modes = SessionModes()
+    confirm = modes.flow_map()
+    trade = modes.flow_map()
+    interaction = modes.flow_map()
+    modes.bind(
+        [(session_modes.MODE_CONFIRM, lambda: confirm), (session_modes.MODE_TRADE, lambda: trade)],
+        interaction=lambda: interaction,
+        is_player=lambda sid: sid in players,
+    )
+    assert modes.current('guest') == session_modes.MODE_AUTH
+    assert modes.current(None) == session_modes.MODE_AUTH
+    assert modes.current('s1') == session_modes.MODE_AUTH
+    players.add('s1')  # the auth wizard logged s1 in
+    assert modes.current('s1') == session_modes.MODE_PLAY
+
+    # Starting flows records the highest-priority one at once, before any line
+    interaction['s1'] = {}
+    trade['s1'] = {}
+    confirm['s1'] = 'purge'
+    assert modes.mode_of('s1') == session_modes.MODE_CONFIRM
+    assert modes.current('s1') == session_modes.MODE_CONFIRM
+    confirm.pop('s1')
+    assert modes.mode_of('s1') == session_modes.MODE_TRADE
+    assert modes.base_mode('s1') == session_modes.MODE_INTERACTION
+    trade.clear()
+    del interaction['s1']
+    assert modes.mode_of('s1') == session_modes.MODE_PLAY
+
+    # The recorded mode is what dispatch reads: no flow map is consulted per line
+    rec = modes.record('s1')
+    assert rec is not None
+    rec.flow = rec.mode = session_modes.MODE_TEMPLATE
+    assert modes.current('s1') == session_modes.MODE_TEMPLATE
+
+    assert modes.snapshot() == {session_modes.MODE_AUTH: 1, session_modes.MODE_TEMPLATE: 1}
+    assert (rec.messages, rec.transitions) == (4, 7)
+    modes.forget('s1')
+    assert modes.mode_of('s1') is None
+
+
+def _setup(srv, monkeypatch):
+    sent: list[dict] = []
+    monkeypatch.setattr(srv, "get_sid", lambda: "sid-a")
+    monkeypatch.setattr(srv, "emit", lambda event, payload=None, **kw: sent.append(payload))
+    srv.world.rooms["hall"] = Room(id="hall", description="A long hall.")
+    srv.world.start_room_id = "hall"
+    srv.world.add_player("sid-a", name="Ann", room_id="hall")
+    return sent
+
+
+def test_free_play_line_goes_straight_to_its_router(monkeypatch):
+    import server as srv
+    _setup(srv, monkeypatch)
+    calls: list[str] = []
+
+    def _router(name, result):
+        return lambda *a, **kw: calls.append(name) or result
+
+    monkeypatch.setattr(srv.interaction_router, "try_handle_flow", _router('interaction', False))
+    monkeypatch.setattr(srv.movement_router, "try_handle_flow", _router('movement', True))
+    monkeypatch.setattr(srv.dice_router, "try_handle_flow", _router('dice', False))
+    monkeypatch.setattr(srv.dialogue_router, "try_handle_flow", _router('dialogue', True))
+
+    srv._handle_message_inner({'content': 'say hello'})
+    srv._handle_message_inner({'content': 'look'})
+    srv._handle_message_inner({'content': 'roll 2d6'})
+    assert calls == ['dialogue', 'movement', 'dice', 'dialogue']
+    assert session_modes.get_session_modes().mode_of("sid-a") == session_modes.MODE_PLAY
+
+
+def test_flow_context_reused_until_world_swapped(monkeypatch):
+    import server as srv
+    _setup(srv, monkeypatch)
+    seen: list = []
+    monkeypatch.setattr(srv.dialogue_router, "try_handle_flow", lambda ctx, *a: seen.append(ctx) or True)
+
+    srv._handle_message_inner({'content': 'say one'})
+    srv._handle_message_inner({'content': 'say two'})
+    assert seen[0] is seen[1]
+
+    srv.world = World()
+    srv.world.rooms["hall"] = Room(id="hall", description="A long hall.")
+    srv.world.add_player("sid-a", name="Ann", room_id="hall")
+    srv._handle_message_inner({'content': 'say three'})
+    assert seen[2] is not seen[1] and seen[2].world is srv.world
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+"""Tests for the headless simulation runner.
+
+Covers:
+- N ticks run back-to-back, NPC needs evolve and throughput is reported.
+- Server globals (world, socketio, broadcast hook, plan model) are restored.
+- Same seed and world file save byte-identical worlds (ids and timestamps
+  included); the CLI loads, runs and saves.
+"""
+
+import sim_runner
+from world import CharacterSheet, Object as WObject, Room, World
+
+
+def _world() -> World:
+    w = World()
+    pantry = Room(id="pantry", description="Shelves of food")
+    hall = Room(id="hall", description="A long hall")
+    pantry.doors["hall door"] = "hall"
+    hall.doors["pantry door"] = "pantry"
+    for i in range(3):
+        bread = WObject(display_name="Bread", description="", object_tags={"small", "Edible: 40"})
+        bread.uuid = f"bread-{i}"
+        pantry.objects[bread.uuid] = bread
+    w.rooms = {"pantry": pantry, "hall": hall}
+    for name, room in (("Ada", hall), ("Bo", pantry)):
+        room.npcs.add(name)
+        sheet = CharacterSheet(display_name=name, description="A resident")
+        sheet.hunger = 30.0
+        w.npc_sheets[name] = sheet
+    return w
+
+
+def test_run_simulation_reports_and_restores():
+    import server as srv
+    original = (srv.world, srv.socketio, srv.broadcast_to_room, srv.plan_model)
+    w = _world()
+    assert not w.advanced_goap_enabled
+
+    result = sim_runner.run_simulation(w, 20, seed=3, srv=srv)
+
+    assert result.ticks == 20
+    assert result.npc_updates == 40
+    assert result.ticks_per_sec > 0
+    # Hungry NPCs found the bread (Ada had to walk to the pantry)
+    assert result.after['objects'] < result.before['objects']
+    assert result.after['npc_rooms']['Ada'] == 'pantry'
+    assert "ticks/s" in sim_runner.format_report(result)
+    assert (srv.world, srv.socketio, srv.broadcast_to_room, srv.plan_model) == original
+    assert not w.advanced_goap_enabled
+
+
+def test_same_seed_same_outcome_and_cli(tmp_path, capsys):
+    import server as srv
+    import game_loop
+    import world_clock
+
+    path = tmp_path / "world.json"
+    _world().save_to_file(str(path))
+    saved = []
+    for run in ("a", "b"):
+        w = World.load_from_file(str(path))
+        # Past a daily update (24 ticks): NPC ids, ambitions and timestamps are created
+        sim_runner.run_simulation(w, 30, seed=11, srv=srv)
+        out = tmp_path / f"{run}.json"
+        w.save_to_file(str(out))
+        saved.append(out.read_text())
+        assert w.daily_update_timestamp == sim_runner.SIM_EPOCH + 24 * game_loop.TICK_SECONDS
+    assert '"ambition": {' in saved[0]
+    assert saved[0] == saved[1]
+    assert not world_clock.get_world_clock().simulated
+
+    out = tmp_path / "aged.json"
+    assert sim_runner.main(["--world", str(path), "--ticks", "5", "--save", str(out)]) == 0
+    assert "Simulated 5 ticks" in capsys.readouterr().out
+    assert out.exists()
@@ -37,7 +37,7 @@ def test_offline_plan_sleep_when_tired(monkeypatch):
     # Add an owned bed
     bed = _mk_bed(srv.world, "Simple Bed", npc_name, r)
     # Plan
-    plan = srv._npc_offline_plan(npc_name, r, sheet)
+    plan = srv.game_loop._npc_offline_plan(npc_name, r, sheet)
     assert any(step.get('tool') == 'sleep' for step in plan), "Planner should schedule sleep when tired and a bed is owned."
 
 
@@ -3,8 +3,8 @@ from __future__ import annotations
 """Tests for NPC socialization and emote planner tool.
 
 Covers:
-- _npc_offline_plan enqueues an 'emote' action when socialization < NEED_THRESHOLD.
-- _npc_exec_emote broadcasts and increases socialization by SOCIAL_REFILL_EMOTE.
+- game_loop._npc_offline_plan enqueues an 'emote' action when socialization < NEED_THRESHOLD.
+- game_loop._npc_exec_emote broadcasts and increases socialization by SOCIAL_REFILL_EMOTE.
 """
 
 def test_offline_plan_emote_when_social_low():
@@ -19,7 +19,7 @@ def test_offline_plan_emote_when_social_low():
     # Simulate loneliness: set socialization just below threshold
     setattr(sheet, 'socialization', max(0.0, float(srv.NEED_THRESHOLD) - 1.0))
 
-    plan = srv._npc_offline_plan("Innkeeper", room, sheet)
+    plan = srv.game_loop._npc_offline_plan("Innkeeper", room, sheet)
     assert any((a or {}).get('tool') == 'emote' for a in plan), f"Expected an 'emote' action in plan, got: {plan}"
 
 
@@ -63,7 +63,7 @@ def test_emote_exec_refills_socialization(monkeypatch):
     monkeypatch.setattr(srv, "socketio", FakeSocketIO(), raising=True)
 
     before = getattr(sheet, 'socialization', 0.0)
-    ok, _ = srv._npc_exec_emote(npc_name, rid, "hums a tune.")
+    ok, _ = srv.game_loop._npc_exec_emote(npc_name, rid, "hums a tune.")
     after = getattr(sheet, 'socialization', 0.0)
 
     assert ok is True
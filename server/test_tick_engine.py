@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+"""Tests for the game_loop tick engine.
+
+Covers:
+- Disabled phases are skipped and untimed; extra phases can be registered.
+- An NPC that walks into another room mid-tick is processed exactly once.
+- Thinking is one hook call per room; without a hook the offline planner runs.
+"""
+
+import game_loop
+import tick_profiler
+from game_loop import TickEngine
+from world import CharacterSheet, Room
+
+
+def _npc(srv, name: str, room: Room, **fields) -> CharacterSheet:
+    room.npcs.add(name)
+    sheet = CharacterSheet(display_name=name, description="A resident")
+    for k, v in fields.items():
+        setattr(sheet, k, v)
+    srv.world.npc_sheets[name] = sheet
+    return sheet
+
+
+def test_disabled_phases_skip_and_extra_phases_run(monkeypatch):
+    import server as srv
+    room = Room(id="yard", description="A yard")
+    srv.world.rooms[room.id] = room
+    sheet = _npc(srv, "Pip", room, action_points=0)
+    sheet.plan_queue = [{'tool': 'emote', 'args': {'message': 'waves.'}}]
+
+    engine = TickEngine(disabled={'execute', 'missions'})
+    seen: list[int] = []
+    engine.add_phase('audit', lambda state: seen.append(len(state.entries)), before='think')
+    assert engine.enabled_phases() == ['daily', 'fields', 'needs', 'audit', 'think']
+    engine.run_once()
+
+    phases = tick_profiler.get_tick_profiler().last['phases_ms']
+    assert 'execute' not in phases and 'missions' not in phases
+    assert 'audit' in phases and seen == [1]
+    # Needs ran (AP regenerated) but the queued step did not
+    assert sheet.action_points == 1
+    assert len(sheet.plan_queue) == 1
+
+    engine.set_enabled('execute', True)
+    engine.run_once()
+    assert sheet.plan_queue == []
+
+    monkeypatch.setenv('MUD_TICK_DISABLE', 'daily, Fields')
+    assert TickEngine().enabled_phases() == ['needs', 'think', 'execute', 'missions']
+
+
+def test_npc_moving_rooms_is_processed_once():
+    import server as srv
+    a = Room(id="a", description="Room A")
+    b = Room(id="b", description="Room B")
+    a.doors["oak door"] = "b"
+    b.doors["oak door"] = "a"
+    srv.world.rooms.update({"a": a, "b": b})
+    sheet = _npc(srv, "Wren", a, action_points=0)
+    sheet.plan_queue = [
+        {'tool': 'move_through', 'args': {'name': 'oak door'}},
+        {'tool': 'emote', 'args': {'message': 'stretches.'}},
+    ]
+
+    assert srv._world_tick_once()
+
+    assert "Wren" in b.npcs and "Wren" not in a.npcs
+    # One AP gained, one spent; the second step waits for the next tick
+    assert sheet.action_points == 0
+    assert sheet.plan_queue == [{'tool': 'emote', 'args': {'message': 'stretches.'}}]
+    assert tick_profiler.get_tick_profiler().last['actions'] == 1
+
+
+def test_think_batches_per_room_and_falls_back_offline():
+    import server as srv
+    srv.world.advanced_goap_enabled = True
+    hall = Room(id="hall", description="A hall")
+    den = Room(id="den", description="A den")
+    srv.world.rooms.update({"hall": hall, "den": den})
+    for name, room in (("Ada", hall), ("Bo", hall), ("Cy", den)):
+        _npc(srv, name, room, hunger=10.0)
+
+    calls: list[tuple[str, list[str]]] = []
+    ctx = game_loop.get_context()
+    ctx.think_room = lambda rid, names: calls.append((rid, list(names)))
+    TickEngine().run_once()
+    assert sorted(calls) == [("den", ["Cy"]), ("hall", ["Ada", "Bo"])]
+
+    # No hook: the offline GOAP planner fills the queues directly
+    ctx.think_room = None
+    game_loop.get_wake_queue().clear()
+    TickEngine(disabled={'execute'}).run_once()
+    assert all(srv.world.npc_sheets[n].plan_queue for n in ("Ada", "Bo", "Cy"))
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+"""Tests for the world tick profiler.
+
+Covers:
+- Nearest-rank percentiles over the rolling window.
+- Over-budget ticks emit one structured (JSON) log line.
+- A real world tick records its phases, actions and per-NPC timings.
+"""
+
+import json
+import logging
+
+import tick_profiler
+from tick_profiler import TickProfiler, percentile
+from world import CharacterSheet, Room
+
+
+def test_percentiles_use_nearest_rank():
+    values = sorted(float(v) for v in range(1, 101))
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 50) == 0.0
+
+    prof = TickProfiler(window=3, budget_ms=0)
+    for ms in (5.0, 1.0, 3.0, 2.0):
+        prof.window.append(ms)
+    # Window keeps the newest three samples
+    assert prof.percentiles()['samples'] == 3
+    assert prof.percentiles()['max'] == 3.0
+
+
+def test_over_budget_tick_logs_structured_line(caplog):
+    prof = TickProfiler(budget_ms=0.000001)
+    prof.start_tick()
+    with prof.phase('think'):
+        sum(range(1000))
+    prof.add_npc('Alda', 0.01)
+    with caplog.at_level(logging.WARNING, logger='tick_profiler'):
+        record = prof.end_tick(npcs_thought=2)
+    assert prof.over_budget == 1
+    lines = [r.getMessage() for r in caplog.records if 'tick_over_budget' in r.getMessage()]
+    assert len(lines) == 1
+    payload = json.loads(lines[0].split(' ', 1)[1])
+    assert payload['npcs_thought'] == 2
+    assert payload['slowest_npcs'][0][0] == 'Alda'
+    assert 'think' in payload['phases_ms']
+    assert record['tick'] == 1
+    # Recording outside a tick is a no-op
+    prof.add_phase('think', 1.0)
+    prof.count('actions')
+    assert prof.last['phases_ms']['think'] < 1000.0
+
+
+def test_world_tick_records_phases_and_actions():
+    import server as srv
+    room = Room(id="yard", description="A yard")
+    room.npcs.add("Pip")
+    srv.world.rooms[room.id] = room
+    sheet = CharacterSheet(display_name="Pip", description="A child")
+    sheet.plan_queue = [{'tool': 'emote', 'args': {'message': 'waves.'}}]
+    sheet.action_points = 1
+    srv.world.npc_sheets["Pip"] = sheet
+
+    srv._world_tick_once()
+
+    last = tick_profiler.get_tick_profiler().last
+    assert last is not None
+    for phase in ('daily', 'fields', 'needs', 'execute', 'missions'):
+        assert phase in last['phases_ms']
+    assert last['actions'] >= 1
+    assert last['slowest_npcs'][0][0] == 'Pip'
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+"""Tests for the engine.io backlog adapter.
+
+Covers:
+- Against a real Flask-SocketIO server, a packet waiting in a client's
+  engine.io socket shows up as backlog. This fails if a python-socketio or
+  python-engineio upgrade moves the internals the adapter reads.
+- A server missing those internals switches the adapter off with a warning,
+  and backlog reads 0 instead of raising.
+- The server binds the adapter and /metrics reports whether it is supported.
+"""
+
+import logging
+from types import SimpleNamespace
+
+import engineio
+from flask import Flask
+from flask_socketio import SocketIO
+
+from transport_backlog import EngineIOBacklog
+
+
+def _connected_client():
+    sio = SocketIO(Flask('transport_backlog_test'), async_mode='threading')
+    server = sio.server
+    sock = engineio.socket.Socket(server.eio, 'eio-1')
+    server.eio.sockets['eio-1'] = sock
+    sid = server.manager.connect('eio-1', '/')
+    return sio, sock, sid
+
+
+def test_backlog_counts_packets_waiting_in_engineio_socket():
+    sio, sock, sid = _connected_client()
+    adapter = EngineIOBacklog()
+    assert adapter.bind(sio) is True
+    assert adapter.problems == []
+    assert adapter.backlog(sid) == 0
+    sock.queue.put('packet-1')
+    sock.queue.put('packet-2')
+    assert adapter.backlog(sid) == 2
+    assert adapter.backlog('unknown-sid') == 0
+
+
+def test_missing_internals_switch_adapter_off(caplog):
+    broken = SimpleNamespace(server=SimpleNamespace(manager=SimpleNamespace(), eio=SimpleNamespace()))
+    adapter = EngineIOBacklog()
+    with caplog.at_level(logging.WARNING, logger='transport_backlog'):
+        assert adapter.bind(broken) is False
+    assert adapter.problems == ['server.manager.eio_sid_from_sid is missing', 'server.eio.sockets is missing']
+    assert any('Send backlog unavailable' in r.getMessage() for r in caplog.records)
+    assert adapter.backlog('sid-1') == 0
+
+
+def test_socket_without_queue_switches_adapter_off(caplog):
+    sio, sock, sid = _connected_client()
+    adapter = EngineIOBacklog()
+    adapter.bind(sio)
+    sio.server.eio.sockets['eio-1'] = SimpleNamespace()
+    with caplog.at_level(logging.WARNING, logger='transport_backlog'):
+        assert adapter.backlog(sid) == 0
+    assert adapter.supported is False
+    assert len(caplog.records) == 1
+
+
+def test_server_binds_adapter_and_reports_it():
+    import server as srv
+    import server_metrics
+    import transport_backlog
+
+    assert transport_backlog.get_transport_backlog().supported is True
+    assert 'mud_send_backlog_supported 1' in server_metrics.render_metrics(srv.world)
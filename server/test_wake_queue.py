@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+"""Tests for the NPC wake-up queue.
+
+Covers:
+- Predicted think ticks from constant decay rates, including sleep.
+- The world tick only plans for an NPC on the tick its need crosses the threshold.
+- Raising a need (chat refill) keeps the NPC's earlier wake-up tick and pushes
+  nothing onto the heap; a need that crosses sooner pulls the tick earlier.
+"""
+
+import math
+
+from wake_queue import WakeQueue
+from world import CharacterSheet, Room
+
+
+def _sheet(**needs) -> CharacterSheet:
+    sheet = CharacterSheet(display_name="Nix", description="An NPC")
+    for key, val in needs.items():
+        setattr(sheet, key, val)
+    return sheet
+
+
+def test_predict_ticks_from_decay_rates():
+    q = WakeQueue(25.0, 1.0, 0.5, 0.75, 10.0)
+    assert q.predict_ticks(_sheet(hunger=30.0), True) == 6
+    assert q.predict_ticks(_sheet(hunger=10.0), True) == 0
+    # Without decay a comfortable NPC never needs to wake on its own
+    assert q.predict_ticks(_sheet(hunger=30.0), False) is None
+    # Asleep for 2 ticks: sleep refills to 50, then needs 34 ticks to drop below 25
+    sheet = _sheet(sleep=30.0, sleeping_ticks_remaining=2)
+    assert q.predict_ticks(sheet, True) == 2 + 34
+
+
+def test_tick_thinks_only_when_due(monkeypatch):
+    import server as srv
+    room = Room(id="hall", description="A hall")
+    room.npcs.add("Nix")
+    srv.world.rooms[room.id] = room
+    srv.world.advanced_goap_enabled = True
+    srv.world.npc_sheets["Nix"] = _sheet(hunger=30.0, thirst=100.0)
+    thought_at: list[int] = []
+    wake = srv.game_loop.get_wake_queue()
+    monkeypatch.setattr(srv, "npc_think_room", lambda rid, names: thought_at.append(wake.now))
+    for _ in range(8):
+        srv._world_tick_once()
+    # Hunger drops below 25 on the sixth tick (30 -> 24); with no plan queued
+    # by the stubbed planner the NPC stays due on every tick after that
+    assert thought_at == [6, 7, 8]
+
+
+def test_social_refill_keeps_schedule_without_heap_growth():
+    import server as srv
+    srv.world.advanced_goap_enabled = True
+    sheet = _sheet(socialization=26.0)
+    srv.world.npc_sheets["Nix"] = sheet
+    wake = srv.game_loop.get_wake_queue()
+    wake.schedule("Nix", sheet, True)
+    assert wake._due_at["Nix"] == wake.now + 3
+    heap = wake.stats()['heap_size']
+    # Raising a need leaves the earlier (still valid lower bound) tick in place
+    srv._npc_gain_socialization("Nix", 10.0)
+    assert sheet.socialization == 36.0
+    assert wake._due_at["Nix"] == wake.now + 3
+    # Already full: nothing changes, nothing is pushed
+    sheet.socialization = 100.0
+    for _ in range(50):
+        srv.game_loop._npc_gain_socialization("Nix", 5.0)
+    assert wake.stats()['heap_size'] == heap
+    # A need that now crosses sooner pulls the wake-up earlier
+    sheet.socialization = 25.5
+    srv.game_loop.reschedule_npc_wake("Nix", sheet, srv.world)
+    assert wake._due_at["Nix"] == wake.now + 2
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+"""Tick Profiler — where does the world heartbeat spend its time?
+
+The world tick runs several phases (daily cycle, distance fields, needs decay,
+NPC thinking, action execution, missions). When the heartbeat gets slow, this
+module answers which phase, and which NPCs, are to blame:
+
+- per-phase wall-clock totals for the current tick (phases may be entered many
+  times per tick, e.g. once per room; time accumulates per name)
+- per-NPC time, reported as the top-N slowest NPCs of the tick
+- counters such as actions executed and AI calls made
+- a rolling window of tick durations with p50/p95/p99
+- a cumulative tick duration histogram (for the /metrics endpoint)
+
+Ticks longer than MUD_TICK_BUDGET_MS (default 250 ms) emit one structured log
+line (JSON) so they can be grepped and graphed. Outside a tick every recording
+call is a no-op, so instrumented helpers can still be called directly.
+
+Configuration (env):
+- MUD_TICK_BUDGET_MS: over-budget threshold in milliseconds (default 250)
+- MUD_TICK_STATS_WINDOW: number of recent ticks kept for percentiles (default 120)
+"""
+
+import json
+import logging
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from command_metrics import LatencySeries
+
+
+_logger = logging.getLogger(__name__)
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float((os.getenv(name) or str(default)).strip())
+    except Exception:
+        return default
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list (0.0 when empty)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(-(-pct * len(sorted_values) // 100)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class TickProfiler:
+    """Collects per-phase, per-NPC and rolling tick timings."""
+
+    def __init__(self, window: Optional[int] = None, budget_ms: Optional[float] = None, top_n: int = 5):
+        self.window: Deque[float] = deque(maxlen=int(window or _env_number('MUD_TICK_STATS_WINDOW', 120)))
+        self.budget_ms = float(budget_ms if budget_ms is not None else _env_number('MUD_TICK_BUDGET_MS', 250))
+        self.top_n = top_n
+        self.ticks = 0
+        self.over_budget = 0
+        self.phase_totals_ms: Dict[str, float] = {}
+        self.histogram = LatencySeries()
+        self.last: Optional[Dict[str, Any]] = None
+        self._current: Optional[Dict[str, Any]] = None
+
+    # --- Recording -------------------------------------------------------
+
+    def start_tick(self) -> None:
+        self._current = {
+            'start': time.perf_counter(),
+            'phases': {},
+            'npcs': {},
+            'counts': {'actions': 0, 'ai_calls': 0},
+        }
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a block and add it to phase `name` of the current tick."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - t0)
+
+    def add_phase(self, name: str, seconds: float) -> None:
+        if self._current is not None:
+            phases = self._current['phases']
+            phases[name] = phases.get(name, 0.0) + seconds
+
+    def add_npc(self, npc_name: str, seconds: float) -> None:
+        if self._current is not None:
+            npcs = self._current['npcs']
+            npcs[npc_name] = npcs.get(npc_name, 0.0) + seconds
+
+    def count(self, key: str, n: int = 1) -> None:
+        if self._current is not None:
+            counts = self._current['counts']
+            counts[key] = counts.get(key, 0) + n
+
+    def end_tick(self, **extra: Any) -> Optional[Dict[str, Any]]:
+        """Close the current tick, update the rolling window and return its record."""
+        cur = self._current
+        if cur is None:
+            return None
+        self._current = None
+        duration_ms = (time.perf_counter() - cur['start']) * 1000.0
+        self.ticks += 1
+        self.window.append(duration_ms)
+        self.histogram.add(duration_ms)
+        phases_ms = {k: round(v * 1000.0, 3) for k, v in cur['phases'].items()}
+        for k, v in phases_ms.items():
+            self.phase_totals_ms[k] = self.phase_totals_ms.get(k, 0.0) + v
+        slowest = sorted(cur['npcs'].items(), key=lambda kv: (-kv[1], kv[0]))[:self.top_n]
+        record: Dict[str, Any] = {
+            'tick': self.ticks,
+            'duration_ms': round(duration_ms, 3),
+            'phases_ms': phases_ms,
+            'slowest_npcs': [(name, round(sec * 1000.0, 3)) for name, sec in slowest],
+            'npcs_timed': len(cur['npcs']),
+        }
+        record.update(cur['counts'])
+        record.update(extra)
+        self.last = record
+        if self.budget_ms > 0 and duration_ms > self.budget_ms:
+            self.over_budget += 1
+            _logger.warning("tick_over_budget %s", json.dumps(dict(record, budget_ms=self.budget_ms), sort_keys=True))
+        return record
+
+    # --- Reporting -------------------------------------------------------
+
+    def percentiles(self) -> Dict[str, float]:
+        values = sorted(self.window)
+        return {
+            'p50': round(percentile(values, 50), 3),
+            'p95': round(percentile(values, 95), 3),
+            'p99': round(percentile(values, 99), 3),
+            'max': round(values[-1], 3) if values else 0.0,
+            'samples': len(values),
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Everything /tickstats shows, as a plain dict."""
+        avg_phases = {}
+        if self.ticks:
+            avg_phases = {k: round(v / self.ticks, 3) for k, v in self.phase_totals_ms.items()}
+        return {
+            'ticks': self.ticks,
+            'over_budget': self.over_budget,
+            'budget_ms': self.budget_ms,
+            'durations_ms': self.percentiles(),
+            'avg_phases_ms': avg_phases,
+            'last': dict(self.last) if self.last else None,
+        }
+
+    def reset(self) -> None:
+        self.window.clear()
+        self.ticks = 0
+        self.over_budget = 0
+        self.phase_totals_ms.clear()
+        self.histogram = LatencySeries()
+        self.last = None
+        self._current = None
+
+
+def format_tick_stats(snap: Dict[str, Any]) -> str:
+    """Human-readable report of a TickProfiler snapshot for admins."""
+    d = snap.get('durations_ms') or {}
+    lines = [
+        f"Tick stats: {snap.get('ticks', 0)} ticks, {snap.get('over_budget', 0)} over budget "
+        f"({snap.get('budget_ms', 0):g} ms)",
+        f"Duration (last {d.get('samples', 0)}): p50 {d.get('p50', 0):.1f} ms, p95 {d.get('p95', 0):.1f} ms, "
+        f"p99 {d.get('p99', 0):.1f} ms, max {d.get('max', 0):.1f} ms",
+    ]
+    last = snap.get('last')
+    if not last:
+        lines.append("No ticks recorded yet.")
+        return "\n".join(lines)
+    lines.append(
+        f"Last tick #{last.get('tick')}: {last.get('duration_ms', 0):.1f} ms, "
+        f"actions {last.get('actions', 0)}, AI calls {last.get('ai_calls', 0)}, "
+        f"NPCs thought {last.get('npcs_thought', 0)}"
+    )
+    avg = snap.get('avg_phases_ms') or {}
+    phases = last.get('phases_ms') or {}
+    if phases:
+        parts = [f"{name} {ms:.1f} (avg {avg.get(name, 0.0):.1f})" for name, ms in phases.items()]
+        lines.append("Phases ms: " + ", ".join(parts))
+    slow = last.get('slowest_npcs') or []
+    if slow:
+        lines.append("Slowest NPCs: " + ", ".join(f"{name} {ms:.1f} ms" for name, ms in slow))
+    return "\n".join(lines)
+
+
+# Shared profiler used by the world tick
+_profiler = TickProfiler()
+
+
+def get_tick_profiler() -> TickProfiler:
+    """Return the process-wide tick profiler."""
+    return _profiler
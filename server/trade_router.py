@@ -395,7 +395,7 @@ def try_handle_flow(ctx: CommandContext, sid: str | None, text: str, emit: EmitF
             progressed = True
             for p in emits: emit(MESSAGE_OUT, p)
             for room_id, payload in broadcasts: ctx.broadcast_to_room(room_id, payload, sid)
-            for to_sid, payload in directs: ctx.socketio.emit(MESSAGE_OUT, payload, to=to_sid)
+            for to_sid, payload in directs: ctx.send_to(to_sid, payload)
             if mutated: ctx.mark_world_dirty()
     if sid in ctx.trade_sessions:
         handled, emits, broadcasts, directs, mutated = _trade_handle(ctx, world, sid, text)
@@ -403,6 +403,6 @@ def try_handle_flow(ctx: CommandContext, sid: str | None, text: str, emit: EmitF
             progressed = True
             for p in emits: emit(MESSAGE_OUT, p)
             for room_id, payload in broadcasts: ctx.broadcast_to_room(room_id, payload, sid)
-            for to_sid, payload in directs: ctx.socketio.emit(MESSAGE_OUT, payload, to=to_sid)
+            for to_sid, payload in directs: ctx.send_to(to_sid, payload)
             if mutated: ctx.mark_world_dirty()
     return progressed
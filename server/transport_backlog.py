@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+"""Transport Backlog — packets engine.io still holds for one client.
+
+SendQueues (send_queue) counts a client as slow once its engine.io socket
+holds MUD_SEND_BACKLOG packets. Neither python-socketio nor python-engineio
+has a public call for that number, so EngineIOBacklog reads three internals:
+
+- server.manager.eio_sid_from_sid(sid, namespace)   (python-socketio)
+- server.eio.sockets[eio_sid]                       (python-engineio)
+- <socket>.queue.qsize()                            (python-engineio)
+
+This module is the only place that touches them. bind() checks that they
+exist and warns when the installed major versions differ from TESTED_VERSIONS.
+When an attribute is missing the adapter logs one warning and switches off:
+`supported` becomes False, backlog() reports 0, and /metrics shows
+mud_send_backlog_supported 0. Backpressure then rests on queue depth alone,
+and the lost signal is visible rather than silent.
+
+test_transport_backlog runs the lookup against a real Flask-SocketIO server,
+so an upgrade that moves these internals fails the suite.
+"""
+
+import logging
+from importlib import metadata
+from typing import Any, Dict, List, Optional
+
+_logger = logging.getLogger(__name__)
+
+NAMESPACE = '/'
+
+# Distribution -> major version the internals above were checked against
+TESTED_VERSIONS: Dict[str, int] = {'python-socketio': 5, 'python-engineio': 4}
+
+
+def _major(dist: str) -> Optional[int]:
+    try:
+        return int(metadata.version(dist).split('.', 1)[0])
+    except Exception:
+        return None
+
+
+class EngineIOBacklog:
+    """Version-checked reader of engine.io's per-socket packet queue."""
+
+    def __init__(self):
+        self._socketio: Any = None
+        self.supported = False
+        self.problems: List[str] = []
+
+    def bind(self, socketio: Any) -> bool:
+        """Check socketio's server for the internals read here. Returns `supported`."""
+        self._socketio = socketio
+        problems: List[str] = []
+        server = getattr(socketio, 'server', None)
+        if server is None:
+            problems.append('socketio.server is missing')
+        else:
+            if not callable(getattr(getattr(server, 'manager', None), 'eio_sid_from_sid', None)):
+                problems.append('server.manager.eio_sid_from_sid is missing')
+            if not isinstance(getattr(getattr(server, 'eio', None), 'sockets', None), dict):
+                problems.append('server.eio.sockets is missing')
+        self.problems = problems
+        self.supported = not problems
+        untested = {d: _major(d) for d, v in TESTED_VERSIONS.items() if _major(d) not in (None, v)}
+        if problems:
+            _logger.warning('Send backlog unavailable (%s); slow clients are detected by queue depth only',
+                            '; '.join(problems))
+        elif untested:
+            _logger.warning('Send backlog reads engine.io internals checked against %s; installed majors %s',
+                            TESTED_VERSIONS, untested)
+        return self.supported
+
+    def _disable(self, problem: str) -> None:
+        self.supported = False
+        self.problems.append(problem)
+        _logger.warning('Send backlog unavailable (%s); slow clients are detected by queue depth only', problem)
+
+    def backlog(self, sid: str) -> int:
+        """Packets waiting in sid's engine.io socket (0 when unknown or unsupported)."""
+        if not self.supported:
+            return 0
+        server = self._socketio.server
+        eio_sid = server.manager.eio_sid_from_sid(sid, NAMESPACE)
+        sock = server.eio.sockets.get(eio_sid) if eio_sid else None
+        if sock is None:
+            return 0
+        queue = getattr(sock, 'queue', None)
+        if queue is None or not callable(getattr(queue, 'qsize', None)):
+            self._disable('engine.io sockets have no queue.qsize()')
+            return 0
+        return int(queue.qsize())
+
+
+# Process-wide adapter bound to server.py's SocketIO instance
+_backlog = EngineIOBacklog()
+
+
+def get_transport_backlog() -> EngineIOBacklog:
+    """Return the process-wide transport backlog adapter."""
+    return _backlog
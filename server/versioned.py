@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+"""Versioned containers — dicts and sets that count changes to their keys.
+
+Lookup structures derived from a set of names (the fuzzy resolver's sorted
+prefix array and n-gram index, see id_parse_utils.FuzzyIndex) are expensive to
+build and cheap to query, so they are cached on the container they were built
+from and rebuilt only when its `version` moves:
+
+- VersionedDict bumps `version` when a key is added, removed or bound to a
+  different object (insert, del, pop, popitem, clear, update, setdefault).
+  Reassigning the same object does not bump.
+- VersionedSet bumps on add/discard/remove/pop/clear and the in-place
+  operators.
+
+World.rooms/players/npc_sheets/object_templates and Room.doors/npcs use these
+(World and Room coerce plain dicts and sets assigned to those attributes, the
+same way Room.objects becomes a RoomObjects).
+
+Versions are drawn from one process-wide counter rather than counted per
+container, so a container that replaces another (room.doors = {...}) never
+repeats a version its predecessor had and a version can serve as a cache key
+on its own (plan_cache keys rooms this way).
+
+That also makes current_version() a change detector for every versioned
+container at once: a caller that saw the same current_version() last time knows
+none of them has moved (distance_fields skips quiet ticks this way).
+
+Display names are values, not keys: CharacterSheet calls bump_names() when a
+display_name is assigned, and caches keyed on player names include
+names_version().
+
+Query derived data with cached(container, name, build, extra=...).
+"""
+
+import itertools
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+_versions = itertools.count(1)
+_last_version = 0
+_names_version = 0
+
+
+def next_version() -> int:
+    """A version number never handed out before in this process."""
+    global _last_version
+    _last_version = next(_versions)
+    return _last_version
+
+
+def current_version() -> int:
+    """The latest version handed out; if it has not moved, no versioned state changed."""
+    return _last_version
+
+
+def bump_names() -> None:
+    """Record that some character display name changed."""
+    global _names_version
+    _names_version += 1
+
+
+def names_version() -> int:
+    return _names_version
+
+
+class VersionedDict(dict):
+    """dict whose `version` moves on every change to its entries."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.version = next_version()
+        self.derived: Dict[str, Tuple[Hashable, Any]] = {}
+
+    def __reduce__(self):
+        return (self.__class__, (dict(self),))
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        if dict.get(self, key, VersionedDict._MISSING) is not value:
+            self.version = next_version()
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: Any) -> None:
+        super().__delitem__(key)
+        self.version = next_version()
+
+    _MISSING = object()
+
+    def pop(self, key: Any, default: Any = _MISSING) -> Any:
+        if key in self:
+            self.version = next_version()
+            return super().pop(key)
+        if default is VersionedDict._MISSING:
+            raise KeyError(key)
+        return default
+
+    def popitem(self) -> Tuple[Any, Any]:
+        item = super().popitem()
+        self.version = next_version()
+        return item
+
+    def clear(self) -> None:
+        if self:
+            self.version = next_version()
+        super().clear()
+
+    def setdefault(self, key: Any, default: Any = None) -> Any:
+        if key not in self:
+            self.version = next_version()
+        return super().setdefault(key, default)
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def __ior__(self, other: Any) -> "VersionedDict":
+        self.update(other)
+        return self
+
+
+class VersionedSet(set):
+    """set whose `version` moves on every membership change."""
+
+    def __init__(self, *args: Any) -> None:
+        super().__init__(*args)
+        self.version = next_version()
+        self.derived: Dict[str, Tuple[Hashable, Any]] = {}
+
+    def __reduce__(self):
+        return (self.__class__, (set(self),))
+
+    def add(self, item: Any) -> None:
+        if item not in self:
+            self.version = next_version()
+            super().add(item)
+
+    def discard(self, item: Any) -> None:
+        if item in self:
+            self.version = next_version()
+            super().discard(item)
+
+    def remove(self, item: Any) -> None:
+        super().remove(item)
+        self.version = next_version()
+
+    def pop(self) -> Any:
+        item = super().pop()
+        self.version = next_version()
+        return item
+
+    def clear(self) -> None:
+        if self:
+            self.version = next_version()
+        super().clear()
+
+    def update(self, *others: Any) -> None:
+        self.version = next_version()
+        super().update(*others)
+
+    def difference_update(self, *others: Any) -> None:
+        self.version = next_version()
+        super().difference_update(*others)
+
+    def intersection_update(self, *others: Any) -> None:
+        self.version = next_version()
+        super().intersection_update(*others)
+
+    def symmetric_difference_update(self, other: Any) -> None:
+        self.version = next_version()
+        super().symmetric_difference_update(other)
+
+    def __ior__(self, other: Any) -> "VersionedSet":
+        self.update(other)
+        return self
+
+    def __iand__(self, other: Any) -> "VersionedSet":
+        self.intersection_update(other)
+        return self
+
+    def __isub__(self, other: Any) -> "VersionedSet":
+        self.difference_update(other)
+        return self
+
+    def __ixor__(self, other: Any) -> "VersionedSet":
+        self.symmetric_difference_update(other)
+        return self
+
+
+def versioned_dict(value: Any) -> Any:
+    """Coerce a plain dict to a VersionedDict (other values pass through)."""
+    if isinstance(value, dict) and not isinstance(value, VersionedDict):
+        return VersionedDict(value)
+    return value
+
+
+def versioned_set(value: Any) -> Any:
+    """Coerce a plain set to a VersionedSet (other values pass through)."""
+    if isinstance(value, set) and not isinstance(value, VersionedSet):
+        return VersionedSet(value)
+    return value
+
+
+def is_versioned(container: Any) -> bool:
+    return isinstance(container, (VersionedDict, VersionedSet))
+
+
+def cached(container: Any, name: str, build: Callable[[], Any], extra: Hashable = None) -> Optional[Any]:
+    """build() cached on a versioned container until its version (or extra) changes.
+
+    Returns None for containers that are not versioned; callers fall back to
+    their uncached path.
+    """
+    if not is_versioned(container):
+        return None
+    key = (container.version, extra)
+    hit = container.derived.get(name)
+    if hit is not None and hit[0] == key:
+        return hit[1]
+    value = build()
+    container.derived[name] = (key, value)
+    return value
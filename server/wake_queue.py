@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+"""Wake Queue — predicted think ticks for NPCs.
+
+NPC needs decay at constant rates (NEED_DROP_PER_TICK, SOCIAL_DROP_PER_TICK,
+SLEEP_DROP_PER_TICK), so once we know an NPC's needs we can work out the tick
+at which the first of them will cross NEED_THRESHOLD. Rather than testing four
+needs on every NPC every tick, the world tick keeps a min-heap of those
+predicted wake-up ticks and only looks at NPCs whose tick has come.
+
+Predictions are lower bounds. Anything that raises a need (eating, chatting,
+sleeping, simulated chatter) only pushes the real crossing further out, so the
+NPC may wake a little early, get re-checked, and be rescheduled. Code that
+raises needs therefore calls pull_earlier(), which leaves the schedule alone
+in that case and costs no heap push.
+
+An NPC can only wake late if something lowers its needs outside the tick,
+such as an admin edit or a reload. To cover that, the whole schedule is
+dropped and rebuilt every `resync_every` ticks.
+
+An NPC that is not scheduled counts as due. New NPCs therefore think on the
+first tick they are seen, and popping an NPC simply unschedules it.
+"""
+
+import heapq
+import math
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def _get_resync_ticks() -> int:
+    """Read full-resync interval from environment, default every 30 ticks."""
+    try:
+        return max(1, int((os.getenv('MUD_WAKE_RESYNC_TICKS') or '30').strip()))
+    except Exception:
+        return 30
+
+
+def _ticks_until_below(value: float, threshold: float, rate: float) -> Optional[int]:
+    """Further decay ticks until value drops below threshold (None if never)."""
+    if value < threshold:
+        return 0
+    if rate <= 0:
+        return None
+    return int(math.floor((value - threshold) / rate)) + 1
+
+
+class WakeQueue:
+    """Min-heap of (due_tick, seq, npc_name) with lazy deletion."""
+
+    def __init__(
+        self,
+        threshold: float,
+        need_drop: float,
+        social_drop: float,
+        sleep_drop: float,
+        sleep_refill: float,
+        resync_every: Optional[int] = None,
+    ):
+        self.threshold = float(threshold)
+        self.need_drop = float(need_drop)
+        self.social_drop = float(social_drop)
+        self.sleep_drop = float(sleep_drop)
+        self.sleep_refill = float(sleep_refill)
+        self.resync_every = resync_every or _get_resync_ticks()
+        self.now = 0
+        self._heap: List[Tuple[float, int, str]] = []
+        self._due_at: Dict[str, float] = {}
+        self._seq = 0
+
+    def predict_ticks(self, sheet: Any, decay_enabled: bool) -> Optional[int]:
+        """Ticks from now until sheet first needs to think (None if never)."""
+        hunger = float(getattr(sheet, 'hunger', 100.0) or 0.0)
+        thirst = float(getattr(sheet, 'thirst', 100.0) or 0.0)
+        social = float(getattr(sheet, 'socialization', 100.0) or 0.0)
+        sleep = float(getattr(sheet, 'sleep', 100.0) or 0.0)
+        if min(hunger, thirst, social, sleep) < self.threshold:
+            return 0
+        if not decay_enabled:
+            return None
+        # While asleep the sleep meter refills; decay resumes on waking
+        asleep = int(getattr(sheet, 'sleeping_ticks_remaining', 0) or 0)
+        if asleep > 0:
+            sleep = min(100.0, sleep + asleep * self.sleep_refill)
+        sleep_ticks = _ticks_until_below(sleep, self.threshold, self.sleep_drop)
+        if sleep_ticks is not None:
+            sleep_ticks += max(0, asleep)
+        candidates = [
+            _ticks_until_below(hunger, self.threshold, self.need_drop),
+            _ticks_until_below(thirst, self.threshold, self.need_drop),
+            _ticks_until_below(social, self.threshold, self.social_drop),
+            sleep_ticks,
+        ]
+        known = [c for c in candidates if c is not None]
+        return min(known) if known else None
+
+    def schedule(self, npc_name: str, sheet: Any, decay_enabled: bool) -> None:
+        """(Re)schedule npc_name from its current needs."""
+        ticks = self.predict_ticks(sheet, decay_enabled)
+        self.schedule_at(npc_name, math.inf if ticks is None else self.now + ticks)
+
+    def pull_earlier(self, npc_name: str, sheet: Any, decay_enabled: bool) -> bool:
+        """Move npc_name's wake-up earlier if its needs now call for that; never later.
+
+        A raised need only pushes the real crossing out, and the old earlier
+        tick is still a valid lower bound: the NPC wakes, is re-checked and
+        rescheduled then. So raising needs costs no heap push. Unscheduled
+        NPCs are already due. Returns True when the schedule moved.
+        """
+        current = self._due_at.get(npc_name)
+        if current is None:
+            return False
+        ticks = self.predict_ticks(sheet, decay_enabled)
+        due = math.inf if ticks is None else self.now + ticks
+        if due >= current:
+            return False
+        self.schedule_at(npc_name, due)
+        return True
+
+    def schedule_at(self, npc_name: str, due: float) -> None:
+        """Schedule npc_name for an explicit tick (math.inf parks it until resync)."""
+        self._due_at[npc_name] = due
+        if due != math.inf:
+            self._seq += 1
+            heapq.heappush(self._heap, (due, self._seq, npc_name))
+
+    def is_scheduled(self, npc_name: str) -> bool:
+        return npc_name in self._due_at
+
+    def is_due(self, npc_name: str) -> bool:
+        """True when npc_name has no pending schedule (popped, new or resynced)."""
+        return npc_name not in self._due_at
+
+    def advance(self) -> None:
+        """Start a new tick: bump the clock, resync if it's time, pop due NPCs."""
+        self.now += 1
+        if self.now % self.resync_every == 0:
+            self._heap.clear()
+            self._due_at.clear()
+            return
+        self.pop_due()
+
+    def pop_due(self) -> List[str]:
+        """Unschedule and return every NPC whose wake-up tick has arrived."""
+        popped: List[str] = []
+        while self._heap and self._heap[0][0] <= self.now:
+            due, _seq, name = heapq.heappop(self._heap)
+            # Skip stale entries superseded by a later schedule() call
+            if self._due_at.get(name) != due:
+                continue
+            del self._due_at[name]
+            popped.append(name)
+        return popped
+
+    def forget(self, npc_name: str) -> None:
+        self._due_at.pop(npc_name, None)
+
+    def clear(self) -> None:
+        self.now = 0
+        self._heap.clear()
+        self._due_at.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'tick': self.now,
+            'scheduled': len(self._due_at),
+            'heap_size': len(self._heap),
+        }
@@ -17,11 +17,32 @@ from dataclasses import dataclass, field
 import json
 import os
 import uuid
-from typing import Dict, Set, Optional, List, Any, Tuple
+from typing import Callable, Dict, Set, Optional, List, Any, Tuple
 from safe_utils import safe_call, safe_call_with_default
+import rng_service
+import world_clock
 from mission_model import Mission
 from role_model import FactionRole
 from ambition_model import Ambition
+from room_index import RoomObjects, notify_object_changed
+from versioned import VersionedDict, VersionedSet, bump_names, versioned_dict, versioned_set
+
+
+# Told (sid, room_id) when a player is placed in a room, (sid, None) when they
+# leave the world; the server mirrors this onto Socket.IO rooms.
+_player_room_listener: Optional[Callable[[str, Optional[str]], None]] = None
+
+
+def set_player_room_listener(fn: Optional[Callable[[str, Optional[str]], None]]) -> None:
+    """Register the callback notified by World.add_player/move_player/remove_player."""
+    global _player_room_listener
+    _player_room_listener = fn
+
+
+def _notify_player_room(sid: str, room_id: Optional[str]) -> None:
+    fn = _player_room_listener
+    if fn is not None:
+        safe_call(fn, sid, room_id)
 
 
 @dataclass
@@ -70,7 +91,7 @@ class Object:
     # Faction ownership: optional faction_id that owns this object
     faction_id: Optional[str] = None
     # Stable id
-    uuid: str = field(default_factory=lambda: str(uuid.uuid4()))
+    uuid: str = field(default_factory=rng_service.new_id)
     # Container support (when 'Container' in object_tags): two small and two large slots
     container_small_slots: List[Optional["Object"]] = field(default_factory=lambda: [None, None])
     container_large_slots: List[Optional["Object"]] = field(default_factory=lambda: [None, None])
@@ -83,6 +104,11 @@ class Object:
     armor_defense: Optional[int] = None  # If armor, base defense
     armor_type: Optional[str] = None     # e.g., "light", "medium", "heavy"
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        object.__setattr__(self, name, value)
+        # Keep the containing room's resource index in step (tags, owner, value, nutrition)
+        notify_object_changed(self, name)
+
     def to_dict(self) -> dict:
         return {
             "uuid": self.uuid,
@@ -435,6 +461,12 @@ class CharacterSheet:
     ambition: Optional[Ambition] = None
     lifetime_stats: Dict[str, Any] = field(default_factory=dict)
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        object.__setattr__(self, name, value)
+        # Name indexes (fuzzy player lookup) rebuild when any display name changes
+        if name == 'display_name':
+            bump_names()
+
     def to_dict(self) -> dict:
         d = {
             "display_name": self.display_name,
@@ -672,12 +704,12 @@ class Room:
     id: str
     description: str
     players: Set[str] = field(default_factory=set)  # set of player sids
-    npcs: Set[str] = field(default_factory=set)     # set of npc names
+    npcs: Set[str] = field(default_factory=VersionedSet)     # set of npc names
     # Doors are named connectors within a room that lead to another room id.
     # NOTE: In code and persistence we use stable room ids (machine identifiers).
     # Players type human-readable room names (fuzzy matched) which we resolve to these ids.
     # key: door name shown to players (e.g., "oak door", "north door"). value: target room id
-    doors: Dict[str, str] = field(default_factory=dict)
+    doors: Dict[str, str] = field(default_factory=VersionedDict)
     # Stairs: support up/down links separately (either may be absent)
     stairs_up_to: Optional[str] = None
     stairs_down_to: Optional[str] = None
@@ -694,7 +726,8 @@ class Room:
     # Faction ownership: optional faction_id that owns this room
     faction_id: Optional[str] = None
     # Objects physically present in the room (includes doors/stairs as Objects)
-    objects: Dict[str, Object] = field(default_factory=dict)  # key: object uuid -> Object
+    # RoomObjects is a dict that also maintains the room's resource index (room_index.py)
+    objects: Dict[str, Object] = field(default_factory=RoomObjects)  # key: object uuid -> Object
     # Transient events list for crime detection/recent history (not currently persisted)
     events: List[Dict] = field(default_factory=list)
     # Room Tags (e.g. ['external', 'ownable'])
@@ -702,6 +735,15 @@ class Room:
     # Ownership (ID of owning user or faction)
     owner_id: Optional[str] = None
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name == 'objects' and isinstance(value, dict) and not isinstance(value, RoomObjects):
+            value = RoomObjects(value)
+        elif name == 'npcs':
+            value = versioned_set(value)
+        elif name in ('doors', 'door_locks'):
+            value = versioned_dict(value)
+        object.__setattr__(self, name, value)
+
     def add_event(self, event: Dict):
         """Add an event to the room's history, capping at 50 items."""
         self.events.append(event)
@@ -1365,6 +1407,15 @@ class World:
         # New worlds start at latest version; old worlds are migrated on load
         self.world_version: int = 0  # Will be set to latest during save/load  # Will be set to latest during save/load
 
+    # Name-keyed maps are VersionedDicts so cached lookup indexes (fuzzy resolver)
+    # know when to rebuild; plain dicts assigned later are converted.
+    _VERSIONED_MAPS = frozenset({'rooms', 'players', 'npc_sheets', 'object_templates'})
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in World._VERSIONED_MAPS:
+            value = versioned_dict(value)
+        object.__setattr__(self, name, value)
+
     def ensure_default_room(self) -> Optional[Room]:
         """No longer auto-creates a default room; setup wizard defines the first room."""
         return None
@@ -1396,6 +1447,7 @@ class World:
         room = self.rooms.get(room_id)
         if room:
             room.players.add(sid)
+        _notify_player_room(sid, room_id if room else None)
         # Postconditions
         assert sid in self.players, "player not registered"
         return player
@@ -1408,6 +1460,7 @@ class World:
         room = self.rooms.get(player.room_id)
         if room and sid in room.players:
             room.players.remove(sid)
+        _notify_player_room(sid, None)
 
     def move_player(self, sid: str, new_room_id: str) -> None:
         """Move a Player to another room if it exists.
@@ -1426,6 +1479,7 @@ class World:
         # Add to new room
         player.room_id = new_room_id
         self.rooms[new_room_id].players.add(sid)
+        _notify_player_room(sid, new_room_id)
 
     def describe_room_for(self, sid: str) -> str:
         """Return what the player identified by `sid` should see in their room."""
@@ -1693,7 +1747,7 @@ class World:
             self.npc_ids = {}
         
         if npc_name not in self.npc_ids:
-            new_id = str(uuid.uuid4())
+            new_id = rng_service.new_id()
             self.npc_ids[npc_name] = new_id
             
             # Maintain reverse index
@@ -1796,7 +1850,7 @@ class World:
         # Repair missing ID mappings
         for npc_name in all_npc_names:
             if npc_name not in self.npc_ids:
-                self.npc_ids[npc_name] = str(uuid.uuid4())
+                self.npc_ids[npc_name] = rng_service.new_id()
                 repairs += 1
                 messages.append(f"Created missing ID mapping for NPC '{npc_name}'")
         
@@ -1837,8 +1891,7 @@ class World:
                 raise ValueError(f"Faction name '{name}' already exists")
         
         # Create faction with unique ID
-        import uuid
-        faction_id = str(uuid.uuid4())
+        faction_id = rng_service.new_id()
         faction = Faction(
             faction_id=faction_id,
             name=name.strip(),
@@ -1846,8 +1899,7 @@ class World:
         )
         
         # Set creation timestamp
-        import time
-        faction.created_timestamp = time.time()
+        faction.created_timestamp = world_clock.now()
         
         # Set leader if provided
         if leader_player_id:
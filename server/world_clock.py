@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+"""World Clock — the wall-clock time written into world state.
+
+Memories, mission deadlines, faction creation and the daily cycle stamp the
+world with the current time. Read through now() instead of time.time() so a
+seeded simulation can run on a clock of its own: sim_runner starts a
+simulated clock at a time taken from the world file and advances it by one
+heartbeat interval per tick, so two runs of the same world and seed save the
+same timestamps. Outside a simulation now() is time.time().
+"""
+
+import time
+from typing import Optional
+
+
+class WorldClock:
+    """time.time(), or a simulated time while simulate() is in effect."""
+
+    def __init__(self):
+        self._sim: Optional[float] = None
+
+    @property
+    def simulated(self) -> bool:
+        return self._sim is not None
+
+    def now(self) -> float:
+        return self._sim if self._sim is not None else time.time()
+
+    def simulate(self, start: float) -> None:
+        """Freeze the clock at `start`; it moves only through advance()."""
+        self._sim = float(start)
+
+    def advance(self, seconds: float) -> None:
+        """Move a simulated clock forward (no-op on the real clock)."""
+        if self._sim is not None:
+            self._sim += seconds
+
+    def release(self) -> None:
+        """Back to the real clock."""
+        self._sim = None
+
+
+# Process-wide clock (one world per server process)
+_clock = WorldClock()
+
+
+def get_world_clock() -> WorldClock:
+    """Return the process-wide world clock."""
+    return _clock
+
+
+def now() -> float:
+    """Shortcut for get_world_clock().now()."""
+    return _clock.now()
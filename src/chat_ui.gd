@@ -152,6 +152,12 @@ func _on_disconnected():
 	_schedule_reconnect()
 
 func _on_event(event_name: String, data: Variant) -> void:
+	if event_name == "messages":
+		# One command's replies coalesced by the server: an ordered list of payloads
+		if typeof(data) == TYPE_ARRAY:
+			for item in data:
+				_on_event("message", item)
+		return
 	if event_name != "message":
 		return
 	# If we were waiting for a server acknowledgement, confirm once on first message back
@@ -164,6 +170,9 @@ func _on_event(event_name: String, data: Variant) -> void:
 		_pending_ack["acknowledged"] = true
 		# Clear immediately; timeout handler will no-op if it fires later
 		_pending_ack.clear()
+	_handle_payload(data)
+
+func _handle_payload(data: Variant) -> void:
 	if typeof(data) != TYPE_DICTIONARY:
 		append_to_log("[color=red]Malformed message from server.[/color]")
 		return
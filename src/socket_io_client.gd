@@ -5,6 +5,7 @@ extends Node
 # - Connects to a Socket.IO server URL (engine.io v4)
 # - Handles open/ping/pong and basic 'event' packets on the default namespace
 # - Emits events with JSON payloads
+# - Announces batch support on connect (server may send 'messages' events)
 #
 # What it doesn't do (by design to stay tiny):
 # - Namespaces other than '/'
@@ -66,8 +67,9 @@ func _handle_engineio_message(msg: String) -> void:
 			var data = JSON.parse_string(payload)
 			if typeof(data) == TYPE_DICTIONARY and data.has("sid"):
 				_sid = data["sid"]
-			# Now open Socket.IO default namespace by sending "40"
-			socket.send_text("40")
+			# Now open Socket.IO default namespace by sending "40" with an auth payload;
+			# "batch" tells the server we unpack coalesced 'messages' events
+			socket.send_text("40" + JSON.stringify({"batch": true}))
 			# Notify engine transport is open (emit once)
 			if not _engine_open:
 				_engine_open = true